@@ -0,0 +1,36 @@
+from typing import Optional
+
+import pytest
+from accounts.models import User
+from accounts.services.authentication.jwt_authentication import JWTAuthenticationService
+from accounts.services.users import UsersRetrieveServiceABC
+from core.dependencies.providers import provide_settings
+
+
+class InMemoryUsersRetrieveService(UsersRetrieveServiceABC):
+    """
+    Returns the user without a database, so only the token validation itself is measured.
+    """
+
+    def __init__(self, user: User):
+        self.user = user
+
+    async def get_one_user(self, *args, db_query=None, fields_to_load=None) -> Optional[User]:
+        return self.user
+
+    async def get_many_users(self, *args, db_query=None, fields_to_load=None) -> list[User]:
+        return [self.user]
+
+    async def count_users(self, *args, db_query=None) -> int:
+        return 1
+
+
+@pytest.fixture()
+def jwt_authentication_service() -> JWTAuthenticationService:
+    return JWTAuthenticationService(InMemoryUsersRetrieveService(User(id=1)), provide_settings())
+
+
+def test_validate_token(benchmark, event_loop, jwt_authentication_service):
+    settings = provide_settings()
+    token = event_loop.run_until_complete(jwt_authentication_service.create_token(1, settings.JWT_ACCESS_TOKEN_TYPE))
+    benchmark(lambda: event_loop.run_until_complete(jwt_authentication_service.validate_token(token)))
@@ -0,0 +1,10 @@
+from chat.api.filters.messages import MessagesFilterSet
+from chat.database.selectors.messages import get_messages_db_query_by_chat_room_id
+
+from benchmarks.conftest import create_request
+
+
+def test_messages_filterset_filter_db_query(benchmark):
+    request = create_request('/api/v1/chat/chat_rooms/1/messages', 'search=hello&page=2&page_size=50')
+    db_query = get_messages_db_query_by_chat_room_id(request, 1)
+    benchmark(lambda: MessagesFilterSet(request).filter_db_query(db_query))
@@ -0,0 +1,11 @@
+from core.pagination import DefaultPaginationClass
+
+from benchmarks.conftest import create_request
+
+
+def test_default_pagination_page_urls(benchmark):
+    paginator = DefaultPaginationClass(
+        create_request('/api/v1/chat/chat_rooms/1/messages', 'search=hello&page=3&page_size=50'),
+        db_objects_retriever_strategy=None,
+    )
+    benchmark(paginator.get_previous_and_next_page_urls, 3, 150, 1000)
@@ -0,0 +1,67 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from accounts.models import User
+from chat.database.rows import MessageRow
+from chat.models import Message, MessageFile
+
+
+def get_messages_rows() -> list[SimpleNamespace]:
+    created_at = datetime.now().isoformat()
+    return [
+        SimpleNamespace(
+            id=message_id,
+            is_edited=False,
+            text=f'message {message_id} ' * 10,
+            author_id=message_id % 5 + 1,
+            author_nickname=f'user_{message_id % 5 + 1}',
+            replayed_message_id=None,
+            scheduled_at=None,
+            photos=[
+                {
+                    'id': message_id * 10 + photo_number,
+                    'created_at': created_at,
+                    'modified_at': created_at,
+                    'file_path': f'messages/2022/10/19/{message_id}_{photo_number}.png',
+                }
+                for photo_number in range(2 if message_id % 3 == 0 else 0)
+            ],
+        )
+        for message_id in range(1, 51)
+    ]
+
+
+def build_messages_objects(rows: list[SimpleNamespace]) -> list[Message]:
+    """
+    Lower bound of the ORM hydration cost, the identity map and the loading of the relationships aren't included.
+    """
+    return [
+        Message(
+            id=row.id,
+            is_edited=row.is_edited,
+            text=row.text,
+            author=User(id=row.author_id, nickname=row.author_nickname),
+            replayed_message_id=row.replayed_message_id,
+            scheduled_at=row.scheduled_at,
+            photos=[
+                MessageFile(
+                    id=photo['id'],
+                    file_path=photo['file_path'],
+                    created_at=datetime.fromisoformat(photo['created_at']),
+                    modified_at=datetime.fromisoformat(photo['modified_at']),
+                )
+                for photo in row.photos
+            ],
+        )
+        for row in rows
+    ]
+
+
+def test_messages_orm_objects(benchmark):
+    rows = get_messages_rows()
+    benchmark(build_messages_objects, rows)
+
+
+def test_messages_rows(benchmark):
+    rows = get_messages_rows()
+    benchmark(lambda: [MessageRow.from_row(row) for row in rows])
@@ -0,0 +1,11 @@
+from chat.api.v1.schemas.messages import ListMessagesSchema
+from mixins.schemas import FilesSchema
+
+
+def test_list_messages_schema_from_orm(benchmark, messages):
+    benchmark(lambda: [ListMessagesSchema.from_orm(message).dict() for message in messages])
+
+
+def test_files_schema_from_orm(benchmark, messages):
+    photos = [photo for message in messages for photo in message.photos]
+    benchmark(lambda: [FilesSchema.from_orm(photo).dict() for photo in photos])
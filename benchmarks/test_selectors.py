@@ -0,0 +1,64 @@
+import pytest
+from accounts.database.selectors import users as users_selectors
+from accounts.models import User
+from chat.constants.messages import MessagesTypeEnum
+from chat.database.selectors import chat_rooms as chat_rooms_selectors
+from chat.database.selectors import messages as messages_selectors
+from chat.models import Message
+
+from benchmarks.conftest import create_request
+
+
+def build_messages_db_query(request, uncached: bool):
+    if uncached:
+        base_db_query = messages_selectors._get_messages_base_db_query.__wrapped__(True, True)
+        return base_db_query.where(Message.message_type == MessagesTypeEnum.PRIMARY.value, Message.chat_room_id == 1)
+    return messages_selectors.get_messages_db_query_by_chat_room_id(
+        request,
+        1,
+        Message.message_type == MessagesTypeEnum.PRIMARY.value,
+    )
+
+
+def build_messages_rows_db_query(request, uncached: bool):
+    if uncached:
+        base_db_query = messages_selectors._get_messages_rows_base_db_query.__wrapped__()
+        return base_db_query.where(Message.message_type == MessagesTypeEnum.PRIMARY.value, Message.chat_room_id == 1)
+    return messages_selectors.get_messages_rows_db_query_by_chat_room_id(
+        1,
+        Message.message_type == MessagesTypeEnum.PRIMARY.value,
+    )
+
+
+def build_chat_rooms_inbox_rows_db_query(request, uncached: bool):
+    if uncached:
+        base_db_query = chat_rooms_selectors._get_chat_rooms_inbox_rows_base_db_query.__wrapped__()
+        return base_db_query.where(chat_rooms_selectors.chatroom_members_association_table.c.user_id == 1)
+    return chat_rooms_selectors.get_chat_rooms_inbox_rows_db_query_by_user(1)
+
+
+def build_users_db_query(request, uncached: bool):
+    request_user = User(id=1)
+    if uncached:
+        base_db_query = users_selectors._get_users_base_db_query.__wrapped__()
+        return base_db_query.where(
+            users_selectors.or_(
+                User.id == request_user.id,
+                users_selectors.chatroom_members_association_table.c.user_id == request_user.id,
+            ),
+        )
+    return users_selectors.get_users_db_query(request_user)
+
+
+@pytest.mark.parametrize('uncached', (True, False), ids=('uncached', 'cached'))
+@pytest.mark.parametrize(
+    'build_db_query',
+    (build_messages_db_query, build_messages_rows_db_query, build_chat_rooms_inbox_rows_db_query, build_users_db_query),
+)
+def test_selector_statement_per_request_overhead(benchmark, build_db_query, uncached):
+    """
+    Python overhead of a statement per request: building it and generating its cache key,
+    as SQLAlchemy does on every execution to look the compiled statement up in the cache.
+    """
+    request = create_request('/api/v1/chat/chat_rooms/1/messages')
+    benchmark(lambda: build_db_query(request, uncached)._generate_cache_key())
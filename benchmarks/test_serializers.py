@@ -0,0 +1,26 @@
+from chat.api.v1.schemas.messages import PaginatedListMessagesSchema
+from core.serializers import serialize
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+
+def get_messages_page(messages) -> dict:
+    return {
+        'data': messages,
+        'count': 1000,
+        'total_pages': 20,
+        'current_page': 2,
+        'page_size': len(messages),
+        'next': 'http://testserver/api/v1/chat/chat_rooms/1/messages?page=3',
+        'previous': 'http://testserver/api/v1/chat/chat_rooms/1/messages?page=1',
+    }
+
+
+def test_paginated_messages_pydantic_response(benchmark, messages):
+    page = get_messages_page(messages)
+    benchmark(lambda: JSONResponse(jsonable_encoder(PaginatedListMessagesSchema.parse_obj(page))).body)
+
+
+def test_paginated_messages_compiled_serializer_response(benchmark, messages):
+    page = get_messages_page(messages)
+    benchmark(lambda: ORJSONResponse(serialize(PaginatedListMessagesSchema, page)).body)
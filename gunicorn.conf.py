@@ -1,9 +1,14 @@
 import multiprocessing
+import os
+import shutil
 
 from gunicorn import glogging
+from prometheus_client import multiprocess
 
 bind = '0.0.0.0:8000'
-worker_class = 'uvicorn.workers.UvicornWorker'
+# metrics of the workers are served by the master process on the internal port only
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+worker_class = 'core.workers.ApplicationUvicornWorker'
 workers = multiprocessing.cpu_count() * 2 + 1
 reload = True
 preload = True
@@ -13,3 +18,23 @@ accesslog = '-'
 logging_format = '%(asctime)s [%(levelname)s] %(message)s'
 glogging.Logger.access_fmt = logging_format
 glogging.Logger.error_fmt = logging_format
+
+# metrics of the previous runs must not be aggregated with the metrics of the new workers,
+# the directory is prepared before the application is preloaded
+if prometheus_multiproc_dir := os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from core.metrics import TasksQueuesLengthCollector, start_metrics_server
+        from core.tasks_scheduling.arq_settings import ARQ_REDIS_URL
+        from core.tasks_scheduling.constants import TASKS_SCHEDULING_QUEUE
+
+        start_metrics_server(METRICS_PORT, TasksQueuesLengthCollector(ARQ_REDIS_URL, (TASKS_SCHEDULING_QUEUE,)))
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
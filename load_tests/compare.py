@@ -0,0 +1,60 @@
+"""
+Compares two load testing reports and fails if any latency percentile or throughput regressed
+by more than the threshold:
+
+    python -m load_tests.compare baseline_report.json report.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+from typing import Optional
+
+COMPARED_LATENCIES = ('p50', 'p95', 'p99')
+
+
+def compare_reports(baseline_report: dict, report: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """
+    Returns lines of the comparison table and descriptions of the regressions.
+    """
+    lines, regressions = [], []
+    lines.append(f'{"operation":<20}{"metric":<12}{"baseline":>12}{"current":>12}{"change":>10}')
+    for name, summary in report['scenarios'].items():
+        if not (baseline_summary := baseline_report['scenarios'].get(name)):
+            continue
+        metrics = [
+            (f'{latency} ms', baseline_summary['latency_ms'][latency], summary['latency_ms'][latency], True)
+            for latency in COMPARED_LATENCIES
+        ]
+        metrics.append(('rps', baseline_summary['throughput_per_second'], summary['throughput_per_second'], False))
+        for metric, baseline_value, value, lower_is_better in metrics:
+            change = get_relative_change(baseline_value, value)
+            change_description = f'{change:+.1%}' if change is not None else '-'
+            lines.append(f'{name:<20}{metric:<12}{baseline_value or "-":>12}{value or "-":>12}{change_description:>10}')
+            if change is not None and (change > threshold if lower_is_better else change < -threshold):
+                regressions.append(f'{name} {metric}: {baseline_value} -> {value} ({change_description})')
+    return lines, regressions
+
+
+def get_relative_change(baseline_value: Optional[float], value: Optional[float]) -> Optional[float]:
+    if not baseline_value or value is None:
+        return None
+    return (value - baseline_value) / baseline_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares two load testing reports.')
+    parser.add_argument('baseline_report')
+    parser.add_argument('report')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed relative regression, 0.1 is 10%%')
+    arguments = parser.parse_args()
+    with open(arguments.baseline_report) as baseline_report_file, open(arguments.report) as report_file:
+        baseline_report, report = json.load(baseline_report_file), json.load(report_file)
+    lines, regressions = compare_reports(baseline_report, report, arguments.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print('\nRegressions:\n' + '\n'.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Seeds a synthetic dataset and runs load testing scenarios against a running bgram instance
+backed by a local Postgres and Redis, the results are written to a JSON report.
+
+Run from the repository root with the same environment (.env) as the tested instance, so the dataset
+is seeded into its database:
+
+    PYTHONPATH=project python -m load_tests.run --base-url http://127.0.0.1:8000 --output report.json
+
+Reports of different commits are compared with load_tests.compare.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+from dataclasses import fields
+from datetime import datetime
+
+import httpx
+
+from load_tests.scenarios import SCENARIOS, ScenarioContext, ScenarioOptions
+from load_tests.seed import SeedOptions, seed_dataset
+
+
+async def run_load_tests(
+    base_url: str,
+    scenarios: list[str],
+    seed_options: SeedOptions,
+    scenario_options: ScenarioOptions,
+) -> dict:
+    dataset = await seed_dataset(seed_options)
+    limits = httpx.Limits(max_connections=scenario_options.concurrency)
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'git_commit': get_git_commit(),
+        'python_version': platform.python_version(),
+        'base_url': base_url,
+        'dataset': dataset.to_dict(),
+        'scenario_options': {option.name: getattr(scenario_options, option.name) for option in fields(ScenarioOptions)},
+        'scenarios': {},
+    }
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        context = ScenarioContext(client, dataset, scenario_options)
+        for scenario in scenarios:
+            recorders = await SCENARIOS[scenario](context)
+            report['scenarios'].update({name: recorder.get_summary() for name, recorder in recorders.items()})
+    return report
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.check_output(('git', 'rev-parse', 'HEAD'), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def add_dataclass_arguments(parser: argparse.ArgumentParser, dataclass_type: type):
+    for option in fields(dataclass_type):
+        parser.add_argument(f'--{option.name.replace("_", "-")}', type=type(option.default), default=option.default)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Runs load testing scenarios against a running bgram instance.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--output', default='load_tests_report.json')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f'Comma separated of: {", ".join(SCENARIOS)}')
+    add_dataclass_arguments(parser.add_argument_group('dataset'), SeedOptions)
+    add_dataclass_arguments(parser.add_argument_group('scenarios'), ScenarioOptions)
+    arguments = parser.parse_args()
+    arguments.scenarios = arguments.scenarios.split(',')
+    if unknown_scenarios := set(arguments.scenarios) - set(SCENARIOS):
+        parser.error(f'Unknown scenarios: {", ".join(sorted(unknown_scenarios))}')
+    return arguments
+
+
+def main():
+    arguments = parse_arguments()
+    report = asyncio.run(
+        run_load_tests(
+            arguments.base_url,
+            arguments.scenarios,
+            SeedOptions(**{option.name: getattr(arguments, option.name) for option in fields(SeedOptions)}),
+            ScenarioOptions(**{option.name: getattr(arguments, option.name) for option in fields(ScenarioOptions)}),
+        ),
+    )
+    with open(arguments.output, 'w') as report_file:
+        json.dump(report, report_file, indent=4)
+    for name, summary in report['scenarios'].items():
+        print(f'{name}: {json.dumps(summary)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import websockets
+
+from load_tests.seed import Dataset
+from load_tests.stats import LatencyRecorder
+
+API_PREFIX = '/api/v1'
+
+
+@dataclass
+class ScenarioOptions:
+    concurrency: int = 50
+    requests_count: int = 1000
+    authenticated_users_count: int = 100
+    page_size: int = 50
+    history_pages_count: int = 10
+    fanout_connections_count: int = 10_000
+    fanout_messages_count: int = 10
+    fanout_messages_interval_seconds: float = 1
+    fanout_delivery_timeout_seconds: float = 30
+    random_seed: int = 42
+
+
+class ScenarioContext:
+    def __init__(self, client: httpx.AsyncClient, dataset: Dataset, options: ScenarioOptions):
+        self.client = client
+        self.dataset = dataset
+        self.options = options
+        self.randomizer = random.Random(options.random_seed)
+        self.authorization_headers: dict[int, dict] = {}
+        self.users_chat_room_ids: dict[int, list[int]] = {}
+        for chat_room_id, member_ids in dataset.chat_rooms_members.items():
+            for member_id in member_ids:
+                self.users_chat_room_ids.setdefault(member_id, []).append(chat_room_id)
+
+    async def authenticate_users(self):
+        """
+        Logs in the users used by the scenarios in advance, so the login time doesn't affect other scenarios.
+        """
+        if self.authorization_headers:
+            return
+        users = [user for user in self.dataset.users if user['id'] in self.users_chat_room_ids]
+        for user in users[: self.options.authenticated_users_count]:
+            response = await login(self.client, user)
+            response.raise_for_status()
+            self.authorization_headers[user['id']] = {'authorization': f'Bearer {response.json()["access_token"]}'}
+
+    def get_random_user_id(self) -> int:
+        return self.randomizer.choice(list(self.authorization_headers))
+
+    def get_random_user_chat_room_id(self, user_id: int) -> int:
+        return self.randomizer.choice(self.users_chat_room_ids[user_id])
+
+
+async def run_concurrently(
+    operation: Callable[[LatencyRecorder], Awaitable],
+    operations_count: int,
+    concurrency: int,
+) -> LatencyRecorder:
+    recorder = LatencyRecorder()
+    operations_left = operations_count
+
+    async def worker():
+        nonlocal operations_left
+        while operations_left > 0:
+            operations_left -= 1
+            await operation(recorder)
+
+    recorder.start()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.finish()
+    return recorder
+
+
+async def timed_request(recorder: LatencyRecorder, request: Awaitable[httpx.Response]) -> Optional[httpx.Response]:
+    request_start_time = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        recorder.record(time.perf_counter() - request_start_time, is_successful=False)
+        return None
+    recorder.record(time.perf_counter() - request_start_time, is_successful=response.is_success)
+    return response
+
+
+async def login(client: httpx.AsyncClient, user: dict) -> httpx.Response:
+    return await client.post(
+        f'{API_PREFIX}/accounts/login',
+        json={'email': user['email'], 'password': user['password']},
+    )
+
+
+async def login_storm(context: ScenarioContext) -> dict[str, LatencyRecorder]:
+    """
+    Many users logging in at once, mostly measures password hashing on the event loop.
+    """
+
+    async def operation(recorder: LatencyRecorder):
+        await timed_request(recorder, login(context.client, context.randomizer.choice(context.dataset.users)))
+
+    return {'login': await run_concurrently(operation, context.options.requests_count, context.options.concurrency)}
+
+
+async def inbox(context: ScenarioContext) -> dict[str, LatencyRecorder]:
+    """
+    Rendering of the chat rooms list with last messages and unread counters.
+    """
+    await context.authenticate_users()
+
+    async def operation(recorder: LatencyRecorder):
+        headers = context.authorization_headers[context.get_random_user_id()]
+        await timed_request(recorder, context.client.get(f'{API_PREFIX}/chat/chat_rooms', headers=headers))
+
+    return {'inbox': await run_concurrently(operation, context.options.requests_count, context.options.concurrency)}
+
+
+async def history_scroll(context: ScenarioContext) -> dict[str, LatencyRecorder]:
+    """
+    Scrolling the messages history of a chat room page by page, every page is a separate operation.
+    """
+    await context.authenticate_users()
+
+    async def operation(recorder: LatencyRecorder):
+        user_id = context.get_random_user_id()
+        chat_room_id = context.get_random_user_chat_room_id(user_id)
+        url = f'{API_PREFIX}/chat/chat_rooms/{chat_room_id}/messages?page_size={context.options.page_size}'
+        for _ in range(context.options.history_pages_count):
+            response = await timed_request(
+                recorder,
+                context.client.get(url, headers=context.authorization_headers[user_id]),
+            )
+            if not response or not response.is_success or not (next_page_url := response.json().get('next')):
+                return
+            # next page urls are built for the public host, so only the path is requested from the tested one
+            next_page_url = urlsplit(next_page_url)
+            url = f'{next_page_url.path}?{next_page_url.query}'
+
+    operations_count = max(context.options.requests_count // context.options.history_pages_count, 1)
+    return {'history_page': await run_concurrently(operation, operations_count, context.options.concurrency)}
+
+
+async def send_burst(context: ScenarioContext) -> dict[str, LatencyRecorder]:
+    """
+    Many users sending messages to their chat rooms at once.
+    """
+    await context.authenticate_users()
+
+    async def operation(recorder: LatencyRecorder):
+        user_id = context.get_random_user_id()
+        await timed_request(
+            recorder,
+            context.client.post(
+                f'{API_PREFIX}/chat/chat_rooms/{context.get_random_user_chat_room_id(user_id)}/messages',
+                data={'text': f'load test message {uuid.uuid4().hex}', 'message_type': 'primary'},
+                headers=context.authorization_headers[user_id],
+            ),
+        )
+
+    return {'send': await run_concurrently(operation, context.options.requests_count, context.options.concurrency)}
+
+
+async def broadcast_fanout(context: ScenarioContext) -> dict[str, LatencyRecorder]:
+    """
+    Opens fanout_connections_count websockets to the broadcast chat room, the admin sends messages there
+    and the time from sending of a message till its delivery to every connection is measured.
+    Connections are spread among the authenticated users, so a user can have several connections.
+    Messages rate of the broadcast chat rooms is limited, so fanout_messages_count must not exceed the limit.
+    """
+    await _authenticate_broadcast_chat_room_admin(context)
+    admin_id = context.dataset.users[0]['id']
+    user_ids = list(context.authorization_headers)
+    websocket_url = _get_websocket_url(
+        context.client,
+        f'{API_PREFIX}/chat/chat_rooms/{context.dataset.broadcast_chat_room_id}/chat',
+    )
+    marker = f'load_test_fanout_{uuid.uuid4().hex}'
+    marker_pattern = re.compile(rf'{marker}:(\d+)')
+    messages_sent_at: dict[int, float] = {}
+    connect_recorder, delivery_recorder = LatencyRecorder(), LatencyRecorder()
+    connections_semaphore = asyncio.Semaphore(context.options.concurrency)
+    connected_count = 0
+
+    async def receive(connection_index: int):
+        nonlocal connected_count
+        headers = context.authorization_headers[user_ids[connection_index % len(user_ids)]]
+        async with connections_semaphore:
+            connect_start_time = time.perf_counter()
+            try:
+                websocket = await websockets.connect(websocket_url, extra_headers=headers, max_queue=None)
+            except (OSError, websockets.WebSocketException):
+                connect_recorder.record(time.perf_counter() - connect_start_time, is_successful=False)
+                return
+            finally:
+                connected_count += 1
+            connect_recorder.record(time.perf_counter() - connect_start_time)
+        try:
+            delivered_messages_count = 0
+            while delivered_messages_count < context.options.fanout_messages_count:
+                raw_message = await websocket.recv()
+                if match := marker_pattern.search(raw_message):
+                    delivery_recorder.record(time.perf_counter() - messages_sent_at[int(match.group(1))])
+                    delivered_messages_count += 1
+        except websockets.WebSocketException:
+            pass
+        finally:
+            await websocket.close()
+
+    connect_recorder.start()
+    receivers = [asyncio.create_task(receive(index)) for index in range(context.options.fanout_connections_count)]
+    while connected_count < len(receivers):
+        await asyncio.sleep(0.1)
+    connect_recorder.finish()
+
+    delivery_recorder.start()
+    try:
+        async with websockets.connect(websocket_url, extra_headers=context.authorization_headers[admin_id]) as sender:
+            for message_index in range(context.options.fanout_messages_count):
+                messages_sent_at[message_index] = time.perf_counter()
+                await sender.send(json.dumps({'action': 'send', 'data': {'text': f'{marker}:{message_index}'}}))
+                await asyncio.sleep(context.options.fanout_messages_interval_seconds)
+        await asyncio.wait(receivers, timeout=context.options.fanout_delivery_timeout_seconds)
+    finally:
+        for receiver in receivers:
+            receiver.cancel()
+        await asyncio.gather(*receivers, return_exceptions=True)
+    delivery_recorder.finish()
+    expected_deliveries_count = len(connect_recorder.latencies) * context.options.fanout_messages_count
+    delivery_recorder.errors_count = expected_deliveries_count - len(delivery_recorder.latencies)
+    return {'fanout_connect': connect_recorder, 'fanout_delivery': delivery_recorder}
+
+
+async def _authenticate_broadcast_chat_room_admin(context: ScenarioContext):
+    await context.authenticate_users()
+    admin = context.dataset.users[0]
+    if admin['id'] not in context.authorization_headers:
+        response = await login(context.client, admin)
+        response.raise_for_status()
+        context.authorization_headers[admin['id']] = {'authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+def _get_websocket_url(client: httpx.AsyncClient, path: str) -> str:
+    return str(client.base_url.copy_with(scheme='wss' if client.base_url.scheme == 'https' else 'ws', raw_path=path))
+
+
+SCENARIOS: dict[str, Callable[[ScenarioContext], Awaitable[dict[str, LatencyRecorder]]]] = {
+    'login_storm': login_storm,
+    'inbox': inbox,
+    'history_scroll': history_scroll,
+    'send_burst': send_burst,
+    'broadcast_fanout': broadcast_fanout,
+}
@@ -0,0 +1,210 @@
+import os
+import random
+from dataclasses import asdict, dataclass, field
+
+from accounts.models import User
+from chat.constants.chat_rooms import ChatRoomMemberTypeEnum
+from chat.constants.messages import MessagesTypeEnum
+from chat.models import ChatRoom, Message, MessageFile, chatroom_members_association_table
+from core.database.base import provide_db_sessionmaker
+from core.dependencies.providers import provide_settings
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+LOAD_TEST_PREFIX = 'load_test'
+LOAD_TEST_PASSWORD = 'load_test_password'
+# the smallest valid png, so the seeded photos can be served by the media endpoint
+PHOTO_CONTENT = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082',
+)
+
+
+@dataclass
+class SeedOptions:
+    users_count: int = 1000
+    chat_rooms_count: int = 100
+    members_per_chat_room: int = 20
+    messages_count: int = 100_000
+    photos_per_message_ratio: float = 0.1
+    random_seed: int = 42
+
+
+@dataclass
+class Dataset:
+    options: SeedOptions
+    users: list[dict] = field(default_factory=list)
+    chat_rooms_members: dict[int, list[int]] = field(default_factory=dict)
+    broadcast_chat_room_id: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'options': asdict(self.options),
+            'users_count': len(self.users),
+            'chat_rooms_count': len(self.chat_rooms_members),
+            'broadcast_chat_room_id': self.broadcast_chat_room_id,
+        }
+
+
+async def seed_dataset(options: SeedOptions) -> Dataset:
+    """
+    Deterministically (for the same options) creates users, chat rooms, a broadcast chat room with all
+    the users as members and messages, part of which have photos. Data of the previous runs is removed first.
+    """
+    randomizer = random.Random(options.random_seed)
+    async with provide_db_sessionmaker()() as db_session:
+        await delete_dataset(db_session)
+        user_ids = await _create_users(db_session, options)
+        chat_rooms_members = await _create_chat_rooms(db_session, options, user_ids, randomizer)
+        broadcast_chat_room_id = await _create_broadcast_chat_room(db_session, user_ids)
+        await _create_messages(db_session, options, chat_rooms_members, randomizer)
+        await db_session.commit()
+    return Dataset(
+        options=options,
+        users=[
+            {'id': user_id, 'email': _get_user_email(index), 'password': LOAD_TEST_PASSWORD}
+            for index, user_id in enumerate(user_ids)
+        ],
+        chat_rooms_members=chat_rooms_members,
+        broadcast_chat_room_id=broadcast_chat_room_id,
+    )
+
+
+async def delete_dataset(db_session: AsyncSession):
+    chat_room_ids = select(ChatRoom.id).where(ChatRoom.name.startswith(LOAD_TEST_PREFIX)).scalar_subquery()
+    await db_session.execute(update(ChatRoom).where(ChatRoom.id.in_(chat_room_ids)).values(last_message_id=None))
+    await db_session.execute(delete(Message).where(Message.chat_room_id.in_(chat_room_ids)))
+    await db_session.execute(delete(ChatRoom).where(ChatRoom.name.startswith(LOAD_TEST_PREFIX)))
+    await db_session.execute(delete(User).where(User.email.startswith(LOAD_TEST_PREFIX)))
+    await db_session.commit()
+
+
+async def _create_users(db_session: AsyncSession, options: SeedOptions, batch_size: int = 5000) -> list[int]:
+    # hashing is slow by design, so all the users share the same password hash
+    password_hash = provide_settings().PWD_CONTEXT.hash(LOAD_TEST_PASSWORD)
+    user_ids = []
+    for batch_start in range(0, options.users_count, batch_size):
+        result = await db_session.execute(
+            insert(User)
+            .values(
+                [
+                    {
+                        'nickname': f'{LOAD_TEST_PREFIX}_user_{index}',
+                        'email': _get_user_email(index),
+                        'password': password_hash,
+                        'is_active': True,
+                    }
+                    for index in range(batch_start, min(batch_start + batch_size, options.users_count))
+                ],
+            )
+            .returning(User.id),
+        )
+        user_ids.extend(result.scalars())
+    return user_ids
+
+
+async def _create_chat_rooms(
+    db_session: AsyncSession,
+    options: SeedOptions,
+    user_ids: list[int],
+    randomizer: random.Random,
+) -> dict[int, list[int]]:
+    result = await db_session.execute(
+        insert(ChatRoom)
+        .values([{'name': f'{LOAD_TEST_PREFIX}_chat_room_{index}'} for index in range(options.chat_rooms_count)])
+        .returning(ChatRoom.id),
+    )
+    chat_rooms_members = {
+        chat_room_id: randomizer.sample(user_ids, min(options.members_per_chat_room, len(user_ids)))
+        for chat_room_id in result.scalars()
+    }
+    await db_session.execute(
+        insert(chatroom_members_association_table),
+        [
+            {
+                'room_id': chat_room_id,
+                'user_id': user_id,
+                'member_type': (
+                    ChatRoomMemberTypeEnum.ADMIN.value if index == 0 else ChatRoomMemberTypeEnum.MEMBER.value
+                ),
+            }
+            for chat_room_id, member_ids in chat_rooms_members.items()
+            for index, user_id in enumerate(member_ids)
+        ],
+    )
+    return chat_rooms_members
+
+
+async def _create_broadcast_chat_room(db_session: AsyncSession, user_ids: list[int]) -> int:
+    chat_room_id = await db_session.scalar(
+        insert(ChatRoom).values(name=f'{LOAD_TEST_PREFIX}_broadcast', is_broadcast=True).returning(ChatRoom.id),
+    )
+    await db_session.execute(
+        insert(chatroom_members_association_table),
+        [
+            {
+                'room_id': chat_room_id,
+                'user_id': user_id,
+                'member_type': (
+                    ChatRoomMemberTypeEnum.ADMIN.value if index == 0 else ChatRoomMemberTypeEnum.MEMBER.value
+                ),
+            }
+            for index, user_id in enumerate(user_ids)
+        ],
+    )
+    return chat_room_id
+
+
+async def _create_messages(
+    db_session: AsyncSession,
+    options: SeedOptions,
+    chat_rooms_members: dict[int, list[int]],
+    randomizer: random.Random,
+    batch_size: int = 5000,
+):
+    chat_room_ids = list(chat_rooms_members)
+    photos_folder = os.path.join(provide_settings().MEDIA_PATH, LOAD_TEST_PREFIX)
+    os.makedirs(photos_folder, exist_ok=True)
+    photos_count = 0
+    for batch_start in range(0, options.messages_count, batch_size):
+        messages_values = []
+        for _ in range(batch_start, min(batch_start + batch_size, options.messages_count)):
+            chat_room_id = randomizer.choice(chat_room_ids)
+            messages_values.append(
+                {
+                    'chat_room_id': chat_room_id,
+                    'author_id': randomizer.choice(chat_rooms_members[chat_room_id]),
+                    'text': ' '.join(randomizer.choices(_WORDS, k=randomizer.randint(1, 40))),
+                    'message_type': MessagesTypeEnum.PRIMARY.value,
+                },
+            )
+        result = await db_session.execute(insert(Message).values(messages_values).returning(Message.id))
+        photos_values = []
+        for message_id in result.scalars():
+            if randomizer.random() >= options.photos_per_message_ratio:
+                continue
+            file_path = os.path.join(LOAD_TEST_PREFIX, f'{photos_count}.png')
+            with open(os.path.join(photos_folder, f'{photos_count}.png'), 'wb') as photo:
+                photo.write(PHOTO_CONTENT)
+            photos_values.append({'message_id': message_id, 'file_path': file_path})
+            photos_count += 1
+        if photos_values:
+            await db_session.execute(insert(MessageFile), photos_values)
+    last_message_ids = (
+        select(func.max(Message.id))
+        .where(Message.chat_room_id == ChatRoom.id, Message.message_type == MessagesTypeEnum.PRIMARY.value)
+        .scalar_subquery()
+    )
+    await db_session.execute(
+        update(ChatRoom).where(ChatRoom.id.in_(chat_room_ids)).values(last_message_id=last_message_ids),
+    )
+
+
+def _get_user_email(index: int) -> str:
+    return f'{LOAD_TEST_PREFIX}_user_{index}@bgram.test'
+
+
+_WORDS = (
+    'hello', 'world', 'meeting', 'tomorrow', 'lunch', 'deploy', 'release', 'review', 'photo', 'thanks',
+    'ok', 'sure', 'later', 'call', 'me', 'when', 'you', 'are', 'free', 'the', 'build', 'is', 'green', 'again',
+)  # fmt: skip
@@ -0,0 +1,55 @@
+import math
+import time
+from typing import Optional
+
+
+class LatencyRecorder:
+    """
+    Collects latencies of the operations of a single scenario and summarizes them into percentiles and throughput.
+    """
+
+    percentiles = (50, 90, 95, 99)
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors_count = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def record(self, latency: float, is_successful: bool = True):
+        if is_successful:
+            self.latencies.append(latency)
+        else:
+            self.errors_count += 1
+
+    def get_summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        duration = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        operations_count = len(latencies) + self.errors_count
+        return {
+            'operations_count': operations_count,
+            'errors_count': self.errors_count,
+            'duration_seconds': round(duration, 3),
+            'throughput_per_second': round(len(latencies) / duration, 2) if duration > 0 else 0,
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                **{f'p{percentile}': self.get_percentile(latencies, percentile) for percentile in self.percentiles},
+                'max': round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+        }
+
+    @staticmethod
+    def get_percentile(sorted_latencies: list[float], percentile: int) -> Optional[float]:
+        """
+        Nearest-rank percentile in milliseconds.
+        """
+        if not sorted_latencies:
+            return None
+        rank = max(math.ceil(percentile / 100 * len(sorted_latencies)), 1)
+        return round(sorted_latencies[rank - 1] * 1000, 2)
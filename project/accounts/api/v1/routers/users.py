@@ -5,18 +5,40 @@ from accounts.api.v1.schemas.users import PaginatedUsersListSchema
 from accounts.database.selectors.users import get_user_update_returning_options, get_users_db_query
 from accounts.models import User
 from accounts.services.users import UserFilesServiceABC, UsersCreateUpdateServiceABC, UsersRetrieveServiceABC
-from fastapi import APIRouter, Depends, File, UploadFile
+from core.conditional_requests import (
+    get_not_modified_response,
+    get_tables_versions_etag,
+    is_not_modified,
+    set_conditional_headers,
+)
+from core.database.versions import TablesVersionsABC, get_table_scope
+from core.serializers import serialize
+from fastapi import APIRouter, Depends, File, Request, UploadFile
+from fastapi.responses import ORJSONResponse
 
 router = APIRouter()
 
 
-@router.get('/users', response_model=PaginatedUsersListSchema)
+def get_users_tables(request_user: User) -> tuple[str, ...]:
+    # only the request user is selected by the users query
+    return (get_table_scope(User.__tablename__, request_user.id),)
+
+
+@router.get('/users', response_model=PaginatedUsersListSchema, response_class=ORJSONResponse)
 async def list_users_view(
+    request: Request,
     request_user: User = Depends(),
     users_filterset: UserFilterSetABC = Depends(),
     users_paginator: UsersPaginatorABC = Depends(),
+    tables_versions: TablesVersionsABC = Depends(),
 ):
-    return await users_paginator.paginate(users_filterset.filter_db_query(db_query=get_users_db_query(request_user)))
+    etag = await get_tables_versions_etag(request, tables_versions, get_users_tables(request_user), (request_user.id,))
+    if is_not_modified(request, etag):
+        return get_not_modified_response(etag)
+    paginated_users = await users_paginator.paginate(
+        users_filterset.filter_db_query(db_query=get_users_db_query(request_user)),
+    )
+    return set_conditional_headers(ORJSONResponse(serialize(PaginatedUsersListSchema, paginated_users)), etag)
 
 
 @router.get('/users/{user_id}', response_model=user_schemas.UsersListSchema)
@@ -1,7 +1,9 @@
 from abc import ABC
 
 from accounts.models import User, UserFile
+from core.database.caching import CachedSQLAlchemyDatabaseRepository
 from core.database.repository import BaseDatabaseRepository, SQLAlchemyDatabaseRepository
+from redis import asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -14,6 +16,11 @@ class UsersDatabaseRepository(SQLAlchemyDatabaseRepository, UsersDatabaseReposit
         super().__init__(model=User, db_session=db_session)
 
 
+class CachedUsersDatabaseRepository(CachedSQLAlchemyDatabaseRepository, UsersDatabaseRepositoryABC):
+    def __init__(self, db_session: AsyncSession, redis_client: aioredis.Redis, **cache_options):
+        super().__init__(model=User, db_session=db_session, redis_client=redis_client, **cache_options)
+
+
 class UserFilesDatabaseRepositoryABC(BaseDatabaseRepository, ABC):
     pass
 
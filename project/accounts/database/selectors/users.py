@@ -8,6 +8,13 @@ from sqlalchemy.sql import Select
 
 
 def get_users_db_query(request_user: User) -> Select:
+    return _get_users_base_db_query().where(
+        or_(User.id == request_user.id, chatroom_members_association_table.c.user_id == request_user.id),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_users_base_db_query() -> Select:
     return (
         select(
             User,
@@ -21,7 +28,6 @@ def get_users_db_query(request_user: User) -> Select:
             joinedload(User.photos),
         )
         .where(
-            or_(User.id == request_user.id, chatroom_members_association_table.c.user_id == request_user.id),
             User.is_active == true(),
         )
     )
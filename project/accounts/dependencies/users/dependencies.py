@@ -18,6 +18,7 @@ from accounts.services.users import (
 from core.config import SettingsABC
 from core.filters import FilterSet
 from core.pagination import DefaultPaginationClass
+from core.tasks_scheduling.dependencies import TasksSchedulerABC
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -37,8 +38,11 @@ class UsersDependenciesOverrides:
         }
 
     @staticmethod
-    async def get_users_db_repository(db_session: AsyncSession = Depends()) -> UsersDatabaseRepositoryABC:
-        return provide_users_db_repository(db_session)
+    async def get_users_db_repository(
+        db_session: AsyncSession = Depends(),
+        settings: SettingsABC = Depends(),
+    ) -> UsersDatabaseRepositoryABC:
+        return provide_users_db_repository(db_session, settings)
 
     @staticmethod
     async def get_user_files_db_repository(db_session: AsyncSession = Depends()) -> UserFilesDatabaseRepositoryABC:
@@ -62,8 +66,11 @@ class UsersDependenciesOverrides:
         return provide_users_delete_service(db_repository)
 
     @staticmethod
-    async def get_user_files_service(db_repository: UserFilesDatabaseRepositoryABC = Depends()) -> UserFilesServiceABC:
-        return provide_user_files_service(db_repository)
+    async def get_user_files_service(
+        db_repository: UserFilesDatabaseRepositoryABC = Depends(),
+        tasks_scheduler: TasksSchedulerABC = Depends(),
+    ) -> UserFilesServiceABC:
+        return provide_user_files_service(db_repository, tasks_scheduler)
 
     @staticmethod
     async def get_users_filterset(request: Request) -> FilterSet:
@@ -1,4 +1,7 @@
+from typing import Optional
+
 from accounts.database.repository.users import (
+    CachedUsersDatabaseRepository,
     UserFilesDatabaseRepository,
     UserFilesDatabaseRepositoryABC,
     UsersDatabaseRepository,
@@ -15,10 +18,22 @@ from accounts.services.users import (
     UsersRetrieveServiceABC,
 )
 from core.config import SettingsABC
+from core.contrib.redis import RedisClientProvider
+from core.tasks_scheduling.dependencies import TasksSchedulerABC
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-def provide_users_db_repository(db_session: AsyncSession) -> UsersDatabaseRepositoryABC:
+def provide_users_db_repository(
+    db_session: AsyncSession,
+    settings: Optional[SettingsABC] = None,
+) -> UsersDatabaseRepositoryABC:
+    if settings and settings.DATABASE_CACHE_ENABLED:
+        return CachedUsersDatabaseRepository(
+            db_session,
+            RedisClientProvider.provide_redis_client(),
+            cache_ttl_seconds=settings.DATABASE_CACHE_TTL_SECONDS['users'],
+            lock_timeout_seconds=settings.DATABASE_CACHE_LOCK_TIMEOUT_SECONDS,
+        )
     return UsersDatabaseRepository(db_session)
 
 
@@ -41,5 +56,8 @@ def provide_users_delete_service(db_repository: UsersDatabaseRepositoryABC) -> U
     return UsersDeleteService(db_repository)
 
 
-def provide_user_files_service(db_repository: UserFilesDatabaseRepositoryABC) -> UserFilesServiceABC:
-    return UserFilesService(db_repository)
+def provide_user_files_service(
+    db_repository: UserFilesDatabaseRepositoryABC,
+    tasks_scheduler: Optional[TasksSchedulerABC] = None,
+) -> UserFilesServiceABC:
+    return UserFilesService(db_repository, tasks_scheduler=tasks_scheduler)
@@ -1,7 +1,7 @@
 from chat.models import chatroom_members_association_table
 from core.dependencies.providers import provide_settings
 from mixins.models import DateTimeABC, DescriptionABC, FileABC, IsActiveABC
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, false
 from sqlalchemy.orm import relationship
 
 __all__ = ['User', 'UserFile']
@@ -9,11 +9,20 @@ __all__ = ['User', 'UserFile']
 
 class User(DateTimeABC, DescriptionABC, IsActiveABC):
     __tablename__ = 'users'
+    # the data of every user is versioned on its own, see core.database.versions.get_object_tables_scopes
+    versions_scopes = (('users', 'id'),)
 
     id = Column(Integer, primary_key=True)
     nickname = Column(String, unique=True)
     email = Column(String, unique=True)
     password = Column(String)
+    is_staff = Column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+        doc='Staff users can see the service information, e.g. the stats of the websocket connections',
+    )
 
     email_confirmation_tokens = relationship('EmailConfirmationToken', back_populates='user')
     photos = relationship('UserFile', back_populates='user')
@@ -30,11 +39,8 @@ class User(DateTimeABC, DescriptionABC, IsActiveABC):
 
 class UserFile(FileABC):
     __tablename__ = 'users_photos'
+    versions_scopes = (('users', 'user_id'),)
 
     user_id = Column(Integer, ForeignKey('users.id'), index=True)
 
     user = relationship('User', back_populates='photos', cascade='all, delete')
-
-    @property
-    def folder_to_save(self) -> str:
-        return f'users/{super().folder_to_save}'
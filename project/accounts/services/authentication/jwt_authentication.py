@@ -114,7 +114,9 @@ class JWTAuthenticationService(JWTAuthenticationServiceABC):
 
     async def _get_user(self, user_id: int) -> User:
         user = await self.users_retrieve_service.get_one_user(
-            db_query=select(User).options(load_only(User.id)).where(User.id == user_id, User.is_active == true()),
+            db_query=select(User)
+            .options(load_only(User.id, User.is_staff))
+            .where(User.id == user_id, User.is_active == true()),
         )
         if user:
             return user
@@ -2,9 +2,10 @@ import abc
 from typing import Optional
 
 from accounts.database.repository.users import UsersDatabaseRepositoryABC
-from accounts.models import User
+from accounts.models import User, UserFile
 from accounts.services.exceptions.users import UserCreationException
 from core.config import SettingsABC
+from core.database.versions import get_table_scope
 from core.services.files import FilesService, FilesServiceABC
 from sqlalchemy.sql import Select
 
@@ -90,6 +91,7 @@ class UsersCreateUpdateService(UsersCreateUpdateServiceABC):
         password = data_for_update.pop('password', None)
         if password:
             data_for_update['password'] = self._hash_password(password)
+        self.db_repository.mark_tables_scopes_changed(get_table_scope(User.__tablename__, user_id))
         user = await self.db_repository.update(
             User.id == user_id,
             **data_for_update,
@@ -123,4 +125,4 @@ class UserFilesServiceABC(FilesServiceABC, abc.ABC):
 
 
 class UserFilesService(FilesService, UserFilesServiceABC):
-    file_model = User
+    file_model = UserFile
@@ -0,0 +1,73 @@
+"""empty message
+
+Revision ID: b4d1e8f27c93
+Revises: 5c2e7b91d3a0
+Create Date: 2022-10-08 12:41:19.305118
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b4d1e8f27c93'
+down_revision = '5c2e7b91d3a0'
+branch_labels = None
+depends_on = None
+
+FILES_TABLES_UNIQUE_CONSTRAINTS = {
+    'message_photos': 'message_photos_file_path_key',
+    'chat_rooms_photos': 'chat_rooms_photos_file_path_key',
+    'users_photos': 'uq_file_path',
+}
+
+
+def upgrade():
+    op.create_table(
+        'file_blobs',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('modified_at', sa.DateTime(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('references_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash'),
+        sa.UniqueConstraint('file_path'),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION update_file_blobs_references_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.blob_hash IS NOT NULL THEN
+                UPDATE file_blobs SET references_count = references_count - 1 WHERE content_hash = OLD.blob_hash;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.blob_hash IS NOT NULL THEN
+                UPDATE file_blobs SET references_count = references_count + 1 WHERE content_hash = NEW.blob_hash;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    for table, unique_constraint in FILES_TABLES_UNIQUE_CONSTRAINTS.items():
+        op.add_column(table, sa.Column('blob_hash', sa.String(length=64), nullable=True))
+        op.create_index(op.f(f'ix_{table}_blob_hash'), table, ['blob_hash'], unique=False)
+        op.create_foreign_key(f'{table}_blob_hash_fkey', table, 'file_blobs', ['blob_hash'], ['content_hash'])
+        op.drop_constraint(unique_constraint, table, type_='unique')
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_file_blobs_references_count
+            AFTER INSERT OR DELETE OR UPDATE OF blob_hash ON {table}
+            FOR EACH ROW EXECUTE FUNCTION update_file_blobs_references_count()
+            """,
+        )
+
+
+def downgrade():
+    for table, unique_constraint in FILES_TABLES_UNIQUE_CONSTRAINTS.items():
+        op.execute(f'DROP TRIGGER {table}_file_blobs_references_count ON {table}')
+        op.create_unique_constraint(unique_constraint, table, ['file_path'])
+        op.drop_constraint(f'{table}_blob_hash_fkey', table, type_='foreignkey')
+        op.drop_index(op.f(f'ix_{table}_blob_hash'), table_name=table)
+        op.drop_column(table, 'blob_hash')
+    op.execute('DROP FUNCTION update_file_blobs_references_count()')
+    op.drop_table('file_blobs')
@@ -0,0 +1,33 @@
+"""empty message
+
+Revision ID: c61f0a9e4d25
+Revises: 7d41c2e9a6b8
+Create Date: 2022-10-14 10:17:52.630418
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c61f0a9e4d25'
+down_revision = '7d41c2e9a6b8'
+branch_labels = None
+depends_on = None
+
+# chat rooms created before the admins were introduced get the earliest registered member as the admin
+CHAT_ROOMS_ADMINS_BACKFILL_QUERY = """
+UPDATE chatroom_members_association
+SET member_type = 'admin'
+WHERE (room_id, user_id) IN (
+    SELECT room_id, min(user_id) FROM chatroom_members_association
+    GROUP BY room_id
+    HAVING bool_and(member_type != 'admin')
+)
+"""
+
+
+def upgrade():
+    op.execute(CHAT_ROOMS_ADMINS_BACKFILL_QUERY)
+
+
+def downgrade():
+    pass
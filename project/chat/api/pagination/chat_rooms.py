@@ -1,8 +1,12 @@
 import abc
+from typing import Tuple, Union
 
 from accounts.models import User
+from chat.database.rows import ChatRoomInboxRow
+from chat.models import ChatRoom
 from chat.services.chat_rooms import ChatRoomsRetrieveServiceABC
-from core.pagination import PaginationClassABC, PaginationDatabaseObjectsRetrieverStrategyABC
+from core.pagination import CursorPaginationClass, PaginationClassABC, PaginationDatabaseObjectsRetrieverStrategyABC
+from sqlalchemy import func
 from sqlalchemy.sql import Select
 
 
@@ -10,6 +14,17 @@ class ChatRoomsPaginatorABC(PaginationClassABC, abc.ABC):
     pass
 
 
+class ChatRoomsCursorPaginationClass(CursorPaginationClass, ChatRoomsPaginatorABC):
+    """
+    Paginates chat rooms by the last activity, the most recently active chat rooms go first.
+    """
+
+    ordering = (func.coalesce(ChatRoom.last_message_id, 0), ChatRoom.id)
+
+    def get_cursor_values(self, db_object: Union[ChatRoom, ChatRoomInboxRow]) -> Tuple[int, int]:
+        return db_object.last_message_id or 0, db_object.id
+
+
 class ChatRoomsPaginationDatabaseObjectsRetrieverStrategy(PaginationDatabaseObjectsRetrieverStrategyABC):
     def __init__(self, chat_rooms_service: ChatRoomsRetrieveServiceABC):
         self.chat_rooms_service = chat_rooms_service
@@ -19,3 +34,12 @@ class ChatRoomsPaginationDatabaseObjectsRetrieverStrategy(PaginationDatabaseObje
 
     async def count(self, db_query: Select) -> int:
         return await self.chat_rooms_service.count_chat_rooms(db_query=db_query)
+
+
+class ChatRoomsInboxRowsPaginationDatabaseObjectsRetrieverStrategy(ChatRoomsPaginationDatabaseObjectsRetrieverStrategy):
+    """
+    Retrieves the read only rows of the projected inbox columns instead of the chat rooms objects.
+    """
+
+    async def get_many(self, db_query: Select) -> list[ChatRoomInboxRow]:
+        return await self.chat_rooms_service.get_many_chat_rooms_inbox_rows(db_query=db_query)
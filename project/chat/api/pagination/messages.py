@@ -1,6 +1,7 @@
 import abc
 
 from accounts.models import User
+from chat.database.rows import MessageRow
 from chat.services.messages import MessagesRetrieveServiceABC
 from core.pagination import PaginationClassABC, PaginationDatabaseObjectsRetrieverStrategyABC
 from sqlalchemy.sql import Select
@@ -19,3 +20,12 @@ class MessagesPaginationDatabaseObjectsRetrieverStrategy(PaginationDatabaseObjec
 
     async def count(self, db_query: Select) -> int:
         return await self.messages_service.count_messages(db_query=db_query)
+
+
+class MessagesRowsPaginationDatabaseObjectsRetrieverStrategy(MessagesPaginationDatabaseObjectsRetrieverStrategy):
+    """
+    Retrieves the read only rows of the projected messages columns instead of the messages objects.
+    """
+
+    async def get_many(self, db_query: Select) -> list[MessageRow]:
+        return await self.messages_service.get_many_messages_rows(db_query=db_query)
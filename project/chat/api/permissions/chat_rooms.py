@@ -1,5 +1,12 @@
+from typing import Iterable, Optional
+
 from accounts.models import User
+from chat.constants.chat_rooms import ChatRoomMemberTypeEnum
+from chat.models import chatroom_members_association_table
+from core import permissions as mixins_permissions
+from core.database.repository import BaseDatabaseRepository
 from core.permissions import UserIsAuthenticatedPermission
+from sqlalchemy import select
 
 
 class ChatRoomPermission:
@@ -8,3 +15,50 @@ class ChatRoomPermission:
 
     async def check_permissions(self):
         await UserIsAuthenticatedPermission(self.request_user).check_permissions()
+
+
+class ChatRoomMembersPermissions(mixins_permissions.BasePermission):
+    """
+    Permissions service class for changing members of chat rooms, only admins can remove other members.
+    Chat rooms left without admins are managed by all of their members, so they can't get stuck.
+    """
+
+    def __init__(self, request_user: User, chat_room_id: int, db_repository: BaseDatabaseRepository):
+        self.request_user = request_user
+        self.chat_room_id = chat_room_id
+        self.db_repository = db_repository
+
+    async def check_permissions(self):
+        await UserIsAuthenticatedPermission(self.request_user).check_permissions()
+        member_type = await self._get_member_type()
+        if not member_type or not await self._has_admin_rights(member_type):
+            raise self.permission_denied_exception
+
+    async def check_user_can_remove_members(self, members_ids: Iterable[int]):
+        """
+        Any member can leave the chat room, but only admins can remove the other members.
+        """
+        await UserIsAuthenticatedPermission(self.request_user).check_permissions()
+        member_type = await self._get_member_type()
+        if not member_type:
+            raise self.permission_denied_exception
+        if set(members_ids) - {self.request_user.id} and not await self._has_admin_rights(member_type):
+            raise self.permission_denied_exception
+
+    async def _has_admin_rights(self, member_type: str) -> bool:
+        if member_type == ChatRoomMemberTypeEnum.ADMIN.value:
+            return True
+        chat_room_admins_query = select(chatroom_members_association_table.c.user_id).where(
+            chatroom_members_association_table.c.room_id == self.chat_room_id,
+            chatroom_members_association_table.c.member_type == ChatRoomMemberTypeEnum.ADMIN.value,
+        )
+        return not await self.db_repository.exists(db_query=chat_room_admins_query)
+
+    async def _get_member_type(self) -> Optional[str]:
+        result = await self.db_repository.execute(
+            select(chatroom_members_association_table.c.member_type).where(
+                chatroom_members_association_table.c.user_id == self.request_user.id,
+                chatroom_members_association_table.c.room_id == self.chat_room_id,
+            ),
+        )
+        return result.scalar()
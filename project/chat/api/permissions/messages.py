@@ -1,7 +1,9 @@
 from typing import Optional, Union
 
 from accounts.models import User
-from chat.models import Message, MessageFile, chatroom_members_association_table
+from chat.constants.chat_rooms import ChatRoomMemberTypeEnum
+from chat.models import ChatRoom, Message, MessageFile, chatroom_members_association_table
+from chat.services.rate_limiting import ChatRoomsMessagesRateLimiterABC
 from core import permissions as mixins_permissions
 from core.database.repository import BaseDatabaseRepository
 from core.permissions import UserIsAuthenticatedPermission
@@ -21,17 +23,22 @@ class UserChatRoomMessagingPermissions(mixins_permissions.BasePermission):
         db_repository: BaseDatabaseRepository,
         request: Optional[Request] = None,
         message_ids: Optional[Union[tuple[int], list[int]]] = None,
+        rate_limiter: Optional[ChatRoomsMessagesRateLimiterABC] = None,
     ):
         self.request_user = request_user
         self.chat_room_id = chat_room_id
         self.db_repository = db_repository
         self.request = request
         self.message_ids = message_ids
+        self.rate_limiter = rate_limiter
 
     async def check_permissions(self):
         await UserIsAuthenticatedPermission(self.request_user).check_permissions()
-        await self.check_user_is_member_of_chat_room()
         request_method = getattr(self.request, 'method', None)
+        if request_method == 'POST':
+            await self.check_user_can_send_messages()
+            return
+        await self.check_user_is_member_of_chat_room()
         if request_method in {'PUT', 'PATCH', 'DELETE'}:
             await self.check_message_author()
 
@@ -43,6 +50,29 @@ class UserChatRoomMessagingPermissions(mixins_permissions.BasePermission):
         if not await self.db_repository.exists(db_query=is_user_member_of_chat_room_query):
             raise self.permission_denied_exception
 
+    async def check_user_can_send_messages(self):
+        """
+        Only admins can send messages to broadcast chat rooms and the messages rate there is limited.
+        """
+        chat_room_membership_query = (
+            select(chatroom_members_association_table.c.member_type, ChatRoom.is_broadcast)
+            .join(ChatRoom, ChatRoom.id == chatroom_members_association_table.c.room_id)
+            .where(
+                chatroom_members_association_table.c.user_id == self.request_user.id,
+                chatroom_members_association_table.c.room_id == self.chat_room_id,
+            )
+        )
+        result = await self.db_repository.execute(chat_room_membership_query)
+        chat_room_membership = result.first()
+        if not chat_room_membership:
+            raise self.permission_denied_exception
+        if not chat_room_membership.is_broadcast:
+            return
+        if chat_room_membership.member_type != ChatRoomMemberTypeEnum.ADMIN.value:
+            raise self.permission_denied_exception
+        if self.rate_limiter:
+            await self.rate_limiter.hit(self.chat_room_id)
+
     async def check_message_author(self):
         if not self.message_ids:
             raise self.permission_denied_exception
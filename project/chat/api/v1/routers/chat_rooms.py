@@ -1,39 +1,152 @@
+from typing import Iterable
+
 from accounts.models import User
 from chat.api.pagination.chat_rooms import ChatRoomsPaginatorABC
-from chat.api.permissions.chat_rooms import ChatRoomPermission
+from chat.api.permissions.chat_rooms import ChatRoomMembersPermissions, ChatRoomPermission
+from chat.api.permissions.messages import UserChatRoomMessagingPermissions
 from chat.api.v1.schemas.chat_rooms import (
     ChatRoomCreateSchema,
     ChatRoomDetailSchema,
+    ChatRoomMembersSchema,
+    ChatRoomPresenceSchema,
+    ChatRoomReadCursorSchema,
+    ChatRoomReadCursorUpdateSchema,
     ChatRoomUpdateSchema,
-    PaginatedChatRoomsListSchema,
+    PaginatedChatRoomsInboxSchema,
 )
+from chat.database.repository.chat_rooms import ChatRoomsDatabaseRepositoryABC
 from chat.database.selectors.chat_rooms import (
     get_chat_room_creation_relations_to_load,
+    get_chat_room_db_query_by_user,
+    get_chat_rooms_inbox_rows_db_query_by_user,
     get_many_chat_rooms_db_query_by_user,
 )
 from chat.models import ChatRoom
 from chat.services.chat_rooms import ChatRoomsCreateUpdateServiceABC, ChatRoomsRetrieveServiceABC
-from fastapi import APIRouter, Depends
+from chat.services.presence import PresenceServiceABC
+from chat.services.read_cursors import (
+    ChatRoomsReadCursorsServiceABC,
+    RedisUnreadMessagesCountersService,
+    UnreadMessagesCountersServiceABC,
+)
+from core.conditional_requests import (
+    get_not_modified_response,
+    get_tables_versions_etag,
+    is_not_modified,
+    set_conditional_headers,
+)
+from core.database.versions import TablesVersionsABC, get_table_scope
+from core.serializers import serialize
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 
 router = APIRouter()
 
 
-@router.get('/chat_rooms', response_model=PaginatedChatRoomsListSchema)
-async def list_chat_rooms_view(request_user: User = Depends(), paginator: ChatRoomsPaginatorABC = Depends()):
+def get_chat_room_tables(chat_room_id: int) -> tuple[str, ...]:
+    return (get_table_scope(ChatRoom.__tablename__, chat_room_id),)
+
+
+def get_chat_rooms_inbox_tables(user_id: int, chat_room_ids: Iterable[int]) -> tuple[str, ...]:
+    """
+    The inbox changes only with the user's chat rooms, their last messages and unread messages counters,
+    except for the nicknames of the last messages authors, which are versioned with the whole users table.
+    """
+    return (
+        User.__tablename__,
+        RedisUnreadMessagesCountersService.get_user_versions_table(user_id),
+        *(
+            table
+            for chat_room_id in chat_room_ids
+            for table in (
+                *get_chat_room_tables(chat_room_id),
+                RedisUnreadMessagesCountersService.get_chat_room_versions_table(chat_room_id),
+            )
+        ),
+    )
+
+
+@router.get('/chat_rooms', response_model=PaginatedChatRoomsInboxSchema, response_class=ORJSONResponse)
+async def list_chat_rooms_view(
+    request: Request,
+    request_user: User = Depends(),
+    paginator: ChatRoomsPaginatorABC = Depends(),
+    unread_messages_counters_service: UnreadMessagesCountersServiceABC = Depends(),
+    chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
+    tables_versions: TablesVersionsABC = Depends(),
+):
     await ChatRoomPermission(request_user).check_permissions()
-    return await paginator.paginate(get_many_chat_rooms_db_query_by_user(request_user.id))
+    # ids of the chat rooms are selected by the index of the members, it's much cheaper than the inbox itself
+    chat_room_ids = sorted(await chat_rooms_retrieve_service.get_user_chat_room_ids(request_user.id))
+    etag = await get_tables_versions_etag(
+        request,
+        tables_versions,
+        get_chat_rooms_inbox_tables(request_user.id, chat_room_ids),
+        (request_user.id, *chat_room_ids),
+    )
+    if is_not_modified(request, etag):
+        return get_not_modified_response(etag)
+    paginated_chat_rooms = await paginator.paginate(get_chat_rooms_inbox_rows_db_query_by_user(request_user.id))
+    unread_messages_counts = await unread_messages_counters_service.get_unread_messages_counts(
+        request_user.id,
+        (chat_room.id for chat_room in paginated_chat_rooms['data']),
+    )
+    for chat_room in paginated_chat_rooms['data']:
+        chat_room.unread_messages_count = unread_messages_counts.get(chat_room.id, 0)
+    return set_conditional_headers(ORJSONResponse(serialize(PaginatedChatRoomsInboxSchema, paginated_chat_rooms)), etag)
 
 
 @router.get('/chat_rooms/{chat_room_id}', response_model=ChatRoomDetailSchema)
 async def retrieve_chat_room_view(
     chat_room_id: int,
+    request: Request,
+    response: Response,
     request_user: User = Depends(),
     chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
+    tables_versions: TablesVersionsABC = Depends(),
 ):
     await ChatRoomPermission(request_user).check_permissions()
-    return await chat_rooms_retrieve_service.get_one_chat_room(
+    etag = await get_tables_versions_etag(
+        request, tables_versions, get_chat_room_tables(chat_room_id), (request_user.id,)
+    )
+    if is_not_modified(request, etag):
+        return get_not_modified_response(etag)
+    chat_room = await chat_rooms_retrieve_service.get_one_chat_room(
         db_query=get_many_chat_rooms_db_query_by_user(request_user.id, ChatRoom.id == chat_room_id),
     )
+    set_conditional_headers(response, etag)
+    return chat_room
+
+
+@router.get('/chat_rooms/{chat_room_id}/presence', response_model=ChatRoomPresenceSchema)
+async def retrieve_chat_room_presence_view(
+    chat_room_id: int,
+    request_user: User = Depends(),
+    chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
+    presence_service: PresenceServiceABC = Depends(),
+):
+    await ChatRoomPermission(request_user).check_permissions()
+    if not await chat_rooms_retrieve_service.get_chat_room_member_ids(chat_room_id, user_ids=(request_user.id,)):
+        raise HTTPException(status_code=404, detail='Chat room is not found')
+    return {'online_user_ids': await presence_service.get_chat_room_online_user_ids(chat_room_id)}
+
+
+@router.post('/chat_rooms/{chat_room_id}/read_cursor', response_model=ChatRoomReadCursorSchema)
+async def update_chat_room_read_cursor_view(
+    chat_room_id: int,
+    read_cursor_data: ChatRoomReadCursorUpdateSchema,
+    request_user: User = Depends(),
+    chat_rooms_read_cursors_service: ChatRoomsReadCursorsServiceABC = Depends(),
+):
+    await ChatRoomPermission(request_user).check_permissions()
+    read_cursor = await chat_rooms_read_cursors_service.advance_read_cursor(
+        request_user.id,
+        chat_room_id,
+        read_cursor_data.message_id,
+    )
+    if not read_cursor:
+        raise HTTPException(status_code=404, detail='Chat room or message is not found')
+    return read_cursor
 
 
 @router.post('/chat_rooms', response_model=ChatRoomDetailSchema)
@@ -49,6 +162,7 @@ async def create_chat_room_view(
     return await chat_rooms_create_service.create_chat_room(
         name,
         members,
+        admins_ids=(request_user.id,),
         relations_to_load_after_creation=get_chat_room_creation_relations_to_load(),
         **chat_room_data,
     )
@@ -59,13 +173,60 @@ async def update_chat_room_view(
     chat_room_id: int,
     chat_room_data: ChatRoomUpdateSchema,
     request_user: User = Depends(),
+    chat_rooms_db_repository: ChatRoomsDatabaseRepositoryABC = Depends(),
     chat_rooms_update_service: ChatRoomsCreateUpdateServiceABC = Depends(),
     chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
 ):
     await ChatRoomPermission(request_user).check_permissions()
     chat_room = await chat_rooms_retrieve_service.get_one_chat_room(
-        db_query=get_many_chat_rooms_db_query_by_user(request_user.id, ChatRoom.id == chat_room_id),
+        db_query=get_chat_room_db_query_by_user(request_user.id, ChatRoom.id == chat_room_id),
     )
+    if not chat_room:
+        raise HTTPException(status_code=404, detail='Chat room is not found')
     chat_room_data: dict = chat_room_data.dict(exclude_unset=True)
     members_ids = chat_room_data.pop('members', None)
-    return await chat_rooms_update_service.update_chat_room(chat_room, members_ids=members_ids, **chat_room_data)
+    if members_ids is not None:
+        # setting the members removes the ones not listed, so only admins can do it
+        await ChatRoomMembersPermissions(request_user, chat_room_id, chat_rooms_db_repository).check_permissions()
+    return await chat_rooms_update_service.update_chat_room(
+        chat_room,
+        members_ids=members_ids,
+        relations_to_load_after_update=get_chat_room_creation_relations_to_load(),
+        **chat_room_data,
+    )
+
+
+@router.post('/chat_rooms/{chat_room_id}/members')
+async def add_chat_room_members_view(
+    chat_room_id: int,
+    members_data: ChatRoomMembersSchema,
+    request_user: User = Depends(),
+    chat_rooms_db_repository: ChatRoomsDatabaseRepositoryABC = Depends(),
+    chat_rooms_update_service: ChatRoomsCreateUpdateServiceABC = Depends(),
+):
+    await ChatRoomPermission(request_user).check_permissions()
+    await UserChatRoomMessagingPermissions(
+        request_user,
+        chat_room_id,
+        chat_rooms_db_repository,
+    ).check_user_is_member_of_chat_room()
+    await chat_rooms_update_service.add_members(chat_room_id, members_data.members)
+    return {'detail': 'success'}
+
+
+@router.delete('/chat_rooms/{chat_room_id}/members')
+async def remove_chat_room_members_view(
+    chat_room_id: int,
+    members: tuple[int, ...] = Query(...),
+    request_user: User = Depends(),
+    chat_rooms_db_repository: ChatRoomsDatabaseRepositoryABC = Depends(),
+    chat_rooms_update_service: ChatRoomsCreateUpdateServiceABC = Depends(),
+):
+    await ChatRoomPermission(request_user).check_permissions()
+    await ChatRoomMembersPermissions(
+        request_user,
+        chat_room_id,
+        chat_rooms_db_repository,
+    ).check_user_can_remove_members(members)
+    await chat_rooms_update_service.remove_members(chat_room_id, members)
+    return {'detail': 'success'}
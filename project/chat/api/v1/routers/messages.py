@@ -7,12 +7,14 @@ from chat.api.filters.messages import MessagesFilterSetABC
 from chat.api.pagination.messages import MessagesPaginatorABC
 from chat.api.permissions.messages import UserChatRoomMessagingPermissions, UserMessageFilesPermissions
 from chat.api.v1.schemas.messages import ListMessagesSchema, PaginatedListMessagesSchema, UpdateMessageSchema
+from chat.api.v1.schemas.websockets import WebSocketConnectionsStatsSchema
 from chat.constants.messages import MessagesTypeEnum
 from chat.database.repository.messages import MessageFilesDatabaseRepositoryABC, MessagesDatabaseRepositoryABC
 from chat.database.selectors.messages import (
     get_message_creation_relations_to_load,
     get_message_file_db_query,
     get_messages_db_query_by_chat_room_id,
+    get_messages_rows_db_query_by_chat_room_id,
 )
 from chat.dependencies import chat as chat_dependencies
 from chat.models import Message, MessageFile
@@ -22,9 +24,20 @@ from chat.services.messages import (
     MessagesCreateUpdateDeleteServiceABC,
     MessagesRetrieveServiceABC,
 )
-from chat.websockets.chat import ChatRoomsWebSocketConnectionManager, WebSocketConnection
-from core.dependencies.providers import EventReceiver
+from chat.services.presence import PresenceServiceABC
+from chat.services.rate_limiting import ChatRoomsMessagesRateLimiterABC
+from chat.websockets.chat import (
+    ChatRoomsWebSocketConnectionManager,
+    WebSocketConnection,
+    websocket_connections_registry,
+)
+from chat.websockets.frames import ChatRoomsWebSocketFramesHandler
+from core.config import SettingsABC
+from core.dependencies.providers import EventPublisher, EventReceiver
+from core.permissions import UserIsStaffPermission
+from core.serializers import serialize
 from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, UploadFile, WebSocket
+from fastapi.responses import ORJSONResponse
 from mixins.schemas import FilesSchema
 
 router = APIRouter()
@@ -37,64 +50,103 @@ async def chat_websocket_endpoint(
     request_user: User = Depends(chat_dependencies.get_request_user),
     messages_db_repository: MessagesDatabaseRepositoryABC = Depends(),
     event_receiver: EventReceiver = Depends(),
+    event_publisher: EventPublisher = Depends(),
     chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
+    messages_retrieve_service: MessagesRetrieveServiceABC = Depends(),
+    messages_create_update_delete_service: MessagesCreateUpdateDeleteServiceABC = Depends(),
+    presence_service: PresenceServiceABC = Depends(),
+    rate_limiter: ChatRoomsMessagesRateLimiterABC = Depends(),
+    settings: SettingsABC = Depends(),
 ):
     permissions = UserChatRoomMessagingPermissions(request_user, chat_room_id, messages_db_repository)
     try:
         await permissions.check_permissions()
     except HTTPException:
         return await websocket.close()
-    websocket_connection = WebSocketConnection(websocket, request_user)
-    chat_rooms_websocket_manager = ChatRoomsWebSocketConnectionManager(websocket_connection, event_receiver)
+    websocket_connection = WebSocketConnection(
+        websocket,
+        request_user,
+        send_queue_max_size=settings.WEBSOCKET_SEND_QUEUE_MAX_SIZE,
+    )
+    chat_rooms_websocket_manager = ChatRoomsWebSocketConnectionManager(
+        websocket_connection,
+        event_receiver,
+        presence_service,
+    )
+    frames_handler = ChatRoomsWebSocketFramesHandler(
+        websocket_connection,
+        chat_room_id,
+        messages_db_repository,
+        messages_retrieve_service,
+        messages_create_update_delete_service,
+        event_publisher,
+        presence_service,
+        rate_limiter,
+    )
     await chat_rooms_websocket_manager.accept_connection()
+    tasks = (
+        asyncio.create_task(chat_rooms_websocket_manager.receive_messages(chat_rooms_retrieve_service)),
+        asyncio.create_task(chat_rooms_websocket_manager.receive_frames(frames_handler)),
+        asyncio.create_task(chat_rooms_websocket_manager.send_messages()),
+        asyncio.create_task(chat_rooms_websocket_manager.keep_alive(settings)),
+        asyncio.create_task(chat_rooms_websocket_manager.keep_presence_alive(settings)),
+    )
     try:
-        await asyncio.wait(
-            [
-                chat_rooms_websocket_manager.receive_messages(chat_rooms_retrieve_service),
-                websocket.receive(),
-            ],
-            return_when=asyncio.FIRST_COMPLETED,
-        )
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
     finally:
+        for task in tasks:
+            task.cancel()
         await chat_rooms_websocket_manager.disconnect()
 
 
-@router.get('/chat_rooms/{chat_room_id}/messages', response_model=PaginatedListMessagesSchema)
+@router.get('/websockets/stats', response_model=WebSocketConnectionsStatsSchema)
+async def websocket_connections_stats_view(request_user: User = Depends()):
+    await UserIsStaffPermission(request_user).check_permissions()
+    return websocket_connections_registry.get_stats()
+
+
+@router.get(
+    '/chat_rooms/{chat_room_id}/messages',
+    response_model=PaginatedListMessagesSchema,
+    response_class=ORJSONResponse,
+)
 async def list_messages_view(
     chat_room_id: int,
-    request: Request,
     filterset: MessagesFilterSetABC = Depends(),
     paginator: MessagesPaginatorABC = Depends(),
 ):
-    return await paginator.paginate(
+    paginated_messages = await paginator.paginate(
         filterset.filter_db_query(
-            get_messages_db_query_by_chat_room_id(
-                request,
+            get_messages_rows_db_query_by_chat_room_id(
                 chat_room_id,
                 Message.message_type == MessagesTypeEnum.PRIMARY.value,
             ),
         ),
     )
+    return ORJSONResponse(serialize(PaginatedListMessagesSchema, paginated_messages))
 
 
-@router.get('/chat_rooms/{chat_room_id}/scheduled_messages', response_model=PaginatedListMessagesSchema)
+@router.get(
+    '/chat_rooms/{chat_room_id}/scheduled_messages',
+    response_model=PaginatedListMessagesSchema,
+    response_class=ORJSONResponse,
+)
 async def list_scheduled_messages_view(
     chat_room_id: int,
-    request: Request,
     request_user: User = Depends(),
     filterset: MessagesFilterSetABC = Depends(),
     paginator: MessagesPaginatorABC = Depends(),
 ):
-    return await paginator.paginate(
+    paginated_messages = await paginator.paginate(
         filterset.filter_db_query(
-            get_messages_db_query_by_chat_room_id(
-                request,
+            get_messages_rows_db_query_by_chat_room_id(
                 chat_room_id,
                 User.id == request_user.id,
                 Message.message_type == MessagesTypeEnum.SCHEDULED.value,
             ),
         ),
     )
+    return ORJSONResponse(serialize(PaginatedListMessagesSchema, paginated_messages))
 
 
 @router.post('/chat_rooms/{chat_room_id}/messages', response_model=ListMessagesSchema)
@@ -108,12 +160,14 @@ async def create_message_view(
     request_user: User = Depends(),
     messages_db_repository: MessagesDatabaseRepositoryABC = Depends(),
     messages_create_update_delete_service: MessagesCreateUpdateDeleteServiceABC = Depends(),
+    rate_limiter: ChatRoomsMessagesRateLimiterABC = Depends(),
 ):
     await UserChatRoomMessagingPermissions(
         request_user=request_user,
         chat_room_id=chat_room_id,
         db_repository=messages_db_repository,
         request=request,
+        rate_limiter=rate_limiter,
     ).check_permissions()
     if message_type == MessagesTypeEnum.SCHEDULED:
         return await messages_create_update_delete_service.create_scheduled_message(
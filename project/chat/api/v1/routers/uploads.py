@@ -0,0 +1,110 @@
+from accounts.models import User
+from chat.api.permissions.messages import UserChatRoomMessagingPermissions
+from chat.api.v1.schemas.uploads import CreateUploadSchema, UploadSchema
+from chat.database.repository.messages import MessagesDatabaseRepositoryABC
+from chat.models import Message
+from chat.services.messages import MessageFilesServiceABC
+from core.permissions import UserIsAuthenticatedPermission
+from core.services.exceptions.uploads import (
+    UploadIncompleteException,
+    UploadLockedException,
+    UploadOffsetMismatchException,
+    UploadSizeExceededException,
+)
+from core.services.uploads import ResumableUploadsServiceABC, Upload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from mixins.schemas import FilesSchema
+from sqlalchemy import select
+
+router = APIRouter()
+
+
+@router.post('/uploads', response_model=UploadSchema, status_code=201)
+async def create_upload_view(
+    upload_data: CreateUploadSchema,
+    request_user: User = Depends(),
+    uploads_service: ResumableUploadsServiceABC = Depends(),
+):
+    await UserIsAuthenticatedPermission(request_user).check_permissions()
+    try:
+        return await uploads_service.create_upload(request_user.id, upload_data.filename, upload_data.size)
+    except UploadSizeExceededException as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.get('/uploads/{upload_id}', response_model=UploadSchema)
+async def retrieve_upload_view(
+    upload_id: str,
+    response: Response,
+    request_user: User = Depends(),
+    uploads_service: ResumableUploadsServiceABC = Depends(),
+):
+    upload = await _get_request_user_upload(upload_id, request_user, uploads_service)
+    response.headers['upload-offset'] = str(upload.offset)
+    return upload
+
+
+@router.put('/uploads/{upload_id}', response_model=UploadSchema)
+async def upload_chunk_view(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(..., ge=0),
+    request_user: User = Depends(),
+    uploads_service: ResumableUploadsServiceABC = Depends(),
+):
+    upload = await _get_request_user_upload(upload_id, request_user, uploads_service)
+    try:
+        upload = await uploads_service.write_chunk(upload, offset, request.stream())
+    except UploadOffsetMismatchException as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={'upload-offset': str(e.offset)})
+    except UploadLockedException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UploadSizeExceededException as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    response.headers['upload-offset'] = str(upload.offset)
+    return upload
+
+
+@router.put('/chat_rooms/{chat_room_id}/messages/{message_id}/uploads/{upload_id}', response_model=FilesSchema)
+async def attach_upload_to_message_view(
+    chat_room_id: int,
+    message_id: int,
+    upload_id: str,
+    request: Request,
+    request_user: User = Depends(),
+    messages_db_repository: MessagesDatabaseRepositoryABC = Depends(),
+    message_files_service: MessageFilesServiceABC = Depends(),
+    uploads_service: ResumableUploadsServiceABC = Depends(),
+):
+    await UserChatRoomMessagingPermissions(
+        request_user=request_user,
+        chat_room_id=chat_room_id,
+        db_repository=messages_db_repository,
+        request=request,
+        message_ids=(message_id,),
+    ).check_permissions()
+    is_chat_room_message_query = select(Message.id).where(
+        Message.id == message_id,
+        Message.chat_room_id == chat_room_id,
+    )
+    if not await messages_db_repository.exists(db_query=is_chat_room_message_query):
+        raise HTTPException(status_code=404, detail='Message is not found')
+    upload = await _get_request_user_upload(upload_id, request_user, uploads_service)
+    try:
+        async with uploads_service.assemble_upload(upload) as file:
+            return await message_files_service.create_object_file(file, message_id=message_id)
+    except (UploadIncompleteException, UploadLockedException) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def _get_request_user_upload(
+    upload_id: str,
+    request_user: User,
+    uploads_service: ResumableUploadsServiceABC,
+) -> Upload:
+    await UserIsAuthenticatedPermission(request_user).check_permissions()
+    upload = await uploads_service.get_upload(upload_id)
+    if not upload or upload.user_id != request_user.id:
+        raise HTTPException(status_code=404, detail='Upload is not found')
+    return upload
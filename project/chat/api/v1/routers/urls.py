@@ -1,7 +1,8 @@
-from chat.api.v1.routers import chat_rooms, messages
+from chat.api.v1.routers import chat_rooms, messages, uploads
 from fastapi import APIRouter
 
 router = APIRouter()
 
 router.include_router(chat_rooms.router)
 router.include_router(messages.router)
+router.include_router(uploads.router)
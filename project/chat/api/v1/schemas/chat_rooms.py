@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List, Optional
 
 from mixins import schemas as mixins_schemas
-from mixins.schemas import PaginatedResponseSchemaMixin
+from mixins.schemas import CursorPaginatedResponseSchemaMixin
 from pydantic import BaseModel, validator
 
 
@@ -13,6 +13,7 @@ class ChatRoomBaseSchema(BaseModel):
 
 class ChatRoomCreateSchema(ChatRoomBaseSchema):
     members: Optional[List[int]] = []
+    is_broadcast: bool = False
 
 
 class ChatRoomUpdateSchema(BaseModel):
@@ -21,6 +22,10 @@ class ChatRoomUpdateSchema(BaseModel):
     members: Optional[List[int]] = None
 
 
+class ChatRoomMembersSchema(BaseModel):
+    members: List[int]
+
+
 class ChatRoomMemberSchema(BaseModel):
     id: int
 
@@ -33,12 +38,43 @@ class ChatRoomsListSchema(ChatRoomBaseSchema, mixins_schemas.PhotosFieldSchemaMi
     created_at: datetime
     modified_at: datetime
     members_count: int
+    is_broadcast: bool
+
+    class Config:
+        orm_mode = True
+
+
+class ChatRoomLastMessageAuthorSchema(BaseModel):
+    id: int
+    nickname: str
 
     class Config:
         orm_mode = True
 
 
-class PaginatedChatRoomsListSchema(PaginatedResponseSchemaMixin[ChatRoomsListSchema]):
+class ChatRoomLastMessageSchema(BaseModel):
+    id: int
+    text: str
+    author: Optional[ChatRoomLastMessageAuthorSchema]
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+    @validator('text')
+    def text_snippet(cls, value: str) -> str:  # noqa: N805
+        return value if len(value) <= 100 else f'{value[:100]}...'
+
+
+class ChatRoomsInboxSchema(ChatRoomsListSchema):
+    last_message: Optional[ChatRoomLastMessageSchema]
+    unread_messages_count: int = 0
+
+    class Config:
+        orm_mode = True
+
+
+class PaginatedChatRoomsInboxSchema(CursorPaginatedResponseSchemaMixin[ChatRoomsInboxSchema]):
     pass
 
 
@@ -51,3 +87,16 @@ class ChatRoomDetailSchema(ChatRoomsListSchema):
     @validator('members')
     def members_ids(cls, value: List[ChatRoomMemberSchema]) -> List[int]:  # noqa: N805
         return [member.id for member in value]
+
+
+class ChatRoomPresenceSchema(BaseModel):
+    online_user_ids: List[int]
+
+
+class ChatRoomReadCursorUpdateSchema(BaseModel):
+    message_id: int
+
+
+class ChatRoomReadCursorSchema(BaseModel):
+    last_read_message_id: int
+    unread_messages_count: int
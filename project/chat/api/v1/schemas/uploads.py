@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+
+class CreateUploadSchema(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0)
+
+
+class UploadSchema(BaseModel):
+    id: str  # noqa: A003
+    filename: str
+    size: int
+    offset: int
+
+    class Config:
+        orm_mode = True
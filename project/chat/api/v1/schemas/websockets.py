@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional, Union
+
+from chat.api.v1.schemas.messages import UpdateMessageSchema
+from chat.constants.messages import MessagesTypeEnum
+from chat.constants.websockets import WebSocketInboundActionTypeEnum
+from pydantic import BaseModel
+
+
+class WebSocketInboundFrameSchema(BaseModel):
+    action: WebSocketInboundActionTypeEnum
+    ack_id: Optional[Union[int, str]] = None
+    data: dict = {}
+
+
+class SendMessageFrameDataSchema(BaseModel):
+    text: str
+    replayed_message_id: Optional[int] = None
+    scheduled_at: Optional[datetime] = None
+
+
+class EditMessageFrameDataSchema(UpdateMessageSchema):
+    message_id: int
+
+
+class DeleteMessagesFrameDataSchema(BaseModel):
+    message_ids: tuple[int, ...]
+    message_type: MessagesTypeEnum = MessagesTypeEnum.PRIMARY
+
+
+class WebSocketConnectionsStatsSchema(BaseModel):
+    connections_count: int
+    bytes_sent: int
+    bytes_received: int
+    send_queues_size: int
+    max_send_queue_size: int
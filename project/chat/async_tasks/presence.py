@@ -0,0 +1,24 @@
+from chat.dependencies.chat_rooms.providers import provide_chat_rooms_db_repository, provide_chat_rooms_retrieve_service
+from chat.dependencies.presence.providers import provide_presence_service
+from core.database.base import provide_db_sessionmaker
+from core.dependencies.providers import provide_event_publisher, provide_settings
+
+
+async def publish_expired_users_offline(job_context: dict) -> int:
+    async with (db_session := provide_db_sessionmaker()()):
+        presence_service = provide_presence_service(
+            provide_event_publisher(),
+            provide_chat_rooms_retrieve_service(provide_chat_rooms_db_repository(db_session)),
+            provide_settings(),
+        )
+        return await presence_service.publish_expired_users_offline()
+
+
+async def publish_delayed_presence_events(job_context: dict) -> int:
+    async with (db_session := provide_db_sessionmaker()()):
+        presence_service = provide_presence_service(
+            provide_event_publisher(),
+            provide_chat_rooms_retrieve_service(provide_chat_rooms_db_repository(db_session)),
+            provide_settings(),
+        )
+        return await presence_service.publish_delayed_presence_events()
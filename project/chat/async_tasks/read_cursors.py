@@ -0,0 +1,15 @@
+from chat.dependencies.chat_rooms.providers import provide_chat_rooms_db_repository
+from chat.dependencies.read_cursors.providers import (
+    provide_chat_rooms_read_cursors_service,
+    provide_unread_messages_counters_service,
+)
+from core.database.base import provide_db_sessionmaker
+
+
+async def seed_unread_messages_counters(job_context: dict) -> bool:
+    async with (db_session := provide_db_sessionmaker()()):
+        read_cursors_service = provide_chat_rooms_read_cursors_service(
+            provide_chat_rooms_db_repository(db_session),
+            provide_unread_messages_counters_service(),
+        )
+        return await read_cursors_service.seed_unread_messages_counters()
@@ -0,0 +1,19 @@
+from enum import Enum
+
+
+class WebSocketInboundActionTypeEnum(str, Enum):
+    SEND = 'send'
+    EDIT = 'edit'
+    DELETE = 'delete'
+    TYPING = 'typing'
+
+
+class WebSocketOutboundActionTypeEnum(str, Enum):
+    ACK = 'ack'
+    TYPING = 'typing'
+    PRESENCE = 'presence'
+
+
+class WebSocketAckStatusEnum(str, Enum):
+    SUCCESS = 'success'
+    ERROR = 'error'
@@ -1,7 +1,9 @@
 from abc import ABC
 
 from chat.models import ChatRoom
+from core.database.caching import CachedSQLAlchemyDatabaseRepository
 from core.database.repository import BaseDatabaseRepository, SQLAlchemyDatabaseRepository
+from redis import asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -12,3 +14,8 @@ class ChatRoomsDatabaseRepositoryABC(BaseDatabaseRepository, ABC):
 class ChatRoomsDatabaseRepository(SQLAlchemyDatabaseRepository, ChatRoomsDatabaseRepositoryABC):
     def __init__(self, db_session: AsyncSession):
         super().__init__(model=ChatRoom, db_session=db_session)
+
+
+class CachedChatRoomsDatabaseRepository(CachedSQLAlchemyDatabaseRepository, ChatRoomsDatabaseRepositoryABC):
+    def __init__(self, db_session: AsyncSession, redis_client: aioredis.Redis, **cache_options):
+        super().__init__(model=ChatRoom, db_session=db_session, redis_client=redis_client, **cache_options)
@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Optional
+
+from mixins.rows import FileRow
+from sqlalchemy.engine import Row
+
+
+class MessageAuthorRow:
+    __slots__ = ('id', 'nickname')
+
+    def __init__(self, id: int, nickname: str):  # noqa: A002
+        self.id = id
+        self.nickname = nickname
+
+
+class MessageRow:
+    """
+    Read only message of the messages list, built straight from the row of the projected columns.
+    """
+
+    __slots__ = ('id', 'is_edited', 'text', 'author', 'replayed_message_id', 'scheduled_at', 'photos')
+
+    def __init__(
+        self,
+        id: int,  # noqa: A002
+        is_edited: bool,
+        text: str,
+        author: Optional[MessageAuthorRow],
+        replayed_message_id: Optional[int],
+        scheduled_at: Optional[datetime],
+        photos: list[FileRow],
+    ):
+        self.id = id
+        self.is_edited = is_edited
+        self.text = text
+        self.author = author
+        self.replayed_message_id = replayed_message_id
+        self.scheduled_at = scheduled_at
+        self.photos = photos
+
+    @classmethod
+    def from_row(cls, row: Row) -> 'MessageRow':
+        return cls(
+            row.id,
+            row.is_edited,
+            row.text,
+            MessageAuthorRow(row.author_id, row.author_nickname) if row.author_id is not None else None,
+            row.replayed_message_id,
+            row.scheduled_at,
+            [FileRow.from_json(photo) for photo in row.photos],
+        )
+
+
+class ChatRoomLastMessageRow:
+    __slots__ = ('id', 'text', 'author', 'created_at')
+
+    def __init__(self, id: int, text: str, author: Optional[MessageAuthorRow], created_at: datetime):  # noqa: A002
+        self.id = id
+        self.text = text
+        self.author = author
+        self.created_at = created_at
+
+
+class ChatRoomInboxRow:
+    """
+    Read only chat room of the user inbox, built straight from the row of the projected columns.
+    """
+
+    __slots__ = (
+        'id',
+        'name',
+        'description',
+        'created_at',
+        'modified_at',
+        'members_count',
+        'is_broadcast',
+        'last_message_id',
+        'last_message',
+        'photos',
+        'unread_messages_count',
+    )
+
+    def __init__(
+        self,
+        id: int,  # noqa: A002
+        name: str,
+        description: Optional[str],
+        created_at: datetime,
+        modified_at: datetime,
+        members_count: int,
+        is_broadcast: bool,
+        last_message_id: Optional[int],
+        last_message: Optional[ChatRoomLastMessageRow],
+        photos: list[FileRow],
+        unread_messages_count: int = 0,
+    ):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.created_at = created_at
+        self.modified_at = modified_at
+        self.members_count = members_count
+        self.is_broadcast = is_broadcast
+        self.last_message_id = last_message_id
+        self.last_message = last_message
+        self.photos = photos
+        self.unread_messages_count = unread_messages_count
+
+    @classmethod
+    def from_row(cls, row: Row) -> 'ChatRoomInboxRow':
+        last_message = None
+        if row.last_message_id is not None:
+            last_message_author = None
+            if row.last_message_author_id is not None:
+                last_message_author = MessageAuthorRow(row.last_message_author_id, row.last_message_author_nickname)
+            last_message = ChatRoomLastMessageRow(
+                row.last_message_id,
+                row.last_message_text,
+                last_message_author,
+                row.last_message_created_at,
+            )
+        return cls(
+            row.id,
+            row.name,
+            row.description,
+            row.created_at,
+            row.modified_at,
+            row.members_count or 0,
+            row.is_broadcast,
+            row.last_message_id,
+            last_message,
+            [FileRow.from_json(photo) for photo in row.photos],
+        )
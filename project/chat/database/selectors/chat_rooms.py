@@ -1,13 +1,22 @@
 import functools
 
 from accounts.models import User
-from chat.models import ChatRoom, chatroom_members_association_table
+from chat.models import ChatRoom, ChatRoomFile, Message, chatroom_members_association_table
+from mixins.rows import get_files_json_agg_subquery
 from sqlalchemy import select
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import aliased, joinedload, selectinload
 from sqlalchemy.sql import Select
 
 
 def get_many_chat_rooms_db_query_by_user(user_id: int, *args) -> Select:
+    return _get_many_chat_rooms_base_db_query().where(
+        chatroom_members_association_table.c.user_id == user_id,
+        *args,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_many_chat_rooms_base_db_query() -> Select:
     return (
         select(
             ChatRoom,
@@ -19,9 +28,66 @@ def get_many_chat_rooms_db_query_by_user(user_id: int, *args) -> Select:
             joinedload(ChatRoom.members).load_only(User.id),
             joinedload(ChatRoom.photos),
         )
-        .where(
-            chatroom_members_association_table.c.user_id == user_id,
-            *args,
+    )
+
+
+def get_chat_room_db_query_by_user(user_id: int, *args) -> Select:
+    return _get_chat_room_base_db_query().where(
+        chatroom_members_association_table.c.user_id == user_id,
+        *args,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_chat_room_base_db_query() -> Select:
+    return select(ChatRoom,).join(
+        chatroom_members_association_table,
+    )
+
+
+def get_chat_rooms_inbox_rows_db_query_by_user(user_id: int, *args) -> Select:
+    """
+    Selects only the columns of the user inbox, so the rows can be returned without building the ORM objects.
+    """
+    return _get_chat_rooms_inbox_rows_base_db_query().where(
+        chatroom_members_association_table.c.user_id == user_id,
+        *args,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_chat_rooms_inbox_rows_base_db_query() -> Select:
+    last_message = aliased(Message)
+    last_message_author = aliased(User)
+    return (
+        select(
+            ChatRoom.id,
+            ChatRoom.name,
+            ChatRoom.description,
+            ChatRoom.created_at,
+            ChatRoom.modified_at,
+            ChatRoom.members_count.label('members_count'),
+            ChatRoom.is_broadcast,
+            last_message.id.label('last_message_id'),
+            last_message.text.label('last_message_text'),
+            last_message.created_at.label('last_message_created_at'),
+            last_message_author.id.label('last_message_author_id'),
+            last_message_author.nickname.label('last_message_author_nickname'),
+            get_files_json_agg_subquery(ChatRoomFile, ChatRoomFile.chat_room_id == ChatRoom.id).label('photos'),
+        )
+        .select_from(
+            ChatRoom,
+        )
+        .join(
+            chatroom_members_association_table,
+        )
+        .outerjoin(
+            last_message,
+            last_message.id == ChatRoom.last_message_id,
+        )
+        .outerjoin(
+            last_message_author,
+            last_message_author.id == last_message.author_id,
         )
     )
 
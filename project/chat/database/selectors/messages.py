@@ -1,7 +1,9 @@
 import functools
 
+from accounts.models import User
 from chat.models import Message, MessageFile
 from fastapi import Request
+from mixins.rows import get_files_json_agg_subquery
 from sqlalchemy import select
 from sqlalchemy.orm import contains_eager, joinedload
 from sqlalchemy.sql import Select
@@ -10,6 +12,19 @@ from sqlalchemy.sql import Select
 def get_messages_db_query_by_chat_room_id(
     request: Request, chat_room_id: int, *args, load_relationships: bool = True
 ) -> Select:
+    db_query = _get_messages_base_db_query(
+        load_relationships=load_relationships,
+        contains_eager_author=request.method == 'GET',
+    )
+    return db_query.where(
+        *args,
+        Message.chat_room_id == chat_room_id,
+    )
+
+
+# statements are immutable, so the parts not depending on the request are built once and shared by the selectors
+@functools.lru_cache(maxsize=4)
+def _get_messages_base_db_query(load_relationships: bool, contains_eager_author: bool) -> Select:
     db_query = (
         select(
             Message,
@@ -17,28 +32,67 @@ def get_messages_db_query_by_chat_room_id(
         .join(
             Message.author,
         )
-        .where(
-            *args,
-            Message.chat_room_id == chat_room_id,
-        )
         .order_by(-Message.id)
     )
     if not load_relationships:
         return db_query
-    if request.method == 'GET':
+    if contains_eager_author:
         return db_query.options(joinedload(Message.photos), contains_eager(Message.author))
     return db_query.options(joinedload(Message.photos), joinedload(Message.author))
 
 
+def get_messages_rows_db_query_by_chat_room_id(chat_room_id: int, *args) -> Select:
+    """
+    Selects only the columns of the messages list, so the rows can be returned without building the ORM objects.
+    """
+    return _get_messages_rows_base_db_query().where(
+        *args,
+        Message.chat_room_id == chat_room_id,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_messages_rows_base_db_query() -> Select:
+    return (
+        select(
+            Message.id,
+            Message.is_edited,
+            Message.text,
+            Message.replayed_message_id,
+            Message.scheduled_at,
+            User.id.label('author_id'),
+            User.nickname.label('author_nickname'),
+            get_files_json_agg_subquery(MessageFile, MessageFile.message_id == Message.id).label('photos'),
+        )
+        .select_from(
+            Message,
+        )
+        .join(
+            Message.author,
+        )
+        .order_by(-Message.id)
+    )
+
+
 def get_message_db_query(*args, load_relationships: bool = True) -> Select:
-    db_query = select(Message).where(*args).order_by(-Message.id)
+    return _get_message_base_db_query(load_relationships).where(*args)
+
+
+@functools.lru_cache(maxsize=2)
+def _get_message_base_db_query(load_relationships: bool) -> Select:
+    db_query = select(Message).order_by(-Message.id)
     if not load_relationships:
         return db_query
     return db_query.options(joinedload(Message.photos), joinedload(Message.author))
 
 
 def get_message_file_db_query(*args, load_relationships: bool = True) -> Select:
-    db_query = select(MessageFile).where(*args)
+    return _get_message_file_base_db_query(load_relationships).where(*args)
+
+
+@functools.lru_cache(maxsize=2)
+def _get_message_file_base_db_query(load_relationships: bool) -> Select:
+    db_query = select(MessageFile)
     if not load_relationships:
         return db_query
     return db_query.options(joinedload(MessageFile.message).load_only(Message.id, Message.message_type))
@@ -1,13 +1,18 @@
-from accounts.services.users import UsersRetrieveServiceABC
-from chat.api.pagination.chat_rooms import ChatRoomsPaginationDatabaseObjectsRetrieverStrategy, ChatRoomsPaginatorABC
+from chat.api.pagination.chat_rooms import (
+    ChatRoomsCursorPaginationClass,
+    ChatRoomsInboxRowsPaginationDatabaseObjectsRetrieverStrategy,
+    ChatRoomsPaginatorABC,
+)
 from chat.database.repository.chat_rooms import ChatRoomsDatabaseRepositoryABC
 from chat.dependencies.chat_rooms.providers import (
     provide_chat_rooms_create_update_service,
     provide_chat_rooms_db_repository,
+    provide_chat_rooms_messages_rate_limiter,
     provide_chat_rooms_retrieve_service,
 )
 from chat.services.chat_rooms import ChatRoomsCreateUpdateServiceABC, ChatRoomsRetrieveServiceABC
-from core.pagination import DefaultPaginationClass
+from chat.services.rate_limiting import ChatRoomsMessagesRateLimiterABC
+from core.config import SettingsABC
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,11 +25,15 @@ class ChatRoomsDependenciesOverrides:
             ChatRoomsRetrieveServiceABC: cls.get_chat_rooms_retrieve_service,
             ChatRoomsCreateUpdateServiceABC: cls.get_chat_rooms_create_update_service,
             ChatRoomsPaginatorABC: cls.get_chat_rooms_paginator,
+            ChatRoomsMessagesRateLimiterABC: cls.get_chat_rooms_messages_rate_limiter,
         }
 
     @staticmethod
-    async def get_chat_rooms_db_repository(db_session: AsyncSession = Depends()) -> ChatRoomsDatabaseRepositoryABC:
-        return provide_chat_rooms_db_repository(db_session)
+    async def get_chat_rooms_db_repository(
+        db_session: AsyncSession = Depends(),
+        settings: SettingsABC = Depends(),
+    ) -> ChatRoomsDatabaseRepositoryABC:
+        return provide_chat_rooms_db_repository(db_session, settings)
 
     @staticmethod
     async def get_chat_rooms_retrieve_service(
@@ -36,20 +45,21 @@ class ChatRoomsDependenciesOverrides:
     async def get_chat_rooms_create_update_service(
         db_repository: ChatRoomsDatabaseRepositoryABC = Depends(),
         chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
-        users_retrieve_service: UsersRetrieveServiceABC = Depends(),
     ) -> ChatRoomsCreateUpdateServiceABC:
-        return provide_chat_rooms_create_update_service(
-            db_repository,
-            chat_rooms_retrieve_service,
-            users_retrieve_service,
-        )
+        return provide_chat_rooms_create_update_service(db_repository, chat_rooms_retrieve_service)
 
     @staticmethod
     async def get_chat_rooms_paginator(
         request: Request,
         chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
-    ) -> DefaultPaginationClass:
-        chat_rooms_db_objects_retriever_strategy = ChatRoomsPaginationDatabaseObjectsRetrieverStrategy(
+    ) -> ChatRoomsCursorPaginationClass:
+        chat_rooms_db_objects_retriever_strategy = ChatRoomsInboxRowsPaginationDatabaseObjectsRetrieverStrategy(
             chat_rooms_retrieve_service,
         )
-        return DefaultPaginationClass(request, chat_rooms_db_objects_retriever_strategy)
+        return ChatRoomsCursorPaginationClass(request, chat_rooms_db_objects_retriever_strategy)
+
+    @staticmethod
+    async def get_chat_rooms_messages_rate_limiter(
+        settings: SettingsABC = Depends(),
+    ) -> ChatRoomsMessagesRateLimiterABC:
+        return provide_chat_rooms_messages_rate_limiter(settings)
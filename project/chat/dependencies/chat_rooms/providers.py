@@ -1,15 +1,33 @@
-from accounts.services.users import UsersRetrieveServiceABC
-from chat.database.repository.chat_rooms import ChatRoomsDatabaseRepository, ChatRoomsDatabaseRepositoryABC
+from typing import Optional
+
+from chat.database.repository.chat_rooms import (
+    CachedChatRoomsDatabaseRepository,
+    ChatRoomsDatabaseRepository,
+    ChatRoomsDatabaseRepositoryABC,
+)
 from chat.services.chat_rooms import (
     ChatRoomsCreateUpdateService,
     ChatRoomsCreateUpdateServiceABC,
     ChatRoomsRetrieveService,
     ChatRoomsRetrieveServiceABC,
 )
+from chat.services.rate_limiting import ChatRoomsMessagesRateLimiterABC, RedisChatRoomsMessagesRateLimiter
+from core.config import SettingsABC
+from core.contrib.redis import RedisClientProvider
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-def provide_chat_rooms_db_repository(db_session: AsyncSession) -> ChatRoomsDatabaseRepositoryABC:
+def provide_chat_rooms_db_repository(
+    db_session: AsyncSession,
+    settings: Optional[SettingsABC] = None,
+) -> ChatRoomsDatabaseRepositoryABC:
+    if settings and settings.DATABASE_CACHE_ENABLED:
+        return CachedChatRoomsDatabaseRepository(
+            db_session,
+            RedisClientProvider.provide_redis_client(),
+            cache_ttl_seconds=settings.DATABASE_CACHE_TTL_SECONDS['chat_rooms'],
+            lock_timeout_seconds=settings.DATABASE_CACHE_LOCK_TIMEOUT_SECONDS,
+        )
     return ChatRoomsDatabaseRepository(db_session)
 
 
@@ -20,6 +38,13 @@ def provide_chat_rooms_retrieve_service(db_repository: ChatRoomsDatabaseReposito
 def provide_chat_rooms_create_update_service(
     db_repository: ChatRoomsDatabaseRepositoryABC,
     chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC,
-    users_retrieve_service: UsersRetrieveServiceABC,
 ) -> ChatRoomsCreateUpdateServiceABC:
-    return ChatRoomsCreateUpdateService(db_repository, chat_rooms_retrieve_service, users_retrieve_service)
+    return ChatRoomsCreateUpdateService(db_repository, chat_rooms_retrieve_service)
+
+
+def provide_chat_rooms_messages_rate_limiter(settings: SettingsABC) -> ChatRoomsMessagesRateLimiterABC:
+    return RedisChatRoomsMessagesRateLimiter(
+        RedisClientProvider.provide_redis_client(),
+        settings.BROADCAST_CHAT_ROOMS_MESSAGES_RATE_LIMIT,
+        settings.BROADCAST_CHAT_ROOMS_RATE_LIMIT_WINDOW_SECONDS,
+    )
@@ -1,5 +1,5 @@
 from chat.api.filters.messages import MessagesFilterSet, MessagesFilterSetABC
-from chat.api.pagination.messages import MessagesPaginationDatabaseObjectsRetrieverStrategy, MessagesPaginatorABC
+from chat.api.pagination.messages import MessagesPaginatorABC, MessagesRowsPaginationDatabaseObjectsRetrieverStrategy
 from chat.database.repository.messages import MessageFilesDatabaseRepositoryABC, MessagesDatabaseRepositoryABC
 from chat.dependencies.messages.providers import (
     provide_message_files_db_repository,
@@ -17,12 +17,15 @@ from chat.services.messages import (
     MessagesCreateUpdateDeleteServiceABC,
     MessagesRetrieveServiceABC,
 )
+from chat.services.read_cursors import UnreadMessagesCountersServiceABC
+from core.database.dataloader import DataLoaderABC
 from core.dependencies.providers import EventPublisher
 from core.filters import FilterSet
 from core.pagination import DefaultPaginationClass
 from core.tasks_scheduling.dependencies import TasksSchedulerABC
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
 
 
 class MessagesDependenciesOverrides:
@@ -59,19 +62,23 @@ class MessagesDependenciesOverrides:
     @staticmethod
     async def get_message_files_filesystem_service(
         db_repository: MessageFilesDatabaseRepositoryABC = Depends(),
+        data_loader: DataLoaderABC = Depends(),
+        tasks_scheduler: TasksSchedulerABC = Depends(),
     ) -> MessageFilesFilesystemServiceABC:
-        return provide_message_files_filesystem_service(db_repository)
+        return provide_message_files_filesystem_service(db_repository, data_loader, tasks_scheduler)
 
     @staticmethod
     async def get_message_files_service(
         message_files_filesystem_service: MessageFilesFilesystemServiceABC = Depends(),
         message_files_db_repository: MessageFilesDatabaseRepositoryABC = Depends(),
         event_publisher: EventPublisher = Depends(),
+        data_loader: DataLoaderABC = Depends(),
     ) -> MessageFilesServiceABC:
         return provide_message_files_service(
             message_files_filesystem_service,
             message_files_db_repository,
             event_publisher,
+            data_loader,
         )
 
     @staticmethod
@@ -82,19 +89,21 @@ class MessagesDependenciesOverrides:
 
     @staticmethod
     async def get_messages_create_update_delete_service(
-        request: Request,
+        connection: HTTPConnection,
         db_repository: MessagesDatabaseRepositoryABC = Depends(),
         event_publisher: EventPublisher = Depends(),
         message_files_service: MessageFilesServiceABC = Depends(),
         tasks_scheduler: TasksSchedulerABC = Depends(),
+        unread_messages_counters_service: UnreadMessagesCountersServiceABC = Depends(),
     ) -> MessagesCreateUpdateDeleteServiceABC:
-        chat_room_id = int(chat_room_id) if (chat_room_id := request.path_params.get('chat_room_id')) else None
+        chat_room_id = int(chat_room_id) if (chat_room_id := connection.path_params.get('chat_room_id')) else None
         return provide_messages_create_update_delete_service(
             db_repository,
             event_publisher,
             message_files_service,
             tasks_scheduler=tasks_scheduler,
             chat_room_id=chat_room_id,
+            unread_messages_counters_service=unread_messages_counters_service,
         )
 
     @staticmethod
@@ -106,7 +115,7 @@ class MessagesDependenciesOverrides:
         request: Request,
         messages_retrieve_service: MessagesRetrieveServiceABC = Depends(),
     ) -> DefaultPaginationClass:
-        messages_db_objects_retriever_strategy = MessagesPaginationDatabaseObjectsRetrieverStrategy(
+        messages_db_objects_retriever_strategy = MessagesRowsPaginationDatabaseObjectsRetrieverStrategy(
             messages_retrieve_service,
         )
         return DefaultPaginationClass(request, messages_db_objects_retriever_strategy)
@@ -17,8 +17,13 @@ from chat.services.messages import (
     MessagesCreateUpdateDeleteServiceABC,
     MessagesRetrieveService,
     MessagesRetrieveServiceABC,
+    ScheduledMessagesDispatcher,
+    ScheduledMessagesDispatcherABC,
 )
-from core.dependencies.providers import EventPublisher
+from chat.services.read_cursors import UnreadMessagesCountersServiceABC
+from core.config import SettingsABC
+from core.database.dataloader import DataLoaderABC
+from core.dependencies.providers import EventPublisher, provide_settings
 from core.tasks_scheduling.dependencies import TasksSchedulerABC
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -40,16 +45,24 @@ def provide_message_files_retrieve_service(
 
 def provide_message_files_filesystem_service(
     db_repository: MessageFilesDatabaseRepositoryABC,
+    data_loader: Optional[DataLoaderABC] = None,
+    tasks_scheduler: Optional[TasksSchedulerABC] = None,
 ) -> MessageFilesFilesystemServiceABC:
-    return MessageFilesFilesystemService(db_repository)
+    return MessageFilesFilesystemService(db_repository, data_loader=data_loader, tasks_scheduler=tasks_scheduler)
 
 
 def provide_message_files_service(
     message_files_filesystem_service: MessageFilesFilesystemServiceABC,
     message_files_db_repository: MessageFilesDatabaseRepositoryABC,
     event_publisher: EventPublisher,
+    data_loader: Optional[DataLoaderABC] = None,
 ) -> MessageFilesServiceABC:
-    return MessageFilesService(message_files_filesystem_service, message_files_db_repository, event_publisher)
+    return MessageFilesService(
+        message_files_filesystem_service,
+        message_files_db_repository,
+        event_publisher,
+        data_loader,
+    )
 
 
 def provide_messages_retrieve_service(db_repository: MessagesDatabaseRepositoryABC) -> MessagesRetrieveServiceABC:
@@ -63,6 +76,7 @@ def provide_messages_create_update_delete_service(
     tasks_scheduler: Optional[TasksSchedulerABC] = None,
     chat_room_id: Optional[int] = None,
     request: Optional[Request] = None,
+    unread_messages_counters_service: Optional[UnreadMessagesCountersServiceABC] = None,
 ) -> MessagesCreateUpdateDeleteServiceABC:
     if not chat_room_id and request:
         chat_room_id = int(chat_room_id) if (chat_room_id := request.path_params.get('chat_room_id')) else None
@@ -72,4 +86,20 @@ def provide_messages_create_update_delete_service(
         event_publisher,
         message_files_service,
         tasks_scheduler,
+        unread_messages_counters_service,
+        provide_settings().SCHEDULED_MESSAGES_BUCKET_MILLISECONDS,
+    )
+
+
+def provide_scheduled_messages_dispatcher(
+    db_repository: MessagesDatabaseRepositoryABC,
+    event_publisher: EventPublisher,
+    unread_messages_counters_service: UnreadMessagesCountersServiceABC,
+    settings: SettingsABC,
+) -> ScheduledMessagesDispatcherABC:
+    return ScheduledMessagesDispatcher(
+        db_repository,
+        event_publisher,
+        unread_messages_counters_service,
+        batch_size=settings.SCHEDULED_MESSAGES_DISPATCH_BATCH_SIZE,
     )
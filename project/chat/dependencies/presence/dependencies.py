@@ -0,0 +1,22 @@
+from chat.dependencies.presence.providers import provide_presence_service
+from chat.services.chat_rooms import ChatRoomsRetrieveServiceABC
+from chat.services.presence import PresenceServiceABC
+from core.config import SettingsABC
+from core.dependencies.providers import EventPublisher
+from fastapi import Depends
+
+
+class PresenceDependenciesOverrides:
+    @classmethod
+    def override_dependencies(cls) -> dict:
+        return {
+            PresenceServiceABC: cls.get_presence_service,
+        }
+
+    @staticmethod
+    async def get_presence_service(
+        event_publisher: EventPublisher = Depends(),
+        chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC = Depends(),
+        settings: SettingsABC = Depends(),
+    ) -> PresenceServiceABC:
+        return provide_presence_service(event_publisher, chat_rooms_retrieve_service, settings)
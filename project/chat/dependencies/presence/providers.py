@@ -0,0 +1,18 @@
+from chat.services.chat_rooms import ChatRoomsRetrieveServiceABC
+from chat.services.presence import PresenceServiceABC, RedisPresenceService
+from core.config import SettingsABC
+from core.contrib.redis import RedisClientProvider
+from core.dependencies.providers import EventPublisher
+
+
+def provide_presence_service(
+    event_publisher: EventPublisher,
+    chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC,
+    settings: SettingsABC,
+) -> PresenceServiceABC:
+    return RedisPresenceService(
+        RedisClientProvider.provide_redis_client(),
+        event_publisher,
+        chat_rooms_retrieve_service,
+        settings,
+    )
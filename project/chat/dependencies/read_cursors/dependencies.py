@@ -0,0 +1,27 @@
+from chat.database.repository.chat_rooms import ChatRoomsDatabaseRepositoryABC
+from chat.dependencies.read_cursors.providers import (
+    provide_chat_rooms_read_cursors_service,
+    provide_unread_messages_counters_service,
+)
+from chat.services.read_cursors import ChatRoomsReadCursorsServiceABC, UnreadMessagesCountersServiceABC
+from fastapi import Depends
+
+
+class ReadCursorsDependenciesOverrides:
+    @classmethod
+    def override_dependencies(cls) -> dict:
+        return {
+            UnreadMessagesCountersServiceABC: cls.get_unread_messages_counters_service,
+            ChatRoomsReadCursorsServiceABC: cls.get_chat_rooms_read_cursors_service,
+        }
+
+    @staticmethod
+    async def get_unread_messages_counters_service() -> UnreadMessagesCountersServiceABC:
+        return provide_unread_messages_counters_service()
+
+    @staticmethod
+    async def get_chat_rooms_read_cursors_service(
+        db_repository: ChatRoomsDatabaseRepositoryABC = Depends(),
+        unread_messages_counters_service: UnreadMessagesCountersServiceABC = Depends(),
+    ) -> ChatRoomsReadCursorsServiceABC:
+        return provide_chat_rooms_read_cursors_service(db_repository, unread_messages_counters_service)
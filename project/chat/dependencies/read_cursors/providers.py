@@ -0,0 +1,19 @@
+from chat.database.repository.chat_rooms import ChatRoomsDatabaseRepositoryABC
+from chat.services.read_cursors import (
+    ChatRoomsReadCursorsService,
+    ChatRoomsReadCursorsServiceABC,
+    RedisUnreadMessagesCountersService,
+    UnreadMessagesCountersServiceABC,
+)
+from core.contrib.redis import RedisClientProvider
+
+
+def provide_unread_messages_counters_service() -> UnreadMessagesCountersServiceABC:
+    return RedisUnreadMessagesCountersService(RedisClientProvider.provide_redis_client())
+
+
+def provide_chat_rooms_read_cursors_service(
+    db_repository: ChatRoomsDatabaseRepositoryABC,
+    unread_messages_counters_service: UnreadMessagesCountersServiceABC,
+) -> ChatRoomsReadCursorsServiceABC:
+    return ChatRoomsReadCursorsService(db_repository, unread_messages_counters_service)
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import TYPE_CHECKING, Iterable, Optional, Union
 
 from chat.api.v1.schemas.messages import ListMessagesSchema
 from chat.constants.messages import MessagesActionTypeEnum
@@ -6,8 +6,20 @@ from chat.models import Message
 from chat.websockets.chat import ChatRoomsWebSocketConnectionManager
 from core.dependencies.providers import EventPublisher
 
+if TYPE_CHECKING:
+    from chat.services.read_cursors import UnreadMessagesCountersServiceABC
 
-async def message_created_event(event_publisher: EventPublisher, message: Union[Message, int]):
+
+async def message_created_event(
+    event_publisher: EventPublisher,
+    message: Union[Message, int],
+    unread_messages_counters_service: Optional['UnreadMessagesCountersServiceABC'] = None,
+):
+    if unread_messages_counters_service:
+        await unread_messages_counters_service.increment_chat_room_messages_count(
+            message.chat_room_id,
+            message.author_id,
+        )
     await broadcast_message_to_chat_room(
         event_publisher,
         message.chat_room_id,
@@ -25,6 +37,19 @@ async def message_updated_event(event_publisher: EventPublisher, message: Messag
     )
 
 
+async def messages_updated_event(event_publisher: EventPublisher, messages: Iterable[Message]):
+    await ChatRoomsWebSocketConnectionManager.broadcast_many(
+        (
+            (
+                {**ListMessagesSchema.from_orm(message).dict(), 'action': MessagesActionTypeEnum.UPDATED.value},
+                message.chat_room_id,
+            )
+            for message in messages
+        ),
+        event_publisher,
+    )
+
+
 async def messages_deleted_event(event_publisher: EventPublisher, chat_room_id: int, message_ids: tuple[int]):
     await broadcast_message_to_chat_room(
         event_publisher,
@@ -0,0 +1,29 @@
+from typing import Iterable
+
+from chat.constants.websockets import WebSocketOutboundActionTypeEnum
+from chat.events.messages import broadcast_message_to_chat_room
+from core.dependencies.providers import EventPublisher
+
+
+async def user_presence_changed_event(
+    event_publisher: EventPublisher,
+    user_id: int,
+    chat_room_ids: Iterable[int],
+    is_online: bool,
+):
+    for chat_room_id in chat_room_ids:
+        await broadcast_message_to_chat_room(
+            event_publisher,
+            chat_room_id,
+            WebSocketOutboundActionTypeEnum.PRESENCE.value,
+            {'user_id': user_id, 'is_online': is_online},
+        )
+
+
+async def user_typing_event(event_publisher: EventPublisher, chat_room_id: int, user_id: int):
+    await broadcast_message_to_chat_room(
+        event_publisher,
+        chat_room_id,
+        WebSocketOutboundActionTypeEnum.TYPING.value,
+        {'user_id': user_id},
+    )
@@ -1,7 +1,7 @@
 from chat.constants import chat_rooms as chat_rooms_constants
 from core.database.base import Base
 from mixins.models import DateTimeABC, DescriptionABC, FileABC, IsActiveABC
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, event, func, select
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Table, event, false, func, select
 from sqlalchemy.orm import aliased, column_property, mapper, relationship
 
 __all__ = ['chatroom_members_association_table', 'ChatRoom', 'ChatRoomFile']
@@ -13,14 +13,30 @@ chatroom_members_association_table = Table(
     Column('room_id', Integer, ForeignKey('chat_rooms.id', ondelete='CASCADE'), index=True),
     Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), index=True),
     Column('member_type', String, nullable=False, default=chat_rooms_constants.ChatRoomMemberTypeEnum.MEMBER.value),
+    Column('last_read_message_id', Integer, nullable=True),
 )
 
 
 class ChatRoom(DateTimeABC, DescriptionABC, IsActiveABC):
     __tablename__ = 'chat_rooms'
+    # the data of every chat room is versioned on its own, see core.database.versions.get_object_tables_scopes
+    versions_scopes = (('chat_rooms', 'id'),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String, unique=True)
+    is_broadcast = Column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+        doc='Broadcast chat rooms are large read-mostly rooms where only admins can send messages',
+    )
+    last_message_id = Column(
+        Integer,
+        ForeignKey('messages.id', ondelete='SET NULL', use_alter=True),
+        index=True,
+        doc='Id of the latest primary message of the chat room, maintained on messages creation and deletion',
+    )
 
     photos = relationship('ChatRoomFile', back_populates='chat_room')
     members = relationship(
@@ -28,7 +44,8 @@ class ChatRoom(DateTimeABC, DescriptionABC, IsActiveABC):
         secondary=chatroom_members_association_table,
         back_populates='chat_rooms',
     )
-    messages = relationship('Message', back_populates='chat_room')
+    messages = relationship('Message', back_populates='chat_room', foreign_keys='Message.chat_room_id')
+    last_message = relationship('Message', foreign_keys=[last_message_id], viewonly=True)
 
 
 @event.listens_for(mapper, 'mapper_configured')
@@ -58,11 +75,8 @@ def set_thread_count(mapper, cls) -> None:
 
 class ChatRoomFile(FileABC):
     __tablename__ = 'chat_rooms_photos'
+    versions_scopes = (('chat_rooms', 'chat_room_id'),)
 
     chat_room_id = Column(Integer, ForeignKey('chat_rooms.id'), index=True)
 
     chat_room = relationship('ChatRoom', back_populates='photos', cascade='all, delete')
-
-    @property
-    def folder_to_save(self) -> str:
-        return f'chat_room/{super().folder_to_save}'
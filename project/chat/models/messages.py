@@ -8,6 +8,7 @@ __all__ = ['Message', 'MessageFile']
 
 class Message(DateTimeABC):
     __tablename__ = 'messages'
+    versions_scopes = (('chat_rooms', 'chat_room_id'),)
 
     id = Column(Integer, primary_key=True)
     is_edited = Column(Boolean, default=False)
@@ -28,7 +29,7 @@ class Message(DateTimeABC):
     )
 
     author = relationship('User', back_populates='messages')
-    chat_room = relationship('ChatRoom', back_populates='messages', cascade='all, delete')
+    chat_room = relationship('ChatRoom', back_populates='messages', foreign_keys=[chat_room_id], cascade='all, delete')
     replayed_message = relationship('Message', remote_side=id, backref='replies')
     photos = relationship('MessageFile', back_populates='message')
 
@@ -39,7 +40,3 @@ class MessageFile(FileABC):
     message_id = Column(Integer, ForeignKey('messages.id', ondelete='CASCADE'), index=True)
 
     message = relationship('Message', back_populates='photos', cascade='all, delete')
-
-    @property
-    def folder_to_save(self) -> str:
-        return f'messages/{super().folder_to_save}'
@@ -2,10 +2,12 @@ import abc
 from typing import Iterable, List, Optional, Union
 
 from accounts.models import User
-from accounts.services.users import UsersRetrieveServiceABC
+from chat.constants.chat_rooms import ChatRoomMemberTypeEnum
+from chat.database.rows import ChatRoomInboxRow
 from chat.models import ChatRoom, chatroom_members_association_table
 from core.database.repository import BaseDatabaseRepository
-from sqlalchemy import select
+from core.database.versions import get_table_scope
+from sqlalchemy import delete, exists, insert, literal, select
 from sqlalchemy.sql import Select
 
 
@@ -18,12 +20,20 @@ class ChatRoomsRetrieveServiceABC(abc.ABC):
     async def get_many_chat_rooms(self, *args, db_query: Optional[Select] = None) -> list[ChatRoom]:
         pass
 
+    @abc.abstractmethod
+    async def get_many_chat_rooms_inbox_rows(self, *args, db_query: Optional[Select] = None) -> list[ChatRoomInboxRow]:
+        pass
+
     @abc.abstractmethod
     async def count_chat_rooms(self, *args, db_query: Optional[Select] = None) -> int:
         pass
 
     @abc.abstractmethod
-    async def get_user_chat_room_ids(self, user: Union[int, User]) -> list[int]:
+    async def get_user_chat_room_ids(self, user: Union[int, User], is_broadcast: Optional[bool] = None) -> list[int]:
+        pass
+
+    @abc.abstractmethod
+    async def get_chat_room_member_ids(self, chat_room_id: int, user_ids: Optional[Iterable[int]] = None) -> list[int]:
         pass
 
 
@@ -37,16 +47,37 @@ class ChatRoomsRetrieveService(ChatRoomsRetrieveServiceABC):
     async def get_many_chat_rooms(self, *args, db_query: Optional[Select] = None) -> list[ChatRoom]:
         return await self.db_repository.get_many(*args, db_query=db_query)
 
+    async def get_many_chat_rooms_inbox_rows(self, *args, db_query: Optional[Select] = None) -> list[ChatRoomInboxRow]:
+        rows = await self.db_repository.get_many_rows(*args, db_query=db_query)
+        return [ChatRoomInboxRow.from_row(row) for row in rows]
+
     async def count_chat_rooms(self, *args, db_query: Optional[Select] = None) -> int:
         return await self.db_repository.count(*args, db_query=db_query)
 
-    async def get_user_chat_room_ids(self, user: Union[int, User]) -> list[int]:
+    async def get_user_chat_room_ids(self, user: Union[int, User], is_broadcast: Optional[bool] = None) -> list[int]:
         user_id = user if isinstance(user, int) else user.id
         user_chat_room_ids_query = select(chatroom_members_association_table.c.room_id).where(
             chatroom_members_association_table.c.user_id == user_id,
         )
+        if is_broadcast is not None:
+            user_chat_room_ids_query = user_chat_room_ids_query.join(
+                ChatRoom,
+                ChatRoom.id == chatroom_members_association_table.c.room_id,
+            ).where(
+                ChatRoom.is_broadcast.is_(is_broadcast),
+            )
         return await self.db_repository.get_many(db_query=user_chat_room_ids_query)
 
+    async def get_chat_room_member_ids(self, chat_room_id: int, user_ids: Optional[Iterable[int]] = None) -> list[int]:
+        chat_room_member_ids_query = select(chatroom_members_association_table.c.user_id).where(
+            chatroom_members_association_table.c.room_id == chat_room_id,
+        )
+        if user_ids is not None:
+            chat_room_member_ids_query = chat_room_member_ids_query.where(
+                chatroom_members_association_table.c.user_id.in_(list(user_ids)),
+            )
+        return await self.db_repository.get_many(db_query=chat_room_member_ids_query)
+
 
 class ChatRoomsCreateUpdateServiceABC(abc.ABC):
     @abc.abstractmethod
@@ -57,52 +88,134 @@ class ChatRoomsCreateUpdateServiceABC(abc.ABC):
     async def update_chat_room(self, *args, **kwargs) -> ChatRoom:
         pass
 
+    @abc.abstractmethod
+    async def add_members(self, chat_room_id: int, members_ids: Iterable[int]):
+        pass
+
+    @abc.abstractmethod
+    async def remove_members(self, chat_room_id: int, members_ids: Iterable[int]):
+        pass
+
 
 class ChatRoomsCreateUpdateService(ChatRoomsCreateUpdateServiceABC):
+    """
+    Members of chat rooms are changed only with INSERT ... SELECT and DELETE statements
+    on the association table, so neither the members collection nor the users are ever loaded.
+    """
+
     def __init__(
         self,
         db_repository: BaseDatabaseRepository,
         chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC,
-        users_retrieve_service: UsersRetrieveServiceABC,
     ):
         self.db_repository = db_repository
         self.chat_rooms_retrieve_service = chat_rooms_retrieve_service
-        self.users_retrieve_service = users_retrieve_service
 
     async def create_chat_room(
         self,
         name: str,
         members_ids: List[int],
+        admins_ids: Iterable[int] = (),
         relations_to_load_after_creation: Optional[tuple] = None,
         **kwargs,
     ) -> ChatRoom:
-        if members_ids:
-            members = await self.users_retrieve_service.get_many_users(User.id.in_(members_ids), fields_to_load=('id',))
-        else:
-            members = members_ids
-        chat_room = ChatRoom(name=name, members=members, **kwargs)
+        chat_room = ChatRoom(name=name, **kwargs)
         chat_room = await self.db_repository.create_from_object(chat_room)
+        await self.db_repository.flush()
+        if admins_ids:
+            await self._add_members(chat_room.id, admins_ids, member_type=ChatRoomMemberTypeEnum.ADMIN)
+        if members_ids:
+            await self._add_members(chat_room.id, members_ids)
         await self.db_repository.commit()
         await self.db_repository.refresh(chat_room)
         if relations_to_load_after_creation:
-            return await self.chat_rooms_retrieve_service.get_one_chat_room(
-                ChatRoom.id == chat_room.id,
-                db_query=select(ChatRoom).options(*relations_to_load_after_creation),
-            )
+            return await self._load_chat_room_relations(chat_room.id, relations_to_load_after_creation)
         return chat_room
 
     async def update_chat_room(
         self,
         chat_room: ChatRoom,
         members_ids: Optional[Iterable[int]] = None,
+        relations_to_load_after_update: Optional[tuple] = None,
         **data_for_update,
     ) -> ChatRoom:
         if members_ids is not None:
-            data_for_update['members'] = await self.users_retrieve_service.get_many_users(
-                User.id.in_(members_ids),
-                fields_to_load=('id',),
-            )
+            await self._set_members(chat_room.id, members_ids)
         chat_room = await self.db_repository.update_object(chat_room, **data_for_update)
         await self.db_repository.commit()
         await self.db_repository.refresh(chat_room)
+        if relations_to_load_after_update:
+            return await self._load_chat_room_relations(chat_room.id, relations_to_load_after_update)
         return chat_room
+
+    async def add_members(self, chat_room_id: int, members_ids: Iterable[int]):
+        await self._add_members(chat_room_id, members_ids)
+        await self.db_repository.commit()
+
+    async def remove_members(self, chat_room_id: int, members_ids: Iterable[int]):
+        await self._remove_members(chat_room_id, chatroom_members_association_table.c.user_id.in_(set(members_ids)))
+        await self.db_repository.commit()
+
+    async def _set_members(self, chat_room_id: int, members_ids: Iterable[int]):
+        members_ids = set(members_ids)
+        await self._remove_members(chat_room_id, chatroom_members_association_table.c.user_id.not_in(members_ids))
+        await self._add_members(chat_room_id, members_ids)
+
+    async def _add_members(
+        self,
+        chat_room_id: int,
+        members_ids: Iterable[int],
+        member_type: ChatRoomMemberTypeEnum = ChatRoomMemberTypeEnum.MEMBER,
+    ):
+        """
+        Inserts association rows only for the existing users which aren't members of the chat room yet.
+        """
+        members_ids = set(members_ids)
+        if not members_ids:
+            return
+        existing_membership_query = select(chatroom_members_association_table.c.user_id).where(
+            chatroom_members_association_table.c.room_id == chat_room_id,
+            chatroom_members_association_table.c.user_id == User.id,
+        )
+        new_members_query = select(literal(chat_room_id), User.id, literal(member_type.value)).where(
+            User.id.in_(members_ids),
+            ~exists(existing_membership_query),
+        )
+        result = await self.db_repository.execute(
+            insert(chatroom_members_association_table)
+            .from_select(
+                ('room_id', 'user_id', 'member_type'),
+                new_members_query,
+            )
+            .returning(chatroom_members_association_table.c.user_id),
+        )
+        self._mark_members_changed(chat_room_id, result.scalars().all())
+
+    async def _remove_members(self, chat_room_id: int, *args):
+        result = await self.db_repository.execute(
+            delete(chatroom_members_association_table)
+            .where(
+                chatroom_members_association_table.c.room_id == chat_room_id,
+                *args,
+            )
+            .returning(chatroom_members_association_table.c.user_id),
+        )
+        self._mark_members_changed(chat_room_id, result.scalars().all())
+
+    def _mark_members_changed(self, chat_room_id: int, members_ids: Iterable[int]):
+        """
+        Members are shown with the chat room and chat rooms are shown with the users.
+        """
+        members_ids = list(members_ids)
+        if not members_ids:
+            return
+        self.db_repository.mark_tables_scopes_changed(
+            get_table_scope(ChatRoom.__tablename__, chat_room_id),
+            *(get_table_scope(User.__tablename__, member_id) for member_id in members_ids),
+        )
+
+    async def _load_chat_room_relations(self, chat_room_id: int, relations_to_load: tuple) -> ChatRoom:
+        return await self.chat_rooms_retrieve_service.get_one_chat_room(
+            ChatRoom.id == chat_room_id,
+            db_query=select(ChatRoom).options(*relations_to_load).execution_options(populate_existing=True),
+        )
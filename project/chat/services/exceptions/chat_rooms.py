@@ -0,0 +1,10 @@
+from fastapi.exceptions import HTTPException
+from starlette import status
+
+
+class ChatRoomMessagesRateLimitExceededException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Too many messages were sent to the chat room, try again later',
+        )
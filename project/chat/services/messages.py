@@ -1,19 +1,33 @@
 import abc
-import asyncio.exceptions
-from typing import Optional, Union
+import math
+from datetime import datetime
+from typing import Iterable, Optional, Union
 
 from chat.constants.messages import MessagesTypeEnum
-from chat.events.messages import message_created_event, message_updated_event, messages_deleted_event
-from chat.models import Message, MessageFile
+from chat.database.rows import MessageRow
+from chat.database.selectors.messages import get_message_creation_relations_to_load
+from chat.events.messages import (
+    message_created_event,
+    message_updated_event,
+    messages_deleted_event,
+    messages_updated_event,
+)
+from chat.models import ChatRoom, Message, MessageFile
 from chat.services.exceptions.messages import MissingTasksSchedulerException
+from chat.services.read_cursors import UnreadMessagesCountersServiceABC
+from core.database.dataloader import DataLoaderABC
 from core.database.repository import BaseDatabaseRepository
+from core.database.versions import get_object_tables_scopes, get_table_scope
 from core.dependencies.providers import EventPublisher
+from core.metrics import SCHEDULED_MESSAGES_DISPATCH_LAG_SECONDS
 from core.services.files import FilesService, FilesServiceABC
 from core.tasks_scheduling.constants import TASKS_SCHEDULING_QUEUE
 from core.tasks_scheduling.dependencies import JobResult, TasksSchedulerABC
 from fastapi import UploadFile
 from mixins.models import FileABC
-from sqlalchemy import select
+from sqlalchemy import case, delete, func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import Select
 
 
@@ -26,6 +40,10 @@ class MessagesRetrieveServiceABC(abc.ABC):
     async def get_many_messages(self, *args, db_query: Optional[Select] = None) -> list[Message]:
         pass
 
+    @abc.abstractmethod
+    async def get_many_messages_rows(self, *args, db_query: Optional[Select] = None) -> list[MessageRow]:
+        pass
+
     @abc.abstractmethod
     async def count_messages(self, *args, db_query: Optional[Select] = None) -> int:
         pass
@@ -41,6 +59,10 @@ class MessagesRetrieveService(MessagesRetrieveServiceABC):
     async def get_many_messages(self, *args, db_query: Optional[Select] = None) -> list[Message]:
         return await self.db_repository.get_many(*args, db_query=db_query)
 
+    async def get_many_messages_rows(self, *args, db_query: Optional[Select] = None) -> list[MessageRow]:
+        rows = await self.db_repository.get_many_rows(*args, db_query=db_query)
+        return [MessageRow.from_row(row) for row in rows]
+
     async def count_messages(self, *args, db_query: Optional[Select] = None) -> int:
         return await self.db_repository.count(*args, db_query=db_query)
 
@@ -79,12 +101,16 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
         event_publisher: EventPublisher,
         message_files_service: 'MessageFilesServiceABC',
         tasks_scheduler: Optional[TasksSchedulerABC] = None,
+        unread_messages_counters_service: Optional[UnreadMessagesCountersServiceABC] = None,
+        scheduled_messages_bucket_milliseconds: int = 500,
     ):
         self._db_repository = db_repository
         self._chat_room_id = chat_room_id
         self._event_publisher = event_publisher
         self._message_files_service = message_files_service
         self._tasks_scheduler = tasks_scheduler
+        self._unread_messages_counters_service = unread_messages_counters_service
+        self._scheduled_messages_bucket_milliseconds = scheduled_messages_bucket_milliseconds
 
     async def create_message(
         self,
@@ -102,7 +128,7 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
             relations_to_load_after_creation=relations_to_load_after_creation,
             **kwargs,
         )
-        await message_created_event(self._event_publisher, created_message)
+        await message_created_event(self._event_publisher, created_message, self._unread_messages_counters_service)
         return created_message
 
     async def create_scheduled_message(
@@ -141,6 +167,9 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
     ) -> Message:
         message = Message(chat_room_id=self._chat_room_id, text=text, author_id=author_id, **kwargs)
         created_message = await self._db_repository.create_from_object(message)
+        if created_message.message_type == MessagesTypeEnum.PRIMARY.value:
+            await self._db_repository.flush()
+            await self._set_chat_room_last_message(created_message)
         await self._db_repository.commit()
         if files:
             for file in files:
@@ -149,6 +178,35 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
             return await self._load_message_relations(created_message.id, relations_to_load_after_creation)
         return created_message
 
+    async def _set_chat_room_last_message(self, message: Message):
+        self._db_repository.mark_tables_scopes_changed(get_table_scope(ChatRoom.__tablename__, message.chat_room_id))
+        await self._db_repository.execute(
+            update(ChatRoom)
+            .where(ChatRoom.id == message.chat_room_id)
+            .values(last_message_id=func.greatest(func.coalesce(ChatRoom.last_message_id, 0), message.id))
+            .execution_options(synchronize_session=False),
+        )
+
+    async def _reset_chat_room_last_message(self):
+        """
+        Sets the latest remaining message as the last message of the chat room if the last one was deleted.
+        """
+        latest_message_id_subquery = (
+            select(func.max(Message.id))
+            .where(
+                Message.chat_room_id == self._chat_room_id,
+                Message.message_type == MessagesTypeEnum.PRIMARY.value,
+            )
+            .scalar_subquery()
+        )
+        self._db_repository.mark_tables_scopes_changed(get_table_scope(ChatRoom.__tablename__, self._chat_room_id))
+        await self._db_repository.execute(
+            update(ChatRoom)
+            .where(ChatRoom.id == self._chat_room_id, ChatRoom.last_message_id.is_(None))
+            .values(last_message_id=latest_message_id_subquery)
+            .execution_options(synchronize_session=False),
+        )
+
     async def _load_message_relations(self, message_id: int, relations_to_load: Optional[tuple] = None) -> Message:
         return await self._db_repository.get_one(
             db_query=select(Message).options(*relations_to_load).where(Message.id == message_id),
@@ -164,6 +222,9 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
         if mark_as_edited and not message.is_edited:
             kwargs['is_edited'] = True
         updated_message = await self._update_message(message, _returning_options, **kwargs)
+        if kwargs.get('message_type') == MessagesTypeEnum.PRIMARY.value:
+            await self._set_chat_room_last_message(updated_message)
+            await self._db_repository.commit()
         await message_updated_event(self._event_publisher, updated_message)
         return updated_message
 
@@ -175,7 +236,9 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
     ) -> Message:
         self._check_tasks_scheduler()
         updated_message = await self._update_message(message, _returning_options, **kwargs)
-        await self._schedule_message(updated_message)
+        task_result = await self._schedule_message(updated_message)
+        if task_result.job_id != updated_message.scheduler_task_id:
+            updated_message = await self._update_message(updated_message, scheduler_task_id=task_result.job_id)
         return updated_message
 
     async def _update_message(
@@ -190,6 +253,7 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
                 _returning_options=_returning_options,
                 **kwargs,
             )
+            self._db_repository.mark_tables_scopes_changed(*get_object_tables_scopes(updated_message))
         else:
             updated_message = await self._db_repository.update_object(message, **kwargs)
         await self._db_repository.commit()
@@ -201,33 +265,30 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
             raise MissingTasksSchedulerException
 
     async def _schedule_message(self, message: Message) -> JobResult:
-        return await self._tasks_scheduler.enqueue_job(
-            'send_scheduled_message',
-            message.id,
+        """
+        Messages aren't scheduled one by one, the job of the time bucket the message falls into sends all the messages
+        due by then. The job is enqueued by the first message of the bucket, the rest ones find it already enqueued.
+        """
+        dispatch_at = get_scheduled_messages_bucket(message.scheduled_at, self._scheduled_messages_bucket_milliseconds)
+        job_id = f'dispatch_scheduled_messages:{int(dispatch_at.timestamp() * 1000)}'
+        await self._tasks_scheduler.enqueue_job(
+            'dispatch_scheduled_messages',
             _queue_name=TASKS_SCHEDULING_QUEUE,
-            _defer_until=message.scheduled_at,
-            _job_id=message.scheduler_task_id,
+            _defer_until=dispatch_at,
+            _job_id=job_id,
         )
+        return JobResult(job_id=job_id)
 
     async def delete_messages(self, message_ids: tuple[int]) -> tuple[int]:
         await self._delete_messages(message_ids, Message.message_type == MessagesTypeEnum.PRIMARY.value)
+        await self._reset_chat_room_last_message()
+        await self._db_repository.commit()
         await messages_deleted_event(self._event_publisher, self._chat_room_id, message_ids)
         return message_ids
 
     async def delete_scheduled_messages(self, message_ids: tuple[int]) -> tuple[int]:
-        self._check_tasks_scheduler()
-        returning = await self._delete_messages(
-            message_ids,
-            Message.message_type == MessagesTypeEnum.SCHEDULED.value,
-            returning_fields=('id', 'scheduler_task_id'),
-        )
-        for message_returning in returning:
-            if not message_returning.scheduler_task_id:
-                continue
-            try:
-                await self._tasks_scheduler.cancel_job(message_returning.scheduler_task_id)
-            except asyncio.exceptions.TimeoutError:
-                pass
+        # jobs of the buckets are shared by the messages, the deleted messages are just not found by them
+        await self._delete_messages(message_ids, Message.message_type == MessagesTypeEnum.SCHEDULED.value)
         return message_ids
 
     async def _delete_messages(
@@ -236,16 +297,124 @@ class MessagesCreateUpdateDeleteService(MessagesCreateUpdateDeleteServiceABC):
         *filtering_args,
         returning_fields: Optional[tuple] = None,
     ) -> Optional[list[Message]]:
+        # files are deleted in the same transaction before the cascade does it, so it's known which ones to release
+        message_files = await self._message_files_service.delete_messages_files(
+            Message.id.in_(message_ids),
+            *filtering_args,
+        )
         returning = await self._db_repository.delete(
             Message.id.in_(message_ids),
             *filtering_args,
             _returning_fields=returning_fields,
         )
         await self._db_repository.commit()
-        await self._message_files_service.delete_message_files_from_filesystem(Message.id.in_(message_ids))
+        await self._message_files_service.release_message_files(message_files)
         return returning
 
 
+class ScheduledMessagesDispatcherABC(abc.ABC):
+    @abc.abstractmethod
+    async def dispatch_due_messages(self, due_at: Optional[datetime] = None) -> int:
+        pass
+
+
+class ScheduledMessagesDispatcher(ScheduledMessagesDispatcherABC):
+    """
+    Sends the due scheduled messages by batches: message type of the whole batch is switched by a single
+    UPDATE ... RETURNING, the last messages of the chat rooms are set by another one and the events of the batch
+    are published by a redis pipeline. Messages locked by a concurrent dispatch are skipped, so the overlapping
+    jobs don't send them twice.
+    """
+
+    def __init__(
+        self,
+        db_repository: BaseDatabaseRepository,
+        event_publisher: EventPublisher,
+        unread_messages_counters_service: UnreadMessagesCountersServiceABC,
+        batch_size: int = 1000,
+    ):
+        self._db_repository = db_repository
+        self._event_publisher = event_publisher
+        self._unread_messages_counters_service = unread_messages_counters_service
+        self._batch_size = batch_size
+
+    async def dispatch_due_messages(self, due_at: Optional[datetime] = None) -> int:
+        due_at = due_at or datetime.now()
+        dispatched_messages_count = 0
+        while True:
+            messages = await self._dispatch_messages_batch(due_at)
+            if messages:
+                await self._publish_dispatched_messages(messages)
+                dispatched_messages_count += len(messages)
+            if len(messages) < self._batch_size:
+                return dispatched_messages_count
+
+    async def _dispatch_messages_batch(self, due_at: datetime) -> list[Message]:
+        due_messages_ids_query = (
+            select(Message.id)
+            .where(
+                Message.message_type == MessagesTypeEnum.SCHEDULED.value,
+                or_(Message.scheduled_at.is_(None), Message.scheduled_at <= due_at),
+            )
+            .order_by(Message.scheduled_at)
+            .limit(self._batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        dispatch_query = (
+            update(Message)
+            .where(Message.id.in_(due_messages_ids_query))
+            .values(message_type=MessagesTypeEnum.PRIMARY.value)
+            .returning(Message)
+        )
+        messages = (
+            (
+                await self._db_repository.execute(
+                    select(Message)
+                    .from_statement(dispatch_query)
+                    .options(selectinload(Message.author), selectinload(Message.photos))
+                    # the messages already in the session are refreshed by the returned rows
+                    .execution_options(populate_existing=True),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if messages:
+            await self._set_chat_rooms_last_messages(messages)
+        await self._db_repository.commit()
+        return messages
+
+    async def _set_chat_rooms_last_messages(self, messages: Iterable[Message]):
+        last_messages_ids = {}
+        for message in messages:
+            last_messages_ids[message.chat_room_id] = max(last_messages_ids.get(message.chat_room_id, 0), message.id)
+        self._db_repository.mark_tables_scopes_changed(
+            *(get_table_scope(ChatRoom.__tablename__, chat_room_id) for chat_room_id in last_messages_ids),
+        )
+        await self._db_repository.execute(
+            update(ChatRoom)
+            .where(ChatRoom.id.in_(last_messages_ids))
+            .values(
+                last_message_id=func.greatest(
+                    func.coalesce(ChatRoom.last_message_id, 0),
+                    case(last_messages_ids, value=ChatRoom.id),
+                ),
+            )
+            .execution_options(synchronize_session=False),
+        )
+
+    async def _publish_dispatched_messages(self, messages: list[Message]):
+        dispatched_at = datetime.now()
+        for message in messages:
+            if message.scheduled_at:
+                dispatch_lag = dispatched_at - message.scheduled_at
+                SCHEDULED_MESSAGES_DISPATCH_LAG_SECONDS.observe(max(dispatch_lag.total_seconds(), 0))
+        await messages_updated_event(self._event_publisher, messages)
+        await self._unread_messages_counters_service.increment_chat_rooms_messages_counts(
+            (message.chat_room_id, message.author_id) for message in messages
+        )
+
+
 class MessageFilesRetrieveServiceABC(abc.ABC):
     @abc.abstractmethod
     async def get_one_message_file(self, *args, db_query: Optional[Select] = None) -> Message:
@@ -294,7 +463,11 @@ class MessageFilesServiceABC(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def delete_message_files_from_filesystem(self, *args):
+    async def delete_messages_files(self, *args) -> list[Row]:
+        pass
+
+    @abc.abstractmethod
+    async def release_message_files(self, message_files: Iterable[Row]):
         pass
 
     @abc.abstractmethod
@@ -312,10 +485,12 @@ class MessageFilesService(MessageFilesServiceABC):
         files_service: MessageFilesFilesystemServiceABC,
         db_repository: BaseDatabaseRepository,
         event_publisher: Optional[EventPublisher] = None,
+        data_loader: Optional[DataLoaderABC] = None,
     ):
         self.files_service = files_service
         self.db_repository = db_repository
         self.event_publisher = event_publisher
+        self.data_loader = data_loader
 
     async def get_one_message_file(self, *args, db_query: Optional[Select] = None) -> MessageFile:
         return await self.db_repository.get_one(*args, db_query=db_query)
@@ -332,16 +507,18 @@ class MessageFilesService(MessageFilesServiceABC):
         message_file: Union[MessageFile, int],
     ) -> MessageFile:
         message_file_id = self._get_message_file_id(message_file)
+        self._prime_message_file(message_file)
         new_message_file: MessageFile = await self.files_service.change_file(message_file_id, replacement_file)
-        message = getattr(message_file, 'message', None)
+        message = await self._get_message_file_message(message_file)
         if message:
             await message_updated_event(self.event_publisher, message)
         return new_message_file
 
     async def delete_message_file(self, message_file: Optional[Union[MessageFile, int]]):
         message_file_id = self._get_message_file_id(message_file)
+        self._prime_message_file(message_file)
         await self.files_service.delete_file_object(message_file_id)
-        message = getattr(message_file, 'message', None)
+        message = await self._get_message_file_message(message_file)
         if message:
             await message_updated_event(self.event_publisher, message)
 
@@ -351,20 +528,58 @@ class MessageFilesService(MessageFilesServiceABC):
         message_file: Union[MessageFile, int],
     ) -> MessageFile:
         message_file_id = self._get_message_file_id(message_file)
+        self._prime_message_file(message_file)
         new_message_file: MessageFile = await self.files_service.change_file(message_file_id, replacement_file)
         return new_message_file
 
     async def delete_scheduled_message_file(self, message_file: Optional[Union[MessageFile, int]]):
         message_file_id = self._get_message_file_id(message_file)
+        self._prime_message_file(message_file)
         await self.files_service.delete_file_object(message_file_id)
 
-    async def delete_message_files_from_filesystem(self, *args):
-        file_paths = await self.db_repository.get_many(
-            db_query=select(MessageFile.file_path).join(Message).where(*args),
+    async def delete_messages_files(self, *args) -> list[Row]:
+        """
+        Deletes files of the messages filtered by args without committing, returns their blobs hashes and paths.
+        """
+        delete_query = (
+            delete(MessageFile)
+            .where(MessageFile.message_id.in_(select(Message.id).where(*args)))
+            .returning(MessageFile.blob_hash, MessageFile.file_path)
+            .execution_options(synchronize_session=False)
         )
-        for file_path in file_paths:
-            await self.files_service.remove_file_from_filesystem(file_path)
+        return (await self.db_repository.execute(delete_query)).all()
+
+    async def release_message_files(self, message_files: Iterable[Row]):
+        await self.files_service.release_files(message_files)
+
+    def _prime_message_file(self, message_file: Optional[Union[MessageFile, int]]):
+        if self.data_loader and isinstance(message_file, MessageFile):
+            self.data_loader.prime(message_file)
+
+    async def _get_message_file_message(self, message_file: Optional[Union[MessageFile, int]]) -> Optional[Message]:
+        """
+        Returns the message of the file with the relations needed for the message events.
+        """
+        if not isinstance(message_file, MessageFile):
+            return None
+        if self.data_loader:
+            return await self.data_loader.load(
+                Message,
+                message_file.message_id,
+                *get_message_creation_relations_to_load(),
+            )
+        return getattr(message_file, 'message', None)
 
     def _get_message_file_id(self, message_file: Optional[Union[MessageFile, int]]) -> int:
         if message_file:
             return message_file.id if isinstance(message_file, MessageFile) else message_file
+
+
+def get_scheduled_messages_bucket(scheduled_at: Optional[datetime], bucket_milliseconds: int) -> datetime:
+    """
+    Returns the end of the time bucket the message scheduled at the given time falls into.
+    """
+    scheduled_at_milliseconds = (scheduled_at or datetime.now()).timestamp() * 1000
+    return datetime.fromtimestamp(
+        math.ceil(scheduled_at_milliseconds / bucket_milliseconds) * bucket_milliseconds / 1000
+    )
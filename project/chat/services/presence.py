@@ -0,0 +1,226 @@
+import abc
+import time
+from typing import Iterable
+
+from chat.events.presence import user_presence_changed_event, user_typing_event
+from chat.services.chat_rooms import ChatRoomsRetrieveServiceABC
+from core.config import SettingsABC
+from core.dependencies.providers import EventPublisher
+from redis import asyncio as aioredis
+
+
+class PresenceServiceABC(abc.ABC):
+    @abc.abstractmethod
+    async def connect(self, user_id: int, connection_id: str):
+        pass
+
+    @abc.abstractmethod
+    async def heartbeat(self, user_id: int, connection_id: str):
+        pass
+
+    @abc.abstractmethod
+    async def disconnect(self, user_id: int, connection_id: str):
+        pass
+
+    @abc.abstractmethod
+    async def typing(self, user_id: int, chat_room_id: int):
+        pass
+
+    @abc.abstractmethod
+    async def get_online_user_ids(self, user_ids: Iterable[int]) -> list[int]:
+        pass
+
+    @abc.abstractmethod
+    async def get_chat_room_online_user_ids(self, chat_room_id: int) -> list[int]:
+        pass
+
+    @abc.abstractmethod
+    async def publish_expired_users_offline(self) -> int:
+        pass
+
+    @abc.abstractmethod
+    async def publish_delayed_presence_events(self) -> int:
+        pass
+
+
+class RedisPresenceService(PresenceServiceABC):
+    """
+    Keeps users' presence as ephemeral state in redis.
+
+    Every live websocket connection of the user is stored in the "presence:user:{user_id}" sorted set
+    with its expiration timestamp as a score, connections are kept alive by heartbeats,
+    so connections of the crashed workers just expire. Online users are kept in the "presence:online_users"
+    sorted set with the expiration of their latest connection, the users expired there are set offline
+    by the periodic sweep. Presence events are published to the user's chat rooms (except the broadcast ones)
+    only when the user goes online or offline, typing events are rate limited per user and chat room.
+
+    Presence events are rate limited per user as well, so a flapping connection doesn't fan out to all the user's
+    chat rooms on every reconnect. Changes within the window are delayed and the latest presence of the user is
+    published by the periodic sweep only if it differs from the published one, which is kept
+    in the "presence:published_online_users" set.
+    """
+
+    online_users_key = 'presence:online_users'
+    published_online_users_key = 'presence:published_online_users'
+    # users whose presence changes were rate limited, scored by the timestamp of the end of their window
+    delayed_presence_events_key = 'presence:delayed_events'
+    # removes the connection and the expired ones, then the user from the online users if no connections are left,
+    # only the caller which has removed the user publishes the offline event
+    set_offline_script = """
+    if ARGV[3] ~= '' then
+        redis.call('zrem', KEYS[2], ARGV[3])
+    end
+    redis.call('zremrangebyscore', KEYS[2], '-inf', ARGV[2])
+    if redis.call('zcard', KEYS[2]) > 0 then
+        return 0
+    end
+    return redis.call('zrem', KEYS[1], ARGV[1])
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        event_publisher: EventPublisher,
+        chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC,
+        settings: SettingsABC,
+    ):
+        self.redis_client = redis_client
+        self.event_publisher = event_publisher
+        self.chat_rooms_retrieve_service = chat_rooms_retrieve_service
+        self.settings = settings
+        self._set_offline = redis_client.register_script(self.set_offline_script)
+
+    async def connect(self, user_id: int, connection_id: str):
+        presence_key = self._get_presence_key(user_id)
+        current_timestamp = time.time()
+        expires_at = current_timestamp + self.settings.PRESENCE_TTL_SECONDS
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            pipeline.zremrangebyscore(presence_key, '-inf', current_timestamp)
+            pipeline.zcard(presence_key)
+            pipeline.zadd(presence_key, {connection_id: expires_at})
+            pipeline.expire(presence_key, self.settings.PRESENCE_TTL_SECONDS)
+            pipeline.zadd(self.online_users_key, {user_id: expires_at})
+            _, alive_connections_count, *_ = await pipeline.execute()
+        if not alive_connections_count:
+            await self._publish_presence_changed(user_id, is_online=True)
+
+    async def heartbeat(self, user_id: int, connection_id: str):
+        """
+        The user is added back to the online users if it was set offline by the sweep, e.g. after the heartbeats
+        were delayed longer than the presence ttl, then it's published online again.
+        """
+        presence_key = self._get_presence_key(user_id)
+        expires_at = time.time() + self.settings.PRESENCE_TTL_SECONDS
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            pipeline.zadd(presence_key, {connection_id: expires_at})
+            pipeline.expire(presence_key, self.settings.PRESENCE_TTL_SECONDS)
+            pipeline.zadd(self.online_users_key, {user_id: expires_at}, nx=True)
+            pipeline.zadd(self.online_users_key, {user_id: expires_at}, xx=True)
+            *_, is_user_added, _ = await pipeline.execute()
+        if is_user_added:
+            await self._publish_presence_changed(user_id, is_online=True)
+
+    async def disconnect(self, user_id: int, connection_id: str):
+        if await self._set_user_offline(user_id, connection_id):
+            await self._publish_presence_changed(user_id, is_online=False)
+
+    async def typing(self, user_id: int, chat_room_id: int):
+        typing_key = f'presence:typing:{chat_room_id}:{user_id}'
+        if await self.redis_client.set(typing_key, 1, nx=True, ex=self.settings.TYPING_EVENTS_RATE_LIMIT_SECONDS):
+            await user_typing_event(self.event_publisher, chat_room_id, user_id)
+
+    async def get_online_user_ids(self, user_ids: Iterable[int]) -> list[int]:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        expiration_timestamps = await self.redis_client.zmscore(self.online_users_key, user_ids)
+        current_timestamp = time.time()
+        return [
+            user_id
+            for user_id, expires_at in zip(user_ids, expiration_timestamps)
+            if expires_at is not None and expires_at > current_timestamp
+        ]
+
+    async def get_chat_room_online_user_ids(self, chat_room_id: int) -> list[int]:
+        """
+        Online users are usually much fewer than the members of the large chat rooms, so while there are not too many
+        of them, the online users are looked up among the members instead of looking all the members up.
+        """
+        current_timestamp = time.time()
+        online_users_count = await self.redis_client.zcount(self.online_users_key, current_timestamp, '+inf')
+        if online_users_count <= self.settings.PRESENCE_ONLINE_USERS_LOOKUP_LIMIT:
+            online_user_ids = await self.redis_client.zrangebyscore(self.online_users_key, current_timestamp, '+inf')
+            return await self.chat_rooms_retrieve_service.get_chat_room_member_ids(
+                chat_room_id,
+                user_ids=map(int, online_user_ids),
+            )
+        member_ids = await self.chat_rooms_retrieve_service.get_chat_room_member_ids(chat_room_id)
+        return await self.get_online_user_ids(member_ids)
+
+    async def publish_expired_users_offline(self) -> int:
+        """
+        Publishes offline events of the users whose connections have expired without being closed,
+        e.g. because their worker has crashed.
+        """
+        current_timestamp = time.time()
+        expired_user_ids = await self.redis_client.zrangebyscore(self.online_users_key, '-inf', current_timestamp)
+        offline_users_count = 0
+        for user_id in map(int, expired_user_ids):
+            if await self._set_user_offline(user_id):
+                await self._publish_presence_changed(user_id, is_online=False)
+                offline_users_count += 1
+        return offline_users_count
+
+    async def _set_user_offline(self, user_id: int, connection_id: str = '') -> bool:
+        return bool(
+            await self._set_offline(
+                keys=(self.online_users_key, self._get_presence_key(user_id)),
+                args=(user_id, time.time(), connection_id),
+            ),
+        )
+
+    async def publish_delayed_presence_events(self) -> int:
+        """
+        Publishes the latest presence of the users whose presence changes were rate limited.
+        """
+        current_timestamp = time.time()
+        delayed_user_ids = await self.redis_client.zrangebyscore(
+            self.delayed_presence_events_key,
+            '-inf',
+            current_timestamp,
+        )
+        published_events_count = 0
+        for user_id in map(int, delayed_user_ids):
+            # the concurrent sweeps don't publish the same user twice
+            if not await self.redis_client.zrem(self.delayed_presence_events_key, user_id):
+                continue
+            is_online = bool(await self.get_online_user_ids((user_id,)))
+            published_events_count += await self._publish_presence_changed(user_id, is_online)
+        return published_events_count
+
+    async def _publish_presence_changed(self, user_id: int, is_online: bool) -> bool:
+        if bool(await self.redis_client.sismember(self.published_online_users_key, user_id)) == is_online:
+            return False
+        rate_limit_seconds = self.settings.PRESENCE_EVENTS_RATE_LIMIT_SECONDS
+        if rate_limit_seconds and not await self.redis_client.set(
+            f'presence:events:{user_id}',
+            1,
+            nx=True,
+            ex=rate_limit_seconds,
+        ):
+            await self.redis_client.zadd(
+                self.delayed_presence_events_key,
+                {user_id: time.time() + rate_limit_seconds},
+            )
+            return False
+        if is_online:
+            await self.redis_client.sadd(self.published_online_users_key, user_id)
+        else:
+            await self.redis_client.srem(self.published_online_users_key, user_id)
+        chat_room_ids = await self.chat_rooms_retrieve_service.get_user_chat_room_ids(user_id, is_broadcast=False)
+        await user_presence_changed_event(self.event_publisher, user_id, chat_room_ids, is_online)
+        return True
+
+    @staticmethod
+    def _get_presence_key(user_id: int) -> str:
+        return f'presence:user:{user_id}'
@@ -0,0 +1,35 @@
+import abc
+import time
+
+from chat.services.exceptions.chat_rooms import ChatRoomMessagesRateLimitExceededException
+from redis import asyncio as aioredis
+
+
+class ChatRoomsMessagesRateLimiterABC(abc.ABC):
+    @abc.abstractmethod
+    async def hit(self, chat_room_id: int):
+        """
+        Must register a new message in the chat room and raise exception if the limit is exceeded.
+        """
+        pass
+
+
+class RedisChatRoomsMessagesRateLimiter(ChatRoomsMessagesRateLimiterABC):
+    """
+    Fixed window rate limiter of messages sent to a chat room, shared by all the workers.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, limit: int, window_seconds: int):
+        self.redis_client = redis_client
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    async def hit(self, chat_room_id: int):
+        window = int(time.time() // self.window_seconds)
+        rate_limit_key = f'rate_limit:chat_room:{chat_room_id}:{window}'
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            pipeline.incr(rate_limit_key)
+            pipeline.expire(rate_limit_key, self.window_seconds)
+            messages_count, _ = await pipeline.execute()
+        if messages_count > self.limit:
+            raise ChatRoomMessagesRateLimitExceededException
@@ -0,0 +1,268 @@
+import abc
+from collections import Counter
+from typing import Iterable, Optional
+
+from chat.constants.messages import MessagesTypeEnum
+from chat.models import Message, chatroom_members_association_table
+from core.database.repository import BaseDatabaseRepository
+from core.database.versions import RedisTablesVersions, get_table_scope
+from redis import asyncio as aioredis
+from sqlalchemy import func, or_, select, update
+
+
+class UnreadMessagesCountersServiceABC(abc.ABC):
+    @abc.abstractmethod
+    async def increment_chat_room_messages_count(self, chat_room_id: int, author_id: Optional[int] = None):
+        pass
+
+    @abc.abstractmethod
+    async def increment_chat_rooms_messages_counts(self, messages: Iterable[tuple[int, Optional[int]]]):
+        pass
+
+    @abc.abstractmethod
+    async def set_unread_messages_count(self, user_id: int, chat_room_id: int, unread_messages_count: int):
+        pass
+
+    @abc.abstractmethod
+    async def get_unread_messages_counts(self, user_id: int, chat_room_ids: Iterable[int]) -> dict[int, int]:
+        pass
+
+    @abc.abstractmethod
+    async def are_counters_seeded(self) -> bool:
+        pass
+
+    @abc.abstractmethod
+    async def seed_counters(
+        self,
+        messages_counts: Iterable[tuple[int, int]],
+        read_messages_counts: Iterable[tuple[int, int, int]],
+    ):
+        pass
+
+
+class RedisUnreadMessagesCountersService(UnreadMessagesCountersServiceABC):
+    """
+    Keeps unread messages counters in redis hashes.
+
+    Instead of incrementing a counter of every chat room member on each message, only the total messages count
+    of the chat room is incremented, while every user keeps a snapshot of that count taken when the user read
+    the chat room. Unread messages count is the difference between them, so both writing and reading are O(1).
+
+    The counts are approximate: messages are counted after they are committed, while the snapshot is taken
+    against the unread messages counted by the database, so a message committed concurrently with the snapshot
+    may be missed or counted twice. The difference lasts till the next snapshot of the chat room by the user.
+    """
+
+    chat_rooms_messages_count_key = 'chat_rooms:messages_count'
+    # counters of the messages sent before they were kept in redis are seeded from the database once
+    seeded_key = 'chat_rooms:messages_count:seeded'
+    # counters aren't stored in the database, so their changes are versioned as a table of their own:
+    # the messages counts within the scopes of the chat rooms and the read messages counts within the users' ones
+    versions_table_name = 'unread_messages_counters'
+    # reading the messages count and writing the snapshot aren't interleaved with the increments of the count
+    set_unread_messages_count_script = """
+    local messages_count = tonumber(redis.call('hget', KEYS[1], ARGV[1]) or 0)
+    redis.call('hset', KEYS[2], ARGV[1], math.max(messages_count - tonumber(ARGV[2]), 0))
+    return redis.call('incr', KEYS[3])
+    """
+
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis_client = redis_client
+        self._set_unread_messages_count = redis_client.register_script(self.set_unread_messages_count_script)
+
+    async def increment_chat_room_messages_count(self, chat_room_id: int, author_id: Optional[int] = None):
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            pipeline.hincrby(self.chat_rooms_messages_count_key, chat_room_id, 1)
+            pipeline.incr(self._get_chat_room_versions_key(chat_room_id))
+            if author_id:
+                pipeline.hincrby(self._get_read_messages_count_key(author_id), chat_room_id, 1)
+                pipeline.incr(self._get_user_versions_key(author_id))
+            await pipeline.execute()
+
+    async def increment_chat_rooms_messages_counts(self, messages: Iterable[tuple[int, Optional[int]]]):
+        """
+        Increments the counters by the chat room ids and the author ids of many messages at once.
+        """
+        messages_counts, authors_messages_counts = Counter(), Counter()
+        for chat_room_id, author_id in messages:
+            messages_counts[chat_room_id] += 1
+            if author_id:
+                authors_messages_counts[(author_id, chat_room_id)] += 1
+        if not messages_counts:
+            return
+        async with self.redis_client.pipeline(transaction=True) as pipeline:
+            for chat_room_id, messages_count in messages_counts.items():
+                pipeline.hincrby(self.chat_rooms_messages_count_key, chat_room_id, messages_count)
+                pipeline.incr(self._get_chat_room_versions_key(chat_room_id))
+            for (author_id, chat_room_id), messages_count in authors_messages_counts.items():
+                pipeline.hincrby(self._get_read_messages_count_key(author_id), chat_room_id, messages_count)
+            for author_id in {author_id for author_id, _ in authors_messages_counts}:
+                pipeline.incr(self._get_user_versions_key(author_id))
+            await pipeline.execute()
+
+    async def set_unread_messages_count(self, user_id: int, chat_room_id: int, unread_messages_count: int):
+        await self._set_unread_messages_count(
+            keys=(
+                self.chat_rooms_messages_count_key,
+                self._get_read_messages_count_key(user_id),
+                self._get_user_versions_key(user_id),
+            ),
+            args=(chat_room_id, unread_messages_count),
+        )
+
+    async def get_unread_messages_counts(self, user_id: int, chat_room_ids: Iterable[int]) -> dict[int, int]:
+        chat_room_ids = list(chat_room_ids)
+        if not chat_room_ids:
+            return {}
+        async with self.redis_client.pipeline(transaction=False) as pipeline:
+            pipeline.hmget(self.chat_rooms_messages_count_key, chat_room_ids)
+            pipeline.hmget(self._get_read_messages_count_key(user_id), chat_room_ids)
+            messages_counts, read_messages_counts = await pipeline.execute()
+        return {
+            chat_room_id: max(int(messages_count or 0) - int(read_messages_count or 0), 0)
+            for chat_room_id, messages_count, read_messages_count in zip(
+                chat_room_ids,
+                messages_counts,
+                read_messages_counts,
+            )
+        }
+
+    async def are_counters_seeded(self) -> bool:
+        return bool(await self.redis_client.exists(self.seeded_key))
+
+    async def seed_counters(
+        self,
+        messages_counts: Iterable[tuple[int, int]],
+        read_messages_counts: Iterable[tuple[int, int, int]],
+    ):
+        """
+        Overwrites the counters by the counts of the messages in the chat rooms and of the messages read by their
+        members, the counts must be taken from the database after the messages are counted in redis.
+        """
+        async with self.redis_client.pipeline(transaction=False) as pipeline:
+            for chat_room_id, messages_count in messages_counts:
+                pipeline.hset(self.chat_rooms_messages_count_key, chat_room_id, messages_count)
+                pipeline.incr(self._get_chat_room_versions_key(chat_room_id))
+            for user_id, chat_room_id, read_messages_count in read_messages_counts:
+                pipeline.hset(self._get_read_messages_count_key(user_id), chat_room_id, read_messages_count)
+                pipeline.incr(self._get_user_versions_key(user_id))
+            pipeline.set(self.seeded_key, 1)
+            await pipeline.execute()
+
+    @staticmethod
+    def _get_read_messages_count_key(user_id: int) -> str:
+        return f'chat_rooms:read_messages_count:{user_id}'
+
+    @classmethod
+    def get_chat_room_versions_table(cls, chat_room_id: int) -> str:
+        return get_table_scope(f'{cls.versions_table_name}:chat_rooms', chat_room_id)
+
+    @classmethod
+    def get_user_versions_table(cls, user_id: int) -> str:
+        return get_table_scope(f'{cls.versions_table_name}:users', user_id)
+
+    def _get_chat_room_versions_key(self, chat_room_id: int) -> str:
+        return RedisTablesVersions.get_key(self.get_chat_room_versions_table(chat_room_id))
+
+    def _get_user_versions_key(self, user_id: int) -> str:
+        return RedisTablesVersions.get_key(self.get_user_versions_table(user_id))
+
+
+class ChatRoomsReadCursorsServiceABC(abc.ABC):
+    @abc.abstractmethod
+    async def advance_read_cursor(self, user_id: int, chat_room_id: int, message_id: int) -> Optional[dict]:
+        pass
+
+    @abc.abstractmethod
+    async def seed_unread_messages_counters(self) -> bool:
+        pass
+
+
+class ChatRoomsReadCursorsService(ChatRoomsReadCursorsServiceABC):
+    def __init__(
+        self,
+        db_repository: BaseDatabaseRepository,
+        unread_messages_counters_service: UnreadMessagesCountersServiceABC,
+    ):
+        self.db_repository = db_repository
+        self.unread_messages_counters_service = unread_messages_counters_service
+
+    async def advance_read_cursor(self, user_id: int, chat_room_id: int, message_id: int) -> Optional[dict]:
+        """
+        Moves the read cursor of the user in the chat room forward, the cursor never moves backwards.
+        Returns None if the user isn't a member of the chat room or the message isn't sent to it.
+        """
+        last_read_message_id = await self._update_last_read_message_id(user_id, chat_room_id, message_id)
+        if last_read_message_id is None:
+            return None
+        unread_messages_count = await self.db_repository.count(
+            db_query=select(Message.id).where(
+                Message.chat_room_id == chat_room_id,
+                Message.id > last_read_message_id,
+                Message.message_type == MessagesTypeEnum.PRIMARY.value,
+                or_(Message.author_id.is_(None), Message.author_id != user_id),
+            ),
+        )
+        await self.unread_messages_counters_service.set_unread_messages_count(
+            user_id,
+            chat_room_id,
+            unread_messages_count,
+        )
+        return {'last_read_message_id': last_read_message_id, 'unread_messages_count': unread_messages_count}
+
+    async def seed_unread_messages_counters(self) -> bool:
+        """
+        Seeds the unread messages counters from the database unless they are already seeded.
+        Members have read the messages up to their read cursors and their own messages.
+        """
+        if await self.unread_messages_counters_service.are_counters_seeded():
+            return False
+        messages_counts = await self.db_repository.execute(
+            select(Message.chat_room_id, func.count(Message.id))
+            .where(Message.message_type == MessagesTypeEnum.PRIMARY.value)
+            .group_by(Message.chat_room_id),
+        )
+        read_messages_count_query = (
+            select(func.count(Message.id))
+            .where(
+                Message.chat_room_id == chatroom_members_association_table.c.room_id,
+                Message.message_type == MessagesTypeEnum.PRIMARY.value,
+                or_(
+                    Message.id <= func.coalesce(chatroom_members_association_table.c.last_read_message_id, 0),
+                    Message.author_id == chatroom_members_association_table.c.user_id,
+                ),
+            )
+            .scalar_subquery()
+        )
+        read_messages_counts = await self.db_repository.execute(
+            select(
+                chatroom_members_association_table.c.user_id,
+                chatroom_members_association_table.c.room_id,
+                read_messages_count_query,
+            ),
+        )
+        await self.unread_messages_counters_service.seed_counters(messages_counts.all(), read_messages_counts.all())
+        return True
+
+    async def _update_last_read_message_id(self, user_id: int, chat_room_id: int, message_id: int) -> Optional[int]:
+        last_read_message_id_column = chatroom_members_association_table.c.last_read_message_id
+        result = await self.db_repository.execute(
+            update(chatroom_members_association_table)
+            .where(
+                chatroom_members_association_table.c.room_id == chat_room_id,
+                chatroom_members_association_table.c.user_id == user_id,
+                # the cursor never moves backwards, so a nonexistent message must not move it beyond the real ones
+                select(Message.id)
+                .where(
+                    Message.id == message_id,
+                    Message.chat_room_id == chat_room_id,
+                    Message.message_type == MessagesTypeEnum.PRIMARY.value,
+                )
+                .exists(),
+            )
+            .values(last_read_message_id=func.greatest(func.coalesce(last_read_message_id_column, 0), message_id))
+            .returning(last_read_message_id_column),
+        )
+        last_read_message_id = result.scalar()
+        await self.db_repository.commit()
+        return last_read_message_id
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Callable, Optional
+
+from core.dependencies.providers import EventReceiver, provide_event_receiver
+from redis.exceptions import RedisError
+
+if TYPE_CHECKING:
+    from chat.websockets.chat import ChatRoomsWebSocketConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastChatRoomsFanout:
+    """
+    Delivers events of the broadcast chat rooms to the websocket connections of the current worker process.
+
+    Instead of a redis subscription per connection, the worker subscribes to a broadcast chat room channel once
+    while it has at least one local recipient, and every published event is put straight into the send queues
+    of the connections from the local recipients index, so a single publish costs one redis message per worker.
+    If the subscription fails, e.g. the connection to redis is lost, the worker resubscribes to all the channels
+    with a backoff, so the connections stay subscribed while they are open.
+    """
+
+    def __init__(
+        self,
+        event_receiver_factory: Callable[[], EventReceiver] = provide_event_receiver,
+        min_resubscribe_delay_seconds: float = 0.1,
+        max_resubscribe_delay_seconds: float = 10,
+    ):
+        self._event_receiver_factory = event_receiver_factory
+        self._min_resubscribe_delay_seconds = min_resubscribe_delay_seconds
+        self._max_resubscribe_delay_seconds = max_resubscribe_delay_seconds
+        self._event_receiver: Optional[EventReceiver] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._recipients: defaultdict[int, set['ChatRoomsWebSocketConnectionManager']] = defaultdict(set)
+        self._lock = asyncio.Lock()
+
+    def get_recipients_count(self, chat_room_id: int) -> int:
+        return len(self._recipients.get(chat_room_id, ()))
+
+    async def subscribe(self, connection_manager: 'ChatRoomsWebSocketConnectionManager', *chat_room_ids: int):
+        async with self._lock:
+            new_channels = []
+            for chat_room_id in chat_room_ids:
+                if not self._recipients[chat_room_id]:
+                    new_channels.append(self.get_channel(chat_room_id))
+                self._recipients[chat_room_id].add(connection_manager)
+            if not new_channels:
+                return
+            if not self._event_receiver:
+                self._event_receiver = self._event_receiver_factory()
+            await self._event_receiver.subscribe(*new_channels)
+            if not self._listener_task or self._listener_task.done():
+                self._listener_task = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, connection_manager: 'ChatRoomsWebSocketConnectionManager'):
+        async with self._lock:
+            channels_to_unsubscribe = []
+            for chat_room_id, recipients in list(self._recipients.items()):
+                recipients.discard(connection_manager)
+                if not recipients:
+                    del self._recipients[chat_room_id]
+                    channels_to_unsubscribe.append(self.get_channel(chat_room_id))
+            if channels_to_unsubscribe and self._event_receiver:
+                await self._event_receiver.unsubscribe(*channels_to_unsubscribe)
+            if not self._recipients and self._listener_task:
+                self._listener_task.cancel()
+                self._listener_task = None
+
+    async def _listen(self):
+        resubscribe_delay_seconds = self._min_resubscribe_delay_seconds
+        while True:
+            try:
+                async for message in self._event_receiver.listen():
+                    resubscribe_delay_seconds = self._min_resubscribe_delay_seconds
+                    self._deliver(message)
+                return
+            except RedisError:
+                logger.exception(
+                    'Listening to the broadcast chat rooms failed, resubscribing in %s seconds',
+                    resubscribe_delay_seconds,
+                )
+            await asyncio.sleep(resubscribe_delay_seconds)
+            resubscribe_delay_seconds = min(resubscribe_delay_seconds * 2, self._max_resubscribe_delay_seconds)
+            try:
+                await self._resubscribe()
+            except RedisError:
+                logger.exception('Resubscribing to the broadcast chat rooms failed')
+
+    async def _resubscribe(self):
+        async with self._lock:
+            failed_event_receiver, self._event_receiver = self._event_receiver, self._event_receiver_factory()
+            try:
+                await failed_event_receiver.close()
+            except RedisError:
+                pass
+            if self._recipients:
+                await self._event_receiver.subscribe(*map(self.get_channel, self._recipients))
+
+    def _deliver(self, message: Optional[dict]):
+        if not message or message.get('type') != 'message' or not (data := message.get('data')):
+            return
+        chat_room_id = int(message['channel'].decode('utf-8').rsplit(':', 1)[-1])
+        data = data.decode('utf-8')
+        for connection_manager in tuple(self._recipients.get(chat_room_id, ())):
+            connection_manager.enqueue_message(data)
+
+    @staticmethod
+    def get_channel(chat_room_id: int) -> str:
+        return f'chat_room:{chat_room_id}'
+
+
+broadcast_chat_rooms_fanout = BroadcastChatRoomsFanout()
@@ -1,45 +1,214 @@
+import asyncio
 import json
+import uuid
 from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, Optional, Union
 
 from accounts.models import User
 from chat.services.chat_rooms import ChatRoomsRetrieveServiceABC
+from chat.websockets.broadcast import BroadcastChatRoomsFanout, broadcast_chat_rooms_fanout
+from core.config import SettingsABC
 from core.dependencies.providers import EventPublisher, EventReceiver
-from fastapi import WebSocket
+from core.metrics import REDIS_PUBLISH_DURATION_SECONDS, WEBSOCKET_CONNECTIONS, WEBSOCKET_SEND_QUEUE_SIZE
+from fastapi import WebSocket, status
 from starlette.websockets import WebSocketState
 
+if TYPE_CHECKING:
+    from chat.services.presence import PresenceServiceABC
+    from chat.websockets.frames import ChatRoomsWebSocketFramesHandlerABC
+
 
 class WebSocketConnection:
-    def __init__(self, websocket: WebSocket, user: User, connected_at: datetime = datetime.now()):
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user: User,
+        connected_at: Optional[datetime] = None,
+        send_queue_max_size: int = 0,
+    ):
         self.websocket = websocket
         self.user = user
-        self.connected_at = connected_at
+        self.connected_at = connected_at or datetime.now()
+        self.connection_id = uuid.uuid4().hex
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.send_queue: asyncio.Queue[str] = asyncio.Queue(maxsize=send_queue_max_size)
+        self.is_send_queue_overflowed = False
+
+    def count_received_bytes(self, received_bytes_count: int):
+        self.bytes_received += received_bytes_count
+
+
+class WebSocketConnectionsRegistry:
+    """
+    Registry of the live websocket connections of the current worker process.
+    """
+
+    def __init__(self):
+        self._connections: dict[str, WebSocketConnection] = {}
+        self._closed_connections_bytes_sent = 0
+        self._closed_connections_bytes_received = 0
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def register(self, websocket_connection: WebSocketConnection):
+        self._connections[websocket_connection.connection_id] = websocket_connection
+        WEBSOCKET_CONNECTIONS.inc()
+
+    def unregister(self, websocket_connection: WebSocketConnection):
+        if self._connections.pop(websocket_connection.connection_id, None):
+            WEBSOCKET_CONNECTIONS.dec()
+            self._closed_connections_bytes_sent += websocket_connection.bytes_sent
+            self._closed_connections_bytes_received += websocket_connection.bytes_received
+
+    def get_stats(self) -> dict:
+        connections = list(self._connections.values())
+        send_queues_sizes = [connection.send_queue.qsize() for connection in connections]
+        return {
+            'connections_count': len(connections),
+            'bytes_sent': self._closed_connections_bytes_sent + sum(c.bytes_sent for c in connections),
+            'bytes_received': self._closed_connections_bytes_received + sum(c.bytes_received for c in connections),
+            'send_queues_size': sum(send_queues_sizes),
+            'max_send_queue_size': max(send_queues_sizes, default=0),
+        }
+
+
+websocket_connections_registry = WebSocketConnectionsRegistry()
 
 
 class ChatRoomsWebSocketConnectionManager:
-    def __init__(self, websocket_connection: WebSocketConnection, event_receiver: EventReceiver):
+    def __init__(
+        self,
+        websocket_connection: WebSocketConnection,
+        event_receiver: EventReceiver,
+        presence_service: Optional['PresenceServiceABC'] = None,
+        connections_registry: WebSocketConnectionsRegistry = websocket_connections_registry,
+        broadcast_fanout: BroadcastChatRoomsFanout = broadcast_chat_rooms_fanout,
+    ):
         self.websocket_connection = websocket_connection
         self.event_receiver = event_receiver
+        self.presence_service = presence_service
+        self.connections_registry = connections_registry
+        self.broadcast_fanout = broadcast_fanout
+        self.close_code = status.WS_1000_NORMAL_CLOSURE
 
     async def receive_messages(self, chat_rooms_retrieve_service: ChatRoomsRetrieveServiceABC):
         if self.websocket_connection.websocket.client_state != WebSocketState.CONNECTED:
             await self.accept_connection()
-        chat_room_ids = await chat_rooms_retrieve_service.get_user_chat_room_ids(self.websocket_connection.user)
+        user = self.websocket_connection.user
+        broadcast_chat_room_ids = await chat_rooms_retrieve_service.get_user_chat_room_ids(user, is_broadcast=True)
+        if broadcast_chat_room_ids:
+            await self.broadcast_fanout.subscribe(self, *broadcast_chat_room_ids)
+        chat_room_ids = await chat_rooms_retrieve_service.get_user_chat_room_ids(user, is_broadcast=False)
+        if not chat_room_ids:
+            # events of the broadcast chat rooms are delivered by the worker level fanout
+            return await asyncio.Future()
         await self.event_receiver.subscribe(*(f'chat_room:{chat_room_id}' for chat_room_id in chat_room_ids))
         async for message in self.event_receiver.listen():
             if message and message.get('type') != 'subscribe' and (data := message.get('data')):
-                await self.send_personal_message(json.loads(data.decode('utf-8')))
+                self.enqueue_message(data.decode('utf-8'))
+
+    async def receive_frames(self, frames_handler: 'ChatRoomsWebSocketFramesHandlerABC'):
+        """
+        Reads inbound frames from the client until it disconnects, every frame is answered with an ack if needed.
+        """
+        while True:
+            message = await self.websocket_connection.websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+            raw_frame = message.get('text') or message.get('bytes')
+            self.websocket_connection.count_received_bytes(get_frame_size(raw_frame))
+            ack = await frames_handler.handle_raw_frame(raw_frame)
+            if ack:
+                await self.send_personal_message(ack)
+
+    async def send_messages(self):
+        """
+        Writes queued outbound messages to the client, so a slow client doesn't block receiving of the events.
+        """
+        while True:
+            message = await self.websocket_connection.send_queue.get()
+            await self.websocket_connection.websocket.send_text(message)
+            self.websocket_connection.bytes_sent += get_frame_size(message)
+
+    async def keep_alive(self, settings: SettingsABC):
+        """
+        Returns as soon as the connection has to be reaped because the client doesn't keep up with its messages.
+        Dead connections are detected by the protocol level pings of the server (see core.workers).
+        """
+        while True:
+            await asyncio.sleep(settings.WEBSOCKET_SEND_QUEUE_CHECK_INTERVAL_SECONDS)
+            WEBSOCKET_SEND_QUEUE_SIZE.observe(self.websocket_connection.send_queue.qsize())
+            if self.websocket_connection.is_send_queue_overflowed:
+                self.close_code = status.WS_1013_TRY_AGAIN_LATER
+                return
+
+    async def keep_presence_alive(self, settings: SettingsABC):
+        """
+        Periodically refreshes the presence of the connection user, so it doesn't expire while the connection is alive.
+        """
+        if not self.presence_service:
+            return await asyncio.Future()
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_INTERVAL_SECONDS)
+            await self.presence_service.heartbeat(
+                self.websocket_connection.user.id,
+                self.websocket_connection.connection_id,
+            )
 
     async def accept_connection(self):
         await self.websocket_connection.websocket.accept()
+        self.connections_registry.register(self.websocket_connection)
+        if self.presence_service:
+            await self.presence_service.connect(
+                self.websocket_connection.user.id,
+                self.websocket_connection.connection_id,
+            )
 
     async def disconnect(self):
+        self.connections_registry.unregister(self.websocket_connection)
+        await self.broadcast_fanout.unsubscribe(self)
         if self.websocket_connection.websocket.client_state != WebSocketState.DISCONNECTED:
-            await self.websocket_connection.websocket.close()
+            await self.websocket_connection.websocket.close(code=self.close_code)
         await self.event_receiver.unsubscribe()
+        await self.event_receiver.close()
+        if self.presence_service:
+            await self.presence_service.disconnect(
+                self.websocket_connection.user.id,
+                self.websocket_connection.connection_id,
+            )
 
     @classmethod
     async def broadcast(cls, message: dict, chat_room_id: int, event_publisher: EventPublisher):
-        await event_publisher.publish(f'chat_room:{chat_room_id}', json.dumps(message, default=str))
+        with REDIS_PUBLISH_DURATION_SECONDS.time():
+            await event_publisher.publish(f'chat_room:{chat_room_id}', json.dumps(message, default=str))
+
+    @classmethod
+    async def broadcast_many(cls, messages: Iterable[tuple[dict, int]], event_publisher: EventPublisher):
+        """
+        Publishes the messages to their chat rooms by a single round trip to redis.
+        """
+        with REDIS_PUBLISH_DURATION_SECONDS.time():
+            async with event_publisher.pipeline(transaction=False) as pipeline:
+                for message, chat_room_id in messages:
+                    pipeline.publish(f'chat_room:{chat_room_id}', json.dumps(message, default=str))
+                await pipeline.execute()
 
     async def send_personal_message(self, message: dict):
-        await self.websocket_connection.websocket.send_json(message)
+        self.enqueue_message(json.dumps(message, default=str))
+
+    def enqueue_message(self, message: str):
+        try:
+            self.websocket_connection.send_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.websocket_connection.is_send_queue_overflowed = True
+
+
+def get_frame_size(frame: Union[str, bytes, None]) -> int:
+    """
+    Returns the size of the frame's payload in bytes, the text frames are sent encoded to UTF-8.
+    """
+    if isinstance(frame, str):
+        return len(frame.encode('utf-8'))
+    return len(frame or b'')
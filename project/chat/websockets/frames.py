@@ -0,0 +1,188 @@
+import abc
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from chat.api.permissions.messages import UserChatRoomMessagingPermissions
+from chat.api.v1.schemas.messages import ListMessagesSchema
+from chat.api.v1.schemas.websockets import (
+    DeleteMessagesFrameDataSchema,
+    EditMessageFrameDataSchema,
+    SendMessageFrameDataSchema,
+    WebSocketInboundFrameSchema,
+)
+from chat.constants.messages import MessagesTypeEnum
+from chat.constants.websockets import (
+    WebSocketAckStatusEnum,
+    WebSocketInboundActionTypeEnum,
+    WebSocketOutboundActionTypeEnum,
+)
+from chat.database.selectors.messages import get_message_creation_relations_to_load, get_message_db_query
+from chat.events.presence import user_typing_event
+from chat.models import Message
+from chat.services.messages import MessagesCreateUpdateDeleteServiceABC, MessagesRetrieveServiceABC
+from chat.services.presence import PresenceServiceABC
+from chat.services.rate_limiting import ChatRoomsMessagesRateLimiterABC
+from chat.websockets.chat import WebSocketConnection
+from core.database.repository import BaseDatabaseRepository
+from core.dependencies.providers import EventPublisher
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class ChatRoomsWebSocketFramesHandlerABC(abc.ABC):
+    @abc.abstractmethod
+    async def handle_raw_frame(self, raw_frame: Union[str, bytes, None]) -> Optional[dict]:
+        pass
+
+    @abc.abstractmethod
+    async def handle_frame(self, frame: Any) -> Optional[dict]:
+        pass
+
+
+class ChatRoomsWebSocketFramesHandler(ChatRoomsWebSocketFramesHandlerABC):
+    """
+    Handles inbound frames of the chat websocket on behalf of the already authenticated connection user.
+
+    Frame format: {"action": "send" | "edit" | "delete" | "typing", "ack_id": <optional id>, "data": {...}}.
+    If ack_id is passed, the result of the action is returned as
+    {"action": "ack", "ack_id": <the same id>, "status": "success" | "error", "data" | "detail": ...}.
+    """
+
+    def __init__(
+        self,
+        websocket_connection: WebSocketConnection,
+        chat_room_id: int,
+        db_repository: BaseDatabaseRepository,
+        messages_retrieve_service: MessagesRetrieveServiceABC,
+        messages_create_update_delete_service: MessagesCreateUpdateDeleteServiceABC,
+        event_publisher: EventPublisher,
+        presence_service: Optional[PresenceServiceABC] = None,
+        rate_limiter: Optional[ChatRoomsMessagesRateLimiterABC] = None,
+    ):
+        self.websocket_connection = websocket_connection
+        self.chat_room_id = chat_room_id
+        self.db_repository = db_repository
+        self.messages_retrieve_service = messages_retrieve_service
+        self.messages_create_update_delete_service = messages_create_update_delete_service
+        self.event_publisher = event_publisher
+        self.presence_service = presence_service
+        self.rate_limiter = rate_limiter
+        self._actions_handlers: dict[WebSocketInboundActionTypeEnum, Callable[[dict], Awaitable[Any]]] = {
+            WebSocketInboundActionTypeEnum.SEND: self.send_message,
+            WebSocketInboundActionTypeEnum.EDIT: self.edit_message,
+            WebSocketInboundActionTypeEnum.DELETE: self.delete_messages,
+            WebSocketInboundActionTypeEnum.TYPING: self.typing,
+        }
+
+    async def handle_raw_frame(self, raw_frame: Union[str, bytes, None]) -> Optional[dict]:
+        try:
+            frame = json.loads(raw_frame)
+        except (TypeError, ValueError):
+            return self._get_ack(None, WebSocketAckStatusEnum.ERROR, detail='Frame must be a valid JSON object')
+        return await self.handle_frame(frame)
+
+    async def handle_frame(self, frame: Any) -> Optional[dict]:
+        try:
+            frame = WebSocketInboundFrameSchema.parse_obj(frame)
+        except ValidationError as e:
+            ack_id = frame.get('ack_id') if isinstance(frame, dict) else None
+            return self._get_ack(ack_id, WebSocketAckStatusEnum.ERROR, detail=e.errors())
+        try:
+            result = await self._actions_handlers[frame.action](frame.data)
+        except ValidationError as e:
+            return self._get_ack(frame.ack_id, WebSocketAckStatusEnum.ERROR, detail=e.errors())
+        except HTTPException as e:
+            return self._get_ack(frame.ack_id, WebSocketAckStatusEnum.ERROR, detail=e.detail)
+        except Exception:
+            logger.exception('Failed to handle the %s frame', frame.action)
+            # the session lives as long as the connection, so it must not be left in the failed transaction
+            await self.db_repository.rollback()
+            return self._get_ack(frame.ack_id, WebSocketAckStatusEnum.ERROR, detail='Frame could not be handled')
+        if frame.ack_id is None:
+            return None
+        return self._get_ack(frame.ack_id, WebSocketAckStatusEnum.SUCCESS, data=result)
+
+    async def send_message(self, data: dict) -> dict:
+        message_data = SendMessageFrameDataSchema.parse_obj(data)
+        await self._get_messaging_permissions().check_user_can_send_messages()
+        if message_data.scheduled_at:
+            message = await self.messages_create_update_delete_service.create_scheduled_message(
+                message_data.text,
+                author_id=self.websocket_connection.user.id,
+                replayed_message_id=message_data.replayed_message_id,
+                scheduled_at=message_data.scheduled_at,
+                relations_to_load_after_creation=get_message_creation_relations_to_load(),
+            )
+        else:
+            message = await self.messages_create_update_delete_service.create_message(
+                message_data.text,
+                author_id=self.websocket_connection.user.id,
+                replayed_message_id=message_data.replayed_message_id,
+                relations_to_load_after_creation=get_message_creation_relations_to_load(),
+            )
+        return ListMessagesSchema.from_orm(message).dict()
+
+    async def edit_message(self, data: dict) -> dict:
+        message_data = EditMessageFrameDataSchema.parse_obj(data)
+        await self._check_message_author((message_data.message_id,))
+        message = await self.messages_retrieve_service.get_one_message(
+            db_query=get_message_db_query(
+                Message.id == message_data.message_id,
+                Message.chat_room_id == self.chat_room_id,
+            ),
+        )
+        if not message:
+            raise HTTPException(status_code=404, detail='Message is not found')
+        data_for_update = message_data.dict(exclude={'message_id'}, exclude_unset=True)
+        if message.message_type == MessagesTypeEnum.SCHEDULED:
+            message = await self.messages_create_update_delete_service.update_scheduled_message(
+                message,
+                **data_for_update,
+            )
+        else:
+            message = await self.messages_create_update_delete_service.update_message(message, **data_for_update)
+        return ListMessagesSchema.from_orm(message).dict()
+
+    async def delete_messages(self, data: dict) -> dict:
+        messages_data = DeleteMessagesFrameDataSchema.parse_obj(data)
+        await self._check_message_author(messages_data.message_ids)
+        if messages_data.message_type == MessagesTypeEnum.SCHEDULED:
+            message_ids = await self.messages_create_update_delete_service.delete_scheduled_messages(
+                messages_data.message_ids,
+            )
+        else:
+            message_ids = await self.messages_create_update_delete_service.delete_messages(messages_data.message_ids)
+        return {'message_ids': message_ids}
+
+    async def typing(self, data: dict) -> None:
+        if self.presence_service:
+            await self.presence_service.typing(self.websocket_connection.user.id, self.chat_room_id)
+            return
+        await user_typing_event(self.event_publisher, self.chat_room_id, self.websocket_connection.user.id)
+
+    async def _check_message_author(self, message_ids: tuple[int, ...]):
+        await self._get_messaging_permissions(message_ids).check_message_author()
+
+    def _get_messaging_permissions(
+        self,
+        message_ids: Optional[tuple[int, ...]] = None,
+    ) -> UserChatRoomMessagingPermissions:
+        return UserChatRoomMessagingPermissions(
+            request_user=self.websocket_connection.user,
+            chat_room_id=self.chat_room_id,
+            db_repository=self.db_repository,
+            message_ids=message_ids,
+            rate_limiter=self.rate_limiter,
+        )
+
+    @staticmethod
+    def _get_ack(ack_id: Optional[Union[int, str]], status: WebSocketAckStatusEnum, **payload) -> dict:
+        return {
+            'action': WebSocketOutboundActionTypeEnum.ACK.value,
+            'ack_id': ack_id,
+            'status': status.value,
+            **payload,
+        }
@@ -0,0 +1,78 @@
+import asyncio
+import dataclasses
+import logging
+from typing import Optional
+
+from core.database.base import provide_db_sessionmaker
+from core.database.repository import SQLAlchemyDatabaseRepository
+from core.dependencies.providers import provide_settings
+from core.metrics import RELEASED_FILES_DELETION_DURATION_SECONDS, RELEASED_FILES_REMOVED_TOTAL
+from core.services.files import FilesService
+from core.services.images import generate_image_variants
+from core.services.orphan_files import OrphanFilesCollector
+from mixins.models import FileBlob
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_blob_variants(job_context: dict, blob_hash: str):
+    settings = provide_settings()
+    async with (db_session := provide_db_sessionmaker()()):
+        files_service = FilesService(SQLAlchemyDatabaseRepository(FileBlob, db_session), settings)
+        file_blob = await files_service.get_file_blob(blob_hash)
+        if not file_blob:
+            return
+        # variants of the blob may be already generated by the job of a concurrent upload of the same content
+        variants = file_blob.variants
+        if variants is None:
+            try:
+                # the variants are generated from the local copy of the blob and stored next to it
+                async with files_service.file_storage.local_copy(file_blob.file_path) as directory:
+                    variants = await asyncio.get_running_loop().run_in_executor(
+                        job_context['process_pool'],
+                        generate_image_variants,
+                        directory,
+                        file_blob.file_path,
+                        settings.IMAGE_VARIANTS_SIZES,
+                        settings.IMAGE_VARIANTS_QUALITY,
+                    )
+                    await files_service.file_storage.save_local_files(directory, variants.values())
+            except (OSError, Image.DecompressionBombError):
+                # the file isn't a valid image, empty variants are recorded, so it isn't tried again
+                logger.exception('Failed to generate variants of the blob %s', blob_hash)
+                variants = {}
+        await files_service.record_blob_variants(blob_hash, variants)
+
+
+async def delete_released_files(job_context: dict, blobs_hashes: list[str], file_paths: list[str]):
+    async with (db_session := provide_db_sessionmaker()()):
+        files_service = FilesService(SQLAlchemyDatabaseRepository(FileBlob, db_session), provide_settings())
+        with RELEASED_FILES_DELETION_DURATION_SECONDS.time():
+            removed_files_count = await files_service.delete_released_files(blobs_hashes, file_paths)
+    RELEASED_FILES_REMOVED_TOTAL.inc(removed_files_count)
+
+
+async def collect_orphan_files(job_context: dict, dry_run: Optional[bool] = None) -> dict:
+    settings = provide_settings()
+    async with (db_session := provide_db_sessionmaker()()):
+        db_repository = SQLAlchemyDatabaseRepository(FileBlob, db_session)
+        orphan_files_collector = OrphanFilesCollector(
+            FilesService(db_repository, settings),
+            db_repository,
+            settings,
+            dry_run=settings.ORPHAN_FILES_GC_DRY_RUN if dry_run is None else dry_run,
+        )
+        stats = await orphan_files_collector.collect()
+    logger.info(
+        'Files GC%s: %s files scanned in %.1fs (%.0f files/s), %s orphan files, %s unreferenced blobs, '
+        '%s stale uploads',
+        ' dry run' if stats.dry_run else '',
+        stats.scanned_files_count,
+        stats.duration_seconds,
+        stats.scanned_files_per_second,
+        stats.orphan_files_count,
+        stats.unreferenced_blobs_count,
+        stats.stale_uploads_count,
+    )
+    return dataclasses.asdict(stats)
@@ -0,0 +1,51 @@
+import hashlib
+from typing import Any, Iterable
+
+from core.database.versions import TablesVersionsABC
+from core.dependencies.providers import provide_file_storage
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+async def get_tables_versions_etag(
+    request: Request,
+    tables_versions: TablesVersionsABC,
+    tables: Iterable[str],
+    extra: Iterable[Any] = (),
+) -> str:
+    """
+    Weak ETag of the response built from the data of the tables, it changes with every committed change
+    of the tables, so it can be computed without querying the data itself.
+    Parameters of the request and anything else the response depends on (e.g. request user) must be in extra.
+    Urls of the files in the responses may change without the data, so the version of the urls is included too.
+    """
+    tables = tuple(tables)
+    versions = await tables_versions.get_versions(*tables)
+    urls_version = provide_file_storage().get_urls_version()
+    etag_source = repr((request.url.path, request.url.query, tables, versions, urls_version, tuple(extra)))
+    return f'W/"{hashlib.blake2b(etag_source.encode(), digest_size=16).hexdigest()}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if not (if_none_match := request.headers.get('if-none-match')):
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # weak comparison, the W/ prefixes are ignored
+    return _strip_weak_prefix(etag) in {_strip_weak_prefix(value.strip()) for value in if_none_match.split(',')}
+
+
+def set_conditional_headers(response: Response, etag: str) -> Response:
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.headers['Vary'] = 'Authorization'
+    return response
+
+
+def get_not_modified_response(etag: str) -> Response:
+    return set_conditional_headers(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def _strip_weak_prefix(etag: str) -> str:
+    return etag[2:] if etag.startswith('W/') else etag
@@ -1,6 +1,7 @@
 import abc
 import os
 from pathlib import Path
+from typing import Optional
 
 from core.contrib import redis as redis_contrib
 from dotenv import load_dotenv
@@ -13,8 +14,10 @@ load_dotenv()
 
 class SettingsABC(abc.ABC):
     BASE_DIR: str
+    DEBUG: bool
 
     DATABASE_URL: str
+    DUPLICATED_QUERIES_WARNING_THRESHOLD: int
     HOST_DOMAIN: str
 
     DATETIME_INPUT_OUTPUT_FORMAT: str
@@ -32,16 +35,74 @@ class SettingsABC(abc.ABC):
 
     REDIS_HOST_URL: str
 
+    DATABASE_CACHE_ENABLED: bool
+    DATABASE_CACHE_TTL_SECONDS: dict[str, int]
+    DATABASE_CACHE_LOCK_TIMEOUT_SECONDS: float
+
+    PRESENCE_TTL_SECONDS: int
+    PRESENCE_HEARTBEAT_INTERVAL_SECONDS: int
+    PRESENCE_ONLINE_USERS_LOOKUP_LIMIT: int
+    TYPING_EVENTS_RATE_LIMIT_SECONDS: int
+    PRESENCE_EVENTS_RATE_LIMIT_SECONDS: int
+
+    WEBSOCKET_PING_INTERVAL_SECONDS: int
+    WEBSOCKET_PING_TIMEOUT_SECONDS: int
+    WEBSOCKET_SEND_QUEUE_CHECK_INTERVAL_SECONDS: int
+    WEBSOCKET_SEND_QUEUE_MAX_SIZE: int
+
+    BROADCAST_CHAT_ROOMS_MESSAGES_RATE_LIMIT: int
+    BROADCAST_CHAT_ROOMS_RATE_LIMIT_WINDOW_SECONDS: int
+
+    EVENT_LOOP_WATCHDOG_ENABLED: bool
+    EVENT_LOOP_WATCHDOG_INTERVAL_SECONDS: float
+    EVENT_LOOP_BLOCKING_THRESHOLD_SECONDS: float
+
     PWD_CONTEXT: CryptContext
 
     MEDIA_PATH: str
     MEDIA_URL: str
+    MEDIA_CACHE_MAX_AGE_SECONDS: int
+    MEDIA_ACCEL_REDIRECT_LOCATION: Optional[str]
+
+    FILES_STORAGE_BACKEND: str
+    S3_BUCKET_NAME: Optional[str]
+    S3_ENDPOINT_URL: Optional[str]
+    S3_PUBLIC_ENDPOINT_URL: Optional[str]
+    S3_REGION_NAME: Optional[str]
+    S3_ACCESS_KEY_ID: Optional[str]
+    S3_SECRET_ACCESS_KEY: Optional[str]
+    S3_MAX_POOL_CONNECTIONS: int
+    S3_MULTIPART_THRESHOLD: int
+    S3_MULTIPART_CHUNK_SIZE: int
+    S3_MULTIPART_CONCURRENCY: int
+    S3_PRESIGNED_URLS_EXPIRE_SECONDS: int
+    S3_PRESIGNED_URLS_SIGNING_WINDOW_SECONDS: int
+
+    IMAGE_VARIANTS_SIZES: dict[str, int]
+    IMAGE_VARIANTS_QUALITY: int
+    PROCESS_POOL_MAX_WORKERS: Optional[int]
+
+    UPLOADS_PATH: str
+    UPLOADS_MAX_SIZE: int
+    UPLOADS_TTL_SECONDS: int
+    UPLOADS_CHUNK_LOCK_TIMEOUT_SECONDS: int
+
+    FILES_DELETION_BATCH_SIZE: int
+    ORPHAN_FILES_GC_HOUR: int
+    ORPHAN_FILES_GC_BATCH_SIZE: int
+    ORPHAN_FILES_GC_GRACE_PERIOD_SECONDS: int
+    ORPHAN_FILES_GC_DRY_RUN: bool
+
+    SCHEDULED_MESSAGES_BUCKET_MILLISECONDS: int
+    SCHEDULED_MESSAGES_DISPATCH_BATCH_SIZE: int
 
 
 class Settings(BaseSettings, SettingsABC):
     BASE_DIR = Path(__file__).resolve().parent.parent
+    DEBUG: bool = os.getenv('DEBUG', '').lower() in {'1', 'true'}
 
     DATABASE_URL: str = os.getenv('DATABASE_URL')
+    DUPLICATED_QUERIES_WARNING_THRESHOLD: int = 5
     HOST_DOMAIN: str = os.getenv('HOST_DOMAIN', 'http://127.0.0.1:8000')
 
     DATETIME_INPUT_OUTPUT_FORMAT: str = '%Y-%m-%d %H:%M:%S'
@@ -70,7 +131,76 @@ class Settings(BaseSettings, SettingsABC):
 
     REDIS_HOST_URL: str = redis_contrib.REDIS_HOST_URL
 
+    DATABASE_CACHE_ENABLED: bool = os.getenv('DATABASE_CACHE_ENABLED', '').lower() in {'1', 'true'}
+    DATABASE_CACHE_TTL_SECONDS: dict[str, int] = {'chat_rooms': 30, 'users': 60}
+    DATABASE_CACHE_LOCK_TIMEOUT_SECONDS: float = 5
+
+    PRESENCE_TTL_SECONDS: int = 60
+    PRESENCE_HEARTBEAT_INTERVAL_SECONDS: int = 20
+    # while there are fewer online users, presence of a chat room is looked up by them instead of by its members
+    PRESENCE_ONLINE_USERS_LOOKUP_LIMIT: int = 1000
+    TYPING_EVENTS_RATE_LIMIT_SECONDS: int = 3
+    # presence changes of a user are published at most once per the window, 0 disables the limit
+    PRESENCE_EVENTS_RATE_LIMIT_SECONDS: int = 10
+
+    # protocol level pings of the websocket connections sent by the uvicorn workers,
+    # a dead connection is reaped within the interval plus the timeout
+    WEBSOCKET_PING_INTERVAL_SECONDS: int = 5
+    WEBSOCKET_PING_TIMEOUT_SECONDS: int = 5
+    WEBSOCKET_SEND_QUEUE_CHECK_INTERVAL_SECONDS: int = 5
+    WEBSOCKET_SEND_QUEUE_MAX_SIZE: int = 256
+
+    BROADCAST_CHAT_ROOMS_MESSAGES_RATE_LIMIT: int = 10
+    BROADCAST_CHAT_ROOMS_RATE_LIMIT_WINDOW_SECONDS: int = 60
+
+    EVENT_LOOP_WATCHDOG_ENABLED: bool = os.getenv('EVENT_LOOP_WATCHDOG_ENABLED', '').lower() in {'1', 'true'}
+    EVENT_LOOP_WATCHDOG_INTERVAL_SECONDS: float = 0.25
+    EVENT_LOOP_BLOCKING_THRESHOLD_SECONDS: float = 0.1
+
     PWD_CONTEXT: CryptContext = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
     MEDIA_PATH: str = os.getenv('MEDIA_PATH')
     MEDIA_URL: str = 'media'
+    MEDIA_CACHE_MAX_AGE_SECONDS: int = 365 * 24 * 60 * 60
+    # internal location of the front proxy mapped to MEDIA_PATH, the files are sent by the proxy if it's set
+    MEDIA_ACCEL_REDIRECT_LOCATION: Optional[str] = os.getenv('MEDIA_ACCEL_REDIRECT_LOCATION')
+
+    # 'local' stores the files under MEDIA_PATH, 's3' stores them in the S3 compatible bucket
+    FILES_STORAGE_BACKEND: str = os.getenv('FILES_STORAGE_BACKEND', 'local')
+    S3_BUCKET_NAME: Optional[str] = os.getenv('S3_BUCKET_NAME')
+    S3_ENDPOINT_URL: Optional[str] = os.getenv('S3_ENDPOINT_URL')
+    # endpoint the clients download the files from by the presigned urls, if it differs from the internal one
+    S3_PUBLIC_ENDPOINT_URL: Optional[str] = os.getenv('S3_PUBLIC_ENDPOINT_URL')
+    S3_REGION_NAME: Optional[str] = os.getenv('S3_REGION_NAME', 'us-east-1')
+    S3_ACCESS_KEY_ID: Optional[str] = os.getenv('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY: Optional[str] = os.getenv('S3_SECRET_ACCESS_KEY')
+    S3_MAX_POOL_CONNECTIONS: int = 20
+    S3_MULTIPART_THRESHOLD: int = 16 * 1024 * 1024
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
+    S3_PRESIGNED_URLS_EXPIRE_SECONDS: int = 6 * 60 * 60
+    S3_PRESIGNED_URLS_SIGNING_WINDOW_SECONDS: int = 60 * 60
+
+    # sides of the squares the resized images fit into
+    IMAGE_VARIANTS_SIZES: dict[str, int] = {'small': 160, 'medium': 480, 'large': 1280}
+    IMAGE_VARIANTS_QUALITY: int = 80
+    PROCESS_POOL_MAX_WORKERS: Optional[int] = int(os.getenv('PROCESS_POOL_MAX_WORKERS', 0)) or None
+
+    # parts of the resumable uploads, must not be served with the media, the assembled files are moved to
+    # MEDIA_PATH instead of being copied if they are on the same mount
+    UPLOADS_PATH: str = os.getenv('UPLOADS_PATH', '/var/bgram/uploads')
+    UPLOADS_MAX_SIZE: int = 2 * 1024 * 1024 * 1024
+    UPLOADS_TTL_SECONDS: int = 24 * 60 * 60
+    # the lock is refreshed while it's held, so it only bounds how long the lock of a crashed worker is kept
+    UPLOADS_CHUNK_LOCK_TIMEOUT_SECONDS: int = 60
+
+    FILES_DELETION_BATCH_SIZE: int = 500
+    ORPHAN_FILES_GC_HOUR: int = 4
+    ORPHAN_FILES_GC_BATCH_SIZE: int = 1000
+    # files younger than that may be written by the uploads which aren't committed yet, they are never collected
+    ORPHAN_FILES_GC_GRACE_PERIOD_SECONDS: int = 24 * 60 * 60
+    ORPHAN_FILES_GC_DRY_RUN: bool = os.getenv('ORPHAN_FILES_GC_DRY_RUN', '').lower() in {'1', 'true'}
+
+    # scheduled messages are sent by the jobs of the time buckets, a message waits for the end of its bucket at most
+    SCHEDULED_MESSAGES_BUCKET_MILLISECONDS: int = 500
+    SCHEDULED_MESSAGES_DISPATCH_BATCH_SIZE: int = 1000
@@ -1,6 +1,10 @@
 from core.config import SettingsABC
+from core.database.caching import CacheInvalidatingAsyncSession
+from core.database.queries_statistics import register_queries_statistics_listeners
+from core.database.versions import TablesVersionsTrackingAsyncSession
 from core.dependencies.providers import provide_settings
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from core.metrics import register_db_pool_metrics_listeners
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -9,20 +13,26 @@ def provide_db_engine(config: SettingsABC = provide_settings()):
     engine = getattr(provide_db_engine, 'engine', None)
     if not engine:
         engine = provide_db_engine.engine = create_async_engine(config.DATABASE_URL)
+        register_queries_statistics_listeners(engine.sync_engine)
+        register_db_pool_metrics_listeners(engine.sync_engine)
     return engine
 
 
 def provide_db_sessionmaker(config: SettingsABC = provide_settings(), create_new: bool = False) -> sessionmaker:
     engine = provide_db_engine(config)
+    # writes invalidate the cached query results whichever repository or task they are made by
+    session_class = (
+        CacheInvalidatingAsyncSession if config.DATABASE_CACHE_ENABLED else TablesVersionsTrackingAsyncSession
+    )
     if create_new:
-        return sessionmaker(engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+        return sessionmaker(engine, autoflush=False, expire_on_commit=False, class_=session_class)
     session = getattr(provide_db_sessionmaker, 'session', None)
     if not session:
         session = provide_db_sessionmaker.session = sessionmaker(
             engine,
             autoflush=False,
             expire_on_commit=False,
-            class_=AsyncSession,
+            class_=session_class,
         )
     return session
 
@@ -0,0 +1,313 @@
+import asyncio
+import functools
+import hashlib
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Type
+
+import orjson
+from core.contrib.redis import RedisClientProvider
+from core.database.repository import Model, SQLAlchemyDatabaseRepository
+from core.database.versions import CHANGED_TABLES_SESSION_INFO_KEY, TablesVersionsTrackingAsyncSession
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import Date, DateTime, Time, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, RelationshipProperty, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.state import InstanceState
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.schema import Table
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.util import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'db_cache'
+LOCK_POLL_INTERVAL_SECONDS = 0.05
+# tags outlive the cached results, so the results cached with different ttls are always invalidated
+TAGS_TTL_SECONDS = 24 * 60 * 60
+# key of the references to the objects of the serialized query result
+OBJECT_REFERENCE_KEY = '__object__'
+
+# SQL strings of the statements by their in-memory cache keys, so the statements are compiled only once
+_statements_cache = LRUCache(500)
+
+
+class CachedResultLoadingError(Exception):
+    pass
+
+
+class CacheInvalidatingAsyncSession(TablesVersionsTrackingAsyncSession):
+    """
+    Session invalidating the cached query results of the tables changed in it after the changes are committed.
+
+    Every cached result is tagged by the tables it was selected from, so a commit drops all the results
+    of the changed tables. The changes are tracked by the session, so the statements executed bypassing
+    the cached repositories (e.g. by the other repositories or by the background tasks) invalidate them as well.
+    """
+
+    redis_client: Optional[aioredis.Redis] = None
+
+    async def on_tables_changed(self, changed_tables: set[str], changed_tables_scopes: set[str]):
+        await super().on_tables_changed(changed_tables, changed_tables_scopes)
+        if not changed_tables:
+            return
+        if not self.redis_client:
+            CacheInvalidatingAsyncSession.redis_client = RedisClientProvider.provide_redis_client()
+        await invalidate_cache_tags(self.redis_client, changed_tables)
+
+
+class CachedSQLAlchemyDatabaseRepository(SQLAlchemyDatabaseRepository):
+    """
+    Read-through cache of the get_one and get_many results in redis.
+
+    The results are cached by the SQL, the bound parameters and the loader options of the query. Only the loaded
+    columns and relationships of the objects are cached as JSON, the objects are rebuilt from them and merged
+    into the session without querying the database. Only one process at a time loads a missing result from
+    the database, others wait for it to be cached, so the expired results of the hot queries don't cause
+    a stampede. The cache is bypassed while the session has uncommitted changes, the cached results are invalidated
+    by the CacheInvalidatingAsyncSession. The result is cached only if none of its tables was invalidated while
+    it was loaded, so a result loaded before a commit doesn't overwrite the invalidation.
+    """
+
+    # caches the result only if the generations of its tags haven't changed since they were read before the loading
+    cache_result_script = """
+    local tags_count = tonumber(ARGV[3])
+    for i = 1, tags_count do
+        if (redis.call('get', KEYS[1 + i]) or '0') ~= ARGV[4 + i] then
+            return 0
+        end
+    end
+    redis.call('set', KEYS[1], ARGV[1], 'ex', ARGV[2])
+    for i = 1, tags_count do
+        local tag_key = KEYS[1 + tags_count + i]
+        redis.call('sadd', tag_key, KEYS[1])
+        redis.call('expire', tag_key, ARGV[4])
+    end
+    return 1
+    """
+
+    def __init__(
+        self,
+        model: Type[Model],
+        db_session: AsyncSession,
+        redis_client: aioredis.Redis,
+        cache_ttl_seconds: int,
+        lock_timeout_seconds: float = 5,
+    ):
+        super().__init__(model=model, db_session=db_session)
+        self._db_session = db_session
+        self.redis_client = redis_client
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._cache_result_script = redis_client.register_script(self.cache_result_script)
+        self._mappers = {mapper.class_.__name__: mapper for mapper in model.registry.mappers}
+
+    async def _fetch_one(self, select_query: Select) -> Optional[Model]:
+        result = await self._get_or_load(select_query, functools.partial(super()._fetch_one, select_query))
+        return await self._merge(result)
+
+    async def _fetch_many(self, select_query: Select, unique_results: bool = True) -> List[Model]:
+        result = await self._get_or_load(
+            select_query,
+            functools.partial(super()._fetch_many, select_query, unique_results=unique_results),
+        )
+        return [await self._merge(db_object) for db_object in result]
+
+    async def _get_or_load(self, select_query: Select, load: Callable[[], Awaitable[Any]]) -> Any:
+        cache_key = get_cache_key(select_query)
+        if self._db_session.sync_session.info.get(CHANGED_TABLES_SESSION_INFO_KEY) or not cache_key:
+            return await load()
+        lock_key = f'{cache_key}:lock'
+        tags = sorted(get_cache_tags(select_query))
+        try:
+            if (cached_result := await self.redis_client.get(cache_key)) is not None:
+                return self._load_cached_result(cached_result)
+            is_lock_acquired = await self.redis_client.set(
+                lock_key,
+                1,
+                nx=True,
+                px=int(self.lock_timeout_seconds * 1000),
+            )
+            if not is_lock_acquired and (cached_result := await self._wait_for_cached_result(cache_key, lock_key)):
+                return self._load_cached_result(cached_result)
+            if is_lock_acquired and tags:
+                tags_generations = await self.redis_client.mget(*map(get_tag_generation_key, tags))
+            else:
+                tags_generations = []
+        except (RedisError, CachedResultLoadingError):
+            logger.exception('Failed to get the cached query result')
+            return await load()
+        if not is_lock_acquired:
+            return await load()
+        try:
+            result = await load()
+            await self._cache_result(cache_key, tags, tags_generations, result)
+        finally:
+            await self._release_lock(lock_key)
+        return result
+
+    async def _wait_for_cached_result(self, cache_key: str, lock_key: str) -> Optional[bytes]:
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL_SECONDS)
+            if (cached_result := await self.redis_client.get(cache_key)) is not None:
+                return cached_result
+            if not await self.redis_client.exists(lock_key):
+                return None
+        return None
+
+    async def _cache_result(
+        self, cache_key: str, tags: List[str], tags_generations: List[Optional[bytes]], result: Any
+    ):
+        try:
+            await self._cache_result_script(
+                keys=[cache_key, *map(get_tag_generation_key, tags), *map(get_tag_key, tags)],
+                args=[
+                    dump_query_result(result),
+                    self.cache_ttl_seconds,
+                    len(tags),
+                    TAGS_TTL_SECONDS,
+                    *(generation or b'0' for generation in tags_generations),
+                ],
+            )
+        except (RedisError, TypeError):
+            logger.exception('Failed to cache the query result')
+
+    def _load_cached_result(self, cached_result: bytes) -> Any:
+        try:
+            return load_query_result(cached_result, self._mappers)
+        except (KeyError, ValueError, TypeError) as e:
+            # e.g. the result was cached before the model was changed
+            raise CachedResultLoadingError from e
+
+    async def _release_lock(self, lock_key: str):
+        try:
+            await self.redis_client.delete(lock_key)
+        except RedisError:
+            logger.exception('Failed to release the query result cache lock')
+
+    async def _merge(self, db_object: Any) -> Any:
+        if db_object is None or inspect(db_object, raiseerr=False) is None:
+            return db_object
+        return await self._db_session.merge(db_object, load=False)
+
+
+async def invalidate_cache_tags(redis_client: aioredis.Redis, tags: Iterable[str]):
+    tags = list(tags)
+    tags_keys = [get_tag_key(tag) for tag in tags]
+    try:
+        async with redis_client.pipeline(transaction=False) as pipeline:
+            # results being loaded concurrently are not cached after the generations are changed
+            for tag in tags:
+                pipeline.incr(get_tag_generation_key(tag))
+            for tag_key in tags_keys:
+                pipeline.smembers(tag_key)
+            cached_keys = set().union(*itertools.islice(await pipeline.execute(), len(tags), None))
+        await redis_client.delete(*cached_keys, *tags_keys)
+    except RedisError:
+        logger.exception('Failed to invalidate the cached query results of the tables %s', tags)
+
+
+def get_cache_key(select_query: Select) -> Optional[str]:
+    statement_cache_key = select_query._generate_cache_key()
+    if statement_cache_key is None:
+        return None
+    # loader options like selectinload don't change the SQL, but change the loaded objects
+    offline_key = statement_cache_key.to_offline_string(_statements_cache, select_query, {})
+    offline_key += repr(list(_get_loader_options_paths(select_query)))
+    return f'{CACHE_KEY_PREFIX}:{hashlib.blake2b(offline_key.encode(), digest_size=16).hexdigest()}'
+
+
+def get_cache_tags(select_query: Select) -> set[str]:
+    tags = set()
+    for table in find_tables(select_query, include_aliases=True):
+        table = getattr(table, 'element', table)
+        if isinstance(table, Table):
+            tags.add(table.name)
+    for path in _get_loader_options_paths(select_query, as_strings=False):
+        for path_element in path:
+            relationship = getattr(path_element, 'property', None)
+            if isinstance(relationship, RelationshipProperty):
+                tags.update(table.name for table in relationship.mapper.tables)
+                if relationship.secondary is not None:
+                    tags.add(relationship.secondary.name)
+    return tags
+
+
+def get_tag_key(tag: str) -> str:
+    return f'{CACHE_KEY_PREFIX}:tag:{tag}'
+
+
+def get_tag_generation_key(tag: str) -> str:
+    return f'{CACHE_KEY_PREFIX}:generation:{tag}'
+
+
+def dump_query_result(result: Any) -> bytes:
+    """
+    Serializes the query result to JSON.
+
+    Only the loaded columns and relationships of the objects are kept, every object is serialized once
+    and referenced by its index, so the back references and the objects loaded several times are preserved.
+    """
+    dumped_objects, objects_indexes = [], {}
+
+    def dump(value: Any) -> Any:
+        if isinstance(value, (list, tuple)):
+            return [dump(item) for item in value]
+        state = inspect(value, raiseerr=False)
+        if not isinstance(state, InstanceState):
+            return value
+        if id(value) not in objects_indexes:
+            objects_indexes[id(value)] = len(dumped_objects)
+            dumped_object = {'model': state.mapper.class_.__name__, 'columns': {}, 'relationships': {}}
+            dumped_objects.append(dumped_object)
+            for column_property in state.mapper.column_attrs:
+                if column_property.key in state.dict:
+                    dumped_object['columns'][column_property.key] = state.dict[column_property.key]
+            for relationship in state.mapper.relationships:
+                if relationship.key in state.dict:
+                    dumped_object['relationships'][relationship.key] = dump(state.dict[relationship.key])
+        return {OBJECT_REFERENCE_KEY: objects_indexes[id(value)]}
+
+    result = dump(result)
+    return orjson.dumps({'objects': dumped_objects, 'result': result})
+
+
+def load_query_result(dumped_result: bytes, mappers: dict[str, Mapper]) -> Any:
+    """Rebuilds the query result serialized by the dump_query_result as detached objects."""
+    dumped_result = orjson.loads(dumped_result)
+    db_objects = [
+        mappers[dumped_object['model']].class_manager.new_instance() for dumped_object in dumped_result['objects']
+    ]
+
+    def load(value: Any) -> Any:
+        if isinstance(value, list):
+            return [load(item) for item in value]
+        if isinstance(value, dict) and OBJECT_REFERENCE_KEY in value:
+            return db_objects[value[OBJECT_REFERENCE_KEY]]
+        return value
+
+    for db_object, dumped_object in zip(db_objects, dumped_result['objects']):
+        mapper = inspect(db_object).mapper
+        for key, value in dumped_object['columns'].items():
+            column_type = mapper.column_attrs[key].columns[0].type
+            if value is not None and isinstance(column_type, (Date, DateTime, Time)):
+                value = column_type.python_type.fromisoformat(value)
+            set_committed_value(db_object, key, value)
+        for key, value in dumped_object['relationships'].items():
+            set_committed_value(db_object, key, load(value))
+    for db_object in db_objects:
+        make_transient_to_detached(db_object)
+    return load(dumped_result['result'])
+
+
+def _get_loader_options_paths(select_query: Select, as_strings: bool = True) -> Iterable[tuple]:
+    for option in select_query._with_options:
+        for load in getattr(option, '_to_bind', ()):
+            if as_strings:
+                yield load.strategy, tuple(map(str, load.path))
+            else:
+                yield load.path
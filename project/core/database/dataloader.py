@@ -0,0 +1,82 @@
+import abc
+import asyncio
+from collections import defaultdict
+from typing import Any, Iterable, Optional, Type, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+Model = TypeVar('Model')
+
+
+class DataLoaderABC(abc.ABC):
+    @abc.abstractmethod
+    async def load(self, model: Type[Model], object_id: Any, *options) -> Optional[Model]:
+        pass
+
+    @abc.abstractmethod
+    async def load_many(self, model: Type[Model], object_ids: Iterable[Any], *options) -> list[Optional[Model]]:
+        pass
+
+    @abc.abstractmethod
+    def prime(self, db_object: Any, *options):
+        pass
+
+
+class DataLoader(DataLoaderABC):
+    """
+    Request scoped batching loader of the database objects by their ids.
+
+    Lookups made within one event loop tick (e.g. by asyncio.gather) are coalesced into a single
+    `SELECT ... WHERE id IN (...)` query per model and loader options, the results are memoized for the
+    lifetime of the loader, so the same object is never queried twice during a request.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self._db_session = db_session
+        self._loaded: dict[tuple, asyncio.Future] = {}
+        self._pending: defaultdict[tuple, dict[Any, asyncio.Future]] = defaultdict(dict)
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    async def load(self, model: Type[Model], object_id: Any, *options) -> Optional[Model]:
+        key = (model, options, object_id)
+        if key not in self._loaded:
+            self._loaded[key] = future = asyncio.get_running_loop().create_future()
+            self._pending[(model, options)][object_id] = future
+            if not self._dispatch_task or self._dispatch_task.done():
+                self._dispatch_task = asyncio.create_task(self._dispatch())
+        return await asyncio.shield(self._loaded[key])
+
+    async def load_many(self, model: Type[Model], object_ids: Iterable[Any], *options) -> list[Optional[Model]]:
+        return list(await asyncio.gather(*(self.load(model, object_id, *options) for object_id in object_ids)))
+
+    def prime(self, db_object: Any, *options):
+        """
+        Memoizes an already loaded object, so the following lookups of it don't query the database.
+        """
+        key = (type(db_object), options, db_object.id)
+        if key not in self._loaded:
+            self._loaded[key] = future = asyncio.get_running_loop().create_future()
+            future.set_result(db_object)
+
+    async def _dispatch(self):
+        # the session can't run queries concurrently, so the batches are loaded one by one
+        while self._pending:
+            (model, options), futures = self._pending.popitem()
+            try:
+                db_objects = await self._load_batch(model, options, futures.keys())
+            except Exception as exception:
+                for object_id, future in futures.items():
+                    # failed lookups aren't memoized, so they can be retried
+                    self._loaded.pop((model, options, object_id), None)
+                    future.set_exception(exception)
+                continue
+            for object_id, future in futures.items():
+                future.set_result(db_objects.get(object_id))
+
+    async def _load_batch(self, model: Type[Model], options: tuple, object_ids: Iterable[Any]) -> dict[Any, Model]:
+        db_query = select(model).where(model.id.in_(list(object_ids)))
+        if options:
+            db_query = db_query.options(*options)
+        results = await self._db_session.scalars(db_query)
+        return {db_object.id: db_object for db_object in results.unique().all()}
@@ -0,0 +1,55 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from core.metrics import DB_QUERY_DURATION_SECONDS
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueriesStatistics:
+    """
+    Statistics of the database queries executed during a single request.
+    """
+
+    def __init__(self):
+        self.queries_count = 0
+        self.queries_duration = 0.0
+        self.statements_counter: Counter[str] = Counter()
+
+    def add_query(self, statement: str, duration: float):
+        self.queries_count += 1
+        self.queries_duration += duration
+        self.statements_counter[statement] += 1
+
+    def get_duplicated_statements(self, threshold: int = 2) -> dict[str, int]:
+        """
+        Returns statements executed at least threshold times, which usually means N+1 queries.
+        """
+        return {statement: count for statement, count in self.statements_counter.items() if count >= threshold}
+
+    @property
+    def duplicated_queries_count(self) -> int:
+        return sum(count - 1 for count in self.statements_counter.values())
+
+
+queries_statistics_context: ContextVar[Optional[QueriesStatistics]] = ContextVar('queries_statistics', default=None)
+
+
+def register_queries_statistics_listeners(engine: Engine):
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('queries_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_duration = time.perf_counter() - conn.info['queries_start_time'].pop()
+    DB_QUERY_DURATION_SECONDS.observe(query_duration)
+    if queries_statistics := queries_statistics_context.get():
+        queries_statistics.add_query(statement, query_duration)
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Any, List, Optional, Type, TypeVar, cast
 
+from core.database.versions import mark_tables_scopes_changed
 from sqlalchemy import column, delete, exists, func, insert, select, update
+from sqlalchemy.engine import Result, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import load_only
-from sqlalchemy.sql import Select
+from sqlalchemy.sql import Executable, Select
 
 Model = TypeVar('Model')
 
@@ -30,6 +32,10 @@ class BaseDatabaseRepository(ABC):
     async def rollback(self) -> None:
         pass
 
+    @abstractmethod
+    def mark_tables_scopes_changed(self, *tables_scopes: str) -> None:
+        pass
+
     @abstractmethod
     async def create_from_object(self, *args, **kwargs):
         pass
@@ -50,6 +56,10 @@ class BaseDatabaseRepository(ABC):
     async def delete(self, *args, **kwargs):
         pass
 
+    @abstractmethod
+    async def execute(self, statement: Executable) -> Result:
+        pass
+
     @abstractmethod
     async def get_one(self, *args, db_query: Optional[Any] = None, fields_to_load: Optional[tuple[str]] = None):
         pass
@@ -58,6 +68,10 @@ class BaseDatabaseRepository(ABC):
     async def get_many(self, *args, db_query: Optional[Any] = None, fields_to_load: Optional[tuple[str]] = None):
         pass
 
+    @abstractmethod
+    async def get_many_rows(self, *args, db_query: Optional[Any] = None):
+        pass
+
     @abstractmethod
     async def exists(self, *args, db_query: Optional[Any] = None):
         pass
@@ -87,6 +101,9 @@ class SQLAlchemyDatabaseRepository(BaseDatabaseRepository):
     async def rollback(self):
         await self.__db_session.rollback()
 
+    def mark_tables_scopes_changed(self, *tables_scopes: str) -> None:
+        mark_tables_scopes_changed(self.__db_session.sync_session, *tables_scopes)
+
     async def create_from_object(self, object_to_create: Optional[Model] = None, **kwargs: Any) -> Model:
         object_to_create = object_to_create if object_to_create else self.model(**kwargs)
         self.add(object_to_create)
@@ -130,6 +147,9 @@ class SQLAlchemyDatabaseRepository(BaseDatabaseRepository):
             return results.all()
         await self.__db_session.execute(delete_query)
 
+    async def execute(self, statement: Executable) -> Result:
+        return await self.__db_session.execute(statement)
+
     async def get_one(
         self,
         *args,
@@ -139,7 +159,7 @@ class SQLAlchemyDatabaseRepository(BaseDatabaseRepository):
         select_query = self._get_db_query(*args, db_query=db_query)
         if fields_to_load:
             select_query = select_query.options(load_only(*fields_to_load))
-        return await self.__db_session.scalar(select_query)
+        return await self._fetch_one(select_query)
 
     async def get_many(
         self,
@@ -151,8 +171,16 @@ class SQLAlchemyDatabaseRepository(BaseDatabaseRepository):
         select_query = self._get_db_query(*args, db_query=db_query)
         if fields_to_load:
             select_query = select_query.options(load_only(*fields_to_load))
-        results = await self.__db_session.scalars(select_query)
-        return results.unique().all() if unique_results else results.all()
+        return await self._fetch_many(select_query, unique_results=unique_results)
+
+    async def get_many_rows(self, *args: Any, db_query: Optional[Select] = None) -> List[Row]:
+        """
+        Returns plain rows of the selected columns, no ORM objects are built and put into the identity map,
+        so it is much cheaper than get_many for the read only queries selecting columns instead of entities.
+        """
+        select_query = self._get_db_query(*args, db_query=db_query)
+        results = await self.__db_session.execute(select_query)
+        return results.all()
 
     async def exists(self, *args: Any, db_query: Optional[Select] = None) -> Optional[bool]:
         select_db_query = self._get_db_query(*args, db_query=db_query)
@@ -165,5 +193,12 @@ class SQLAlchemyDatabaseRepository(BaseDatabaseRepository):
         db_query = db_query.with_only_columns([func.count()]).order_by(None)
         return await self.__db_session.scalar(db_query) or 0
 
+    async def _fetch_one(self, select_query: Select) -> Optional[Model]:
+        return await self.__db_session.scalar(select_query)
+
+    async def _fetch_many(self, select_query: Select, unique_results: bool = True) -> List[Model]:
+        results = await self.__db_session.scalars(select_query)
+        return results.unique().all() if unique_results else results.all()
+
     def _get_db_query(self, *args, db_query: Optional[Select]) -> Select:
         return db_query.where(*args) if db_query is not None else select(self.model).where(*args)
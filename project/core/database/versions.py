@@ -0,0 +1,161 @@
+import abc
+import asyncio
+import logging
+from typing import Any, Optional
+
+from core.contrib.redis import RedisClientProvider
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger(__name__)
+
+CHANGED_TABLES_SESSION_INFO_KEY = 'changed_tables'
+CHANGED_TABLES_SCOPES_SESSION_INFO_KEY = 'changed_tables_scopes'
+
+
+class TablesVersionsABC(abc.ABC):
+    @abc.abstractmethod
+    async def get_versions(self, *tables: str) -> tuple[int, ...]:
+        pass
+
+    @abc.abstractmethod
+    async def bump(self, *tables: str):
+        pass
+
+
+class RedisTablesVersions(TablesVersionsABC):
+    """
+    Versions of the tables contents, every committed change of a table increments its version.
+    """
+
+    key_prefix = 'tables_versions'
+
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis_client = redis_client
+
+    async def get_versions(self, *tables: str) -> tuple[int, ...]:
+        versions = await self.redis_client.mget([self.get_key(table) for table in tables])
+        return tuple(int(version or 0) for version in versions)
+
+    async def bump(self, *tables: str):
+        async with self.redis_client.pipeline(transaction=False) as pipeline:
+            for table in tables:
+                pipeline.incr(self.get_key(table))
+            await pipeline.execute()
+
+    @classmethod
+    def get_key(cls, table: str) -> str:
+        return f'{cls.key_prefix}:{table}'
+
+
+class TablesVersionsTrackingAsyncSession(AsyncSession):
+    """
+    Bumps versions of the tables and of the tables scopes changed in the session right after the changes
+    are committed, so the responses depending on the versions never outlive the committed data.
+
+    A failed bump is retried in the background, otherwise the responses of the changed tables would be
+    considered not modified till the next change of the tables.
+    """
+
+    tables_versions: Optional[TablesVersionsABC] = None
+    bump_retry_delays_seconds: tuple[float, ...] = (0.1, 0.5, 1, 5, 15)
+    # references to the retries, so they aren't garbage collected while they are pending
+    _bump_retries: set[asyncio.Task] = set()
+
+    async def commit(self):
+        await super().commit()
+        changed_tables = self.sync_session.info.pop(CHANGED_TABLES_SESSION_INFO_KEY, set())
+        changed_tables_scopes = self.sync_session.info.pop(CHANGED_TABLES_SCOPES_SESSION_INFO_KEY, set())
+        if changed_tables or changed_tables_scopes:
+            await self.on_tables_changed(changed_tables, changed_tables_scopes)
+
+    async def on_tables_changed(self, changed_tables: set[str], changed_tables_scopes: set[str]):
+        tables = (*changed_tables, *changed_tables_scopes)
+        try:
+            await self._get_tables_versions().bump(*tables)
+        except RedisError:
+            logger.exception('Failed to bump versions of the changed tables %s, the bump is retried', tables)
+            bump_retry = asyncio.create_task(self._retry_bump(tables))
+            self._bump_retries.add(bump_retry)
+            bump_retry.add_done_callback(self._bump_retries.discard)
+
+    async def _retry_bump(self, tables: tuple[str, ...]):
+        # a retry of the partially failed bump may bump some versions twice, it only changes their etags once more
+        for delay in self.bump_retry_delays_seconds:
+            await asyncio.sleep(delay)
+            try:
+                return await self._get_tables_versions().bump(*tables)
+            except RedisError:
+                logger.warning('Failed to retry the bump of the versions of the changed tables %s', tables)
+        logger.error('Gave up bumping versions of the changed tables %s', tables)
+
+    def _get_tables_versions(self) -> TablesVersionsABC:
+        if not self.tables_versions:
+            TablesVersionsTrackingAsyncSession.tables_versions = RedisTablesVersions(
+                RedisClientProvider.provide_redis_client(),
+            )
+        return self.tables_versions
+
+
+def get_table_scope(table: str, scope_id: Any) -> str:
+    """
+    Part of the table data versioned as a table of its own, e.g. the data of a single chat room,
+    so the responses showing only that part don't change with every change of the table.
+    """
+    return f'{table}:{scope_id}'
+
+
+def get_object_tables_scopes(db_object: Any) -> set[str]:
+    """
+    Scopes of the table data the object belongs to, declared by its model as (table, attribute) pairs
+    in versions_scopes, e.g. photos of a chat room belong to the scope of the chat room.
+    """
+    # only the loaded attributes are read, the unloaded ones can't be loaded while the session is flushed
+    loaded_attributes = inspect(db_object).dict
+    return {
+        get_table_scope(table, scope_id)
+        for table, attribute in getattr(type(db_object), 'versions_scopes', ())
+        if (scope_id := loaded_attributes.get(attribute)) is not None
+    }
+
+
+def mark_tables_scopes_changed(session: Session, *tables_scopes: str):
+    """
+    Scopes changed by the statements are unknown to the session, so they must be marked by the callers.
+    """
+    session.info.setdefault(CHANGED_TABLES_SCOPES_SESSION_INFO_KEY, set()).update(tables_scopes)
+
+
+def _get_changed_tables(session: Session) -> set[str]:
+    return session.info.setdefault(CHANGED_TABLES_SESSION_INFO_KEY, set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_tables(session: Session, flush_context):
+    changed_tables = _get_changed_tables(session)
+    for db_object in (*session.new, *session.deleted, *session.dirty):
+        state = inspect(db_object)
+        if db_object in session.dirty and not session.is_modified(db_object):
+            continue
+        changed_tables.update(table.name for table in state.mapper.tables)
+        mark_tables_scopes_changed(session, *get_object_tables_scopes(db_object))
+        for relationship in state.mapper.relationships:
+            if relationship.secondary is not None and state.attrs[relationship.key].history.has_changes():
+                changed_tables.add(relationship.secondary.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_executed_statements_tables(orm_execute_state: ORMExecuteState):
+    # the repository runs the DML statements returning objects as select().from_statement(...)
+    statement = getattr(orm_execute_state.statement, 'element', orm_execute_state.statement)
+    if getattr(statement, 'is_dml', False):
+        _get_changed_tables(orm_execute_state.session).add(statement.table.name)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_tables(session: Session):
+    session.info.pop(CHANGED_TABLES_SESSION_INFO_KEY, None)
+    session.info.pop(CHANGED_TABLES_SCOPES_SESSION_INFO_KEY, None)
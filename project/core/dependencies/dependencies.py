@@ -1,6 +1,18 @@
 from core.config import SettingsABC
 from core.database.base import provide_db_sessionmaker
-from core.dependencies.providers import EventPublisher, EventReceiver, provide_event_publisher, provide_event_receiver
+from core.database.dataloader import DataLoaderABC
+from core.database.versions import TablesVersionsABC
+from core.dependencies.providers import (
+    EventPublisher,
+    EventReceiver,
+    provide_data_loader,
+    provide_event_publisher,
+    provide_event_receiver,
+    provide_resumable_uploads_service,
+    provide_tables_versions,
+)
+from core.services.uploads import ResumableUploadsServiceABC
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -15,12 +27,22 @@ class FastapiDependenciesOverrides:
             AsyncSession: self.get_db_session,
             EventPublisher: self.get_event_publisher,
             EventReceiver: self.get_event_receiver,
+            DataLoaderABC: self.get_data_loader,
+            TablesVersionsABC: self.get_tables_versions,
+            ResumableUploadsServiceABC: self.get_resumable_uploads_service,
         }
 
     async def get_db_session(self) -> AsyncSession:
         async with (session := self.db_sessionmaker()):
             yield session
 
+    @staticmethod
+    async def get_data_loader(db_session: AsyncSession = Depends()) -> DataLoaderABC:
+        """
+        Dependencies are cached per request, so the loader and its memoized objects are shared within a request.
+        """
+        return provide_data_loader(db_session)
+
     async def get_settings(self) -> SettingsABC:
         return self.config
 
@@ -31,3 +53,10 @@ class FastapiDependenciesOverrides:
     @staticmethod
     async def get_event_receiver() -> EventReceiver:
         return provide_event_receiver()
+
+    @staticmethod
+    async def get_tables_versions() -> TablesVersionsABC:
+        return provide_tables_versions()
+
+    async def get_resumable_uploads_service(self) -> ResumableUploadsServiceABC:
+        return provide_resumable_uploads_service(self.config)
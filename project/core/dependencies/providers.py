@@ -3,6 +3,11 @@ from typing import AsyncIterator
 
 from core.config import Settings, SettingsABC
 from core.contrib.redis import RedisClientProvider
+from core.database.dataloader import DataLoader, DataLoaderABC
+from core.database.versions import RedisTablesVersions, TablesVersionsABC
+from core.services.storages import FileStorageABC, LocalFileStorage, S3FileStorage
+from core.services.uploads import ResumableUploadsService, ResumableUploadsServiceABC
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 @functools.lru_cache(maxsize=1)
@@ -14,6 +19,9 @@ class EventPublisher:
     async def publish(self, *args):
         pass
 
+    def pipeline(self, *args, **kwargs):
+        pass
+
 
 class EventReceiver:
     async def subscribe(self, *args, **kwargs):
@@ -25,6 +33,9 @@ class EventReceiver:
     async def listen(self) -> AsyncIterator:
         pass
 
+    async def close(self):
+        pass
+
 
 def provide_event_publisher() -> EventPublisher:
     return RedisClientProvider.provide_redis_client()
@@ -32,3 +43,44 @@ def provide_event_publisher() -> EventPublisher:
 
 def provide_event_receiver() -> EventReceiver:
     return RedisClientProvider.provide_redis_client().pubsub()
+
+
+def provide_data_loader(db_session: AsyncSession) -> DataLoaderABC:
+    return DataLoader(db_session)
+
+
+def provide_tables_versions() -> TablesVersionsABC:
+    return RedisTablesVersions(RedisClientProvider.provide_redis_client())
+
+
+def provide_resumable_uploads_service(settings: SettingsABC) -> ResumableUploadsServiceABC:
+    return ResumableUploadsService(RedisClientProvider.provide_redis_client(), settings)
+
+
+@functools.lru_cache(maxsize=1)
+def provide_file_storage() -> FileStorageABC:
+    """
+    Storage is shared by the process, so the connections of the S3 client are pooled.
+    """
+    settings = provide_settings()
+    if settings.FILES_STORAGE_BACKEND == 's3':
+        return S3FileStorage(
+            settings.S3_BUCKET_NAME,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            public_endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL,
+            region_name=settings.S3_REGION_NAME,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunk_size=settings.S3_MULTIPART_CHUNK_SIZE,
+            multipart_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+            urls_expire_seconds=settings.S3_PRESIGNED_URLS_EXPIRE_SECONDS,
+            urls_signing_window_seconds=settings.S3_PRESIGNED_URLS_SIGNING_WINDOW_SECONDS,
+            cache_control=f'private, max-age={settings.MEDIA_CACHE_MAX_AGE_SECONDS}, immutable',
+        )
+    return LocalFileStorage(
+        settings.MEDIA_PATH,
+        f'{settings.HOST_DOMAIN}/{settings.MEDIA_URL}',
+        excluded_paths=(settings.UPLOADS_PATH,),
+    )
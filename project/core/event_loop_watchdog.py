@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from core.metrics import EVENT_LOOP_BLOCKS_TOTAL, EVENT_LOOP_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopWatchdog:
+    """
+    Measures the lag of the event loop of the current worker process and detects blocking calls.
+
+    A heartbeat task running in the loop sleeps for interval_seconds and records how much later than expected
+    it was woken up. A separate thread checks the heartbeat, and if it is overdue by more than threshold_seconds,
+    the loop is still stuck in some callback, so the current stack of the loop thread is logged while it blocks.
+    """
+
+    def __init__(self, interval_seconds: float = 0.25, threshold_seconds: float = 0.1):
+        self.interval_seconds = interval_seconds
+        self.threshold_seconds = threshold_seconds
+        self._last_heartbeat_at = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_heartbeat_at = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog_thread = threading.Thread(target=self._watch, name='event-loop-watchdog', daemon=True)
+        self._watchdog_thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected_heartbeat_at = time.monotonic() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self._last_heartbeat_at = time.monotonic()
+            EVENT_LOOP_LAG_SECONDS.observe(max(self._last_heartbeat_at - expected_heartbeat_at, 0))
+
+    def _watch(self):
+        reported_heartbeat_at = None
+        while not self._stopped.wait(self.threshold_seconds / 2):
+            last_heartbeat_at = self._last_heartbeat_at
+            blocked_seconds = time.monotonic() - last_heartbeat_at - self.interval_seconds
+            if blocked_seconds > self.threshold_seconds and reported_heartbeat_at != last_heartbeat_at:
+                # every blocking call is reported once, while its stack is still on the loop thread
+                reported_heartbeat_at = last_heartbeat_at
+                self.report_blocking_call(blocked_seconds)
+
+    def report_blocking_call(self, blocked_seconds: float):
+        EVENT_LOOP_BLOCKS_TOTAL.inc()
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame else ''
+        logger.warning('Event loop is blocked for more than %.3f seconds:\n%s', blocked_seconds, stack)
@@ -0,0 +1,164 @@
+import os
+from email.utils import formatdate
+from typing import Optional
+from urllib.parse import quote
+
+import anyio
+from core.config import SettingsABC
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = 'http.response.zerocopy'
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+class MediaFileResponse(FileResponse):
+    """
+    File response sending either the whole file or a single byte range of it.
+
+    The file is handed to the server with the zero-copy sendfile if it supports the ASGI zerocopy extension,
+    otherwise it is streamed by the large chunks read in a thread.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        method: str,
+        headers: dict,
+        byte_range: Optional[tuple[int, int]] = None,
+    ):
+        headers = dict(headers)
+        if byte_range:
+            start, end = byte_range
+            headers['content-range'] = f'bytes {start}-{end}/{stat_result.st_size}'
+            headers['content-length'] = str(end - start + 1)
+        super().__init__(
+            path,
+            status_code=206 if byte_range else 200,
+            headers=headers,
+            stat_result=stat_result,
+            method=method,
+        )
+        self.offset, self.count = (byte_range[0], byte_range[1] - byte_range[0] + 1) if byte_range else (0, None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        count = self.stat_result.st_size - self.offset if self.count is None else self.count
+        if self.send_header_only or not count:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        elif ZEROCOPY_EXTENSION in scope.get('extensions', {}):
+            with open(self.path, mode='rb') as file:
+                await send({'type': ZEROCOPY_EXTENSION, 'file': file, 'offset': self.offset, 'count': count})
+        else:
+            await self._send_chunks(send, count)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_chunks(self, send: Send, count: int):
+        async with await anyio.open_file(self.path, mode='rb') as file:
+            await file.seek(self.offset)
+            while count > 0:
+                chunk = await file.read(min(self.chunk_size, count))
+                # the announced content length can't be sent anymore, so the response is aborted
+                if not chunk:
+                    raise RuntimeError(f'File at path {self.path} was truncated while being sent.')
+                count -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': count > 0})
+
+
+class MediaFiles(StaticFiles):
+    """
+    Serves the uploaded media files, which are never changed after being written under their unique names,
+    so they are cached by the clients for as long as possible.
+
+    Supports the single range requests, so the videos can be seeked. If the accel redirect location is set,
+    files are only looked up and sent by the front proxy (nginx X-Accel-Redirect) from the internal location
+    mapped to the same directory.
+    """
+
+    def __init__(self, *, directory: str, cache_max_age_seconds: int, accel_redirect_location: Optional[str] = None):
+        super().__init__(directory=directory)
+        self.cache_control = f'public, max-age={cache_max_age_seconds}, immutable'
+        self.accel_redirect_location = accel_redirect_location.rstrip('/') if accel_redirect_location else None
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if self.accel_redirect_location:
+            return self._accel_redirect_response(full_path)
+        headers = {
+            'etag': get_file_etag(stat_result),
+            'last-modified': formatdate(stat_result.st_mtime, usegmt=True),
+            'cache-control': self.cache_control,
+            'accept-ranges': 'bytes',
+        }
+        request_headers = Headers(scope=scope)
+        if self.is_not_modified(Headers(headers), request_headers):
+            return NotModifiedResponse(Headers(headers))
+        byte_range = None
+        if request_headers.get('if-range', headers['etag']) == headers['etag']:
+            try:
+                byte_range = parse_range_header(request_headers.get('range'), stat_result.st_size)
+            except RangeNotSatisfiable:
+                return Response(
+                    status_code=416,
+                    headers={'content-range': f'bytes */{stat_result.st_size}', 'accept-ranges': 'bytes'},
+                )
+        return MediaFileResponse(full_path, stat_result, scope['method'], headers, byte_range=byte_range)
+
+    def _accel_redirect_response(self, full_path: str) -> Response:
+        relative_path = os.path.relpath(full_path, os.path.realpath(self.directory))
+        # header values must be latin-1, nginx unquotes the uri of the redirect before serving the file
+        return Response(
+            headers={
+                'x-accel-redirect': f'{self.accel_redirect_location}/{quote(relative_path)}',
+                'cache-control': self.cache_control,
+            },
+        )
+
+
+def get_file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[tuple[int, int]]:
+    """
+    Returns the inclusive bounds of the requested byte range, or None if the whole file has to be sent.
+    Multiple ranges are rare and not worth the multipart responses, so the whole file is sent for them.
+    """
+    if not range_header or not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+    start, _, end = range_header.removeprefix('bytes=').strip().partition('-')
+    if not (start or end) or not all(bound.isdigit() for bound in (start, end) if bound):
+        return None
+    if not start:
+        suffix_length = int(end)
+        if not suffix_length or not file_size:
+            raise RangeNotSatisfiable(range_header)
+        return max(file_size - suffix_length, 0), file_size - 1
+    start, end = int(start), int(end) if end else file_size - 1
+    if start >= file_size:
+        raise RangeNotSatisfiable(range_header)
+    if start > end:
+        return None
+    return start, min(end, file_size - 1)
+
+
+def provide_media_files(config: SettingsABC) -> MediaFiles:
+    return MediaFiles(
+        directory=config.MEDIA_PATH,
+        cache_max_age_seconds=config.MEDIA_CACHE_MAX_AGE_SECONDS,
+        accel_redirect_location=config.MEDIA_ACCEL_REDIRECT_LOCATION,
+    )
@@ -0,0 +1,129 @@
+import logging
+from typing import Iterable
+
+import redis
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Duration of http requests',
+    ('method', 'route', 'status_code'),
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Number of database queries executed during http request',
+    ('route',),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_QUERY_DURATION_SECONDS = Histogram(
+    'db_query_duration_seconds',
+    'Duration of database queries',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_POOL_SIZE = Gauge('db_pool_size', 'Size of database connections pools', multiprocess_mode='livesum')
+DB_POOL_CHECKED_OUT_CONNECTIONS = Gauge(
+    'db_pool_checked_out_connections',
+    'Database connections checked out from the pools',
+    multiprocess_mode='livesum',
+)
+REDIS_PUBLISH_DURATION_SECONDS = Histogram(
+    'redis_publish_duration_seconds',
+    'Duration of publishing events to redis',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+WEBSOCKET_CONNECTIONS = Gauge('websocket_connections', 'Live websocket connections', multiprocess_mode='livesum')
+WEBSOCKET_SEND_QUEUE_SIZE = Histogram(
+    'websocket_send_queue_size',
+    'Sizes of the websocket connections send queues, sampled on every ping',
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250),
+)
+SCHEDULED_MESSAGES_DISPATCH_LAG_SECONDS = Histogram(
+    'scheduled_messages_dispatch_lag_seconds',
+    'Delay between scheduled time of the messages and the moment they are sent',
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    'event_loop_lag_seconds',
+    'Delay of the event loop heartbeats',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_BLOCKS_TOTAL = Counter('event_loop_blocks', 'Number of detected blocking calls in the event loop')
+RELEASED_FILES_REMOVED_TOTAL = Counter('released_files_removed', 'Files removed after being released')
+RELEASED_FILES_DELETION_DURATION_SECONDS = Histogram(
+    'released_files_deletion_duration_seconds',
+    'Duration of the deletion jobs of the released files',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+ORPHAN_FILES_GC_SCANNED_FILES_TOTAL = Counter('orphan_files_gc_scanned_files', 'Media files scanned by the files GC')
+ORPHAN_FILES_GC_FOUND_FILES_TOTAL = Counter(
+    'orphan_files_gc_found_files',
+    'Files without references found by the files GC, they are removed unless it is a dry run',
+    ('kind', 'dry_run'),
+)
+ORPHAN_FILES_GC_DURATION_SECONDS = Histogram(
+    'orphan_files_gc_duration_seconds',
+    'Duration of the files GC runs',
+    buckets=(1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200),
+)
+
+
+class TasksQueuesLengthCollector:
+    """
+    Collects the number of jobs in the tasks queues on every scrape.
+    """
+
+    def __init__(self, redis_url: str, queue_names: Iterable[str]):
+        self.redis_client = redis.Redis.from_url(redis_url)
+        self.queue_names = tuple(queue_names)
+
+    def describe(self):
+        # the queues aren't queried when the collector is registered
+        return []
+
+    def collect(self):
+        tasks_queue_length = GaugeMetricFamily(
+            'tasks_queue_length',
+            'Number of jobs in the tasks queue',
+            labels=('queue',),
+        )
+        for queue_name in self.queue_names:
+            try:
+                tasks_queue_length.add_metric((queue_name,), self.redis_client.zcard(queue_name))
+            except RedisError:
+                logger.exception('Failed to get the length of the tasks queue %s', queue_name)
+        yield tasks_queue_length
+
+
+def start_metrics_server(port: int, *collectors):
+    """
+    Serves the metrics of all the worker processes from the background thread of the gunicorn master process,
+    so the metrics are served on the internal port instead of the public port of the application.
+    """
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in collectors:
+        registry.register(collector)
+    start_http_server(port, registry=registry)
+
+
+def register_db_pool_metrics_listeners(engine: Engine):
+    if event.contains(engine.pool, 'checkout', _on_connection_checkout):
+        return
+    if hasattr(engine.pool, 'size'):
+        DB_POOL_SIZE.inc(engine.pool.size())
+    event.listen(engine.pool, 'checkout', _on_connection_checkout)
+    event.listen(engine.pool, 'checkin', _on_connection_checkin)
+
+
+def _on_connection_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT_CONNECTIONS.inc()
+
+
+def _on_connection_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT_CONNECTIONS.dec()
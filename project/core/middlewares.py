@@ -0,0 +1,104 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from core.database.queries_statistics import QueriesStatistics, queries_statistics_context
+from core.metrics import HTTP_REQUEST_DB_QUERIES, HTTP_REQUEST_DURATION_SECONDS
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class QueriesStatisticsMiddleware:
+    """
+    Counts database queries and their total duration per http request and warns about likely N+1 queries,
+    i.e. identical statements executed at least duplicated_queries_threshold times during the request.
+    If expose_headers is set, the statistics are returned in the X-DB-Queries-* response headers.
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = False, duplicated_queries_threshold: int = 5):
+        self.app = app
+        self.expose_headers = expose_headers
+        self.duplicated_queries_threshold = duplicated_queries_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        queries_statistics = QueriesStatistics()
+        context_token = queries_statistics_context.set(queries_statistics)
+
+        async def send_with_queries_statistics(message: Message):
+            if message['type'] == 'http.response.start' and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers.append('X-DB-Queries-Count', str(queries_statistics.queries_count))
+                headers.append('X-DB-Queries-Duration-Ms', f'{queries_statistics.queries_duration * 1000:.2f}')
+                headers.append('X-DB-Duplicated-Queries-Count', str(queries_statistics.duplicated_queries_count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_queries_statistics)
+        finally:
+            queries_statistics_context.reset(context_token)
+            self.warn_about_duplicated_queries(scope, queries_statistics)
+
+    def warn_about_duplicated_queries(self, scope: Scope, queries_statistics: QueriesStatistics):
+        duplicated_statements = queries_statistics.get_duplicated_statements(self.duplicated_queries_threshold)
+        for statement, count in duplicated_statements.items():
+            logger.warning(
+                'Possible N+1 queries: statement was executed %s times during %s %s: %s',
+                count,
+                scope['method'],
+                scope['path'],
+                statement,
+            )
+
+
+class MetricsMiddleware:
+    """
+    Measures http requests durations and the number of database queries per route template,
+    so requests to /chat_rooms/1 and /chat_rooms/2 are aggregated under /chat_rooms/{chat_room_id}.
+    Must be added before QueriesStatisticsMiddleware to run inside of it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes_paths: Optional[dict[Callable, str]] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        request_start_time = time.perf_counter()
+
+        async def send_with_status_code(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status_code)
+        finally:
+            route_path = self.get_route_path(scope)
+            HTTP_REQUEST_DURATION_SECONDS.labels(scope['method'], route_path, status_code).observe(
+                time.perf_counter() - request_start_time,
+            )
+            if queries_statistics := queries_statistics_context.get():
+                HTTP_REQUEST_DB_QUERIES.labels(route_path).observe(queries_statistics.queries_count)
+
+    def get_route_path(self, scope: Scope) -> str:
+        """
+        The router puts the matched endpoint (or the mounted application) into the scope,
+        so the route template is looked up by it instead of matching the path against every route again.
+        """
+        if self._routes_paths is None:
+            self._routes_paths = {
+                route.app if isinstance(route, Mount) else route.endpoint: route.path
+                for route in scope['app'].routes
+                if isinstance(route, Mount) or hasattr(route, 'endpoint')
+            }
+        return self._routes_paths.get(scope.get('endpoint'), 'unmatched')
@@ -1,10 +1,13 @@
 import abc
+import base64
+import json
 import math
-from typing import Tuple
+from typing import Any, Optional, Tuple
 
 from core.database.base import Base
-from fastapi import Request
-from sqlalchemy.sql import Select
+from fastapi import HTTPException, Request
+from sqlalchemy import tuple_
+from sqlalchemy.sql import ColumnElement, Select
 
 
 class PaginationDatabaseObjectsRetrieverStrategyABC(abc.ABC):
@@ -113,3 +116,85 @@ class DefaultPaginationClass(PaginationClassABC):
         elif self.request_query_params:
             return f'{url}&{self.page_number_param}={current_page_number + 1}'
         return f'{url}?{self.page_number_param}={current_page_number + 1}'
+
+
+class CursorPaginationClass(PaginationClassABC, abc.ABC):
+    """
+    Keyset pagination in the descending order of the ordering columns, so the pages don't shift
+    when new objects are added and the database never has to skip the objects of the previous pages.
+    """
+
+    ordering: Tuple[ColumnElement, ...] = ()
+    default_page_size: int = 20
+    max_page_size: int = 100
+
+    def __init__(
+        self,
+        request: Request,
+        db_objects_retriever_strategy: PaginationDatabaseObjectsRetrieverStrategyABC,
+        cursor_param: str = 'cursor',
+        page_size_param: str = 'page_size',
+        database_objects_data_keyword_in_response: str = 'data',
+    ):
+        self.request = request
+        self.request_query_params = request.query_params
+        self.cursor_param = cursor_param
+        self.page_size_param = page_size_param
+        self.db_objects_retriever_strategy = db_objects_retriever_strategy
+        self.database_objects_data_keyword_in_response = database_objects_data_keyword_in_response
+
+    @abc.abstractmethod
+    def get_cursor_values(self, db_object: Base) -> Tuple[Any, ...]:
+        """
+        Must return the values of the ordering columns for the db object.
+        """
+        pass
+
+    async def paginate(self, db_query: Select) -> dict:
+        page_size = self.get_page_size()
+        cursor_values = self.decode_cursor(self.request_query_params.get(self.cursor_param))
+        if cursor_values:
+            db_query = db_query.where(tuple_(*self.ordering) < tuple_(*cursor_values))
+        db_query = db_query.order_by(*(column.desc() for column in self.ordering)).limit(page_size + 1)
+        db_objects = await self.db_objects_retriever_strategy.get_many(db_query)
+        next_page_url = None
+        if len(db_objects) > page_size:
+            db_objects = db_objects[:page_size]
+            next_page_url = self.get_next_page_url(self.encode_cursor(self.get_cursor_values(db_objects[-1])))
+        return {
+            self.database_objects_data_keyword_in_response: db_objects,
+            'page_size': page_size,
+            'next': next_page_url,
+        }
+
+    def get_page_size(self) -> int:
+        page_size = self.request_query_params.get(self.page_size_param)
+        if page_size is None:
+            return self.default_page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise HTTPException(status_code=400, detail='Invalid page size')
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_page_url(self, cursor: str) -> str:
+        return str(self.request.url.include_query_params(**{self.cursor_param: cursor}))
+
+    @staticmethod
+    def encode_cursor(cursor_values: Tuple[Any, ...]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(cursor_values).encode()).decode()
+
+    def decode_cursor(self, cursor: Optional[str]) -> Optional[Tuple[Any, ...]]:
+        if not cursor:
+            return None
+        try:
+            cursor_values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise HTTPException(status_code=400, detail='Invalid cursor')
+        if not isinstance(cursor_values, list) or len(cursor_values) != len(self.ordering):
+            raise HTTPException(status_code=400, detail='Invalid cursor')
+        for cursor_value, column in zip(cursor_values, self.ordering):
+            # bool is a subclass of int, but it is never a valid value of an integer column
+            if isinstance(cursor_value, bool) or not isinstance(cursor_value, column.type.python_type):
+                raise HTTPException(status_code=400, detail='Invalid cursor')
+        return tuple(cursor_values)
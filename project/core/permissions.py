@@ -30,3 +30,12 @@ class UserIsAuthenticatedPermission(BasePermission):
     async def check_permissions(self):
         if not self.request_user:
             raise self.permission_denied_exception
+
+
+class UserIsStaffPermission(BasePermission):
+    def __init__(self, request_user: Optional[User]):
+        self.request_user = request_user
+
+    async def check_permissions(self):
+        if not self.request_user or not self.request_user.is_staff:
+            raise self.permission_denied_exception
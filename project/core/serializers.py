@@ -0,0 +1,82 @@
+import functools
+from typing import Any, Callable, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from pydantic.class_validators import make_generic_validator
+from pydantic.fields import SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SET, SHAPE_SINGLETON, SHAPE_TUPLE_ELLIPSIS, ModelField
+
+__all__ = ['get_schema_serializer', 'serialize']
+
+SEQUENCE_SHAPES = (SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SET, SHAPE_TUPLE_ELLIPSIS)
+
+
+def serialize(schema: Type[BaseModel], obj: Any) -> dict:
+    return get_schema_serializer(schema)(obj)
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema_serializer(schema: Type[BaseModel]) -> Callable[[Any], dict]:
+    """
+    Generates a function converting an object (or a dict, if the schema isn't in orm mode) straight into
+    the JSON compatible dict, equal to the one FastAPI produces after validating the object with the schema.
+
+    Values are expected to already have the types of the schema fields, as the ORM objects do, so the type
+    coercion is skipped and only the schema validators are called. Fields validated by the pre or each item
+    validators fall back to the regular pydantic validation of the field.
+    """
+    namespace = {'schema': schema, 'config': schema.__config__, 'validate_field': _validate_field}
+    lines = ['def serializer(obj):', '    data = {}']
+    for index, field in enumerate(schema.__fields__.values()):
+        namespace[f'field_{index}'] = field
+        lines.append(f'    value = {_get_value_expression(schema, field, index, namespace)}')
+        lines.extend(f'    {line}' for line in _get_field_serialization_lines(field, index, namespace))
+        lines.append(f'    data[{field.alias!r}] = value')
+    lines.append('    return data')
+    exec(compile('\n'.join(lines), f'<{schema.__name__} serializer>', 'exec'), namespace)
+    return namespace['serializer']
+
+
+def _get_value_expression(schema: Type[BaseModel], field: ModelField, index: int, namespace: dict) -> str:
+    if field.required:
+        return f'obj.{field.name}' if schema.__config__.orm_mode else f'obj[{field.alias!r}]'
+    namespace[f'default_{index}'] = field.default
+    if schema.__config__.orm_mode:
+        return f'getattr(obj, {field.name!r}, default_{index})'
+    return f'obj.get({field.alias!r}, default_{index})'
+
+
+def _get_field_serialization_lines(field: ModelField, index: int, namespace: dict) -> list[str]:
+    validators = list(field.class_validators.values())
+    # validators of the nested schemas fields expect the schemas instances, not the serialized data
+    if any(validator.pre or validator.each_item for validator in validators) or (validators and _is_model_field(field)):
+        return [f'value = validate_field(field_{index}, value, data, schema)']
+    lines = []
+    if _is_model_field(field):
+        namespace[f'serializer_{index}'] = get_schema_serializer(field.type_)
+        if field.shape == SHAPE_SINGLETON:
+            lines.append(f'value = None if value is None else serializer_{index}(value)')
+        else:
+            lines.append(f'value = None if value is None else [serializer_{index}(item) for item in value]')
+    elif field.shape in SEQUENCE_SHAPES:
+        lines.append('value = None if value is None else list(value)')
+    for validator_index, validator in enumerate(validators):
+        validator_name = f'validator_{index}_{validator_index}'
+        namespace[validator_name] = make_generic_validator(validator.func)
+        lines.append(f'value = {validator_name}(schema, value, data, field_{index}, config)')
+    return lines
+
+
+def _is_model_field(field: ModelField) -> bool:
+    return (
+        isinstance(field.type_, type)
+        and issubclass(field.type_, BaseModel)
+        and field.shape in (SHAPE_SINGLETON, *SEQUENCE_SHAPES)
+    )
+
+
+def _validate_field(field: ModelField, value: Any, data: dict, schema: Type[BaseModel]) -> Any:
+    value, errors = field.validate(value, data, loc=field.alias, cls=schema)
+    if errors:
+        raise ValueError(f'{schema.__name__}.{field.name} is invalid: {errors}')
+    return jsonable_encoder(value)
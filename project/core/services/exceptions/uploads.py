@@ -0,0 +1,19 @@
+class UploadOffsetMismatchException(Exception):
+    def __init__(self, offset: int):
+        self.offset = offset
+        super().__init__(f'Chunk must be uploaded at the offset {offset}')
+
+
+class UploadSizeExceededException(Exception):
+    def __init__(self, size: int):
+        super().__init__(f'Upload size can not exceed {size} bytes')
+
+
+class UploadIncompleteException(Exception):
+    def __init__(self, offset: int, size: int):
+        super().__init__(f'Only {offset} of {size} bytes are uploaded')
+
+
+class UploadLockedException(Exception):
+    def __init__(self):
+        super().__init__('Upload is being uploaded or assembled by another request')
@@ -1,14 +1,28 @@
 import abc
 import asyncio
+import hashlib
+import itertools
 import os
-import uuid
-from typing import Type, Union
+from typing import BinaryIO, Iterable, Iterator, Optional, Type, Union
 
 from core.config import SettingsABC
+from core.database.dataloader import DataLoaderABC
 from core.database.repository import BaseDatabaseRepository
-from core.dependencies.providers import provide_settings
+from core.database.versions import get_object_tables_scopes
+from core.dependencies.providers import provide_file_storage, provide_settings
+from core.services.images import is_resizable_image
+from core.services.storages import FileStorageABC
+from core.services.uploads import AssembledUploadFile
+from core.tasks_scheduling.constants import TASKS_SCHEDULING_QUEUE
+from core.tasks_scheduling.dependencies import TasksSchedulerABC
 from fastapi import UploadFile
-from mixins.models import FileABC
+from mixins.models import FileABC, FileBlob
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Row
+
+FILE_CHUNK_SIZE = 1024 * 1024
+MAX_FILE_EXTENSION_LENGTH = 10
 
 
 class FilesServiceABC(abc.ABC):
@@ -25,31 +39,72 @@ class FilesServiceABC(abc.ABC):
         pass
 
     @abc.abstractmethod
-    async def remove_file_from_filesystem(self, file_path: str):
+    async def get_file_object(self, file_object_id: int) -> Optional[FileABC]:
+        pass
+
+    @abc.abstractmethod
+    async def release_files(self, files: Iterable[tuple[Optional[str], str]]):
+        pass
+
+    @abc.abstractmethod
+    async def delete_released_files(self, blobs_hashes: Iterable[str], file_paths: Iterable[str]) -> int:
+        pass
+
+    @abc.abstractmethod
+    async def delete_unreferenced_blobs(self, *blobs_hashes: str) -> int:
+        pass
+
+    @abc.abstractmethod
+    async def record_blob_variants(self, blob_hash: str, variants: dict[str, str]):
+        pass
+
+    @abc.abstractmethod
+    async def remove_files(self, file_paths: Iterable[str]) -> int:
         pass
 
 
 class FilesService(FilesServiceABC):
     """
     Service class for working with files.
+
+    Files are stored by their content: the uploaded content is hashed and all the files with the same content
+    share one blob, which is deleted only when no files refer to it anymore. Resized variants of the images
+    are generated once per blob in background, if the tasks scheduler is given. The blobs are kept by
+    the file storage, the local or the S3 one.
     """
 
     file_model: Type[FileABC] = None
+    blobs_folder = 'blobs'
 
-    def __init__(self, db_repository: BaseDatabaseRepository, settings: SettingsABC = provide_settings()):
+    def __init__(
+        self,
+        db_repository: BaseDatabaseRepository,
+        settings: SettingsABC = provide_settings(),
+        data_loader: Optional[DataLoaderABC] = None,
+        tasks_scheduler: Optional[TasksSchedulerABC] = None,
+        file_storage: Optional[FileStorageABC] = None,
+    ):
         self.db_repository = db_repository
         self.settings = settings
+        self.data_loader = data_loader
+        self.tasks_scheduler = tasks_scheduler
+        self.file_storage = file_storage or provide_file_storage()
 
     async def create_object_file(self, file: UploadFile, **kwargs) -> FileABC:
         """
         Creates an object of file_model class in database.
         """
-        object_to_create_in_db = self.file_model(**kwargs)
-        file_path = await self.write_file(object_to_create_in_db.folder_to_save, file)
-        object_to_create_in_db.file_path = file_path
+        file_blob = await self.store_file_blob(file)
+        object_to_create_in_db = self.file_model(
+            blob_hash=file_blob.content_hash,
+            file_path=file_blob.file_path,
+            variants=file_blob.variants,
+            **kwargs,
+        )
         model_instance = await self.db_repository.create_from_object(object_to_create_in_db)
         await self.db_repository.commit()
         await self.db_repository.refresh(model_instance)
+        await self.enqueue_blob_variants_generation(file_blob)
         return model_instance
 
     async def change_file(self, file_object: Union[FileABC, int], replacement_file: UploadFile) -> FileABC:
@@ -57,52 +112,177 @@ class FilesService(FilesServiceABC):
         Changes file_path in file_object to new uploaded file.
         """
         if isinstance(file_object, int):
-            file_object = await self.db_repository.get_one(self.file_model.id == file_object)
-        new_file_path = await self.write_file(file_object.folder_to_save, replacement_file)
-        file_path_to_remove = file_object.file_path
-        file_object = await self.db_repository.update_object(file_object, file_path=new_file_path)
+            file_object = await self.get_file_object(file_object)
+        file_blob = await self.store_file_blob(replacement_file)
+        blob_hash_to_release, file_path_to_release = file_object.blob_hash, file_object.file_path
+        file_object = await self.db_repository.update_object(
+            file_object,
+            blob_hash=file_blob.content_hash,
+            file_path=file_blob.file_path,
+            variants=file_blob.variants,
+        )
         await self.db_repository.commit()
         await self.db_repository.refresh(file_object)
-        await self.remove_file_from_filesystem(file_path_to_remove)
+        await self.enqueue_blob_variants_generation(file_blob)
+        if blob_hash_to_release != file_blob.content_hash:
+            await self.release_file(blob_hash_to_release, file_path_to_release)
         return file_object
 
     async def delete_file_object(self, file_object_to_delete: Union[FileABC, int]):
         """
-        Deletes file object from db and removes file from filesystem.
+        Deletes file object from db and removes file from filesystem if no other file objects share it.
         """
         if isinstance(file_object_to_delete, int):
-            file_object_to_delete = await self.db_repository.get_one(self.file_model.id == file_object_to_delete)
-        file_path_to_remove = file_object_to_delete.file_path
+            file_object_to_delete = await self.get_file_object(file_object_to_delete)
+        blob_hash_to_release, file_path_to_release = file_object_to_delete.blob_hash, file_object_to_delete.file_path
+        self.db_repository.mark_tables_scopes_changed(*get_object_tables_scopes(file_object_to_delete))
         await self.db_repository.delete(self.file_model.id == file_object_to_delete.id)
         await self.db_repository.commit()
-        await self.remove_file_from_filesystem(file_path_to_remove)
+        await self.release_file(blob_hash_to_release, file_path_to_release)
 
-    async def remove_file_from_filesystem(self, file_path: str):
-        file_path_to_remove = os.path.join(self.settings.MEDIA_PATH, file_path)
-        loop = asyncio.get_running_loop()
-        if os.path.exists(file_path_to_remove):
-            await loop.run_in_executor(None, os.remove, file_path_to_remove)
+    async def get_file_object(self, file_object_id: int) -> Optional[FileABC]:
+        if self.data_loader:
+            return await self.data_loader.load(self.file_model, file_object_id)
+        return await self.db_repository.get_one(self.file_model.id == file_object_id)
+
+    async def release_file(self, blob_hash: Optional[str], file_path: str):
+        await self.release_files(((blob_hash, file_path),))
+
+    async def release_files(self, files: Iterable[tuple[Optional[str], str]]):
+        """
+        Releases blobs of the deleted file objects, given as pairs of blob hash and file path. Released files are
+        deleted by the tasks worker if the tasks scheduler is given, so the removals don't hold the requests.
+        """
+        blobs_hashes, file_paths = set(), set()
+        for blob_hash, file_path in files:
+            # files uploaded before the blobs were introduced aren't shared
+            if blob_hash is None:
+                file_paths.add(file_path)
+            else:
+                blobs_hashes.add(blob_hash)
+        if not (blobs_hashes or file_paths):
+            return
+        if self.tasks_scheduler:
+            await self.tasks_scheduler.enqueue_job(
+                'delete_released_files',
+                sorted(blobs_hashes),
+                sorted(file_paths),
+                _queue_name=TASKS_SCHEDULING_QUEUE,
+            )
+        else:
+            await self.delete_released_files(blobs_hashes, file_paths)
 
-    async def write_file(self, folder_to_save_file: str, file: UploadFile) -> str:
-        content_to_write = await file.read()
-        filename = '_'.join(file.filename.split())
+    async def delete_released_files(self, blobs_hashes: Iterable[str], file_paths: Iterable[str]) -> int:
+        """
+        Deletes the released blobs and files by batches, a statement and an executor call per batch.
+        Returns the number of removed files.
+        """
+        removed_files_count = 0
+        for blobs_hashes_batch in get_batches(blobs_hashes, self.settings.FILES_DELETION_BATCH_SIZE):
+            removed_files_count += await self.delete_unreferenced_blobs(*blobs_hashes_batch)
+        for file_paths_batch in get_batches(file_paths, self.settings.FILES_DELETION_BATCH_SIZE):
+            removed_files_count += await self.remove_files(file_paths_batch)
+        return removed_files_count
+
+    async def delete_unreferenced_blobs(self, *blobs_hashes: str) -> int:
+        """
+        Deletes the blobs no files refer to anymore, all of them if the hashes aren't given.
+        Returns the number of removed files.
+
+        The deleted rows stay locked until the files are removed, so the same content uploaded in the meantime
+        waits for the removal and is stored again.
+        """
+        delete_query = delete(FileBlob).where(FileBlob.references_count == 0)
+        if blobs_hashes:
+            delete_query = delete_query.where(FileBlob.content_hash.in_(blobs_hashes))
+        deleted_blobs = await self.db_repository.execute(delete_query.returning(FileBlob.file_path, FileBlob.variants))
+        file_paths = [
+            file_path
+            for blob_file_path, variants in deleted_blobs
+            for file_path in (blob_file_path, *(variants or {}).values())
+        ]
+        removed_files_count = await self.remove_files(file_paths) if file_paths else 0
+        await self.db_repository.commit()
+        return removed_files_count
+
+    async def remove_files(self, file_paths: Iterable[str]) -> int:
+        return await self.file_storage.delete(file_paths)
+
+    async def store_file_blob(self, file: UploadFile) -> Row:
+        """
+        Returns hash, path and variants of the blob with the content of the file, the content is written only if
+        it isn't stored yet.
+
+        The blob row stays locked until the commit, so the blob can't be deleted before the file object
+        referring to it is created.
+        """
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            None,
-            self.write_file_to_filesystem,
-            folder_to_save_file,
-            filename,
-            content_to_write,
+        blob_hash, size = await loop.run_in_executor(None, get_file_content_hash, file.file)
+        upsert_query = (
+            postgresql.insert(FileBlob)
+            .values(content_hash=blob_hash, file_path=self.get_blob_path(blob_hash, file.filename), size=size)
+            .on_conflict_do_update(index_elements=[FileBlob.content_hash], set_={'modified_at': func.now()})
+            .returning(FileBlob.content_hash, FileBlob.file_path, FileBlob.variants)
         )
+        file_blob = (await self.db_repository.execute(upsert_query)).one()
+        await self.file_storage.save(
+            file_blob.file_path,
+            file.file,
+            source_path=file.path if isinstance(file, AssembledUploadFile) else None,
+        )
+        return file_blob
+
+    async def enqueue_blob_variants_generation(self, file_blob: Row):
+        if self.tasks_scheduler and file_blob.variants is None and is_resizable_image(file_blob.file_path):
+            await self.tasks_scheduler.enqueue_job(
+                'generate_blob_variants',
+                file_blob.content_hash,
+                _queue_name=TASKS_SCHEDULING_QUEUE,
+            )
+
+    async def get_file_blob(self, blob_hash: str) -> Optional[FileBlob]:
+        return await self.db_repository.get_one(db_query=select(FileBlob).where(FileBlob.content_hash == blob_hash))
+
+    async def record_blob_variants(self, blob_hash: str, variants: dict[str, str]):
+        """
+        Saves the variants on the blob and copies them to all the files of the blob.
+        """
+        await self.db_repository.execute(
+            update(FileBlob).where(FileBlob.content_hash == blob_hash).values(variants=variants),
+        )
+        for file_model in FileABC.__subclasses__():
+            # the files are returned, so the versions of the data they are shown with are bumped
+            files = await self.db_repository.execute(
+                select(file_model).from_statement(
+                    update(file_model)
+                    .where(file_model.blob_hash == blob_hash, file_model.variants.is_(None))
+                    .values(variants=variants)
+                    .returning(file_model),
+                ),
+            )
+            self.db_repository.mark_tables_scopes_changed(
+                *(table_scope for file in files.scalars() for table_scope in get_object_tables_scopes(file)),
+            )
+        await self.db_repository.commit()
+
+    def get_blob_path(self, blob_hash: str, filename: str) -> str:
+        # the extension is kept, so the media type of the file can be guessed when it's served
+        file_extension = os.path.splitext(filename or '')[1].lower()
+        if not file_extension[1:].isalnum() or len(file_extension) > MAX_FILE_EXTENSION_LENGTH:
+            file_extension = ''
+        return os.path.join(self.blobs_folder, blob_hash[:2], blob_hash[2:4], f'{blob_hash}{file_extension}')
+
+
+def get_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    items = iter(items)
+    while batch := list(itertools.islice(items, batch_size)):
+        yield batch
+
 
-    def write_file_to_filesystem(self, folder_to_save_file: str, filename: str, content_to_write: bytes) -> str:
-        folder_to_save_file = os.path.join(self.settings.MEDIA_PATH, folder_to_save_file)
-        os.makedirs(folder_to_save_file, exist_ok=True)
-        full_path_to_save_file = os.path.join(folder_to_save_file, filename)
-        if os.path.exists(full_path_to_save_file):
-            path_to_save_file_without_extension, file_extension = os.path.splitext(full_path_to_save_file)
-            path_to_save_file_without_extension = f'{path_to_save_file_without_extension}{uuid.uuid4().hex[:5]}'
-            full_path_to_save_file = f'{path_to_save_file_without_extension}{file_extension}'
-        with open(full_path_to_save_file, 'wb') as file:
-            file.write(content_to_write)
-        return full_path_to_save_file.replace(self.settings.MEDIA_PATH, '', 1).lstrip('/')
+def get_file_content_hash(file: BinaryIO) -> tuple[str, int]:
+    file.seek(0)
+    content_hash, size = hashlib.blake2b(digest_size=32), 0
+    while chunk := file.read(FILE_CHUNK_SIZE):
+        content_hash.update(chunk)
+        size += len(chunk)
+    return content_hash.hexdigest(), size
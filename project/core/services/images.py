@@ -0,0 +1,44 @@
+import mimetypes
+import os
+import uuid
+
+from PIL import Image, ImageOps
+
+RESIZABLE_IMAGES_MEDIA_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/gif', 'image/bmp', 'image/tiff'}
+
+
+def is_resizable_image(file_path: str) -> bool:
+    return mimetypes.guess_type(file_path)[0] in RESIZABLE_IMAGES_MEDIA_TYPES
+
+
+def generate_image_variants(media_path: str, file_path: str, sizes: dict[str, int], quality: int) -> dict[str, str]:
+    """
+    Saves WebP copies of the image fitting into the squares of the sizes next to it and returns their paths.
+
+    Resizing is CPU bound, so it's meant to be run in a process pool. Every smaller copy is resized from
+    the previous one instead of the original image.
+    """
+    variants = {}
+    file_path_without_extension = os.path.splitext(file_path)[0]
+    with Image.open(os.path.join(media_path, file_path)) as image:
+        # JPEGs are decoded right at the reduced scale, that's much faster than decoding the full image
+        image.draft('RGB', (max(sizes.values()), max(sizes.values())))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+        for size_name, size in sorted(sizes.items(), key=lambda size_item: size_item[1], reverse=True):
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            variant_path = f'{file_path_without_extension}_{size_name}.webp'
+            _save_webp(image, os.path.join(media_path, variant_path), quality)
+            variants[size_name] = variant_path
+    return variants
+
+
+def _save_webp(image: Image.Image, full_path: str, quality: int):
+    temporary_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+    try:
+        image.save(temporary_path, format='WEBP', quality=quality)
+        os.replace(temporary_path, full_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
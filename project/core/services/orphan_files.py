@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import shutil
+import string
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from core.config import SettingsABC
+from core.database.repository import BaseDatabaseRepository
+from core.metrics import (
+    ORPHAN_FILES_GC_DURATION_SECONDS,
+    ORPHAN_FILES_GC_FOUND_FILES_TOTAL,
+    ORPHAN_FILES_GC_SCANNED_FILES_TOTAL,
+)
+from core.services.files import FilesServiceABC
+from mixins.models import FileABC, FileBlob
+from sqlalchemy import delete, func, select, union_all
+from sqlalchemy.dialects import postgresql
+
+logger = logging.getLogger(__name__)
+
+BLOB_HASH_LENGTH = 64
+
+
+@dataclass
+class OrphanFilesCollectionStats:
+    dry_run: bool
+    scanned_files_count: int = 0
+    orphan_files_count: int = 0
+    unreferenced_blobs_count: int = 0
+    stale_uploads_count: int = 0
+    duration_seconds: float = 0
+
+    @property
+    def scanned_files_per_second(self) -> float:
+        return self.scanned_files_count / self.duration_seconds if self.duration_seconds else 0
+
+
+class OrphanFilesCollector:
+    """
+    Removes the files nothing refers to: the blobs left unreferenced, the media files missing in the files tables
+    (written by the failed uploads or left by the crashed deletions) and the uploads which have expired.
+
+    Files of the storage are scanned by batches, a query per batch looks up which of the scanned files are referenced.
+    Nothing is removed in the dry run, the files which would be removed are only logged and counted.
+    """
+
+    def __init__(
+        self,
+        files_service: FilesServiceABC,
+        db_repository: BaseDatabaseRepository,
+        settings: SettingsABC,
+        dry_run: bool = False,
+    ):
+        self.files_service = files_service
+        self.db_repository = db_repository
+        self.settings = settings
+        self.dry_run = dry_run
+
+    async def collect(self) -> OrphanFilesCollectionStats:
+        stats = OrphanFilesCollectionStats(dry_run=self.dry_run)
+        started_at = time.monotonic()
+        with ORPHAN_FILES_GC_DURATION_SECONDS.time():
+            stats.unreferenced_blobs_count = await self.collect_unreferenced_blobs()
+            stats.scanned_files_count, stats.orphan_files_count = await self.collect_orphan_media_files()
+            stats.stale_uploads_count = await self.collect_stale_uploads()
+        stats.duration_seconds = time.monotonic() - started_at
+        return stats
+
+    async def collect_unreferenced_blobs(self) -> int:
+        if not self.dry_run:
+            unreferenced_blobs_count = await self.files_service.delete_unreferenced_blobs()
+        else:
+            unreferenced_blobs_count = (
+                await self.db_repository.execute(
+                    select(func.count()).select_from(FileBlob).where(FileBlob.references_count == 0),
+                )
+            ).scalar_one()
+        self._count_found_files('unreferenced_blob', unreferenced_blobs_count)
+        return unreferenced_blobs_count
+
+    async def collect_orphan_media_files(self) -> tuple[int, int]:
+        scanned_files_count = orphan_files_count = 0
+        async for file_paths in self.files_service.file_storage.iterate_files(
+            modified_before=time.time() - self.settings.ORPHAN_FILES_GC_GRACE_PERIOD_SECONDS,
+            batch_size=self.settings.ORPHAN_FILES_GC_BATCH_SIZE,
+        ):
+            referenced_file_paths, blobs_hashes = await self.get_referenced_file_paths(file_paths)
+            orphan_file_paths = [file_path for file_path in file_paths if file_path not in referenced_file_paths]
+            scanned_files_count += len(file_paths)
+            orphan_files_count += len(orphan_file_paths)
+            ORPHAN_FILES_GC_SCANNED_FILES_TOTAL.inc(len(file_paths))
+            self._count_found_files('orphan', len(orphan_file_paths))
+            if self.dry_run:
+                for file_path in orphan_file_paths:
+                    logger.info('Orphan file %s would be removed', file_path)
+            elif orphan_file_paths:
+                await self.remove_orphan_files(orphan_file_paths, blobs_hashes)
+        return scanned_files_count, orphan_files_count
+
+    async def get_referenced_file_paths(self, file_paths: Iterable[str]) -> tuple[set[str], set[str]]:
+        """
+        Returns the referenced paths among the given ones and the hashes of the blobs the given paths belong to.
+        """
+        blobs_hashes, other_file_paths = set(), set()
+        for file_path in file_paths:
+            if blob_hash := self.get_blob_hash(file_path):
+                blobs_hashes.add(blob_hash)
+            else:
+                other_file_paths.add(file_path)
+        referenced_file_paths, stored_blobs_hashes = set(), set()
+        if blobs_hashes:
+            file_blobs = await self.db_repository.execute(
+                select(FileBlob.content_hash, FileBlob.file_path, FileBlob.variants).where(
+                    FileBlob.content_hash.in_(blobs_hashes),
+                ),
+            )
+            for blob_hash, blob_file_path, variants in file_blobs:
+                stored_blobs_hashes.add(blob_hash)
+                referenced_file_paths.update((blob_file_path, *(variants or {}).values()))
+        if other_file_paths:
+            # files uploaded before the blobs were introduced are referenced only by the files tables
+            files = await self.db_repository.execute(
+                union_all(
+                    *(
+                        select(file_model.file_path).where(file_model.file_path.in_(other_file_paths))
+                        for file_model in FileABC.__subclasses__()
+                    ),
+                ),
+            )
+            referenced_file_paths.update(files.scalars())
+        return referenced_file_paths, stored_blobs_hashes
+
+    async def remove_orphan_files(self, orphan_file_paths: Iterable[str], stored_blobs_hashes: set[str]):
+        """
+        Removes the orphan files. The same content may be uploaded right now and the upload reuses the blob file
+        if it exists, so the rows of the missing blobs are inserted first, the upload waits for them until
+        the files are removed. The blobs are skipped if their rows have been inserted by the uploads meanwhile.
+        """
+        file_paths_to_remove, missing_blobs_file_paths = [], defaultdict(list)
+        for file_path in orphan_file_paths:
+            blob_hash = self.get_blob_hash(file_path)
+            if blob_hash is None or blob_hash in stored_blobs_hashes:
+                file_paths_to_remove.append(file_path)
+            else:
+                missing_blobs_file_paths[blob_hash].append(file_path)
+        claimed_blobs_hashes = []
+        if missing_blobs_file_paths:
+            claimed_blobs_hashes = (
+                (
+                    await self.db_repository.execute(
+                        postgresql.insert(FileBlob)
+                        .values(
+                            [
+                                {'content_hash': blob_hash, 'file_path': file_paths[0], 'size': 0}
+                                for blob_hash, file_paths in missing_blobs_file_paths.items()
+                            ],
+                        )
+                        .on_conflict_do_nothing()
+                        .returning(FileBlob.content_hash),
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            for blob_hash in claimed_blobs_hashes:
+                file_paths_to_remove.extend(missing_blobs_file_paths[blob_hash])
+        await self.files_service.delete_released_files((), file_paths_to_remove)
+        if claimed_blobs_hashes:
+            await self.db_repository.execute(delete(FileBlob).where(FileBlob.content_hash.in_(claimed_blobs_hashes)))
+        await self.db_repository.commit()
+
+    async def collect_stale_uploads(self) -> int:
+        """
+        Removes the directories of the uploads which have expired without being completed.
+        """
+        loop = asyncio.get_running_loop()
+        stale_uploads_paths = await loop.run_in_executor(
+            None,
+            get_stale_directories,
+            self.settings.UPLOADS_PATH,
+            time.time() - self.settings.UPLOADS_TTL_SECONDS,
+        )
+        self._count_found_files('stale_upload', len(stale_uploads_paths))
+        for stale_upload_path in stale_uploads_paths:
+            if self.dry_run:
+                logger.info('Stale upload %s would be removed', stale_upload_path)
+            else:
+                await loop.run_in_executor(None, shutil.rmtree, stale_upload_path, True)
+        return len(stale_uploads_paths)
+
+    def get_blob_hash(self, file_path: str) -> Optional[str]:
+        # names of the blobs and of their variants start with the hash of the blob
+        if not file_path.startswith(f'{self.files_service.blobs_folder}{os.sep}'):
+            return None
+        blob_hash = os.path.basename(file_path)[:BLOB_HASH_LENGTH]
+        if len(blob_hash) != BLOB_HASH_LENGTH or not all(character in string.hexdigits for character in blob_hash):
+            return None
+        return blob_hash
+
+    def _count_found_files(self, kind: str, count: int):
+        if count:
+            ORPHAN_FILES_GC_FOUND_FILES_TOTAL.labels(kind, str(self.dry_run).lower()).inc(count)
+
+
+def get_stale_directories(path: str, modified_before: float) -> list[str]:
+    try:
+        directories = [entry for entry in os.scandir(path) if entry.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+    return [directory.path for directory in directories if directory.stat().st_mtime < modified_before]
@@ -0,0 +1,402 @@
+import abc
+import asyncio
+import contextlib
+import errno
+import functools
+import itertools
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, BinaryIO, Iterable, Iterator, Optional
+
+import botocore.auth
+import botocore.session
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.auth import SIGV4_TIMESTAMP, S3SigV4QueryAuth
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+FILE_CHUNK_SIZE = 1024 * 1024
+S3_MAX_DELETED_OBJECTS_PER_REQUEST = 1000
+S3_WINDOWED_SIGNATURE_VERSION = 's3v4-windowed'
+SIGNING_TIME_CONTEXT_KEY = 'signing_time'
+
+
+class FileStorageABC(abc.ABC):
+    @abc.abstractmethod
+    async def save(self, file_path: str, file: BinaryIO, source_path: Optional[str] = None):
+        pass
+
+    @abc.abstractmethod
+    async def exists(self, file_path: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    async def delete(self, file_paths: Iterable[str]) -> int:
+        pass
+
+    @abc.abstractmethod
+    def iterate_files(self, modified_before: float, batch_size: int) -> AsyncIterator[list[str]]:
+        pass
+
+    @abc.abstractmethod
+    def local_copy(self, file_path: str) -> contextlib.AbstractAsyncContextManager[str]:
+        pass
+
+    @abc.abstractmethod
+    async def save_local_files(self, directory: str, file_paths: Iterable[str]):
+        pass
+
+    @abc.abstractmethod
+    def get_url(self, file_path: str) -> str:
+        pass
+
+    def get_urls_version(self) -> Optional[int]:
+        """
+        Changes whenever the urls of the same files change, so the responses with the urls can be versioned by it.
+        """
+        return None
+
+    async def close(self):
+        pass
+
+
+class LocalFileStorage(FileStorageABC):
+    """
+    Stores the files in the local directory, they are served by the media files app.
+    """
+
+    def __init__(self, location: str, base_url: str, excluded_paths: Iterable[str] = ()):
+        self.location = location
+        self.base_url = base_url.rstrip('/')
+        self.excluded_paths = tuple(excluded_paths)
+
+    async def save(self, file_path: str, file: BinaryIO, source_path: Optional[str] = None):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.write_file, file_path, file, source_path)
+
+    async def exists(self, file_path: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, os.path.exists, self.get_full_path(file_path))
+
+    async def delete(self, file_paths: Iterable[str]) -> int:
+        return await asyncio.get_running_loop().run_in_executor(None, self.remove_files, tuple(file_paths))
+
+    async def iterate_files(self, modified_before: float, batch_size: int) -> AsyncIterator[list[str]]:
+        loop = asyncio.get_running_loop()
+        files = iterate_directory_files(self.location, modified_before, self.excluded_paths)
+        # the directory is walked in the executor by batches, so the event loop isn't blocked by the scan
+        while file_paths := await loop.run_in_executor(None, list, itertools.islice(files, batch_size)):
+            yield file_paths
+
+    @contextlib.asynccontextmanager
+    async def local_copy(self, file_path: str) -> AsyncIterator[str]:
+        yield self.location
+
+    async def save_local_files(self, directory: str, file_paths: Iterable[str]):
+        if os.path.realpath(directory) == os.path.realpath(self.location):
+            return
+        for file_path in file_paths:
+            with open(os.path.join(directory, file_path), 'rb') as file:
+                await self.save(file_path, file)
+
+    def get_url(self, file_path: str) -> str:
+        return f'{self.base_url}{"" if file_path.startswith("/") else "/"}{file_path}'
+
+    def get_full_path(self, file_path: str) -> str:
+        return os.path.join(self.location, file_path)
+
+    def write_file(self, file_path: str, file: BinaryIO, source_path: Optional[str] = None):
+        """
+        Writes the content of the file, unless there is a file at the path already. If the content is a file
+        of its own (source_path) on the same filesystem, it's moved instead of being copied.
+        """
+        full_path_to_save_file = self.get_full_path(file_path)
+        if os.path.exists(full_path_to_save_file):
+            return
+        os.makedirs(os.path.dirname(full_path_to_save_file), exist_ok=True)
+        if source_path:
+            try:
+                os.replace(source_path, full_path_to_save_file)
+                return
+            except OSError as exception:
+                if exception.errno != errno.EXDEV:
+                    raise
+        # written to a temporary file first, so the file is never seen partially written
+        temporary_path = f'{full_path_to_save_file}.{uuid.uuid4().hex}.tmp'
+        file.seek(0)
+        try:
+            with open(temporary_path, 'wb') as file_to_write:
+                shutil.copyfileobj(file, file_to_write, FILE_CHUNK_SIZE)
+            os.replace(temporary_path, full_path_to_save_file)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def remove_files(self, file_paths: Iterable[str]) -> int:
+        removed_files_count = 0
+        for file_path in file_paths:
+            try:
+                os.remove(self.get_full_path(file_path))
+            except FileNotFoundError:
+                continue
+            removed_files_count += 1
+        return removed_files_count
+
+
+class S3FileStorage(FileStorageABC):
+    """
+    Stores the files in the S3 compatible bucket, the clients download them directly by the presigned urls.
+
+    One client is shared by the process, so the connections to the storage are pooled. Large files are uploaded
+    by the parts sent concurrently, the number of the parts in flight is bounded, so is the memory they take.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        endpoint_url: Optional[str] = None,
+        public_endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        max_pool_connections: int = 10,
+        multipart_threshold: int = 16 * 1024 * 1024,
+        multipart_chunk_size: int = 8 * 1024 * 1024,
+        multipart_concurrency: int = 4,
+        urls_expire_seconds: int = 60 * 60,
+        urls_signing_window_seconds: int = 60 * 60,
+        cache_control: Optional[str] = None,
+    ):
+        self.bucket_name = bucket_name
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunk_size = multipart_chunk_size
+        self.multipart_concurrency = multipart_concurrency
+        self.urls_expire_seconds = urls_expire_seconds
+        self.urls_signing_window_seconds = urls_signing_window_seconds
+        self.cache_control = cache_control
+        self._client_kwargs = {
+            'region_name': region_name,
+            'aws_access_key_id': access_key_id,
+            'aws_secret_access_key': secret_access_key,
+        }
+        self._endpoint_url = endpoint_url
+        self._config = AioConfig(
+            max_pool_connections=max_pool_connections,
+            signature_version='s3v4',
+            s3={'addressing_style': 'path'},
+        )
+        # signing the urls doesn't make any requests, so it's done by the synchronous client outside the event loop
+        self._signing_client = botocore.session.get_session().create_client(
+            's3',
+            endpoint_url=public_endpoint_url or endpoint_url,
+            config=Config(signature_version=S3_WINDOWED_SIGNATURE_VERSION, s3={'addressing_style': 'path'}),
+            **self._client_kwargs,
+        )
+        self._signing_client.meta.events.register('before-sign.s3.GetObject', self._set_signing_time)
+        self._client = None
+        self._client_exit_stack = contextlib.AsyncExitStack()
+        self._client_lock = asyncio.Lock()
+
+    async def get_client(self):
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._client = await self._client_exit_stack.enter_async_context(
+                        get_session().create_client(
+                            's3',
+                            endpoint_url=self._endpoint_url,
+                            config=self._config,
+                            **self._client_kwargs,
+                        ),
+                    )
+        return self._client
+
+    async def close(self):
+        await self._client_exit_stack.aclose()
+        self._client = None
+
+    async def save(self, file_path: str, file: BinaryIO, source_path: Optional[str] = None):
+        if await self.exists(file_path):
+            return
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(None, get_file_size, file)
+        object_parameters = {
+            'Bucket': self.bucket_name,
+            'Key': file_path,
+            'ContentType': mimetypes.guess_type(file_path)[0] or 'application/octet-stream',
+        }
+        if self.cache_control:
+            object_parameters['CacheControl'] = self.cache_control
+        if size > self.multipart_threshold:
+            await self._upload_by_parts(file, object_parameters)
+            return
+        file.seek(0)
+        body = await loop.run_in_executor(None, file.read)
+        await (await self.get_client()).put_object(Body=body, **object_parameters)
+
+    async def exists(self, file_path: str) -> bool:
+        try:
+            await (await self.get_client()).head_object(Bucket=self.bucket_name, Key=file_path)
+        except ClientError as exception:
+            if exception.response['Error']['Code'] in {'404', 'NoSuchKey', 'NotFound'}:
+                return False
+            raise
+        return True
+
+    async def delete(self, file_paths: Iterable[str]) -> int:
+        client = await self.get_client()
+        deleted_files_count = 0
+        file_paths = iter(file_paths)
+        while file_paths_batch := list(itertools.islice(file_paths, S3_MAX_DELETED_OBJECTS_PER_REQUEST)):
+            response = await client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': file_path} for file_path in file_paths_batch], 'Quiet': True},
+            )
+            # deleting the missing objects isn't an error, so only the failed deletions are returned
+            deleted_files_count += len(file_paths_batch) - len(response.get('Errors', ()))
+        return deleted_files_count
+
+    async def iterate_files(self, modified_before: float, batch_size: int) -> AsyncIterator[list[str]]:
+        modified_before = datetime.fromtimestamp(modified_before, tz=timezone.utc)
+        paginator = (await self.get_client()).get_paginator('list_objects_v2')
+        async for page in paginator.paginate(
+            Bucket=self.bucket_name,
+            PaginationConfig={'PageSize': min(batch_size, S3_MAX_DELETED_OBJECTS_PER_REQUEST)},
+        ):
+            if file_paths := [
+                stored_object['Key']
+                for stored_object in page.get('Contents', ())
+                if stored_object['LastModified'] < modified_before
+            ]:
+                yield file_paths
+
+    @contextlib.asynccontextmanager
+    async def local_copy(self, file_path: str) -> AsyncIterator[str]:
+        """
+        Downloads the file to the temporary directory, yields the directory, which is removed afterwards.
+        """
+        loop = asyncio.get_running_loop()
+        with tempfile.TemporaryDirectory() as directory:
+            local_file_path = os.path.join(directory, file_path)
+            await loop.run_in_executor(
+                None,
+                functools.partial(os.makedirs, os.path.dirname(local_file_path), exist_ok=True),
+            )
+            response = await (await self.get_client()).get_object(Bucket=self.bucket_name, Key=file_path)
+            body = response['Body']
+            try:
+                with open(local_file_path, 'wb') as local_file:
+                    while chunk := await body.read(FILE_CHUNK_SIZE):
+                        await loop.run_in_executor(None, local_file.write, chunk)
+            finally:
+                body.close()
+            yield directory
+
+    async def save_local_files(self, directory: str, file_paths: Iterable[str]):
+        for file_path in file_paths:
+            with open(os.path.join(directory, file_path), 'rb') as file:
+                await self.save(file_path, file)
+
+    def get_url(self, file_path: str) -> str:
+        """
+        Urls are signed at the start of the current signing window, so they stay the same within the window
+        and are cached by the clients, every url is valid for at least urls_expire_seconds after it's signed.
+        """
+        return self._signing_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': file_path.lstrip('/')},
+            ExpiresIn=self.urls_expire_seconds + self.urls_signing_window_seconds,
+        )
+
+    def get_urls_version(self) -> int:
+        return int(time.time()) // self.urls_signing_window_seconds
+
+    def _set_signing_time(self, request, **kwargs):
+        request.context[SIGNING_TIME_CONTEXT_KEY] = datetime.fromtimestamp(
+            self.get_urls_version() * self.urls_signing_window_seconds,
+            tz=timezone.utc,
+        )
+
+    async def _upload_by_parts(self, file: BinaryIO, object_parameters: dict):
+        client = await self.get_client()
+        loop = asyncio.get_running_loop()
+        multipart_upload = await client.create_multipart_upload(**object_parameters)
+        upload_parameters = {
+            'Bucket': object_parameters['Bucket'],
+            'Key': object_parameters['Key'],
+            'UploadId': multipart_upload['UploadId'],
+        }
+        # the next part is read only when one of the parts in flight is sent
+        parts_slots = asyncio.Semaphore(self.multipart_concurrency)
+
+        async def upload_part(part_number: int, chunk: bytes) -> dict:
+            try:
+                response = await client.upload_part(PartNumber=part_number, Body=chunk, **upload_parameters)
+            finally:
+                parts_slots.release()
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+        parts_uploads = []
+        try:
+            file.seek(0)
+            while True:
+                await parts_slots.acquire()
+                if not (chunk := await loop.run_in_executor(None, file.read, self.multipart_chunk_size)):
+                    parts_slots.release()
+                    break
+                parts_uploads.append(asyncio.create_task(upload_part(len(parts_uploads) + 1, chunk)))
+            parts = await asyncio.gather(*parts_uploads)
+            await client.complete_multipart_upload(MultipartUpload={'Parts': parts}, **upload_parameters)
+        except BaseException:
+            for part_upload in parts_uploads:
+                part_upload.cancel()
+            await asyncio.gather(*parts_uploads, return_exceptions=True)
+            await client.abort_multipart_upload(**upload_parameters)
+            raise
+
+
+class WindowedS3SigV4QueryAuth(S3SigV4QueryAuth):
+    """
+    Presigns the urls at the signing time set to the request context instead of the current time.
+    """
+
+    def _modify_request_before_signing(self, request):
+        if signing_time := request.context.get(SIGNING_TIME_CONTEXT_KEY):
+            request.context['timestamp'] = signing_time.strftime(SIGV4_TIMESTAMP)
+        super()._modify_request_before_signing(request)
+
+
+botocore.auth.AUTH_TYPE_MAPS[f'{S3_WINDOWED_SIGNATURE_VERSION}-query'] = WindowedS3SigV4QueryAuth
+
+
+def iterate_directory_files(
+    directory: str, modified_before: float, excluded_paths: Iterable[str] = ()
+) -> Iterator[str]:
+    """
+    Yields paths relative to the directory of the files modified before the timestamp.
+    """
+    excluded_paths = {os.path.realpath(excluded_path) for excluded_path in excluded_paths}
+    for directory_path, directories_names, files_names in os.walk(directory):
+        directories_names[:] = [
+            directory_name
+            for directory_name in directories_names
+            if os.path.realpath(os.path.join(directory_path, directory_name)) not in excluded_paths
+        ]
+        for file_name in files_names:
+            file_path = os.path.join(directory_path, file_name)
+            try:
+                if os.lstat(file_path).st_mtime >= modified_before:
+                    continue
+            except FileNotFoundError:
+                continue
+            yield os.path.relpath(file_path, directory)
+
+
+def get_file_size(file: BinaryIO) -> int:
+    return file.seek(0, os.SEEK_END)
@@ -0,0 +1,291 @@
+import abc
+import asyncio
+import contextlib
+import errno
+import functools
+import logging
+import os
+import shutil
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Optional
+
+import anyio
+from core.config import SettingsABC
+from core.services.exceptions.uploads import (
+    UploadIncompleteException,
+    UploadLockedException,
+    UploadOffsetMismatchException,
+    UploadSizeExceededException,
+)
+from fastapi import UploadFile
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.requests import ClientDisconnect
+
+logger = logging.getLogger(__name__)
+
+PART_FILE_SUFFIX = '.part'
+ASSEMBLED_FILE_NAME = 'assembled'
+
+
+@dataclass
+class Upload:
+    id: str  # noqa: A003
+    user_id: int
+    filename: str
+    size: int
+    offset: int = 0
+
+
+@dataclass
+class UploadLock:
+    key: str
+    token: str = field(default_factory=lambda: uuid.uuid4().hex)
+    is_lost: bool = False
+
+
+class AssembledUploadFile(UploadFile):
+    """
+    Uploaded file assembled from the chunks, it's already on the disk, so it can be moved instead of copied.
+    """
+
+    def __init__(self, filename: str, path: str):
+        super().__init__(filename, file=open(path, 'rb'))
+        self.path = path
+
+
+class ResumableUploadsServiceABC(abc.ABC):
+    @abc.abstractmethod
+    async def create_upload(self, user_id: int, filename: str, size: int) -> Upload:
+        pass
+
+    @abc.abstractmethod
+    async def get_upload(self, upload_id: str) -> Optional[Upload]:
+        pass
+
+    @abc.abstractmethod
+    async def write_chunk(self, upload: Upload, offset: int, chunks: AsyncIterator[bytes]) -> Upload:
+        pass
+
+    @abc.abstractmethod
+    def assemble_upload(self, upload: Upload) -> contextlib.AbstractAsyncContextManager[AssembledUploadFile]:
+        pass
+
+    @abc.abstractmethod
+    async def delete_upload(self, upload: Upload):
+        pass
+
+
+class ResumableUploadsService(ResumableUploadsServiceABC):
+    """
+    Uploads of the large files by chunks, so a dropped connection doesn't restart the whole upload.
+
+    Every chunk is written to a part file named by its offset, which is kept even if the connection is
+    dropped in the middle of the chunk, so the upload is resumed right from the received byte. Uploads
+    metadata is kept in redis, the parts are concatenated by the kernel when the upload is assembled.
+
+    Chunks and assembly are serialized by the lock of the upload, it's refreshed while it's held and it's
+    released only by its owner, so a request whose lock has expired never releases the lock of another one.
+    """
+
+    key_prefix = 'uploads'
+    release_lock_script = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    refresh_lock_script = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('expire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(self, redis_client: aioredis.Redis, settings: SettingsABC):
+        self.redis_client = redis_client
+        self.settings = settings
+        self._release_lock = redis_client.register_script(self.release_lock_script)
+        self._refresh_lock = redis_client.register_script(self.refresh_lock_script)
+
+    async def create_upload(self, user_id: int, filename: str, size: int) -> Upload:
+        if size > self.settings.UPLOADS_MAX_SIZE:
+            raise UploadSizeExceededException(self.settings.UPLOADS_MAX_SIZE)
+        upload = Upload(id=uuid.uuid4().hex, user_id=user_id, filename=filename, size=size)
+        await asyncio.get_running_loop().run_in_executor(None, os.makedirs, self._get_upload_path(upload.id))
+        await self.redis_client.hset(
+            self._get_key(upload.id),
+            mapping={'user_id': user_id, 'filename': filename, 'size': size},
+        )
+        await self.redis_client.expire(self._get_key(upload.id), self.settings.UPLOADS_TTL_SECONDS)
+        return upload
+
+    async def get_upload(self, upload_id: str) -> Optional[Upload]:
+        if not (upload_data := await self.redis_client.hgetall(self._get_key(upload_id))):
+            return None
+        offset = await asyncio.get_running_loop().run_in_executor(None, self._get_offset, upload_id)
+        return Upload(
+            id=upload_id,
+            user_id=int(upload_data[b'user_id']),
+            filename=upload_data[b'filename'].decode(),
+            size=int(upload_data[b'size']),
+            offset=offset,
+        )
+
+    async def write_chunk(self, upload: Upload, offset: int, chunks: AsyncIterator[bytes]) -> Upload:
+        async with self._lock_upload(upload) as lock:
+            if offset != upload.offset:
+                raise UploadOffsetMismatchException(upload.offset)
+            upload.offset += await self._write_part(upload, chunks, lock)
+        return upload
+
+    @contextlib.asynccontextmanager
+    async def assemble_upload(self, upload: Upload) -> AsyncIterator[AssembledUploadFile]:
+        """
+        Yields the file assembled from the uploaded parts, the upload is deleted afterwards.
+        The upload is locked till then, so neither chunks nor another assembly can interfere with the parts.
+        """
+        async with self._lock_upload(upload):
+            if upload.offset != upload.size:
+                raise UploadIncompleteException(upload.offset, upload.size)
+            loop = asyncio.get_running_loop()
+            assembled_file_path = await loop.run_in_executor(None, self._assemble_parts, upload.id)
+            assembled_file = AssembledUploadFile(upload.filename, assembled_file_path)
+            try:
+                yield assembled_file
+            finally:
+                await assembled_file.close()
+                await self.delete_upload(upload)
+
+    async def delete_upload(self, upload: Upload):
+        await self.redis_client.delete(self._get_key(upload.id))
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(shutil.rmtree, self._get_upload_path(upload.id), ignore_errors=True),
+        )
+
+    @contextlib.asynccontextmanager
+    async def _lock_upload(self, upload: Upload) -> AsyncIterator[UploadLock]:
+        lock = UploadLock(key=f'{self._get_key(upload.id)}:lock')
+        if not await self.redis_client.set(
+            lock.key,
+            lock.token,
+            nx=True,
+            ex=self.settings.UPLOADS_CHUNK_LOCK_TIMEOUT_SECONDS,
+        ):
+            raise UploadLockedException
+        keep_lock_task = asyncio.create_task(self._keep_lock(lock))
+        try:
+            # the offset may have been advanced by the chunk uploaded before the lock was acquired
+            upload.offset = await asyncio.get_running_loop().run_in_executor(None, self._get_offset, upload.id)
+            yield lock
+        finally:
+            keep_lock_task.cancel()
+            await self._release_lock(keys=(lock.key,), args=(lock.token,))
+
+    async def _keep_lock(self, lock: UploadLock):
+        """
+        Refreshes the lock till it's released, the lock is marked as lost if it has expired in the meantime.
+        """
+        lock_timeout_seconds = self.settings.UPLOADS_CHUNK_LOCK_TIMEOUT_SECONDS
+        while True:
+            await asyncio.sleep(lock_timeout_seconds / 3)
+            try:
+                if not await self._refresh_lock(keys=(lock.key,), args=(lock.token, lock_timeout_seconds)):
+                    lock.is_lost = True
+                    return
+            except RedisError:
+                logger.exception('Failed to refresh the upload lock %s', lock.key)
+
+    async def _write_part(self, upload: Upload, chunks: AsyncIterator[bytes], lock: UploadLock) -> int:
+        part_path = os.path.join(self._get_upload_path(upload.id), f'{upload.offset:020d}{PART_FILE_SUFFIX}')
+        # a request whose lock was lost never overwrites the part being written by the current owner of the lock
+        temporary_path = f'{part_path}.{lock.token}.tmp'
+        written = 0
+        try:
+            async with await anyio.open_file(temporary_path, 'wb') as part_file:
+                async for chunk in chunks:
+                    if lock.is_lost:
+                        raise UploadLockedException
+                    written += len(chunk)
+                    if upload.offset + written > upload.size:
+                        raise UploadSizeExceededException(upload.size)
+                    await part_file.write(chunk)
+        except ClientDisconnect:
+            # the received bytes are kept, so the upload is resumed from where the connection was dropped
+            pass
+        except BaseException:
+            await anyio.Path(temporary_path).unlink(missing_ok=True)
+            raise
+        if lock.is_lost:
+            await anyio.Path(temporary_path).unlink(missing_ok=True)
+            raise UploadLockedException
+        if not written:
+            await anyio.Path(temporary_path).unlink(missing_ok=True)
+            return 0
+        await anyio.Path(temporary_path).rename(part_path)
+        return written
+
+    def _get_offset(self, upload_id: str) -> int:
+        return sum(os.path.getsize(part_path) for part_path in self._get_parts_paths(upload_id))
+
+    def _get_parts_paths(self, upload_id: str) -> list[str]:
+        upload_path = self._get_upload_path(upload_id)
+        try:
+            file_names = os.listdir(upload_path)
+        except FileNotFoundError:
+            return []
+        # offsets are zero padded, so the parts are sorted by their offsets
+        return [
+            os.path.join(upload_path, file_name)
+            for file_name in sorted(file_names)
+            if file_name.endswith(PART_FILE_SUFFIX)
+        ]
+
+    def _assemble_parts(self, upload_id: str) -> str:
+        parts_paths = self._get_parts_paths(upload_id)
+        assembled_file_path = os.path.join(self._get_upload_path(upload_id), ASSEMBLED_FILE_NAME)
+        if len(parts_paths) == 1:
+            os.replace(parts_paths[0], assembled_file_path)
+        else:
+            concatenate_files(parts_paths, assembled_file_path)
+        return assembled_file_path
+
+    def _get_upload_path(self, upload_id: str) -> str:
+        return os.path.join(self.settings.UPLOADS_PATH, upload_id)
+
+    def _get_key(self, upload_id: str) -> str:
+        return f'{self.key_prefix}:{upload_id}'
+
+
+def concatenate_files(source_paths: Iterable[str], destination_path: str):
+    """
+    Concatenates the files without copying their contents through the user space, with copy_file_range
+    (which may even share the blocks on the copy-on-write filesystems) or with sendfile if it isn't supported.
+    """
+    with open(destination_path, 'wb') as destination_file:
+        for source_path in source_paths:
+            with open(source_path, 'rb') as source_file:
+                _copy_file_contents(
+                    source_file.fileno(), destination_file.fileno(), os.fstat(source_file.fileno()).st_size
+                )
+
+
+def _copy_file_contents(source_fd: int, destination_fd: int, count: int):
+    copy = getattr(os, 'copy_file_range', None) or _sendfile
+    while count > 0:
+        try:
+            copied = copy(source_fd, destination_fd, count)
+        except OSError as exception:
+            if copy is _sendfile or exception.errno not in {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}:
+                raise
+            copy = _sendfile
+            continue
+        if not copied:
+            break
+        count -= copied
+
+
+def _sendfile(source_fd: int, destination_fd: int, count: int) -> int:
+    return os.sendfile(destination_fd, source_fd, None, count)
@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 ARQ_REDIS_URL = os.getenv('ARQ_REDIS_URL')
+ARQ_WORKER_METRICS_PORT = int(os.getenv('ARQ_WORKER_METRICS_PORT', 9100))
 
 arq_redis_settings = RedisSettings.from_dsn(ARQ_REDIS_URL)
 
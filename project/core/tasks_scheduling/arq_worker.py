@@ -1,13 +1,21 @@
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
-from arq import Worker
-from chat.async_tasks.messages import send_scheduled_message
+from arq import Worker, cron, func
+from chat.async_tasks.messages import dispatch_scheduled_messages, send_scheduled_message
+from chat.async_tasks.presence import publish_delayed_presence_events, publish_expired_users_offline
+from chat.async_tasks.read_cursors import seed_unread_messages_counters
+from core.async_tasks.files import collect_orphan_files, delete_released_files, generate_blob_variants
 from core.celery.celery_app import bgram_celery_app
 from core.contrib.redis import RedisClientProvider
 from core.database.base import provide_db_sessionmaker
-from core.tasks_scheduling.arq_settings import arq_redis_settings
+from core.dependencies.providers import provide_file_storage, provide_settings
+from core.tasks_scheduling.arq_settings import ARQ_WORKER_METRICS_PORT, arq_redis_settings
 from core.tasks_scheduling.constants import TASKS_SCHEDULING_QUEUE
+from prometheus_client import start_http_server
+
+ORPHAN_FILES_GC_TIMEOUT_SECONDS = 6 * 60 * 60
 
 
 async def execute_task_in_background(job_context: dict, task_name: str, task_kwargs: Optional[dict] = None) -> bool:
@@ -17,14 +25,55 @@ async def execute_task_in_background(job_context: dict, task_name: str, task_kwa
     return True
 
 
+async def on_startup(context: dict):
+    start_http_server(ARQ_WORKER_METRICS_PORT)
+    # CPU bound jobs are run in the separate processes, so they don't block the event loop of the worker
+    context['process_pool'] = ProcessPoolExecutor(max_workers=provide_settings().PROCESS_POOL_MAX_WORKERS)
+    # the job id is fixed, so the counters are seeded by a single job whichever worker starts first
+    await context['redis'].enqueue_job(
+        seed_unread_messages_counters.__name__,
+        _job_id=seed_unread_messages_counters.__name__,
+        _queue_name=TASKS_SCHEDULING_QUEUE,
+    )
+
+
 async def on_shutdown(context: dict):
+    context['process_pool'].shutdown()
     provide_db_sessionmaker().close_all()
     await RedisClientProvider.provide_redis_client().close()
+    await provide_file_storage().close()
 
 
 class TaskSchedulingWorkerSettings(Worker):
-    functions = [execute_task_in_background, send_scheduled_message]
+    functions = [
+        execute_task_in_background,
+        func(dispatch_scheduled_messages, keep_result=0),
+        send_scheduled_message,
+        publish_expired_users_offline,
+        publish_delayed_presence_events,
+        seed_unread_messages_counters,
+        generate_blob_variants,
+        delete_released_files,
+        func(collect_orphan_files, timeout=ORPHAN_FILES_GC_TIMEOUT_SECONDS),
+    ]
+    cron_jobs = [
+        # sends the messages missed by the jobs of the buckets, e.g. scheduled while the job of their bucket was running
+        cron(dispatch_scheduled_messages, second=30),
+        # offline events of the users whose connections weren't closed, e.g. because their worker has crashed
+        cron(publish_expired_users_offline, second={0, 15, 30, 45}),
+        # latest presence of the users whose presence events were rate limited
+        cron(publish_delayed_presence_events, second={5, 20, 35, 50}),
+        cron(
+            collect_orphan_files,
+            hour=provide_settings().ORPHAN_FILES_GC_HOUR,
+            minute=0,
+            timeout=ORPHAN_FILES_GC_TIMEOUT_SECONDS,
+        ),
+    ]
     queue_name = TASKS_SCHEDULING_QUEUE
     redis_settings = arq_redis_settings
+    on_startup = on_startup
     on_shutdown = on_shutdown
     allow_abort_jobs = True
+    # deferred jobs are picked up within the poll delay, it's a part of the dispatch lag of the scheduled messages
+    poll_delay = 0.1
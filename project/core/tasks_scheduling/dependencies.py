@@ -5,7 +5,7 @@ from typing import Optional
 from arq import ArqRedis
 from arq.jobs import Job
 from core.tasks_scheduling.constants import TASKS_SCHEDULING_QUEUE
-from fastapi import Request
+from starlette.requests import HTTPConnection
 
 
 @dataclass
@@ -37,8 +37,8 @@ class TasksScheduler(TasksSchedulerABC):
 
 class TaskSchedulerDependenciesOverrides:
     @staticmethod
-    async def get_tasks_scheduler(request: Request) -> TasksSchedulerABC:
-        return TasksScheduler(request.app.state.arq_redis_pool)
+    async def get_tasks_scheduler(connection: HTTPConnection) -> TasksSchedulerABC:
+        return TasksScheduler(connection.app.state.arq_redis_pool)
 
     def override_dependencies(self) -> dict:
         return {
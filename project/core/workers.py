@@ -0,0 +1,18 @@
+from core.dependencies.providers import provide_settings
+from uvicorn.workers import UvicornWorker
+
+settings = provide_settings()
+
+
+class ApplicationUvicornWorker(UvicornWorker):
+    """
+    Dead websocket connections are detected by the protocol level pings, answered by the clients' websocket stacks,
+    so the clients only receiving the events don't have to send anything to stay connected.
+    """
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        'ws': 'websockets',
+        'ws_ping_interval': settings.WEBSOCKET_PING_INTERVAL_SECONDS,
+        'ws_ping_timeout': settings.WEBSOCKET_PING_TIMEOUT_SECONDS,
+    }
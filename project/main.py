@@ -4,22 +4,33 @@ from accounts.dependencies.authentication.dependencies import AuthorizationDepen
 from accounts.dependencies.users.dependencies import UsersDependenciesOverrides
 from chat.dependencies.chat_rooms.dependencies import ChatRoomsDependenciesOverrides
 from chat.dependencies.messages.dependencies import MessagesDependenciesOverrides
+from chat.dependencies.presence.dependencies import PresenceDependenciesOverrides
+from chat.dependencies.read_cursors.dependencies import ReadCursorsDependenciesOverrides
 from core.config import SettingsABC
 from core.contrib.redis import RedisClientProvider
 from core.database.base import provide_db_sessionmaker
 from core.dependencies.dependencies import FastapiDependenciesOverrides
-from core.dependencies.providers import provide_settings
+from core.dependencies.providers import provide_file_storage, provide_settings
+from core.event_loop_watchdog import EventLoopWatchdog
+from core.media import provide_media_files
+from core.middlewares import MetricsMiddleware, QueriesStatisticsMiddleware
 from core.routers import v1
 from core.tasks_scheduling.arq_settings import create_arq_redis_pool
 from core.tasks_scheduling.dependencies import TaskSchedulerDependenciesOverrides
 from fastapi import FastAPI
-from starlette.staticfiles import StaticFiles
 
 
 def create_application(dependency_overrides_factory: Callable, config: SettingsABC) -> FastAPI:
     application = FastAPI()
 
-    application.mount(f'/{config.MEDIA_URL}', StaticFiles(directory=config.MEDIA_PATH), name='media')
+    application.add_middleware(MetricsMiddleware)
+    application.add_middleware(
+        QueriesStatisticsMiddleware,
+        expose_headers=config.DEBUG,
+        duplicated_queries_threshold=config.DUPLICATED_QUERIES_WARNING_THRESHOLD,
+    )
+
+    application.mount(f'/{config.MEDIA_URL}', provide_media_files(config), name='media')
 
     application.include_router(v1.router, prefix='/api/v1')
 
@@ -35,6 +46,8 @@ def fastapi_dependency_overrides_factory(config: SettingsABC) -> dict:
     authorization_dependencies_overrides = AuthorizationDependenciesOverrides
     messages_dependencies_overrides = MessagesDependenciesOverrides
     chat_rooms_dependencies_overrides = ChatRoomsDependenciesOverrides
+    presence_dependencies_overrides = PresenceDependenciesOverrides
+    read_cursors_dependencies_overrides = ReadCursorsDependenciesOverrides
     return {
         **dependencies_overrides.override_dependencies(),
         **tasks_scheduler_dependencies_overrides.override_dependencies(),
@@ -42,6 +55,8 @@ def fastapi_dependency_overrides_factory(config: SettingsABC) -> dict:
         **authorization_dependencies_overrides.override_dependencies(),
         **messages_dependencies_overrides.override_dependencies(),
         **chat_rooms_dependencies_overrides.override_dependencies(),
+        **presence_dependencies_overrides.override_dependencies(),
+        **read_cursors_dependencies_overrides.override_dependencies(),
     }
 
 
@@ -51,6 +66,13 @@ app = create_application(fastapi_dependency_overrides_factory, provide_settings(
 @app.on_event('startup')
 async def open_connections():
     app.state.arq_redis_pool = await create_arq_redis_pool()
+    config = provide_settings()
+    if config.EVENT_LOOP_WATCHDOG_ENABLED:
+        app.state.event_loop_watchdog = EventLoopWatchdog(
+            interval_seconds=config.EVENT_LOOP_WATCHDOG_INTERVAL_SECONDS,
+            threshold_seconds=config.EVENT_LOOP_BLOCKING_THRESHOLD_SECONDS,
+        )
+        app.state.event_loop_watchdog.start()
 
 
 @app.on_event('shutdown')
@@ -58,3 +80,6 @@ async def close_connections():
     provide_db_sessionmaker().close_all()
     await RedisClientProvider.provide_redis_client().close()
     await app.state.arq_redis_pool.close()
+    await provide_file_storage().close()
+    if event_loop_watchdog := getattr(app.state, 'event_loop_watchdog', None):
+        await event_loop_watchdog.stop()
@@ -0,0 +1,15 @@
+from core.config import SettingsABC
+from core.dependencies.providers import provide_settings
+from core.media import provide_media_files
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+
+def create_media_application(config: SettingsABC) -> Starlette:
+    """
+    Media served by its own workers, so the files downloads don't compete with the chat traffic.
+    """
+    return Starlette(routes=[Mount(f'/{config.MEDIA_URL}', app=provide_media_files(config), name='media')])
+
+
+app = create_media_application(provide_settings())
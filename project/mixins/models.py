@@ -1,7 +1,7 @@
-from datetime import datetime
-
 from core.database.base import Base
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, func
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, String, event, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declared_attr
 
 
 class DateTimeABC(Base):
@@ -23,15 +23,58 @@ class IsActiveABC(Base):
     is_active = Column(Boolean, default=True)
 
 
+class FileBlob(DateTimeABC):
+    """
+    Stored content shared by all the files with the same content, addressed by its hash.
+
+    references_count is maintained by the triggers of the files tables, so it's also correct after the files
+    are deleted by the cascades, the blob may be deleted only when it's zero.
+    """
+
+    __tablename__ = 'file_blobs'
+
+    content_hash = Column(String(64), primary_key=True)
+    file_path = Column(String, nullable=False, unique=True)
+    size = Column(BigInteger, nullable=False)
+    references_count = Column(Integer, nullable=False, default=0, server_default=text('0'))
+    variants = Column(JSONB(none_as_null=True), doc='Paths of the resized copies of the image by their size names')
+
+
 class FileABC(DateTimeABC):
     __abstract__ = True
 
     id = Column(Integer, primary_key=True)
-    file_path = Column(String, unique=True)
-
-    @property
-    def folder_to_save(self) -> str:
-        """
-        Must return path to directory where to save a file.
-        """
-        return datetime.utcnow().strftime('%Y/%m/%d/')
+    file_path = Column(String, doc='Path of the blob of the file, copied from it to read the files without a join')
+    variants = Column(JSONB(none_as_null=True), doc='Variants of the blob, copied from it when they are generated')
+
+    @declared_attr
+    def blob_hash(cls) -> Column:  # noqa: N805
+        return Column(String(64), ForeignKey('file_blobs.content_hash'), index=True)
+
+
+FILE_BLOBS_REFERENCES_COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION update_file_blobs_references_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.blob_hash IS NOT NULL THEN
+        UPDATE file_blobs SET references_count = references_count - 1 WHERE content_hash = OLD.blob_hash;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.blob_hash IS NOT NULL THEN
+        UPDATE file_blobs SET references_count = references_count + 1 WHERE content_hash = NEW.blob_hash;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+FILE_BLOBS_REFERENCES_COUNT_TRIGGER = """
+CREATE TRIGGER {table}_file_blobs_references_count
+AFTER INSERT OR DELETE OR UPDATE OF blob_hash ON {table}
+FOR EACH ROW EXECUTE FUNCTION update_file_blobs_references_count()
+"""
+
+
+@event.listens_for(Base.metadata, 'after_create')
+def _create_file_blobs_references_count_triggers(target, connection, **kwargs):
+    connection.execute(text(FILE_BLOBS_REFERENCES_COUNT_FUNCTION))
+    for file_model in FileABC.__subclasses__():
+        connection.execute(text(FILE_BLOBS_REFERENCES_COUNT_TRIGGER.format(table=file_model.__tablename__)))
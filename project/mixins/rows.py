@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Optional, Type
+
+from mixins.models import FileABC
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.sql.selectable import ScalarSelect
+
+# always with microseconds, so the values are parsed by datetime.fromisoformat
+JSON_DATETIME_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US'
+
+
+class FileRow:
+    __slots__ = ('id', 'created_at', 'modified_at', 'file_path', 'variants')
+
+    def __init__(
+        self,
+        id: int,  # noqa: A002
+        created_at: datetime,
+        modified_at: datetime,
+        file_path: str,
+        variants: Optional[dict[str, str]] = None,
+    ):
+        self.id = id
+        self.created_at = created_at
+        self.modified_at = modified_at
+        self.file_path = file_path
+        self.variants = variants
+
+    @classmethod
+    def from_json(cls, file_data: dict) -> 'FileRow':
+        return cls(
+            file_data['id'],
+            datetime.fromisoformat(file_data['created_at']),
+            datetime.fromisoformat(file_data['modified_at']),
+            file_data['file_path'],
+            file_data.get('variants'),
+        )
+
+
+def get_files_json_agg_subquery(file_model: Type[FileABC], *args: ColumnElement) -> ScalarSelect:
+    """
+    Aggregates the files into a JSON array in the database, so the files of a page of objects are selected
+    in the same row as their object, instead of multiplying the rows by joining the files.
+    """
+    files_json = func.json_agg(
+        aggregate_order_by(
+            func.json_build_object(
+                # keys are rendered inline, types of the bound parameters of json_build_object can't be inferred
+                literal_column("'id'"),
+                file_model.id,
+                literal_column("'created_at'"),
+                func.to_char(file_model.created_at, JSON_DATETIME_FORMAT),
+                literal_column("'modified_at'"),
+                func.to_char(file_model.modified_at, JSON_DATETIME_FORMAT),
+                literal_column("'file_path'"),
+                file_model.file_path,
+                literal_column("'variants'"),
+                file_model.variants,
+            ),
+            file_model.id,
+        ),
+    )
+    return select(func.coalesce(files_json, literal_column("'[]'::json"), type_=JSON)).where(*args).scalar_subquery()
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import Generic, List, Optional, TypeVar
+from typing import Dict, Generic, List, Optional, TypeVar
 
-from core.dependencies.providers import provide_settings
+from core.dependencies.providers import provide_file_storage
 from pydantic import BaseModel, validator
+from pydantic.generics import GenericModel
 
 T = TypeVar('T', bound=BaseModel)
 
@@ -12,14 +13,20 @@ class FilesSchema(BaseModel):
     created_at: datetime
     modified_at: datetime
     file_path: str
+    variants: Optional[Dict[str, str]] = None
 
     class Config:
         orm_mode = True
 
     @validator('file_path')
     def file_path_with_media_url(cls, value: str) -> str:  # noqa: N805
-        settings = provide_settings()
-        return f'{settings.HOST_DOMAIN}/{settings.MEDIA_URL}{"" if value.startswith("/") else "/"}{value}'
+        return get_media_url(value)
+
+    @validator('variants')
+    def variants_with_media_url(cls, value: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:  # noqa: N805
+        if not value:
+            return value
+        return {size_name: get_media_url(file_path) for size_name, file_path in value.items()}
 
     @validator('created_at')
     def created_at_as_string(cls, value: datetime) -> str:  # noqa: N805
@@ -30,11 +37,15 @@ class FilesSchema(BaseModel):
         return str(value)
 
 
+def get_media_url(file_path: str) -> str:
+    return provide_file_storage().get_url(file_path)
+
+
 class PhotosFieldSchemaMixin(BaseModel):
     photos: List[FilesSchema]
 
 
-class PaginatedResponseSchemaMixin(Generic[T], BaseModel):
+class PaginatedResponseSchemaMixin(GenericModel, Generic[T]):
     count: int
     total_pages: int
     current_page: int
@@ -42,3 +53,9 @@ class PaginatedResponseSchemaMixin(Generic[T], BaseModel):
     next: Optional[str]
     previous: Optional[str]
     data: List[T]
+
+
+class CursorPaginatedResponseSchemaMixin(GenericModel, Generic[T]):
+    page_size: int
+    next: Optional[str]
+    data: List[T]
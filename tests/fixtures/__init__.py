@@ -1,4 +1,7 @@
+from tests.fixtures.chat_rooms import *  # noqa: F401, F403
 from tests.fixtures.database import *  # noqa: F401, F403
 from tests.fixtures.events import *  # noqa: F401, F403
 from tests.fixtures.messages import *  # noqa: F401, F403
+from tests.fixtures.redis import *  # noqa: F401, F403
 from tests.fixtures.tasks_scheduling import *  # noqa: F401, F403
+from tests.fixtures.websockets import *  # noqa: F401, F403
@@ -0,0 +1,33 @@
+import pytest
+import pytest_asyncio
+from chat.database.repository.chat_rooms import ChatRoomsDatabaseRepositoryABC
+from chat.dependencies.chat_rooms.providers import (
+    provide_chat_rooms_create_update_service,
+    provide_chat_rooms_db_repository,
+    provide_chat_rooms_retrieve_service,
+)
+from chat.models import ChatRoom
+from chat.services.chat_rooms import ChatRoomsCreateUpdateServiceABC
+
+__all__ = ['chat_rooms_db_repository', 'chat_rooms_create_update_service', 'chat_room']
+
+
+@pytest.fixture()
+def chat_rooms_db_repository(db_session) -> ChatRoomsDatabaseRepositoryABC:
+    return provide_chat_rooms_db_repository(db_session)
+
+
+@pytest.fixture()
+def chat_rooms_create_update_service(chat_rooms_db_repository) -> ChatRoomsCreateUpdateServiceABC:
+    return provide_chat_rooms_create_update_service(
+        chat_rooms_db_repository,
+        provide_chat_rooms_retrieve_service(chat_rooms_db_repository),
+    )
+
+
+@pytest_asyncio.fixture()
+async def chat_room(db_session) -> ChatRoom:
+    chat_room = ChatRoom(name='test_chat_room')
+    db_session.add(chat_room)
+    await db_session.commit()
+    return chat_room
@@ -1,15 +1,16 @@
 import pytest_asyncio
 from core.database.base import provide_db_engine, provide_db_sessionmaker
+from core.database.caching import CacheInvalidatingAsyncSession
 from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
 
-__all__ = ['db_session']
+__all__ = ['db_session', 'cache_invalidating_db_session']
 
 
-@pytest_asyncio.fixture()
-async def db_session():
+async def _create_db_session(db_sessionmaker: sessionmaker):
     connection = await provide_db_engine().connect()
     transaction = await connection.begin()
-    session = provide_db_sessionmaker()(bind=connection)
+    session = db_sessionmaker(bind=connection)
     nested = await connection.begin_nested()  # Begin a nested transaction (using SAVEPOINT).
 
     # If the application code calls session.commit, it will end the nested transaction.
@@ -26,3 +27,16 @@ async def db_session():
     await session.close()
     await transaction.rollback()
     await connection.close()
+
+
+@pytest_asyncio.fixture()
+async def db_session():
+    async for session in _create_db_session(provide_db_sessionmaker()):
+        yield session
+
+
+@pytest_asyncio.fixture()
+async def cache_invalidating_db_session():
+    db_sessionmaker = sessionmaker(autoflush=False, expire_on_commit=False, class_=CacheInvalidatingAsyncSession)
+    async for session in _create_db_session(db_sessionmaker):
+        yield session
@@ -1,14 +1,48 @@
+import json
+
 import pytest
 from core.dependencies.providers import EventPublisher
 
-__all__ = ['event_publisher']
+__all__ = ['event_publisher', 'published_events']
 
 
 class TestsEventPublisher(EventPublisher):
-    async def publish(self, *args):
-        pass
+    def __init__(self):
+        self.published_events = []
+
+    async def publish(self, channel: str, message: str):
+        self.published_events.append((channel, json.loads(message)))
+
+    def pipeline(self, *args, **kwargs) -> 'TestsEventPublisherPipeline':
+        return TestsEventPublisherPipeline(self)
+
+
+class TestsEventPublisherPipeline:
+    def __init__(self, event_publisher: TestsEventPublisher):
+        self.event_publisher = event_publisher
+        self.commands = []
+
+    async def __aenter__(self) -> 'TestsEventPublisherPipeline':
+        return self
+
+    async def __aexit__(self, *args):
+        self.commands.clear()
+
+    def publish(self, channel: str, message: str):
+        self.commands.append((channel, message))
+
+    async def execute(self):
+        for channel, message in self.commands:
+            await self.event_publisher.publish(channel, message)
+        self.commands.clear()
 
 
 @pytest.fixture(scope='session', autouse=True)
 def event_publisher() -> EventPublisher:
     return TestsEventPublisher()
+
+
+@pytest.fixture()
+def published_events(event_publisher) -> list[tuple[str, dict]]:
+    event_publisher.published_events.clear()
+    return event_publisher.published_events
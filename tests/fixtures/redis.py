@@ -0,0 +1,13 @@
+import pytest_asyncio
+from core.dependencies.providers import provide_settings
+from redis import asyncio as aioredis
+
+__all__ = ['redis_client']
+
+
+@pytest_asyncio.fixture()
+async def redis_client() -> aioredis.Redis:
+    redis_client = aioredis.from_url(provide_settings().REDIS_HOST_URL)
+    yield redis_client
+    await redis_client.flushdb()
+    await redis_client.close()
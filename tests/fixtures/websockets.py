@@ -0,0 +1,49 @@
+import pytest_asyncio
+from accounts.models import User
+from chat.constants.chat_rooms import ChatRoomMemberTypeEnum
+from chat.dependencies.messages.providers import (
+    provide_messages_create_update_delete_service,
+    provide_messages_retrieve_service,
+)
+from chat.models import ChatRoom, chatroom_members_association_table
+from chat.websockets.chat import WebSocketConnection
+from chat.websockets.frames import ChatRoomsWebSocketFramesHandler, ChatRoomsWebSocketFramesHandlerABC
+from sqlalchemy import insert
+
+__all__ = ['websocket_frames_handler']
+
+
+@pytest_asyncio.fixture()
+async def websocket_frames_handler(
+    db_session,
+    messages_db_repository,
+    message_files_service,
+    tasks_scheduler,
+    event_publisher,
+) -> ChatRoomsWebSocketFramesHandlerABC:
+    user = User(nickname='websocket_user', email='websocket_user@test.com', password='password')
+    chat_room = ChatRoom(name='websocket_chat_room')
+    db_session.add_all((user, chat_room))
+    await db_session.flush()
+    await db_session.execute(
+        insert(chatroom_members_association_table).values(
+            room_id=chat_room.id,
+            user_id=user.id,
+            member_type=ChatRoomMemberTypeEnum.ADMIN.value,
+        ),
+    )
+    await db_session.commit()
+    return ChatRoomsWebSocketFramesHandler(
+        WebSocketConnection(websocket=None, user=user),
+        chat_room.id,
+        messages_db_repository,
+        provide_messages_retrieve_service(messages_db_repository),
+        provide_messages_create_update_delete_service(
+            messages_db_repository,
+            event_publisher,
+            message_files_service,
+            tasks_scheduler=tasks_scheduler,
+            chat_room_id=chat_room.id,
+        ),
+        event_publisher,
+    )
@@ -0,0 +1,188 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from accounts.models import User
+from chat.api.permissions.chat_rooms import ChatRoomMembersPermissions
+from chat.api.permissions.messages import UserChatRoomMessagingPermissions
+from chat.constants.chat_rooms import ChatRoomMemberTypeEnum
+from chat.models import ChatRoom, chatroom_members_association_table
+from chat.services.exceptions.chat_rooms import ChatRoomMessagesRateLimitExceededException
+from chat.services.rate_limiting import RedisChatRoomsMessagesRateLimiter
+from fastapi import HTTPException
+from sqlalchemy import insert, select, text
+
+
+async def create_users(db_session, count: int) -> list[User]:
+    users = [
+        User(nickname=f'member_{index}', email=f'member_{index}@test.com', password='password')
+        for index in range(count)
+    ]
+    db_session.add_all(users)
+    await db_session.commit()
+    return users
+
+
+async def get_members(db_session, chat_room_id: int) -> dict[int, str]:
+    result = await db_session.execute(
+        select(chatroom_members_association_table.c.user_id, chatroom_members_association_table.c.member_type).where(
+            chatroom_members_association_table.c.room_id == chat_room_id,
+        ),
+    )
+    return dict(result.all())
+
+
+@pytest.mark.asyncio
+async def test_add_members_inserts_only_existing_users_which_are_not_members(
+    db_session,
+    chat_rooms_create_update_service,
+):
+    admin, member, new_member = await create_users(db_session, 3)
+    chat_room = await chat_rooms_create_update_service.create_chat_room(
+        'members_chat_room',
+        [member.id],
+        admins_ids=(admin.id,),
+    )
+
+    await chat_rooms_create_update_service.add_members(chat_room.id, (admin.id, new_member.id, new_member.id + 1000))
+    assert await get_members(db_session, chat_room.id) == {
+        admin.id: ChatRoomMemberTypeEnum.ADMIN.value,
+        member.id: ChatRoomMemberTypeEnum.MEMBER.value,
+        new_member.id: ChatRoomMemberTypeEnum.MEMBER.value,
+    }
+
+
+@pytest.mark.asyncio
+async def test_remove_and_set_members(db_session, chat_room, chat_rooms_create_update_service):
+    first_user, second_user, third_user = await create_users(db_session, 3)
+    await chat_rooms_create_update_service.add_members(chat_room.id, (first_user.id, second_user.id))
+
+    await chat_rooms_create_update_service.remove_members(chat_room.id, (first_user.id, third_user.id))
+    assert await get_members(db_session, chat_room.id) == {second_user.id: ChatRoomMemberTypeEnum.MEMBER.value}
+
+    await chat_rooms_create_update_service.update_chat_room(chat_room, members_ids=(first_user.id, third_user.id))
+    assert await get_members(db_session, chat_room.id) == {
+        first_user.id: ChatRoomMemberTypeEnum.MEMBER.value,
+        third_user.id: ChatRoomMemberTypeEnum.MEMBER.value,
+    }
+
+
+@pytest.mark.asyncio
+async def test_only_admins_can_remove_other_members(
+    db_session, chat_rooms_create_update_service, chat_rooms_db_repository
+):
+    admin, member, another_member, not_member = await create_users(db_session, 4)
+    chat_room = await chat_rooms_create_update_service.create_chat_room(
+        'permissions_chat_room',
+        [member.id, another_member.id],
+        admins_ids=(admin.id,),
+    )
+
+    member_permissions = ChatRoomMembersPermissions(member, chat_room.id, chat_rooms_db_repository)
+    await member_permissions.check_user_can_remove_members((member.id,))
+    for members_ids in ((another_member.id,), (admin.id,), (member.id, another_member.id)):
+        with pytest.raises(HTTPException):
+            await member_permissions.check_user_can_remove_members(members_ids)
+    with pytest.raises(HTTPException):
+        await member_permissions.check_permissions()
+
+    with pytest.raises(HTTPException):
+        await ChatRoomMembersPermissions(
+            not_member,
+            chat_room.id,
+            chat_rooms_db_repository,
+        ).check_user_can_remove_members((not_member.id,))
+
+    admin_permissions = ChatRoomMembersPermissions(admin, chat_room.id, chat_rooms_db_repository)
+    await admin_permissions.check_user_can_remove_members((member.id, another_member.id))
+    await admin_permissions.check_permissions()
+
+
+@pytest.mark.asyncio
+async def test_members_of_chat_room_without_admins_can_remove_other_members(
+    db_session,
+    chat_room,
+    chat_rooms_create_update_service,
+    chat_rooms_db_repository,
+):
+    member, another_member = await create_users(db_session, 2)
+    await chat_rooms_create_update_service.add_members(chat_room.id, (member.id, another_member.id))
+
+    member_permissions = ChatRoomMembersPermissions(member, chat_room.id, chat_rooms_db_repository)
+    await member_permissions.check_permissions()
+    await member_permissions.check_user_can_remove_members((another_member.id,))
+
+
+@pytest.mark.asyncio
+async def test_chat_rooms_admins_backfill_migration(db_session, chat_room):
+    migration_spec = importlib.util.spec_from_file_location(
+        'backfilled_chat_rooms_admins',
+        Path(__file__).parents[3] / 'project/alembic/versions/c61f0a9e4d25_backfilled_chat_rooms_admins.py',
+    )
+    migration = importlib.util.module_from_spec(migration_spec)
+    migration_spec.loader.exec_module(migration)
+    admin, member, another_admin, another_member = await create_users(db_session, 4)
+    chat_room_with_admin = ChatRoom(name='chat_room_with_admin')
+    db_session.add(chat_room_with_admin)
+    await db_session.flush()
+    await db_session.execute(
+        insert(chatroom_members_association_table),
+        [
+            {'room_id': room_id, 'user_id': user_id, 'member_type': member_type.value}
+            for room_id, user_id, member_type in (
+                (chat_room.id, member.id, ChatRoomMemberTypeEnum.MEMBER),
+                (chat_room.id, admin.id, ChatRoomMemberTypeEnum.MEMBER),
+                (chat_room_with_admin.id, another_member.id, ChatRoomMemberTypeEnum.MEMBER),
+                (chat_room_with_admin.id, another_admin.id, ChatRoomMemberTypeEnum.ADMIN),
+            )
+        ],
+    )
+    await db_session.commit()
+
+    await db_session.execute(text(migration.CHAT_ROOMS_ADMINS_BACKFILL_QUERY))
+    await db_session.commit()
+    assert await get_members(db_session, chat_room.id) == {
+        admin.id: ChatRoomMemberTypeEnum.ADMIN.value,
+        member.id: ChatRoomMemberTypeEnum.MEMBER.value,
+    }
+    assert await get_members(db_session, chat_room_with_admin.id) == {
+        another_admin.id: ChatRoomMemberTypeEnum.ADMIN.value,
+        another_member.id: ChatRoomMemberTypeEnum.MEMBER.value,
+    }
+
+
+@pytest.mark.asyncio
+async def test_only_admins_can_send_messages_to_broadcast_chat_rooms_at_limited_rate(
+    db_session,
+    chat_rooms_create_update_service,
+    chat_rooms_db_repository,
+    redis_client,
+):
+    admin, member, not_member = await create_users(db_session, 3)
+    chat_room = await chat_rooms_create_update_service.create_chat_room(
+        'messaging_chat_room',
+        [member.id],
+        admins_ids=(admin.id,),
+    )
+    broadcast_chat_room = await chat_rooms_create_update_service.create_chat_room(
+        'broadcast_chat_room',
+        [member.id],
+        admins_ids=(admin.id,),
+        is_broadcast=True,
+    )
+    rate_limiter = RedisChatRoomsMessagesRateLimiter(redis_client, limit=2, window_seconds=60)
+
+    def get_permissions(user: User, chat_room_id: int) -> UserChatRoomMessagingPermissions:
+        return UserChatRoomMessagingPermissions(user, chat_room_id, chat_rooms_db_repository, rate_limiter=rate_limiter)
+
+    for _ in range(3):
+        await get_permissions(member, chat_room.id).check_user_can_send_messages()
+    for user, chat_room_id in ((not_member, chat_room.id), (member, broadcast_chat_room.id)):
+        with pytest.raises(HTTPException) as exception_info:
+            await get_permissions(user, chat_room_id).check_user_can_send_messages()
+        assert exception_info.value.status_code == 403
+
+    for _ in range(2):
+        await get_permissions(admin, broadcast_chat_room.id).check_user_can_send_messages()
+    with pytest.raises(ChatRoomMessagesRateLimitExceededException):
+        await get_permissions(admin, broadcast_chat_room.id).check_user_can_send_messages()
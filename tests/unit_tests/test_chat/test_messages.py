@@ -1,7 +1,19 @@
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
 import pytest
 from chat.constants.messages import MessagesTypeEnum
 from chat.database.selectors.messages import get_message_creation_relations_to_load
-from chat.services.messages import MessagesCreateUpdateDeleteServiceABC
+from chat.dependencies.messages.providers import (
+    provide_messages_create_update_delete_service,
+    provide_scheduled_messages_dispatcher,
+)
+from chat.models import ChatRoom, Message
+from chat.services.messages import MessagesCreateUpdateDeleteServiceABC, get_scheduled_messages_bucket
+from chat.services.read_cursors import RedisUnreadMessagesCountersService
+from core.dependencies.providers import provide_settings
+from sqlalchemy import text
 
 
 @pytest.mark.asyncio
@@ -20,3 +32,123 @@ async def test_create_scheduled_message(messages_create_update_delete_service: M
     assert message.text == 'test message text'
     assert message.message_type == MessagesTypeEnum.SCHEDULED
     assert message.scheduler_task_id
+
+
+def test_get_scheduled_messages_bucket():
+    bucket_end = datetime(2022, 5, 1, 12, 0, 1)
+    assert get_scheduled_messages_bucket(datetime(2022, 5, 1, 12, 0, 0, 600000), 500) == bucket_end
+    assert get_scheduled_messages_bucket(datetime(2022, 5, 1, 12, 0, 1), 500) == bucket_end
+    assert get_scheduled_messages_bucket(datetime(2022, 5, 1, 12, 0, 1, 1000), 500) > bucket_end
+
+
+@pytest.mark.asyncio
+async def test_chat_room_last_message_is_maintained_on_creation_and_deletion(
+    db_session,
+    chat_room,
+    messages_db_repository,
+    event_publisher,
+    message_files_service,
+    tasks_scheduler,
+):
+    messages_service = provide_messages_create_update_delete_service(
+        messages_db_repository,
+        event_publisher,
+        message_files_service,
+        tasks_scheduler=tasks_scheduler,
+        chat_room_id=chat_room.id,
+    )
+    first_message = await messages_service.create_message(text='first')
+    second_message = await messages_service.create_message(text='second')
+    await messages_service.create_scheduled_message(text='scheduled', scheduled_at=datetime(2100, 1, 1))
+    await db_session.refresh(chat_room)
+    assert chat_room.last_message_id == second_message.id
+
+    await messages_service.delete_messages((first_message.id,))
+    await db_session.refresh(chat_room)
+    assert chat_room.last_message_id == second_message.id
+
+    await messages_service.delete_messages((second_message.id,))
+    await db_session.refresh(chat_room)
+    assert chat_room.last_message_id is None
+
+
+@pytest.mark.asyncio
+async def test_chat_rooms_last_message_backfill_migration(db_session, chat_room):
+    migration_spec = importlib.util.spec_from_file_location(
+        'added_last_message_id_to_chat_rooms',
+        Path(__file__).parents[3] / 'project/alembic/versions/a81d5e0c4f27_added_last_message_id_to_chat_rooms.py',
+    )
+    migration = importlib.util.module_from_spec(migration_spec)
+    migration_spec.loader.exec_module(migration)
+    empty_chat_room = ChatRoom(name='empty_chat_room')
+    messages = [Message(text=str(index), chat_room_id=chat_room.id) for index in range(2)]
+    scheduled_message = Message(
+        text='scheduled',
+        chat_room_id=chat_room.id,
+        message_type=MessagesTypeEnum.SCHEDULED.value,
+    )
+    db_session.add_all((empty_chat_room, *messages, scheduled_message))
+    await db_session.commit()
+
+    await db_session.execute(text(migration.LAST_MESSAGE_ID_BACKFILL_QUERY))
+    await db_session.commit()
+    await db_session.refresh(chat_room)
+    await db_session.refresh(empty_chat_room)
+    assert chat_room.last_message_id == messages[-1].id
+    assert empty_chat_room.last_message_id is None
+
+
+@pytest.mark.asyncio
+async def test_due_scheduled_messages_are_dispatched_by_batches(
+    db_session,
+    chat_room,
+    messages_db_repository,
+    event_publisher,
+    published_events,
+    redis_client,
+):
+    due_at = datetime(2022, 5, 1, 12)
+    due_messages = [
+        Message(
+            text=str(index),
+            chat_room_id=chat_room.id,
+            message_type=MessagesTypeEnum.SCHEDULED.value,
+            scheduled_at=datetime(2022, 5, 1, 11, index),
+        )
+        for index in range(3)
+    ]
+    future_message = Message(
+        text='future',
+        chat_room_id=chat_room.id,
+        message_type=MessagesTypeEnum.SCHEDULED.value,
+        scheduled_at=datetime(2022, 5, 1, 13),
+    )
+    deleted_message = Message(
+        text='deleted',
+        chat_room_id=chat_room.id,
+        message_type=MessagesTypeEnum.SCHEDULED.value,
+        scheduled_at=datetime(2022, 5, 1, 11),
+    )
+    db_session.add_all((*due_messages, future_message, deleted_message))
+    await db_session.commit()
+    await db_session.delete(deleted_message)
+    await db_session.commit()
+    dispatcher = provide_scheduled_messages_dispatcher(
+        messages_db_repository,
+        event_publisher,
+        RedisUnreadMessagesCountersService(redis_client),
+        provide_settings().copy(update={'SCHEDULED_MESSAGES_DISPATCH_BATCH_SIZE': 2}),
+    )
+
+    assert await dispatcher.dispatch_due_messages(due_at) == 3
+    for message in (*due_messages, future_message):
+        await db_session.refresh(message)
+    assert [message.message_type for message in due_messages] == [MessagesTypeEnum.PRIMARY] * 3
+    assert future_message.message_type == MessagesTypeEnum.SCHEDULED
+    await db_session.refresh(chat_room)
+    assert chat_room.last_message_id == due_messages[-1].id
+    assert sorted(event['id'] for _, event in published_events) == [message.id for message in due_messages]
+    assert {channel for channel, _ in published_events} == {f'chat_room:{chat_room.id}'}
+
+    assert await dispatcher.dispatch_due_messages(due_at) == 0
+    assert len(published_events) == 3
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+from chat.constants.websockets import WebSocketOutboundActionTypeEnum
+from chat.services.presence import RedisPresenceService
+from core.dependencies.providers import provide_settings
+
+
+class PresenceTestsChatRoomsRetrieveService:
+    def __init__(self, chat_rooms_members_ids: dict[int, list[int]]):
+        self.chat_rooms_members_ids = chat_rooms_members_ids
+
+    async def get_user_chat_room_ids(self, user_id: int, is_broadcast=None) -> list[int]:
+        return [
+            chat_room_id for chat_room_id, member_ids in self.chat_rooms_members_ids.items() if user_id in member_ids
+        ]
+
+    async def get_chat_room_member_ids(self, chat_room_id: int, user_ids=None) -> list[int]:
+        member_ids = self.chat_rooms_members_ids[chat_room_id]
+        if user_ids is None:
+            return member_ids
+        user_ids = set(user_ids)
+        return [member_id for member_id in member_ids if member_id in user_ids]
+
+
+def get_presence_service(redis_client, event_publisher, **settings) -> RedisPresenceService:
+    return RedisPresenceService(
+        redis_client,
+        event_publisher,
+        PresenceTestsChatRoomsRetrieveService({1: [1, 2, 3], 2: [1]}),
+        provide_settings().copy(update={'PRESENCE_EVENTS_RATE_LIMIT_SECONDS': 0, **settings}),
+    )
+
+
+def get_presence_events(published_events: list) -> list[tuple[str, int, bool]]:
+    return [
+        (channel, event['user_id'], event['is_online'])
+        for channel, event in published_events
+        if event['action'] == WebSocketOutboundActionTypeEnum.PRESENCE.value
+    ]
+
+
+@pytest.mark.asyncio
+async def test_presence_events_are_published_by_first_and_last_connections(
+    redis_client,
+    event_publisher,
+    published_events,
+):
+    presence_service = get_presence_service(redis_client, event_publisher)
+
+    await presence_service.connect(1, 'first')
+    await presence_service.connect(1, 'second')
+    assert get_presence_events(published_events) == [('chat_room:1', 1, True), ('chat_room:2', 1, True)]
+    assert await presence_service.get_online_user_ids((1, 2)) == [1]
+
+    published_events.clear()
+    await presence_service.disconnect(1, 'first')
+    assert get_presence_events(published_events) == []
+    await presence_service.disconnect(1, 'second')
+    assert get_presence_events(published_events) == [('chat_room:1', 1, False), ('chat_room:2', 1, False)]
+    assert await presence_service.get_online_user_ids((1, 2)) == []
+
+
+@pytest.mark.asyncio
+async def test_expired_users_are_published_offline(redis_client, event_publisher, published_events):
+    presence_service = get_presence_service(redis_client, event_publisher)
+    await presence_service.connect(2, 'crashed')
+    await presence_service.connect(3, 'alive')
+    expired_at = time.time() - 1
+    # as if the worker of the connection has crashed and its heartbeats have stopped
+    await redis_client.zadd(presence_service._get_presence_key(2), {'crashed': expired_at})
+    await redis_client.zadd(presence_service.online_users_key, {2: expired_at})
+    published_events.clear()
+
+    assert await presence_service.publish_expired_users_offline() == 1
+    assert get_presence_events(published_events) == [('chat_room:1', 2, False)]
+    assert await presence_service.publish_expired_users_offline() == 0
+    assert await presence_service.get_online_user_ids((2, 3)) == [3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('online_users_lookup_limit', (1000, 0))
+async def test_get_chat_room_online_user_ids(redis_client, event_publisher, online_users_lookup_limit):
+    presence_service = get_presence_service(
+        redis_client,
+        event_publisher,
+        PRESENCE_ONLINE_USERS_LOOKUP_LIMIT=online_users_lookup_limit,
+    )
+    for user_id in (1, 3, 4):
+        await presence_service.connect(user_id, f'connection_{user_id}')
+
+    assert sorted(await presence_service.get_chat_room_online_user_ids(1)) == [1, 3]
+    assert await presence_service.get_chat_room_online_user_ids(2) == [1]
+
+
+@pytest.mark.asyncio
+async def test_presence_events_of_flapping_user_are_rate_limited(redis_client, event_publisher, published_events):
+    presence_service = get_presence_service(redis_client, event_publisher, PRESENCE_EVENTS_RATE_LIMIT_SECONDS=10)
+    await presence_service.connect(1, 'first')
+    assert get_presence_events(published_events) == [('chat_room:1', 1, True), ('chat_room:2', 1, True)]
+    published_events.clear()
+
+    await presence_service.disconnect(1, 'first')
+    await presence_service.connect(1, 'second')
+    await presence_service.disconnect(1, 'second')
+    assert get_presence_events(published_events) == []
+    # the delayed offline event is published by the sweep after the window
+    await redis_client.zadd(presence_service.delayed_presence_events_key, {1: time.time() - 1})
+    await redis_client.delete('presence:events:1')
+    assert await presence_service.publish_delayed_presence_events() == 1
+    assert get_presence_events(published_events) == [('chat_room:1', 1, False), ('chat_room:2', 1, False)]
+    assert await presence_service.publish_delayed_presence_events() == 0
+
+
+@pytest.mark.asyncio
+async def test_delayed_presence_event_is_not_published_if_presence_is_unchanged(
+    redis_client,
+    event_publisher,
+    published_events,
+):
+    presence_service = get_presence_service(redis_client, event_publisher, PRESENCE_EVENTS_RATE_LIMIT_SECONDS=10)
+    await presence_service.connect(1, 'first')
+    await presence_service.disconnect(1, 'first')
+    await presence_service.connect(1, 'second')
+    published_events.clear()
+    await redis_client.zadd(presence_service.delayed_presence_events_key, {1: time.time() - 1})
+    await redis_client.delete('presence:events:1')
+    assert await presence_service.publish_delayed_presence_events() == 0
+    assert get_presence_events(published_events) == []
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_of_user_set_offline_publishes_it_online(redis_client, event_publisher, published_events):
+    presence_service = get_presence_service(redis_client, event_publisher)
+    await presence_service.connect(1, 'delayed')
+    expired_at = time.time() - 1
+    await redis_client.zadd(presence_service._get_presence_key(1), {'delayed': expired_at})
+    await redis_client.zadd(presence_service.online_users_key, {1: expired_at})
+    assert await presence_service.publish_expired_users_offline() == 1
+    published_events.clear()
+
+    await presence_service.heartbeat(1, 'delayed')
+    assert get_presence_events(published_events) == [('chat_room:1', 1, True), ('chat_room:2', 1, True)]
+    assert await presence_service.get_online_user_ids((1,)) == [1]
+    await presence_service.heartbeat(1, 'delayed')
+    assert len(get_presence_events(published_events)) == 2
@@ -0,0 +1,136 @@
+import pytest
+from accounts.models import User
+from chat.constants.messages import MessagesTypeEnum
+from chat.dependencies.chat_rooms.providers import provide_chat_rooms_db_repository
+from chat.dependencies.read_cursors.providers import provide_chat_rooms_read_cursors_service
+from chat.models import ChatRoom, Message, chatroom_members_association_table
+from chat.services.read_cursors import RedisUnreadMessagesCountersService
+from core.database.versions import RedisTablesVersions
+from sqlalchemy import insert
+
+
+@pytest.mark.asyncio
+async def test_unread_messages_count_is_set_against_chat_room_messages_count(redis_client):
+    unread_messages_counters_service = RedisUnreadMessagesCountersService(redis_client)
+    await unread_messages_counters_service.increment_chat_rooms_messages_counts(((1, None), (1, 2), (1, None)))
+
+    await unread_messages_counters_service.set_unread_messages_count(1, 1, 2)
+    await unread_messages_counters_service.set_unread_messages_count(2, 2, 5)
+    assert await unread_messages_counters_service.get_unread_messages_counts(1, (1, 2)) == {1: 2, 2: 0}
+    assert await unread_messages_counters_service.get_unread_messages_counts(2, (1, 2)) == {1: 2, 2: 0}
+
+    await unread_messages_counters_service.increment_chat_room_messages_count(1)
+    assert await unread_messages_counters_service.get_unread_messages_counts(1, (1,)) == {1: 3}
+
+
+@pytest.mark.asyncio
+async def test_unread_messages_counters_versions_are_scoped(redis_client):
+    unread_messages_counters_service = RedisUnreadMessagesCountersService(redis_client)
+    tables_versions = RedisTablesVersions(redis_client)
+    versions_tables = (
+        RedisUnreadMessagesCountersService.get_chat_room_versions_table(1),
+        RedisUnreadMessagesCountersService.get_chat_room_versions_table(2),
+        RedisUnreadMessagesCountersService.get_user_versions_table(1),
+        RedisUnreadMessagesCountersService.get_user_versions_table(2),
+    )
+
+    await unread_messages_counters_service.increment_chat_room_messages_count(1, author_id=2)
+    assert await tables_versions.get_versions(*versions_tables) == (1, 0, 0, 1)
+
+    await unread_messages_counters_service.set_unread_messages_count(1, 1, 0)
+    assert await tables_versions.get_versions(*versions_tables) == (1, 0, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_unread_messages_counters_are_seeded(redis_client):
+    unread_messages_counters_service = RedisUnreadMessagesCountersService(redis_client)
+    await unread_messages_counters_service.increment_chat_room_messages_count(1)
+    assert not await unread_messages_counters_service.are_counters_seeded()
+
+    await unread_messages_counters_service.seed_counters(((1, 5), (2, 3)), ((1, 1, 2), (1, 2, 3), (2, 1, 5)))
+    assert await unread_messages_counters_service.are_counters_seeded()
+    assert await unread_messages_counters_service.get_unread_messages_counts(1, (1, 2)) == {1: 3, 2: 0}
+    assert await unread_messages_counters_service.get_unread_messages_counts(2, (1, 2)) == {1: 0, 2: 3}
+
+
+@pytest.mark.asyncio
+async def test_read_cursor_moves_only_forward_to_messages_of_chat_room(db_session, redis_client):
+    user = User(nickname='reader', email='reader@test.com', password='password')
+    another_user = User(nickname='writer', email='writer@test.com', password='password')
+    chat_room, another_chat_room = ChatRoom(name='read_cursor_chat_room'), ChatRoom(name='another_chat_room')
+    db_session.add_all((user, another_user, chat_room, another_chat_room))
+    await db_session.flush()
+    await db_session.execute(insert(chatroom_members_association_table).values(room_id=chat_room.id, user_id=user.id))
+    messages = [Message(text=str(index), author_id=another_user.id, chat_room_id=chat_room.id) for index in range(3)]
+    scheduled_message = Message(
+        text='scheduled',
+        chat_room_id=chat_room.id,
+        message_type=MessagesTypeEnum.SCHEDULED.value,
+    )
+    another_chat_room_message = Message(text='another', chat_room_id=another_chat_room.id)
+    db_session.add_all((*messages, scheduled_message, another_chat_room_message))
+    await db_session.commit()
+    unread_messages_counters_service = RedisUnreadMessagesCountersService(redis_client)
+    await unread_messages_counters_service.increment_chat_rooms_messages_counts(
+        (chat_room.id, another_user.id) for _ in messages
+    )
+    read_cursors_service = provide_chat_rooms_read_cursors_service(
+        provide_chat_rooms_db_repository(db_session),
+        unread_messages_counters_service,
+    )
+
+    read_cursor = await read_cursors_service.advance_read_cursor(user.id, chat_room.id, messages[1].id)
+    assert read_cursor == {'last_read_message_id': messages[1].id, 'unread_messages_count': 1}
+    assert await unread_messages_counters_service.get_unread_messages_counts(user.id, (chat_room.id,)) == {
+        chat_room.id: 1,
+    }
+
+    read_cursor = await read_cursors_service.advance_read_cursor(user.id, chat_room.id, messages[0].id)
+    assert read_cursor == {'last_read_message_id': messages[1].id, 'unread_messages_count': 1}
+
+    for message_id in (another_chat_room_message.id, scheduled_message.id, another_chat_room_message.id + 1000):
+        assert await read_cursors_service.advance_read_cursor(user.id, chat_room.id, message_id) is None
+    assert await read_cursors_service.advance_read_cursor(another_user.id, chat_room.id, messages[2].id) is None
+
+    read_cursor = await read_cursors_service.advance_read_cursor(user.id, chat_room.id, messages[2].id)
+    assert read_cursor == {'last_read_message_id': messages[2].id, 'unread_messages_count': 0}
+
+
+@pytest.mark.asyncio
+async def test_unread_messages_counters_are_seeded_from_database(db_session, chat_room, redis_client):
+    reader, writer = (
+        User(nickname=nickname, email=f'{nickname}@test.com', password='password') for nickname in ('reader', 'writer')
+    )
+    db_session.add_all((reader, writer))
+    await db_session.flush()
+    await db_session.execute(
+        insert(chatroom_members_association_table),
+        [{'room_id': chat_room.id, 'user_id': user.id} for user in (reader, writer)],
+    )
+    messages = [
+        Message(text=str(index), author_id=author.id, chat_room_id=chat_room.id)
+        for index, author in enumerate((writer, reader, writer, writer))
+    ]
+    scheduled_message = Message(
+        text='scheduled',
+        chat_room_id=chat_room.id,
+        message_type=MessagesTypeEnum.SCHEDULED.value,
+    )
+    db_session.add_all((*messages, scheduled_message))
+    await db_session.commit()
+    read_cursors_service = provide_chat_rooms_read_cursors_service(
+        provide_chat_rooms_db_repository(db_session),
+        RedisUnreadMessagesCountersService(redis_client),
+    )
+    await read_cursors_service.advance_read_cursor(reader.id, chat_room.id, messages[0].id)
+    await redis_client.flushdb()
+
+    assert await read_cursors_service.seed_unread_messages_counters()
+    unread_messages_counters_service = RedisUnreadMessagesCountersService(redis_client)
+    assert await unread_messages_counters_service.get_unread_messages_counts(reader.id, (chat_room.id,)) == {
+        chat_room.id: 2,
+    }
+    assert await unread_messages_counters_service.get_unread_messages_counts(writer.id, (chat_room.id,)) == {
+        chat_room.id: 1,
+    }
+    assert not await read_cursors_service.seed_unread_messages_counters()
@@ -0,0 +1,183 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from accounts.models import User
+from chat.constants.websockets import WebSocketAckStatusEnum
+from chat.websockets.broadcast import BroadcastChatRoomsFanout
+from chat.websockets.chat import (
+    ChatRoomsWebSocketConnectionManager,
+    WebSocketConnection,
+    WebSocketConnectionsRegistry,
+    get_frame_size,
+)
+from chat.websockets.frames import ChatRoomsWebSocketFramesHandlerABC
+from core.dependencies.providers import EventReceiver
+from fastapi import status
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+
+@pytest.mark.asyncio
+async def test_send_message_frame(websocket_frames_handler: ChatRoomsWebSocketFramesHandlerABC):
+    ack = await websocket_frames_handler.handle_raw_frame(
+        '{"action": "send", "ack_id": 1, "data": {"text": "test message text"}}',
+    )
+    assert ack['ack_id'] == 1
+    assert ack['status'] == WebSocketAckStatusEnum.SUCCESS
+    assert ack['data']['text'] == 'test message text'
+
+
+@pytest.mark.asyncio
+async def test_invalid_frames(websocket_frames_handler: ChatRoomsWebSocketFramesHandlerABC):
+    ack = await websocket_frames_handler.handle_raw_frame('not a json')
+    assert ack['status'] == WebSocketAckStatusEnum.ERROR
+    ack = await websocket_frames_handler.handle_raw_frame('{"action": "unknown", "ack_id": "a"}')
+    assert ack['ack_id'] == 'a'
+    assert ack['status'] == WebSocketAckStatusEnum.ERROR
+    ack = await websocket_frames_handler.handle_raw_frame('{"action": "send", "ack_id": 2, "data": {}}')
+    assert ack['ack_id'] == 2
+    assert ack['status'] == WebSocketAckStatusEnum.ERROR
+
+
+@pytest.mark.asyncio
+async def test_failed_frame_is_acked_and_session_is_rolled_back(
+    websocket_frames_handler: ChatRoomsWebSocketFramesHandlerABC,
+):
+    ack = await websocket_frames_handler.handle_raw_frame(
+        '{"action": "send", "ack_id": 1, "data": {"text": "reply", "replayed_message_id": 1000000}}',
+    )
+    assert ack['ack_id'] == 1
+    assert ack['status'] == WebSocketAckStatusEnum.ERROR
+    ack = await websocket_frames_handler.handle_raw_frame(
+        '{"action": "send", "ack_id": 2, "data": {"text": "test message text"}}',
+    )
+    assert ack['status'] == WebSocketAckStatusEnum.SUCCESS
+
+
+@pytest.mark.asyncio
+async def test_silent_connection_is_kept_and_overflowed_one_is_reaped():
+    websocket_connection = WebSocketConnection(websocket=None, user=User(), send_queue_max_size=1)
+    chat_rooms_websocket_manager = ChatRoomsWebSocketConnectionManager(
+        websocket_connection,
+        event_receiver=None,
+        connections_registry=WebSocketConnectionsRegistry(),
+    )
+    settings = SimpleNamespace(WEBSOCKET_SEND_QUEUE_CHECK_INTERVAL_SECONDS=0)
+    keep_alive_task = asyncio.create_task(chat_rooms_websocket_manager.keep_alive(settings))
+    await asyncio.sleep(0.01)
+    # clients only receiving the events don't send anything, nothing but the events is sent to them either
+    assert not keep_alive_task.done()
+    assert websocket_connection.send_queue.empty()
+    for _ in range(2):
+        chat_rooms_websocket_manager.enqueue_message('{}')
+    await asyncio.wait_for(keep_alive_task, timeout=1)
+    assert chat_rooms_websocket_manager.close_code == status.WS_1013_TRY_AGAIN_LATER
+
+
+def test_websocket_connections_registry_stats():
+    connections_registry = WebSocketConnectionsRegistry()
+    websocket_connection = WebSocketConnection(websocket=None, user=User())
+    connections_registry.register(websocket_connection)
+    websocket_connection.bytes_sent = 10
+    websocket_connection.send_queue.put_nowait('message')
+    stats = connections_registry.get_stats()
+    assert stats['connections_count'] == 1
+    assert stats['bytes_sent'] == 10
+    assert stats['max_send_queue_size'] == 1
+    connections_registry.unregister(websocket_connection)
+    stats = connections_registry.get_stats()
+    assert stats['connections_count'] == 0
+    assert stats['bytes_sent'] == 10
+
+
+@pytest.mark.asyncio
+async def test_websocket_traffic_is_counted_in_bytes():
+    sent_messages = []
+    websocket = SimpleNamespace(send_text=lambda message: asyncio.sleep(0, sent_messages.append(message)))
+    websocket_connection = WebSocketConnection(websocket=websocket, user=User())
+    chat_rooms_websocket_manager = ChatRoomsWebSocketConnectionManager(
+        websocket_connection,
+        event_receiver=None,
+        connections_registry=WebSocketConnectionsRegistry(),
+    )
+    send_messages_task = asyncio.create_task(chat_rooms_websocket_manager.send_messages())
+    chat_rooms_websocket_manager.enqueue_message('привет')
+    await asyncio.sleep(0.01)
+    send_messages_task.cancel()
+    assert sent_messages == ['привет']
+    assert websocket_connection.bytes_sent == 12
+    assert get_frame_size(b'\x00\x01') == 2
+    assert get_frame_size(None) == 0
+
+
+class BroadcastTestsEventReceiver(EventReceiver):
+    def __init__(self):
+        self.channels = set()
+        self.messages = asyncio.Queue()
+        self.is_closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def listen(self):
+        while self.channels:
+            message = await self.messages.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def close(self):
+        self.is_closed = True
+
+
+@pytest.mark.asyncio
+async def test_broadcast_chat_rooms_fanout():
+    event_receiver = BroadcastTestsEventReceiver()
+    broadcast_fanout = BroadcastChatRoomsFanout(event_receiver_factory=lambda: event_receiver)
+    connection_managers = [
+        ChatRoomsWebSocketConnectionManager(
+            WebSocketConnection(websocket=None, user=User()),
+            event_receiver=None,
+            broadcast_fanout=broadcast_fanout,
+        )
+        for _ in range(2)
+    ]
+    for connection_manager in connection_managers:
+        await broadcast_fanout.subscribe(connection_manager, 1)
+    assert event_receiver.channels == {'chat_room:1'}
+    assert broadcast_fanout.get_recipients_count(1) == 2
+    await event_receiver.messages.put({'type': 'message', 'channel': b'chat_room:1', 'data': b'{"text": "test"}'})
+    await asyncio.sleep(0.01)
+    for connection_manager in connection_managers:
+        assert connection_manager.websocket_connection.send_queue.get_nowait() == '{"text": "test"}'
+    for connection_manager in connection_managers:
+        await broadcast_fanout.unsubscribe(connection_manager)
+    assert not event_receiver.channels
+    assert broadcast_fanout.get_recipients_count(1) == 0
+
+
+@pytest.mark.asyncio
+async def test_broadcast_chat_rooms_fanout_resubscribes_on_failure():
+    event_receivers = [BroadcastTestsEventReceiver(), BroadcastTestsEventReceiver()]
+    broadcast_fanout = BroadcastChatRoomsFanout(
+        event_receiver_factory=iter(event_receivers).__next__,
+        min_resubscribe_delay_seconds=0.01,
+    )
+    connection_manager = ChatRoomsWebSocketConnectionManager(
+        WebSocketConnection(websocket=None, user=User()),
+        event_receiver=None,
+        broadcast_fanout=broadcast_fanout,
+    )
+    await broadcast_fanout.subscribe(connection_manager, 1, 2)
+
+    await event_receivers[0].messages.put(RedisConnectionError('Connection closed by server.'))
+    await asyncio.sleep(0.05)
+    assert event_receivers[0].is_closed
+    assert event_receivers[1].channels == {'chat_room:1', 'chat_room:2'}
+    await event_receivers[1].messages.put({'type': 'message', 'channel': b'chat_room:2', 'data': b'{"text": "test"}'})
+    await asyncio.sleep(0.01)
+    assert connection_manager.websocket_connection.send_queue.get_nowait() == '{"text": "test"}'
+    await broadcast_fanout.unsubscribe(connection_manager)
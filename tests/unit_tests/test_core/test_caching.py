@@ -0,0 +1,171 @@
+import asyncio
+import datetime
+import functools
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from accounts.database.selectors.users import get_users_db_query
+from accounts.models import User, UserFile
+from chat.database.repository.chat_rooms import CachedChatRoomsDatabaseRepository
+from chat.database.selectors.chat_rooms import get_many_chat_rooms_db_query_by_user
+from chat.models import ChatRoom, Message
+from core.database.caching import (
+    CachedSQLAlchemyDatabaseRepository,
+    CacheInvalidatingAsyncSession,
+    dump_query_result,
+    get_cache_key,
+    get_cache_tags,
+    get_tag_key,
+    invalidate_cache_tags,
+    load_query_result,
+)
+from core.database.repository import SQLAlchemyDatabaseRepository
+from core.database.versions import CHANGED_TABLES_SESSION_INFO_KEY, RedisTablesVersions
+from sqlalchemy import inspect, select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def test_cache_key_depends_on_statement_parameters_and_loader_options():
+    assert get_cache_key(get_users_db_query(User(id=1))) == get_cache_key(get_users_db_query(User(id=1)))
+    assert get_cache_key(get_users_db_query(User(id=1))) != get_cache_key(get_users_db_query(User(id=2)))
+    assert get_cache_key(select(User).options(selectinload(User.photos))) != get_cache_key(
+        select(User).options(joinedload(User.photos)),
+    )
+
+
+def test_cache_tags_include_tables_of_joins_and_loaded_relationships():
+    assert get_cache_tags(get_users_db_query(User(id=1))) == {
+        'users',
+        'users_photos',
+        'chat_rooms',
+        'chatroom_members_association',
+    }
+    assert get_cache_tags(get_many_chat_rooms_db_query_by_user(1, ChatRoom.id == 1)) == {
+        'chat_rooms',
+        'chat_rooms_photos',
+        'users',
+        'chatroom_members_association',
+    }
+
+
+def test_query_result_objects_are_rebuilt_from_cached_rows():
+    created_at = datetime.datetime(2022, 5, 1, 12, 30, 15, 500)
+    user = User(id=1, nickname='user', created_at=created_at, photos=[UserFile(id=2, file_path='photo.png')])
+
+    dumped_result = dump_query_result([user])
+    assert orjson.loads(dumped_result)['objects'][0]['columns'] == {
+        'id': 1,
+        'nickname': 'user',
+        'created_at': created_at.isoformat(),
+    }
+    [loaded_user] = load_query_result(
+        dumped_result, {mapper.class_.__name__: mapper for mapper in User.registry.mappers}
+    )
+    assert isinstance(loaded_user, User) and inspect(loaded_user).detached
+    assert (loaded_user.id, loaded_user.nickname, loaded_user.created_at) == (1, 'user', created_at)
+    [loaded_photo] = loaded_user.photos
+    assert isinstance(loaded_photo, UserFile)
+    assert (loaded_photo.id, loaded_photo.file_path) == (2, 'photo.png')
+    assert loaded_photo.user is loaded_user
+    assert 'email' not in inspect(loaded_user).dict
+
+
+def get_cached_users_repository(redis_client, db_session=None) -> CachedSQLAlchemyDatabaseRepository:
+    # the results are loaded by the tests themselves, the session only keeps the uncommitted changes
+    db_session = db_session or SimpleNamespace(sync_session=SimpleNamespace(info={}))
+    return CachedSQLAlchemyDatabaseRepository(User, db_session, redis_client, cache_ttl_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_read_through(redis_client):
+    repository = get_cached_users_repository(redis_client)
+    select_query = get_users_db_query(User(id=1))
+    loaded_results = []
+
+    async def load():
+        loaded_results.append(['user'])
+        return loaded_results[-1]
+
+    assert await repository._get_or_load(select_query, load) == ['user']
+    assert await repository._get_or_load(select_query, load) == ['user']
+    assert len(loaded_results) == 1
+    assert await redis_client.sismember(get_tag_key('users'), get_cache_key(select_query))
+
+    repository._db_session.sync_session.info[CHANGED_TABLES_SESSION_INFO_KEY] = {'messages'}
+    assert await repository._get_or_load(select_query, load) == ['user']
+    assert len(loaded_results) == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_result_is_loaded_by_single_caller(redis_client):
+    select_query = get_users_db_query(User(id=1))
+    loads_count = 0
+
+    async def load():
+        nonlocal loads_count
+        loads_count += 1
+        await asyncio.sleep(0.2)
+        return ['user']
+
+    results = await asyncio.gather(
+        *(get_cached_users_repository(redis_client)._get_or_load(select_query, load) for _ in range(5)),
+    )
+    assert results == [['user']] * 5
+    assert loads_count == 1
+    assert not await redis_client.exists(f'{get_cache_key(select_query)}:lock')
+
+
+@pytest.mark.asyncio
+async def test_result_loaded_before_invalidation_is_not_cached(redis_client):
+    repository = get_cached_users_repository(redis_client)
+    select_query = get_users_db_query(User(id=1))
+
+    async def load():
+        # the users are changed and invalidated while the stale result is being loaded
+        await invalidate_cache_tags(redis_client, {'users'})
+        return ['stale user']
+
+    assert await repository._get_or_load(select_query, load) == ['stale user']
+    assert not await redis_client.exists(get_cache_key(select_query))
+    assert await repository._get_or_load(select_query, functools.partial(asyncio.sleep, 0, ['user'])) == ['user']
+    assert await repository._get_or_load(select_query, functools.partial(asyncio.sleep, 0, [])) == ['user']
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_invalidated_on_commit(redis_client):
+    repository = get_cached_users_repository(redis_client)
+    users_query, chat_rooms_query = get_users_db_query(User(id=1)), select(ChatRoom)
+    for select_query in (users_query, chat_rooms_query):
+        await repository._get_or_load(select_query, functools.partial(asyncio.sleep, 0, ['result']))
+    db_session = CacheInvalidatingAsyncSession()
+    db_session.redis_client, db_session.tables_versions = redis_client, RedisTablesVersions(redis_client)
+
+    db_session.sync_session.info[CHANGED_TABLES_SESSION_INFO_KEY] = {'users_photos'}
+    await db_session.commit()
+    assert not await redis_client.exists(get_cache_key(users_query), get_tag_key('users_photos'))
+    assert await redis_client.exists(get_cache_key(chat_rooms_query))
+    assert await db_session.tables_versions.get_versions('users_photos') == (1,)
+
+
+@pytest.mark.asyncio
+async def test_writes_bypassing_cached_repository_invalidate_cached_results(
+    cache_invalidating_db_session, redis_client
+):
+    db_session = cache_invalidating_db_session
+    db_session.redis_client, db_session.tables_versions = redis_client, RedisTablesVersions(redis_client)
+    chat_room = ChatRoom(name='cached_chat_room')
+    db_session.add(chat_room)
+    await db_session.commit()
+    chat_rooms_repository = CachedChatRoomsDatabaseRepository(db_session, redis_client, cache_ttl_seconds=60)
+    assert await chat_rooms_repository.get_one(ChatRoom.id == chat_room.id) is chat_room
+    cache_key = get_cache_key(select(ChatRoom).where(ChatRoom.id == chat_room.id))
+    assert await redis_client.exists(cache_key)
+
+    # e.g. the last message of the chat room is set by the messages repository
+    messages_repository = SQLAlchemyDatabaseRepository(Message, db_session)
+    await messages_repository.execute(update(ChatRoom).where(ChatRoom.id == chat_room.id).values(description='new'))
+    assert await chat_rooms_repository.get_one(ChatRoom.id == chat_room.id) is chat_room
+    assert await redis_client.exists(cache_key)
+    await messages_repository.commit()
+    assert not await redis_client.exists(cache_key)
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from accounts.models import UserFile
+from chat.api.v1.routers.chat_rooms import get_chat_rooms_inbox_tables
+from chat.models import ChatRoom, Message
+from core.conditional_requests import get_tables_versions_etag, is_not_modified
+from core.database.versions import (
+    CHANGED_TABLES_SCOPES_SESSION_INFO_KEY,
+    RedisTablesVersions,
+    TablesVersionsABC,
+    TablesVersionsTrackingAsyncSession,
+    get_object_tables_scopes,
+    get_table_scope,
+)
+from redis.exceptions import ConnectionError as RedisConnectionError
+from starlette.requests import Request
+
+
+class InMemoryTablesVersions(TablesVersionsABC):
+    def __init__(self):
+        self.versions = {}
+
+    async def get_versions(self, *tables: str) -> tuple[int, ...]:
+        return tuple(self.versions.get(table, 0) for table in tables)
+
+    async def bump(self, *tables: str):
+        for table in tables:
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+
+def get_request(query_string: str = '', if_none_match: str = None) -> Request:
+    headers = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+    return Request(
+        {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/chat_rooms',
+            'query_string': query_string.encode(),
+            'headers': headers,
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_with_tables_versions_and_request():
+    tables_versions = InMemoryTablesVersions()
+    etag = await get_tables_versions_etag(get_request(), tables_versions, ('chat_rooms', 'users'), (1,))
+
+    assert etag.startswith('W/"')
+    assert etag == await get_tables_versions_etag(get_request(), tables_versions, ('chat_rooms', 'users'), (1,))
+    assert etag != await get_tables_versions_etag(get_request(), tables_versions, ('chat_rooms', 'users'), (2,))
+    assert etag != await get_tables_versions_etag(
+        get_request('page=2'),
+        tables_versions,
+        ('chat_rooms', 'users'),
+        (1,),
+    )
+
+    await tables_versions.bump('users')
+    assert etag != await get_tables_versions_etag(get_request(), tables_versions, ('chat_rooms', 'users'), (1,))
+
+
+@pytest.mark.asyncio
+async def test_inbox_etag_changes_only_with_user_chat_rooms():
+    tables_versions = InMemoryTablesVersions()
+    inbox_tables = get_chat_rooms_inbox_tables(1, (1, 2))
+    etag = await get_tables_versions_etag(get_request(), tables_versions, inbox_tables, (1,))
+
+    await tables_versions.bump(get_table_scope('chat_rooms', 3), get_table_scope('users', 2), 'chat_rooms')
+    assert etag == await get_tables_versions_etag(get_request(), tables_versions, inbox_tables, (1,))
+
+    await tables_versions.bump(get_table_scope('chat_rooms', 2))
+    assert etag != await get_tables_versions_etag(get_request(), tables_versions, inbox_tables, (1,))
+
+
+def test_object_tables_scopes():
+    assert get_object_tables_scopes(ChatRoom(id=1)) == {'chat_rooms:1'}
+    assert get_object_tables_scopes(Message(chat_room_id=2)) == {'chat_rooms:2'}
+    assert get_object_tables_scopes(UserFile(user_id=3)) == {'users:3'}
+    assert get_object_tables_scopes(Message()) == set()
+
+
+@pytest.mark.asyncio
+async def test_changed_tables_scopes_are_bumped_on_commit(redis_client):
+    db_session = TablesVersionsTrackingAsyncSession()
+    db_session.tables_versions = RedisTablesVersions(redis_client)
+
+    db_session.sync_session.info[CHANGED_TABLES_SCOPES_SESSION_INFO_KEY] = {'chat_rooms:1'}
+    await db_session.commit()
+    assert await db_session.tables_versions.get_versions('chat_rooms:1', 'chat_rooms:2', 'chat_rooms') == (1, 0, 0)
+    assert CHANGED_TABLES_SCOPES_SESSION_INFO_KEY not in db_session.sync_session.info
+
+
+@pytest.mark.asyncio
+async def test_failed_bump_is_retried():
+    class FailingTablesVersions(InMemoryTablesVersions):
+        failures_count = 2
+
+        async def bump(self, *tables: str):
+            if self.failures_count:
+                self.failures_count -= 1
+                raise RedisConnectionError
+            await super().bump(*tables)
+
+    db_session = TablesVersionsTrackingAsyncSession()
+    db_session.tables_versions = FailingTablesVersions()
+    db_session.bump_retry_delays_seconds = (0, 0, 0)
+
+    db_session.sync_session.info[CHANGED_TABLES_SCOPES_SESSION_INFO_KEY] = {'chat_rooms:1'}
+    await db_session.commit()
+    assert await db_session.tables_versions.get_versions('chat_rooms:1') == (0,)
+    await asyncio.gather(*db_session._bump_retries)
+    assert await db_session.tables_versions.get_versions('chat_rooms:1') == (1,)
+
+
+def test_is_not_modified():
+    etag = 'W/"abc"'
+
+    assert not is_not_modified(get_request(), etag)
+    assert not is_not_modified(get_request(if_none_match='W/"other"'), etag)
+    assert is_not_modified(get_request(if_none_match='W/"abc"'), etag)
+    assert is_not_modified(get_request(if_none_match='"abc"'), etag)
+    assert is_not_modified(get_request(if_none_match='W/"other", W/"abc"'), etag)
+    assert is_not_modified(get_request(if_none_match='*'), etag)
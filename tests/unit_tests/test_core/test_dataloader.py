@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from accounts.models import User
+from core.database.dataloader import DataLoader
+from core.database.queries_statistics import QueriesStatistics, queries_statistics_context
+
+
+@pytest.mark.asyncio
+async def test_data_loader_batches_and_memoizes_lookups(db_session):
+    users = [
+        User(nickname=f'loader_user_{number}', email=f'loader_user_{number}@test.com', password='password')
+        for number in range(3)
+    ]
+    db_session.add_all(users)
+    await db_session.flush()
+    data_loader = DataLoader(db_session)
+    queries_statistics = QueriesStatistics()
+    token = queries_statistics_context.set(queries_statistics)
+    try:
+        loaded_users = await asyncio.gather(
+            data_loader.load(User, users[0].id),
+            data_loader.load(User, users[1].id),
+            data_loader.load(User, users[0].id),
+            data_loader.load(User, -1),
+        )
+        assert queries_statistics.queries_count == 1
+        assert loaded_users == [users[0], users[1], users[0], None]
+
+        assert await data_loader.load_many(User, (users[1].id, users[0].id)) == [users[1], users[0]]
+        assert queries_statistics.queries_count == 1
+
+        data_loader.prime(users[2])
+        assert await data_loader.load(User, users[2].id) is users[2]
+        assert queries_statistics.queries_count == 1
+    finally:
+        queries_statistics_context.reset(token)
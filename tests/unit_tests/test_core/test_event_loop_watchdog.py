@@ -0,0 +1,24 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from core.event_loop_watchdog import EventLoopWatchdog
+
+
+def block_event_loop():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_watchdog_reports_blocking_call(caplog):
+    event_loop_watchdog = EventLoopWatchdog(interval_seconds=0.02, threshold_seconds=0.05)
+    event_loop_watchdog.start()
+    with caplog.at_level(logging.WARNING, logger='core.event_loop_watchdog'):
+        await asyncio.sleep(0.05)
+        block_event_loop()
+        await asyncio.sleep(0.05)
+    await event_loop_watchdog.stop()
+    blocking_calls_records = [record for record in caplog.records if 'Event loop is blocked' in record.message]
+    assert len(blocking_calls_records) == 1
+    assert 'block_event_loop' in blocking_calls_records[0].message
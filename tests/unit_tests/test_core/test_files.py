@@ -0,0 +1,76 @@
+import hashlib
+import io
+import os
+import time
+
+from chat.services.messages import MessageFilesFilesystemService
+from core.dependencies.providers import provide_settings
+from core.services.files import get_batches, get_file_content_hash
+from core.services.images import generate_image_variants, is_resizable_image
+from core.services.orphan_files import OrphanFilesCollector, get_stale_directories
+from core.services.storages import LocalFileStorage, iterate_directory_files
+from PIL import Image
+
+
+def test_blobs_are_addressed_by_content(tmp_path):
+    file_storage = LocalFileStorage(str(tmp_path), 'http://testserver/media')
+    files_service = MessageFilesFilesystemService(db_repository=None, file_storage=file_storage)
+    content = b'meme' * 1024
+    blob_hash, size = get_file_content_hash(io.BytesIO(content))
+    assert blob_hash == hashlib.blake2b(content, digest_size=32).hexdigest()
+    assert size == len(content)
+
+    blob_path = files_service.get_blob_path(blob_hash, 'forwarded meme.PNG')
+    assert blob_path == f'blobs/{blob_hash[:2]}/{blob_hash[2:4]}/{blob_hash}.png'
+    assert files_service.get_blob_path(blob_hash, 'no_extension').endswith(blob_hash)
+
+    file_storage.write_file(blob_path, io.BytesIO(content))
+    file_storage.write_file(blob_path, io.BytesIO(b'not written again'))
+    assert (tmp_path / blob_path).read_bytes() == content
+    assert [path.name for path in (tmp_path / blob_path).parent.iterdir()] == [f'{blob_hash}.png']
+
+
+def test_image_variants(tmp_path):
+    Image.new('RGB', (2000, 1000), color='red').save(tmp_path / 'photo.jpg')
+
+    variants = generate_image_variants(str(tmp_path), 'photo.jpg', {'small': 100, 'large': 500}, quality=80)
+
+    assert variants == {'small': 'photo_small.webp', 'large': 'photo_large.webp'}
+    with Image.open(tmp_path / 'photo_small.webp') as small_variant:
+        assert small_variant.format == 'WEBP'
+        assert small_variant.size == (100, 50)
+    with Image.open(tmp_path / 'photo_large.webp') as large_variant:
+        assert large_variant.size == (500, 250)
+    assert is_resizable_image('photo.JPG')
+    assert not is_resizable_image('video.mp4')
+
+
+def test_orphan_files_scan(tmp_path):
+    settings = provide_settings().copy(update={'MEDIA_PATH': str(tmp_path / 'media')})
+    file_storage = LocalFileStorage(settings.MEDIA_PATH, 'http://testserver/media')
+    files_service = MessageFilesFilesystemService(db_repository=None, settings=settings, file_storage=file_storage)
+    orphan_files_collector = OrphanFilesCollector(files_service, db_repository=None, settings=settings)
+    blob_hash = 'ab' * 32
+    blob_path = files_service.get_blob_path(blob_hash, 'photo.jpg')
+    old_file_paths = (blob_path, f'{os.path.splitext(blob_path)[0]}_small.webp', 'messages_files/old.png')
+    for file_path in (*old_file_paths, 'messages_files/new.png', 'uploads/upload/00000.part'):
+        os.makedirs(tmp_path / 'media' / os.path.dirname(file_path), exist_ok=True)
+        (tmp_path / 'media' / file_path).write_bytes(b'content')
+    week_ago = time.time() - 7 * 24 * 60 * 60
+    for file_path in (*old_file_paths, 'uploads/upload/00000.part', 'uploads/upload'):
+        os.utime(tmp_path / 'media' / file_path, (week_ago, week_ago))
+
+    media_files = iterate_directory_files(
+        settings.MEDIA_PATH,
+        modified_before=time.time() - 24 * 60 * 60,
+        excluded_paths=(str(tmp_path / 'media' / 'uploads'),),
+    )
+
+    assert sorted(media_files) == sorted(old_file_paths)
+    assert [orphan_files_collector.get_blob_hash(file_path) for file_path in old_file_paths] == [blob_hash] * 2 + [None]
+    assert orphan_files_collector.get_blob_hash('blobs/ab/cd/not_a_hash.png') is None
+    assert get_stale_directories(str(tmp_path / 'media' / 'uploads'), time.time() - 60) == [
+        str(tmp_path / 'media' / 'uploads' / 'upload'),
+    ]
+    assert get_stale_directories(str(tmp_path / 'missing'), time.time()) == []
+    assert list(get_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,62 @@
+import pytest
+from core.media import MediaFiles
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+
+@pytest.fixture
+def media_application(tmp_path):
+    (tmp_path / 'video.mp4').write_bytes(bytes(range(100)))
+    media_files = MediaFiles(directory=str(tmp_path), cache_max_age_seconds=60)
+    return Starlette(routes=[Mount('/media', app=media_files)])
+
+
+@pytest.mark.asyncio
+async def test_media_files_range_requests(media_application):
+    async with AsyncClient(app=media_application, base_url='http://test') as client:
+        response = await client.get('/media/video.mp4')
+        assert response.status_code == 200
+        assert response.content == bytes(range(100))
+        assert response.headers['accept-ranges'] == 'bytes'
+        assert response.headers['cache-control'] == 'public, max-age=60, immutable'
+        etag = response.headers['etag']
+
+        response = await client.get('/media/video.mp4', headers={'range': 'bytes=10-19'})
+        assert response.status_code == 206
+        assert response.content == bytes(range(10, 20))
+        assert response.headers['content-range'] == 'bytes 10-19/100'
+
+        response = await client.get('/media/video.mp4', headers={'range': 'bytes=-5'})
+        assert response.status_code == 206
+        assert response.content == bytes(range(95, 100))
+
+        response = await client.get('/media/video.mp4', headers={'range': 'bytes=90-', 'if-range': '"outdated"'})
+        assert response.status_code == 200
+        assert len(response.content) == 100
+
+        response = await client.get('/media/video.mp4', headers={'range': 'bytes=100-'})
+        assert response.status_code == 416
+        assert response.headers['content-range'] == 'bytes */100'
+
+        response = await client.get('/media/video.mp4', headers={'if-none-match': etag})
+        assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_media_files_accel_redirect(tmp_path):
+    (tmp_path / 'photo.jpg').write_bytes(b'photo')
+    media_files = MediaFiles(directory=str(tmp_path), cache_max_age_seconds=60, accel_redirect_location='/protected/')
+    async with AsyncClient(app=Starlette(routes=[Mount('/media', app=media_files)]), base_url='http://test') as client:
+        response = await client.get('/media/photo.jpg')
+    assert response.headers['x-accel-redirect'] == '/protected/photo.jpg'
+    assert response.content == b''
+
+
+@pytest.mark.asyncio
+async def test_media_files_accel_redirect_path_is_quoted(tmp_path):
+    (tmp_path / 'фото 1%.jpg').write_bytes(b'photo')
+    media_files = MediaFiles(directory=str(tmp_path), cache_max_age_seconds=60, accel_redirect_location='/protected/')
+    async with AsyncClient(app=Starlette(routes=[Mount('/media', app=media_files)]), base_url='http://test') as client:
+        response = await client.get('/media/%D1%84%D0%BE%D1%82%D0%BE%201%25.jpg')
+    assert response.headers['x-accel-redirect'] == '/protected/%D1%84%D0%BE%D1%82%D0%BE%201%25.jpg'
@@ -0,0 +1,15 @@
+import pytest
+from core.contrib.redis import REDIS_HOST_URL
+from core.metrics import TasksQueuesLengthCollector
+
+
+@pytest.mark.asyncio
+async def test_tasks_queues_length_is_collected_on_scrape(redis_client):
+    collector = TasksQueuesLengthCollector(REDIS_HOST_URL, ('tasks', 'empty_tasks'))
+    await redis_client.zadd('tasks', {'first_job': 1, 'second_job': 2})
+
+    [tasks_queue_length] = collector.collect()
+    assert [(sample.labels, sample.value) for sample in tasks_queue_length.samples] == [
+        ({'queue': 'tasks'}, 2),
+        ({'queue': 'empty_tasks'}, 0),
+    ]
@@ -0,0 +1,49 @@
+import pytest
+from core.database.queries_statistics import queries_statistics_context
+from core.metrics import HTTP_REQUEST_DURATION_SECONDS
+from core.middlewares import MetricsMiddleware, QueriesStatisticsMiddleware
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_queries_statistics_middleware():
+    application = FastAPI()
+    application.add_middleware(QueriesStatisticsMiddleware, expose_headers=True, duplicated_queries_threshold=2)
+
+    @application.get('/')
+    async def endpoint():
+        queries_statistics = queries_statistics_context.get()
+        queries_statistics.add_query('SELECT users.id FROM users WHERE users.id = %(id_1)s', 0.002)
+        queries_statistics.add_query('SELECT users.id FROM users WHERE users.id = %(id_1)s', 0.001)
+        queries_statistics.add_query('SELECT 1', 0.001)
+        return {}
+
+    async with AsyncClient(app=application, base_url='http://test') as client:
+        response = await client.get('/')
+    assert response.headers['X-DB-Queries-Count'] == '3'
+    assert response.headers['X-DB-Queries-Duration-Ms'] == '4.00'
+    assert response.headers['X-DB-Duplicated-Queries-Count'] == '1'
+    assert queries_statistics_context.get() is None
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware():
+    application = FastAPI()
+    application.add_middleware(MetricsMiddleware)
+
+    @application.get('/items/{item_id}')
+    async def endpoint(item_id: int):
+        return {'id': item_id}
+
+    def get_requests_count(status_code: int) -> float:
+        samples = HTTP_REQUEST_DURATION_SECONDS.labels('GET', '/items/{item_id}', status_code).collect()[0].samples
+        return next(sample.value for sample in samples if sample.name.endswith('_count'))
+
+    ok_requests_count, invalid_requests_count = get_requests_count(200), get_requests_count(422)
+    async with AsyncClient(app=application, base_url='http://test') as client:
+        await client.get('/items/1')
+        await client.get('/items/2')
+        await client.get('/items/invalid')
+    assert get_requests_count(200) == ok_requests_count + 2
+    assert get_requests_count(422) == invalid_requests_count + 1
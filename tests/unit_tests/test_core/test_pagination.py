@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from chat.api.pagination.chat_rooms import ChatRoomsCursorPaginationClass
+from chat.models import ChatRoom
+from core.pagination import CursorPaginationClass, PaginationDatabaseObjectsRetrieverStrategyABC
+from fastapi import HTTPException
+from sqlalchemy import select
+from starlette.requests import Request
+
+
+class InMemoryPaginationDatabaseObjectsRetrieverStrategy(PaginationDatabaseObjectsRetrieverStrategyABC):
+    def __init__(self, db_objects: list):
+        self.db_objects = db_objects
+
+    async def get_many(self, db_query) -> list:
+        return self.db_objects[: db_query._limit_clause.value]
+
+
+def get_request(query_string: str = '') -> Request:
+    return Request(
+        {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/chat_rooms',
+            'query_string': query_string.encode(),
+            'headers': [(b'host', b'testserver')],
+        },
+    )
+
+
+def get_paginator(query_string: str = '', db_objects: list = ()) -> ChatRoomsCursorPaginationClass:
+    return ChatRoomsCursorPaginationClass(
+        get_request(query_string),
+        InMemoryPaginationDatabaseObjectsRetrieverStrategy(list(db_objects)),
+    )
+
+
+@pytest.mark.parametrize(
+    'query_string, page_size',
+    (('', 20), ('page_size=5', 5), ('page_size=0', 1), ('page_size=-5', 1), ('page_size=1000', 100)),
+)
+def test_cursor_pagination_page_size_is_clamped(query_string: str, page_size: int):
+    assert get_paginator(query_string).get_page_size() == page_size
+
+
+@pytest.mark.parametrize('page_size', ('abc', '1.5', ''))
+def test_cursor_pagination_invalid_page_size(page_size: str):
+    with pytest.raises(HTTPException) as exception_info:
+        get_paginator(f'page_size={page_size}').get_page_size()
+    assert exception_info.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    'cursor_values',
+    ([1], [1, 2, 3], ['1', 2], [1.5, 2], [True, 2], [None, 2], [[1], 2], {'id': 1}, 1),
+)
+def test_cursor_pagination_invalid_cursor_values(cursor_values):
+    paginator = get_paginator()
+    with pytest.raises(HTTPException) as exception_info:
+        paginator.decode_cursor(CursorPaginationClass.encode_cursor(cursor_values))
+    assert exception_info.value.status_code == 400
+
+
+@pytest.mark.parametrize('cursor', ('not base64!', 'bm90IGpzb24='))
+def test_cursor_pagination_malformed_cursor(cursor: str):
+    with pytest.raises(HTTPException) as exception_info:
+        get_paginator().decode_cursor(cursor)
+    assert exception_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_next_page_url_points_after_last_object():
+    db_objects = [SimpleNamespace(id=chat_room_id, last_message_id=None) for chat_room_id in (5, 4, 3)]
+    paginator = get_paginator('page_size=2', db_objects)
+
+    page = await paginator.paginate(select(ChatRoom))
+    assert page['data'] == db_objects[:2]
+    assert page['page_size'] == 2
+    next_page_cursor = parse_qs(urlparse(page['next']).query)['cursor'][0]
+    assert paginator.decode_cursor(next_page_cursor) == (0, 4)
+
+    paginator = get_paginator(f'page_size=2&cursor={next_page_cursor}', db_objects[2:])
+    last_page = await paginator.paginate(select(ChatRoom))
+    assert last_page['data'] == db_objects[2:]
+    assert last_page['next'] is None
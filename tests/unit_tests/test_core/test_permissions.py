@@ -0,0 +1,12 @@
+import pytest
+from accounts.models import User
+from core.permissions import UserIsStaffPermission
+from fastapi import HTTPException
+
+
+@pytest.mark.asyncio
+async def test_user_is_staff_permission():
+    await UserIsStaffPermission(User(is_staff=True)).check_permissions()
+    for request_user in (None, User(is_staff=False)):
+        with pytest.raises(HTTPException):
+            await UserIsStaffPermission(request_user).check_permissions()
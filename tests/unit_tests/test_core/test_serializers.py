@@ -0,0 +1,151 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from accounts.api.v1.schemas.users import PaginatedUsersListSchema
+from accounts.models import User, UserFile
+from chat.api.v1.schemas.chat_rooms import PaginatedChatRoomsInboxSchema
+from chat.api.v1.schemas.messages import PaginatedListMessagesSchema
+from chat.database.rows import ChatRoomInboxRow, MessageRow
+from chat.models import ChatRoom, ChatRoomFile, Message, MessageFile
+from core.serializers import serialize
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+
+def get_pydantic_response_body(schema, content) -> bytes:
+    return JSONResponse(jsonable_encoder(schema.parse_obj(content))).body
+
+
+def test_serialize_paginated_messages():
+    now = datetime(2022, 10, 19, 12, 30, 15, 123456)
+    author = User(id=1, nickname='author')
+    messages = [
+        Message(
+            id=1,
+            is_edited=True,
+            text='Привіт "world"\n\t\x01',
+            author=author,
+            replayed_message_id=None,
+            scheduled_at=now,
+            photos=[MessageFile(id=1, file_path='messages/1.png', created_at=now, modified_at=now)],
+        ),
+        Message(id=2, is_edited=False, text='', author=None, replayed_message_id=1, scheduled_at=None, photos=[]),
+    ]
+    page = {
+        'data': messages,
+        'count': 2,
+        'total_pages': 1,
+        'current_page': 1,
+        'page_size': 20,
+        'next': None,
+        'previous': None,
+    }
+    assert ORJSONResponse(serialize(PaginatedListMessagesSchema, page)).body == get_pydantic_response_body(
+        PaginatedListMessagesSchema,
+        page,
+    )
+
+
+def test_serialize_paginated_chat_rooms_inbox():
+    now = datetime(2022, 10, 19, 12, 30, 15)
+    chat_room = ChatRoom(
+        id=1,
+        name='chat room',
+        description=None,
+        created_at=now,
+        modified_at=now,
+        is_broadcast=False,
+        photos=[ChatRoomFile(id=1, file_path='/chat_rooms/1.png', created_at=now, modified_at=now)],
+        last_message=Message(id=1, text='a' * 150, author=User(id=1, nickname='author'), created_at=now),
+    )
+    chat_room.members_count = 3
+    chat_room.unread_messages_count = 2
+    page = {'page_size': 20, 'next': 'http://test/chat_rooms?cursor=abc', 'data': [chat_room]}
+    assert ORJSONResponse(serialize(PaginatedChatRoomsInboxSchema, page)).body == get_pydantic_response_body(
+        PaginatedChatRoomsInboxSchema,
+        page,
+    )
+
+
+def test_serialize_paginated_rows_as_objects():
+    now = datetime(2022, 10, 19, 12, 30, 15)
+    photo = {'id': 1, 'created_at': now.isoformat(), 'modified_at': now.isoformat(), 'file_path': 'files/1.png'}
+    message_row = SimpleNamespace(
+        id=1,
+        is_edited=False,
+        text='text',
+        author_id=1,
+        author_nickname='author',
+        replayed_message_id=None,
+        scheduled_at=None,
+        photos=[photo],
+    )
+    message = Message(
+        id=1,
+        is_edited=False,
+        text='text',
+        author=User(id=1, nickname='author'),
+        replayed_message_id=None,
+        scheduled_at=None,
+        photos=[MessageFile(id=1, file_path='files/1.png', created_at=now, modified_at=now)],
+    )
+    messages_page = {'count': 1, 'total_pages': 1, 'current_page': 1, 'page_size': 20, 'next': None, 'previous': None}
+    assert serialize(PaginatedListMessagesSchema, {**messages_page, 'data': [MessageRow.from_row(message_row)]}) == (
+        serialize(PaginatedListMessagesSchema, {**messages_page, 'data': [message]})
+    )
+
+    chat_room_row = SimpleNamespace(
+        id=1,
+        name='chat room',
+        description='',
+        created_at=now,
+        modified_at=now,
+        members_count=2,
+        is_broadcast=False,
+        last_message_id=None,
+        photos=[photo],
+    )
+    chat_room = ChatRoom(
+        id=1,
+        name='chat room',
+        description='',
+        created_at=now,
+        modified_at=now,
+        is_broadcast=False,
+        photos=[ChatRoomFile(id=1, file_path='files/1.png', created_at=now, modified_at=now)],
+        last_message=None,
+    )
+    chat_room.members_count = 2
+    chat_room.unread_messages_count = 0
+    assert serialize(PaginatedChatRoomsInboxSchema, {'page_size': 20, 'next': None, 'data': [chat_room]}) == (
+        serialize(
+            PaginatedChatRoomsInboxSchema,
+            {'page_size': 20, 'next': None, 'data': [ChatRoomInboxRow.from_row(chat_room_row)]},
+        )
+    )
+
+
+def test_serialize_paginated_users():
+    now = datetime(2022, 10, 19, 12, 30, 15)
+    user = User(
+        id=1,
+        nickname='user',
+        email='user@test.com',
+        description='',
+        is_active=True,
+        photos=[UserFile(id=1, file_path='users/1.png', created_at=now, modified_at=now)],
+        chat_rooms=[ChatRoom(id=1), ChatRoom(id=2)],
+    )
+    page = {
+        'data': [user],
+        'count': 1,
+        'total_pages': 1,
+        'current_page': 1,
+        'page_size': 20,
+        'next': None,
+        'previous': None,
+    }
+    assert ORJSONResponse(serialize(PaginatedUsersListSchema, page)).body == get_pydantic_response_body(
+        PaginatedUsersListSchema,
+        page,
+    )
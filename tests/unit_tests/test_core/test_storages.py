@@ -0,0 +1,106 @@
+import io
+import os
+import time
+import uuid
+
+import httpx
+import pytest
+from botocore.exceptions import ClientError
+from core.dependencies.providers import provide_settings
+from core.services.storages import LocalFileStorage, S3FileStorage
+
+
+async def get_stored_files(file_storage, modified_before: float) -> list[str]:
+    return [
+        file_path async for file_paths in file_storage.iterate_files(modified_before, 2) for file_path in file_paths
+    ]
+
+
+@pytest.mark.asyncio
+async def test_local_file_storage(tmp_path):
+    file_storage = LocalFileStorage(str(tmp_path / 'media'), 'http://testserver/media/')
+    source_path = tmp_path / 'assembled'
+    source_path.write_bytes(b'uploaded by chunks')
+
+    await file_storage.save('blobs/photo.png', io.BytesIO(b'photo'))
+    await file_storage.save('blobs/video.mp4', io.BytesIO(), source_path=str(source_path))
+
+    assert (tmp_path / 'media' / 'blobs' / 'photo.png').read_bytes() == b'photo'
+    assert (tmp_path / 'media' / 'blobs' / 'video.mp4').read_bytes() == b'uploaded by chunks'
+    assert not source_path.exists()
+    assert await file_storage.exists('blobs/video.mp4')
+    assert sorted(await get_stored_files(file_storage, time.time() + 1)) == ['blobs/photo.png', 'blobs/video.mp4']
+    assert await get_stored_files(file_storage, time.time() - 60) == []
+    async with file_storage.local_copy('blobs/photo.png') as directory:
+        assert os.path.join(directory, 'blobs', 'photo.png') == str(tmp_path / 'media' / 'blobs' / 'photo.png')
+    assert file_storage.get_url('blobs/photo.png') == 'http://testserver/media/blobs/photo.png'
+    assert await file_storage.delete(('blobs/photo.png', 'blobs/missing.png')) == 1
+    assert not await file_storage.exists('blobs/photo.png')
+
+
+def test_s3_file_storage_urls_are_stable_within_signing_window(monkeypatch):
+    file_storage = S3FileStorage(
+        'bucket',
+        endpoint_url='http://storage',
+        region_name='us-east-1',
+        access_key_id='access_key_id',
+        secret_access_key='secret_access_key',
+        urls_expire_seconds=60,
+        urls_signing_window_seconds=600,
+    )
+    monkeypatch.setattr(time, 'time', lambda: 6000)
+    url = file_storage.get_url('blobs/photo.png')
+    assert 'X-Amz-Date=19700101T014000Z' in url
+    assert 'X-Amz-Expires=660' in url
+    assert file_storage.get_urls_version() == 10
+
+    monkeypatch.setattr(time, 'time', lambda: 6599)
+    assert file_storage.get_url('blobs/photo.png') == url
+    assert file_storage.get_urls_version() == 10
+
+    monkeypatch.setattr(time, 'time', lambda: 6600)
+    assert file_storage.get_url('blobs/photo.png') != url
+    assert file_storage.get_urls_version() == 11
+
+
+@pytest.mark.asyncio
+async def test_s3_file_storage(tmp_path):
+    settings = provide_settings()
+    file_storage = S3FileStorage(
+        settings.S3_BUCKET_NAME,
+        endpoint_url=settings.S3_ENDPOINT_URL,
+        region_name=settings.S3_REGION_NAME,
+        access_key_id=settings.S3_ACCESS_KEY_ID,
+        secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        multipart_threshold=5 * 1024 * 1024,
+        multipart_chunk_size=5 * 1024 * 1024,
+        multipart_concurrency=2,
+    )
+    client = await file_storage.get_client()
+    try:
+        await client.create_bucket(Bucket=settings.S3_BUCKET_NAME)
+    except ClientError as exception:
+        if exception.response['Error']['Code'] not in {'BucketAlreadyOwnedByYou', 'BucketAlreadyExists'}:
+            raise
+    prefix = uuid.uuid4().hex
+    large_content = os.urandom(12 * 1024 * 1024)
+    try:
+        await file_storage.save(f'{prefix}/photo.png', io.BytesIO(b'photo'))
+        await file_storage.save(f'{prefix}/photo.png', io.BytesIO(b'not written again'))
+        await file_storage.save(f'{prefix}/video.mp4', io.BytesIO(large_content))
+
+        assert await file_storage.exists(f'{prefix}/video.mp4')
+        assert not await file_storage.exists(f'{prefix}/missing.png')
+        async with file_storage.local_copy(f'{prefix}/video.mp4') as directory:
+            with open(os.path.join(directory, prefix, 'video.mp4'), 'rb') as local_copy:
+                assert local_copy.read() == large_content
+        assert not os.path.exists(directory)
+        async with httpx.AsyncClient() as http_client:
+            response = await http_client.get(file_storage.get_url(f'{prefix}/photo.png'))
+        assert response.content == b'photo'
+        assert response.headers['content-type'] == 'image/png'
+        stored_files = await get_stored_files(file_storage, time.time() + 60)
+        assert {f'{prefix}/photo.png', f'{prefix}/video.mp4'} <= set(stored_files)
+    finally:
+        assert await file_storage.delete((f'{prefix}/photo.png', f'{prefix}/video.mp4')) == 2
+        await file_storage.close()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+import pytest
+from core.dependencies.providers import provide_settings
+from core.services.exceptions.uploads import UploadLockedException, UploadSizeExceededException
+from core.services.uploads import ResumableUploadsService, Upload, UploadLock, concatenate_files
+from starlette.requests import ClientDisconnect
+
+
+async def get_chunks(*chunks: bytes, disconnect: bool = False):
+    for chunk in chunks:
+        yield chunk
+    if disconnect:
+        raise ClientDisconnect
+
+
+@pytest.mark.asyncio
+async def test_upload_parts_are_kept_on_disconnect_and_assembled(tmp_path, redis_client):
+    settings = provide_settings().copy(update={'UPLOADS_PATH': str(tmp_path)})
+    uploads_service = ResumableUploadsService(redis_client=redis_client, settings=settings)
+    upload = Upload(id='upload', user_id=1, filename='video.mp4', size=10)
+    os.makedirs(tmp_path / upload.id)
+    lock = UploadLock(key='lock')
+
+    assert await uploads_service._write_part(upload, get_chunks(b'abc', b'd', disconnect=True), lock) == 4
+    upload.offset = uploads_service._get_offset(upload.id)
+    assert upload.offset == 4
+    with pytest.raises(UploadSizeExceededException):
+        await uploads_service._write_part(upload, get_chunks(b'efghijk'), lock)
+    assert uploads_service._get_offset(upload.id) == 4
+    assert await uploads_service._write_part(upload, get_chunks(b'efg', b'hij'), lock) == 6
+
+    assembled_file_path = uploads_service._assemble_parts(upload.id)
+    with open(assembled_file_path, 'rb') as assembled_file:
+        assert assembled_file.read() == b'abcdefghij'
+
+
+@pytest.mark.asyncio
+async def test_upload_is_locked_while_assembled(tmp_path, redis_client):
+    settings = provide_settings().copy(update={'UPLOADS_PATH': str(tmp_path)})
+    uploads_service = ResumableUploadsService(redis_client=redis_client, settings=settings)
+    upload = await uploads_service.create_upload(user_id=1, filename='video.mp4', size=3)
+    await uploads_service.write_chunk(upload, 0, get_chunks(b'abc'))
+
+    async with uploads_service.assemble_upload(upload) as assembled_file:
+        with pytest.raises(UploadLockedException):
+            async with uploads_service.assemble_upload(upload):
+                pass
+        with pytest.raises(UploadLockedException):
+            await uploads_service.write_chunk(upload, 3, get_chunks(b'd'))
+        assert await assembled_file.read() == b'abc'
+    assert not await redis_client.exists(f'{uploads_service._get_key(upload.id)}:lock')
+    assert await uploads_service.get_upload(upload.id) is None
+
+
+@pytest.mark.asyncio
+async def test_upload_lock_is_refreshed_and_released_only_by_its_owner(tmp_path, redis_client):
+    settings = provide_settings().copy(update={'UPLOADS_PATH': str(tmp_path), 'UPLOADS_CHUNK_LOCK_TIMEOUT_SECONDS': 1})
+    uploads_service = ResumableUploadsService(redis_client=redis_client, settings=settings)
+    upload = await uploads_service.create_upload(user_id=1, filename='video.mp4', size=3)
+
+    async with uploads_service._lock_upload(upload) as lock:
+        await asyncio.sleep(1.5)
+        assert await redis_client.get(lock.key) == lock.token.encode()
+        assert not lock.is_lost
+        # as if the lock has expired and has been taken by another request
+        await redis_client.set(lock.key, 'another')
+        await asyncio.sleep(0.5)
+        assert lock.is_lost
+        with pytest.raises(UploadLockedException):
+            await uploads_service._write_part(upload, get_chunks(b'abc'), lock)
+    assert await redis_client.get(lock.key) == b'another'
+    assert os.listdir(tmp_path / upload.id) == []
+
+
+def test_concatenate_files(tmp_path):
+    source_paths = []
+    for index, content in enumerate((b'first' * 100_000, b'', b'second')):
+        source_path = tmp_path / f'{index}.part'
+        source_path.write_bytes(content)
+        source_paths.append(str(source_path))
+
+    concatenate_files(source_paths, str(tmp_path / 'assembled'))
+
+    assert (tmp_path / 'assembled').read_bytes() == b'first' * 100_000 + b'second'